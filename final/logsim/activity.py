@@ -0,0 +1,236 @@
+"""Count the switching activity of every output of the network.
+
+Used in the Logic Simulator project to estimate the dynamic power of a
+circuit, which grows with how often its signals switch, without monitoring
+every output.
+
+Classes
+-------
+Activity - counts toggles, HIGH cycles and glitches of every output.
+"""
+import array
+
+
+class Activity:
+
+    """Count toggles, HIGH cycles and glitches of every output.
+
+    The network calls this class while activity statistics are set, and
+    does not call it at all otherwise. Whenever a device is marked as
+    changed, its outputs are compared to the signals last seen, so every
+    RISING and FALLING edge is counted as it happens. An output with more
+    than one edge while a cycle settles has a glitch. The number of cycles
+    each output has been HIGH is only updated when the output changes, so
+    cycles in which nothing changes cost nothing.
+
+    The counts are kept in integer arrays indexed by the position of each
+    output, which is assigned the first time the output is seen.
+
+    Parameters
+    ----------
+    devices: instance of the devices.Devices() class.
+
+    Public methods
+    --------------
+    reset(self): Clears all counts.
+
+    build_index(self): Assigns positions to the outputs not yet counted.
+
+    sync_levels(self): Takes the current signals as the settled levels,
+                       without counting any edges.
+
+    record_outputs(self, device_id): Counts the edges of the outputs of the
+                                     device.
+
+    end_cycle(self): Counts the glitches and HIGH cycles of the outputs
+                     changed in the cycle just executed.
+
+    update_levels(self, positions, cycle): Updates the HIGH cycles of the
+                                           outputs at the given positions.
+
+    skip_cycles(self, cycles): Records cycles in which no signal changed.
+
+    get_high_cycles(self, position): Returns the number of cycles the output
+                                     has been HIGH for.
+
+    get_statistics(self): Returns the counts of every output.
+
+    get_report(self, count=10): Returns the most active outputs as a list of
+                                lines of text.
+    """
+
+    def __init__(self, devices):
+        """Initialise the counts."""
+        self.devices = devices
+        self.HIGH = devices.HIGH
+        self.RISING = devices.RISING
+        self.FALLING = devices.FALLING
+        self.reset()
+
+    def reset(self):
+        """Clear all counts."""
+        self.cycles = 0  # cycles recorded, executed or skipped
+
+        # outputs lists the (device_id, output_id) output at each position,
+        # and device_outputs stores {device_id: [(position, outputs
+        # dictionary, output_id) for each output]}
+        self.outputs = []
+        self.device_outputs = {}
+        self.edit_count = None
+
+        # Counts of each output, indexed by its position
+        self.rises = array.array("l")
+        self.falls = array.array("l")
+        self.glitches = array.array("l")
+        self.high_cycles = array.array("l")  # before high_start
+
+        # signals stores the signal of each output last seen, high_start the
+        # first cycle of the current HIGH level or 0 if it is LOW, and
+        # cycle_edges the edges counted in this cycle
+        self.signals = array.array("l")
+        self.high_start = array.array("l")
+        self.cycle_edges = array.array("l")
+        self.changed_positions = []  # with edges in this cycle
+
+        self.build_index()
+
+    def build_index(self):
+        """Assign positions to the outputs not yet counted.
+
+        This is called whenever devices or outputs may have been added.
+        """
+        if self.edit_count == self.devices.edit_count:
+            return
+        for device in self.devices.devices_list:
+            device_outputs = self.device_outputs.setdefault(
+                device.device_id, [])
+            if len(device_outputs) == len(device.outputs):
+                continue
+            counted = set(output_id for position, outputs, output_id
+                          in device_outputs)
+            for output_id, signal in device.outputs.items():
+                if output_id in counted:
+                    continue
+                position = len(self.outputs)
+                self.outputs.append((device.device_id, output_id))
+                device_outputs.append((position, device.outputs, output_id))
+                for counts in [self.rises, self.falls, self.glitches,
+                               self.high_cycles, self.cycle_edges]:
+                    counts.append(0)
+                self.signals.append(signal)
+                if signal in [self.HIGH, self.RISING]:
+                    self.high_start.append(self.cycles + 1)
+                else:
+                    self.high_start.append(0)
+        self.edit_count = self.devices.edit_count
+
+    def sync_levels(self):
+        """Take the current signals as the settled levels.
+
+        This is called after a cold start-up, which sets signals without any
+        edges. The levels are taken to start in the next cycle.
+        """
+        self.build_index()
+        for position, (device_id, output_id) in enumerate(self.outputs):
+            device = self.devices.get_device(device_id)
+            self.signals[position] = device.outputs[output_id]
+        self.update_levels(range(len(self.outputs)), self.cycles + 1)
+
+    def record_outputs(self, device_id):
+        """Count the edges of the outputs of the device.
+
+        Only outputs whose signals differ from the last ones seen are
+        counted.
+        """
+        signals = self.signals
+        for position, outputs, output_id in self.device_outputs[device_id]:
+            signal = outputs[output_id]
+            if signal == signals[position]:
+                continue
+            signals[position] = signal
+            if signal == self.RISING:
+                self.rises[position] += 1
+            elif signal == self.FALLING:
+                self.falls[position] += 1
+            else:
+                continue
+            if not self.cycle_edges[position]:
+                self.changed_positions.append(position)
+            self.cycle_edges[position] += 1
+
+    def end_cycle(self):
+        """Count the glitches and HIGH cycles of the changed outputs."""
+        self.cycles += 1
+        for position in self.changed_positions:
+            if self.cycle_edges[position] > 1:
+                self.glitches[position] += 1
+            self.cycle_edges[position] = 0
+        self.update_levels(self.changed_positions, self.cycles)
+        self.changed_positions = []
+
+    def update_levels(self, positions, cycle):
+        """Update the HIGH cycles of the outputs at the given positions.
+
+        cycle is the first cycle the outputs are at their present levels.
+        """
+        high_start = self.high_start
+        for position in positions:
+            high = self.signals[position] in [self.HIGH, self.RISING]
+            if high and not high_start[position]:
+                high_start[position] = cycle
+            elif not high and high_start[position]:
+                self.high_cycles[position] += cycle - high_start[position]
+                high_start[position] = 0
+
+    def skip_cycles(self, cycles):
+        """Record cycles in which no signal changed."""
+        self.cycles += cycles
+
+    def get_high_cycles(self, position):
+        """Return the number of cycles the output has been HIGH for."""
+        high_cycles = self.high_cycles[position]
+        if self.high_start[position]:
+            high_cycles += self.cycles + 1 - self.high_start[position]
+        return high_cycles
+
+    def get_statistics(self):
+        """Return the counts of every output.
+
+        The returned dictionary maps every (device_id, output_id) output to
+        a (rises, falls, HIGH cycles, glitches) tuple.
+        """
+        statistics = {}
+        for position, output in enumerate(self.outputs):
+            statistics[output] = (self.rises[position],
+                                  self.falls[position],
+                                  self.get_high_cycles(position),
+                                  self.glitches[position])
+        return statistics
+
+    def get_report(self, count=10):
+        """Return the most active outputs as a list of lines of text.
+
+        The outputs are ranked by their toggles, and the activity is the
+        number of toggles per cycle.
+        """
+        toggles = [self.rises[position] + self.falls[position]
+                   for position in range(len(self.outputs))]
+        lines = ["".join(["Cycles recorded: ", str(self.cycles),
+                          ", toggles: ", str(sum(toggles)),
+                          ", glitches: ", str(sum(self.glitches))])]
+        lines.append("Most active outputs (toggles, activity, HIGH duty, "
+                     "glitches):")
+        cycles = max(self.cycles, 1)
+        ranked = sorted(range(len(self.outputs)), key=toggles.__getitem__,
+                        reverse=True)
+        for position in ranked[:count]:
+            if not toggles[position]:
+                break
+            signal_name = self.devices.get_signal_name(
+                *self.outputs[position])
+            lines.append("".join([
+                "  ", signal_name, ": ", str(toggles[position]), ", ",
+                format(toggles[position] / cycles, ".3f"), ", ",
+                format(100 * self.get_high_cycles(position) / cycles,
+                       ".1f"), "%, ", str(self.glitches[position])]))
+        return lines
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""Benchmark the simulator on generated circuits of increasing size.
+
+Used in the Logic Simulator project to measure how scanning, parsing,
+building and simulating scale with the number of devices, and to compare
+the results against a stored baseline.
+
+Usage
+-----
+Show help: benchmark.py -h
+Run the suite: benchmark.py [-f <family>] [-s <sizes>] [-c <cycles>]
+               [-r <repeats>] [-o <results file>]
+Compare with a baseline: benchmark.py -b <baseline file> [-t <tolerance>]
+                         <results file>
+
+Classes
+-------
+Benchmark - times the phases of a simulation on generated circuits.
+"""
+import getopt
+import io
+import contextlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+from scanner import Scanner
+from parse import Parser
+from generator import CircuitGenerator
+
+
+class Benchmark:
+
+    """Time the phases of a simulation on generated circuits.
+
+    For each size, a circuit of the given family is generated and written to
+    a temporary definition file. The file is scanned and parsed, the network
+    is built and run for a number of cycles, and the monitored signals are
+    recorded and displayed. Every phase is repeated and its fastest time is
+    kept.
+
+    Parameters
+    ----------
+    family: family of the generated circuits, one of
+            CircuitGenerator.families.
+    cycles: number of simulation cycles run for each size.
+    repeats: number of times each phase is repeated.
+    seed: seed of the generated circuits.
+
+    Public methods
+    --------------
+    get_environment(self): Returns a description of the machine and the code
+                           being benchmarked.
+
+    time_size(self, size): Returns the timings for a circuit of the given
+                           size.
+
+    run(self, sizes): Returns the environment and the timings for circuits of
+                      the given sizes.
+
+    compare(self, baseline, results, tolerance=0.1): Returns the regressions
+                                 of the results against the baseline.
+    """
+
+    def __init__(self, family="dag", cycles=100, repeats=1, seed=0):
+        """Initialise the benchmark options and the measured quantities."""
+        self.family = family
+        self.cycles = cycles
+        self.repeats = repeats
+        self.seed = seed
+
+        # Measured times in seconds, which are better when lower, and rates,
+        # which are better when higher
+        self.times = ["scan_time", "parse_time", "build_time",
+                      "simulate_time", "record_time", "display_time"]
+        self.rates = ["cycles_per_second"]
+
+    def get_environment(self):
+        """Return a description of the machine and the code being timed."""
+        try:
+            commit = subprocess.run(
+                ["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                cwd=os.path.dirname(os.path.abspath(__file__)),
+                check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = None
+        return {"python": platform.python_version(),
+                "implementation": platform.python_implementation(),
+                "platform": platform.platform(),
+                "processor": platform.processor(),
+                "cpu_count": os.cpu_count(),
+                "commit": commit,
+                "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "family": self.family,
+                "cycles": self.cycles,
+                "repeats": self.repeats,
+                "seed": self.seed}
+
+    def time_size(self, size):
+        """Return the timings for a circuit of the given size.
+
+        The returned dictionary holds the family, the size, the number of
+        devices and cycles, the number of cycles which failed or did not
+        settle, and the fastest time of every phase. The rate of cycles is
+        None if any cycle failed, as such cycles are not timed fairly.
+        """
+        definition = CircuitGenerator(self.seed).generate(self.family, size)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "circuit.txt")
+            with open(path, "w") as definition_file:
+                definition_file.write(definition)
+
+            timings = {}
+            failed_cycles = 0
+            for repeat in range(self.repeats):
+                names = Names()
+                start_time = time.perf_counter()
+                scanner = Scanner(path, names)
+                while scanner.get_symbol().type != scanner.EOF:
+                    pass
+                scan_time = time.perf_counter() - start_time
+
+                names = Names()
+                devices = Devices(names)
+                network = Network(names, devices)
+                monitors = Monitors(names, devices, network)
+                parser = Parser(names, devices, network, monitors,
+                                Scanner(path, names))
+                start_time = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    parsed = parser.parse_network()
+                parse_time = time.perf_counter() - start_time
+                if not parsed:
+                    raise ValueError("generated circuit could not be parsed")
+
+                devices.cold_startup()
+                start_time = time.perf_counter()
+                network.prepare_network()
+                build_time = time.perf_counter() - start_time
+
+                simulate_time = 0
+                record_time = 0
+                failed_cycles = 0
+                for cycle in range(self.cycles):
+                    start_time = time.perf_counter()
+                    error_code = network.execute_network()
+                    record_start_time = time.perf_counter()
+                    if error_code != network.NO_ERROR:
+                        failed_cycles += 1
+                    monitors.record_signals()
+                    simulate_time += record_start_time - start_time
+                    record_time += time.perf_counter() - record_start_time
+
+                start_time = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    monitors.display_signals()
+                display_time = time.perf_counter() - start_time
+
+                for name, value in [("scan_time", scan_time),
+                                    ("parse_time", parse_time),
+                                    ("build_time", build_time),
+                                    ("simulate_time", simulate_time),
+                                    ("record_time", record_time),
+                                    ("display_time", display_time)]:
+                    timings[name] = min(timings.get(name, value), value)
+
+        if timings["simulate_time"] > 0 and not failed_cycles:
+            cycles_per_second = self.cycles / timings["simulate_time"]
+        else:
+            cycles_per_second = None
+        timings.update({"family": self.family, "size": size,
+                        "devices": len(devices.devices_list),
+                        "cycles": self.cycles,
+                        "failed_cycles": failed_cycles,
+                        "cycles_per_second": cycles_per_second})
+        return timings
+
+    def run(self, sizes):
+        """Return the environment and the timings for the given sizes."""
+        return {"environment": self.get_environment(),
+                "results": [self.time_size(size) for size in sizes]}
+
+    def compare(self, baseline, results, tolerance=0.1):
+        """Return the regressions of the results against the baseline.
+
+        baseline and results are dictionaries returned by run(). A time is a
+        regression if it is more than tolerance times slower than in the
+        baseline, and a rate if it is more than tolerance times lower. A
+        result with failed cycles is a regression, and is not compared
+        further, nor is a result whose baseline had failed cycles. Every
+        regression is described by a line of text.
+        """
+        baseline_results = {}
+        for result in baseline["results"]:
+            baseline_results[(result["family"], result["size"])] = result
+
+        regressions = []
+        for result in results["results"]:
+            key = (result["family"], result["size"])
+            if result.get("failed_cycles"):
+                regressions.append("".join([
+                    result["family"], " ", str(result["size"]), ": ",
+                    str(result["failed_cycles"]), " of ",
+                    str(result["cycles"]), " cycles failed"]))
+                continue
+            if key not in baseline_results or \
+                    baseline_results[key].get("failed_cycles"):
+                continue
+            baseline_result = baseline_results[key]
+            for name in self.times + self.rates:
+                old_value = baseline_result.get(name)
+                new_value = result.get(name)
+                if not old_value or new_value is None:
+                    continue
+                if name in self.times:
+                    change = new_value / old_value - 1
+                else:
+                    change = old_value / new_value - 1
+                if change > tolerance:
+                    regressions.append("".join([
+                        result["family"], " ", str(result["size"]), " ",
+                        name, ": ", format(old_value, ".4g"), " -> ",
+                        format(new_value, ".4g"), " (",
+                        format(change * 100, ".0f"), "% worse)"]))
+        return regressions
+
+
+def main(arg_list):
+    """Parse the command line options and arguments specified in arg_list.
+
+    Run the benchmark suite and write its results, or compare results with
+    a baseline and exit with status 1 if there are regressions.
+    """
+    usage_message = ("Usage:\n"
+                     "Show help: benchmark.py -h\n"
+                     "Run the suite: benchmark.py [-f <family>] "
+                     "[-s <sizes>] [-c <cycles>] [-r <repeats>] "
+                     "[-o <results file>]\n"
+                     "Compare with a baseline: benchmark.py "
+                     "-b <baseline file> [-t <tolerance>] <results file>\n"
+                     "Sizes are separated by commas, such as 100,1000")
+    try:
+        options, arguments = getopt.getopt(arg_list, "hf:s:c:r:o:b:t:")
+    except getopt.GetoptError:
+        print("Error: invalid command line arguments\n")
+        print(usage_message)
+        sys.exit()
+
+    family = "dag"
+    sizes = [100, 1000, 10000]
+    cycles = 100
+    repeats = 1
+    path = "benchmark.json"
+    baseline_path = None
+    tolerance = 0.1
+    try:
+        for option, value in options:
+            if option == "-h":  # print the usage message
+                print(usage_message)
+                sys.exit()
+            elif option == "-f":
+                family = value
+            elif option == "-s":
+                sizes = [int(size) for size in value.split(",")]
+            elif option == "-c":
+                cycles = int(value)
+            elif option == "-r":
+                repeats = int(value)
+            elif option == "-o":
+                path = value
+            elif option == "-b":
+                baseline_path = value
+            elif option == "-t":
+                tolerance = float(value)
+    except ValueError:
+        print("Error: invalid number\n")
+        print(usage_message)
+        sys.exit()
+
+    benchmark = Benchmark(family, cycles, repeats)
+    if baseline_path is not None:
+        if len(arguments) != 1:
+            print("Error: one results file required\n")
+            print(usage_message)
+            sys.exit()
+        with open(baseline_path) as baseline_file:
+            baseline = json.load(baseline_file)
+        with open(arguments[0]) as results_file:
+            results = json.load(results_file)
+        regressions = benchmark.compare(baseline, results, tolerance)
+        for regression in regressions:
+            print(regression)
+        if regressions:
+            sys.exit(1)
+        print("No regressions.")
+        return
+
+    if family not in CircuitGenerator().families:
+        print("Error: unknown family\n")
+        print(usage_message)
+        sys.exit()
+    results = benchmark.run(sizes)
+    for result in results["results"]:
+        if result["failed_cycles"]:
+            rate = "".join([str(result["failed_cycles"]), " of ",
+                            str(result["cycles"]), " cycles failed"])
+        else:
+            rate = format(result["cycles_per_second"] or 0, ".1f") + \
+                " cycles/s"
+        print("".join([result["family"], " ", str(result["size"]), ": ",
+                       str(result["devices"]), " devices, ", rate,
+                       ", parse ",
+                       format(result["parse_time"] * 1000, ".1f"), " ms"]))
+    with open(path, "w") as results_file:
+        json.dump(results, results_file, indent=2)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,359 @@
+"""Compile the devices of a circuit into bit-parallel Python code.
+
+Used in the Logic Simulator project to simulate many copies of a circuit at
+once. Each signal is held in a Python integer whose bits, or lanes, hold the
+signal in each copy, so one bitwise operation evaluates a gate in all of
+them. The copies may differ in their switches, their state or the faults
+injected into them.
+
+Classes
+-------
+CompiledCircuit - compiles the devices into code evaluated on lanes.
+"""
+from stimulus import Stimulus
+
+
+class CompiledCircuit:
+
+    """Compile the devices into code evaluated on lanes.
+
+    Every output gets a local variable in the generated code, named s
+    followed by its index, as does the memory (m) and the CLK input level
+    at the end of the last cycle (c) of each D-type, and the last level (l)
+    of each source read by a D-type. The gates are evaluated in
+    topological order, repeatedly until no signal changes.
+
+    The network executes the D-types first in each cycle, in the order of
+    the devices and before the gates have seen the new source levels, so a
+    D-type whose CLK input rises samples the last levels of the gates and
+    sources but the new level of a D-type executed before it. The D-types
+    are first evaluated once in that order to match. The network only
+    sees the rising edges of sources, so a D-type whose CLK, SET or CLEAR
+    input comes through gates or from another D-type may take a different
+    level there.
+
+    The levels of the switches, clocks, RC and SIGGEN devices, the sources,
+    are given to the code in each cycle.
+
+    Parameters
+    ----------
+    names: instance of the names.Names() class.
+    devices: instance of the devices.Devices() class.
+    network: instance of the network.Network() class.
+    monitors: instance of the monitors.Monitors() class.
+
+    Public methods
+    --------------
+    build_circuit(self): Indexes the signals and orders the devices.
+
+    get_source_levels(self, cycles, stimulus_path=None): Returns the levels
+                               of the sources in every cycle.
+
+    get_state_names(self): Returns the variables holding the signals,
+                           memories and CLK inputs.
+
+    get_cycle_lines(self, indent, unsettled, force=None): Returns the lines
+                               of code simulating one cycle.
+
+    compile_cycle(self): Returns the function simulating one cycle in every
+                         lane.
+
+    get_initial_state(self, full): Returns the present state of the devices,
+                                   spread across the given lanes.
+    """
+
+    def __init__(self, names, devices, network, monitors):
+        """Initialise the compiled circuit."""
+        self.names = names
+        self.devices = devices
+        self.network = network
+        self.monitors = monitors
+
+        # Set by build_circuit(): signal_index stores {(device_id,
+        # output_id): index of its variable}, sources lists the outputs of
+        # the sources, gates the gate IDs in topological order, loop_gates
+        # the gates on or after loops, which close the order, d_types the
+        # D-type IDs and observed the indices of the monitored outputs
+        self.signal_index = {}
+        self.sources = []
+        self.gates = []
+        self.loop_gates = []
+        self.d_types = []
+        self.observed = []
+
+    def build_circuit(self):
+        """Index the signals and order the devices.
+
+        The gates are ordered so that each one follows the gates driving
+        it, except around loops. Return network.NO_ERROR, or
+        network.INPUTS_NOT_CONNECTED if an input is unconnected.
+        """
+        self.signal_index = {}
+        for device in self.devices.devices_list:
+            for output_id in device.outputs:
+                self.signal_index[(device.device_id, output_id)] = \
+                    len(self.signal_index)
+            if None in device.inputs.values():
+                return self.network.INPUTS_NOT_CONNECTED
+
+        self.observed = [self.signal_index[monitor] for monitor in
+                         self.monitors.monitors_dictionary]
+        source_kinds = [self.devices.SWITCH, self.devices.CLOCK,
+                        self.devices.RC, self.devices.SIGGEN]
+        self.sources = [(device.device_id, None)
+                        for device in self.devices.devices_list
+                        if device.device_kind in source_kinds]
+        self.d_types = [device.device_id
+                        for device in self.devices.devices_list
+                        if device.device_kind == self.devices.D_TYPE]
+
+        # Order the gates topologically, leaving the gates of loops in the
+        # order of the devices
+        gates = [device for device in self.devices.devices_list
+                 if device.device_kind in self.devices.gate_types]
+        gate_ids = set(device.device_id for device in gates)
+        waiting = {}  # {gate ID: number of inputs from unordered gates}
+        dependents = {}
+        for device in gates:
+            waiting[device.device_id] = 0
+            for connected_output in device.inputs.values():
+                if connected_output[0] in gate_ids:
+                    waiting[device.device_id] += 1
+                    dependents.setdefault(connected_output[0], []).append(
+                        device.device_id)
+        ready = [device.device_id for device in gates
+                 if not waiting[device.device_id]]
+        self.gates = []
+        while ready:
+            device_id = ready.pop()
+            self.gates.append(device_id)
+            for dependent in dependents.get(device_id, []):
+                waiting[dependent] -= 1
+                if not waiting[dependent]:
+                    ready.append(dependent)
+        ordered = set(self.gates)
+        self.loop_gates = [device.device_id for device in gates
+                           if device.device_id not in ordered]
+        self.gates.extend(self.loop_gates)
+        return self.network.NO_ERROR
+
+    def get_source_levels(self, cycles, stimulus_path=None):
+        """Return the levels of the sources in every cycle.
+
+        The returned list holds a tuple of the levels, 0 or 1, of the
+        devices in self.sources for every cycle. The devices are simulated
+        on a fork, so their state is left unchanged, and the switch events
+        of the stimulus file at stimulus_path are counted from this state.
+        Return the error code of the stimulus instead if it has an invalid
+        line.
+        """
+        devices = self.devices.fork()
+        network = self.network.fork(devices)
+        network.dirty_devices = None
+        network.scheduler.sync_counters()
+        stimulus = None
+        if stimulus_path is not None:
+            stimulus = Stimulus(self.names, devices, stimulus_path)
+
+        source_devices = [devices.get_device(device_id)
+                          for device_id, output_id in self.sources]
+        source_levels = []
+        for cycle in range(cycles):
+            if stimulus is not None:
+                error_code = stimulus.apply_events(cycle)
+                if error_code != stimulus.NO_ERROR:
+                    stimulus.close()
+                    return error_code
+            levels = []
+            for device in source_devices:
+                if device.device_kind == devices.SWITCH:
+                    levels.append(int(device.switch_state == devices.HIGH))
+                else:
+                    network.update_source(device)
+                    network.execute_clock(device.device_id)
+                    levels.append(int(device.outputs[None] == devices.HIGH))
+            source_levels.append(tuple(levels))
+        if stimulus is not None:
+            stimulus.close()
+        return source_levels
+
+    def get_state_names(self):
+        """Return the variables holding the signals, memories and CLK inputs.
+
+        Each is returned as a string listing the variables, each followed
+        by a comma, to unpack and pack the state with.
+        """
+        signals = "".join("s" + str(index) + ", "
+                          for index in range(len(self.signal_index)))
+        memories = "".join("m" + str(number) + ", "
+                           for number in range(len(self.d_types)))
+        clocks = "".join("c" + str(number) + ", "
+                         for number in range(len(self.d_types)))
+        return signals, memories, clocks
+
+    def get_cycle_lines(self, indent, unsettled, force=None):
+        """Return the lines of code simulating one cycle.
+
+        The code reads the levels of the sources from the sequence levels
+        and M, which has every lane set. The lines in unsettled are run,
+        with the lanes still changing in changed, if the circuit does not
+        settle. force(expression, port) returns the expression for the
+        level at an input or output port, and may be given to inject
+        faults.
+        """
+        devices = self.devices
+        if force is None:
+            def force(expression, port):
+                """Return the expression unchanged."""
+                return expression
+
+        def read(device_id, input_id):
+            """Return the expression for the level at the input."""
+            connected_output = devices.get_device(device_id).inputs[input_id]
+            variable = "s" + str(self.signal_index[connected_output])
+            return force(variable, (device_id, input_id))
+
+        def write(lines, device_id, output_id, expression):
+            """Add the lines setting the output to the expression."""
+            variable = "s" + str(self.signal_index[(device_id, output_id)])
+            lines.append(inner + "n = " + force(expression,
+                                                (device_id, output_id)))
+            lines.append(inner + "changed |= n ^ " + variable)
+            lines.append(inner + variable + " = n")
+
+        def read_first(device_id, input_id):
+            """Return the expression for the input in the first D-type pass.
+
+            A source moving to a new level is seen at its last level on the
+            DATA input, and as LOW on the SET and CLEAR inputs.
+            """
+            connected_output = devices.get_device(device_id).inputs[input_id]
+            if connected_output not in last_sources:
+                return read(device_id, input_id)
+            index = str(self.signal_index[connected_output])
+            last_level = force("l" + index, (device_id, input_id))
+            if input_id == devices.DATA_ID:
+                return last_level
+            return "(" + last_level + " & " + read(device_id, input_id) + ")"
+
+        inner = indent + "    "
+        lines = []
+        for number, device_id in enumerate(self.d_types):
+            lines.append(indent + "d" + str(number) + " = " +
+                         read(device_id, devices.DATA_ID))
+        last_sources = set()
+        for device_id in self.d_types:
+            inputs = devices.get_device(device_id).inputs
+            last_sources.update(inputs[input_id] for input_id in
+                                [devices.DATA_ID, devices.SET_ID,
+                                 devices.CLEAR_ID])
+        last_sources.intersection_update(self.sources)
+        for connected_output in self.sources:
+            if connected_output in last_sources:
+                index = str(self.signal_index[connected_output])
+                lines.append(indent + "l" + index + " = s" + index)
+        for number, (device_id, output_id) in enumerate(self.sources):
+            lines.append("".join([
+                indent, "s", str(self.signal_index[(device_id, output_id)]),
+                " = ", force("levels[" + str(number) + "]",
+                             (device_id, output_id))]))
+
+        # Evaluate the D-types once in the order the network executes them
+        for number, device_id in enumerate(self.d_types):
+            memory = "m" + str(number)
+            clock = "c" + str(number)
+            lines.append("".join([
+                indent, "e = ", read(device_id, devices.CLK_ID),
+                " & (", clock, " ^ M)"]))
+            lines.append(indent + clock + " = " +
+                         read(device_id, devices.CLK_ID))
+            lines.append("".join([
+                indent, memory, " = (", memory, " & (e ^ M) | ",
+                read_first(device_id, devices.DATA_ID), " & e | ",
+                read_first(device_id, devices.SET_ID), ") & (",
+                read_first(device_id, devices.CLEAR_ID), " ^ M)"]))
+            for output_id, expression in [(devices.Q_ID, memory),
+                                          (devices.QBAR_ID, memory + " ^ M")]:
+                lines.append("".join([
+                    indent, "s", str(self.signal_index[(device_id,
+                                                        output_id)]),
+                    " = ", force(expression, (device_id, output_id))]))
+
+        lines.append(indent + "for iteration in range(" +
+                     str(self.network.iteration_limit) + "):")
+        lines.append(inner + "changed = 0")
+        operators = {devices.AND: " & ", devices.NAND: " & ",
+                     devices.OR: " | ", devices.NOR: " | ",
+                     devices.XOR: " ^ "}
+        for device_id in self.gates:
+            device = devices.get_device(device_id)
+            expression = operators[device.device_kind].join(
+                read(device_id, input_id) for input_id in device.inputs)
+            if device.device_kind in [devices.NAND, devices.NOR]:
+                expression = "(" + expression + ") ^ M"
+            write(lines, device_id, None, expression)
+        for number, device_id in enumerate(self.d_types):
+            memory = "m" + str(number)
+            lines.append("".join([
+                inner, "e = ", read(device_id, devices.CLK_ID),
+                " & (c", str(number), " ^ M)"]))
+            lines.append("".join([
+                inner, memory, " = (", memory, " & (e ^ M) | d",
+                str(number), " & e | ", read(device_id, devices.SET_ID),
+                ") & (", read(device_id, devices.CLEAR_ID), " ^ M)"]))
+            write(lines, device_id, devices.Q_ID, memory)
+            write(lines, device_id, devices.QBAR_ID, memory + " ^ M")
+        lines.extend([inner + "if not changed:",
+                      inner + "    break",
+                      indent + "else:"])
+        lines.extend(inner + line for line in unsettled)
+        for number, device_id in enumerate(self.d_types):
+            lines.append(indent + "c" + str(number) + " = " +
+                         read(device_id, devices.CLK_ID))
+        return lines
+
+    def compile_cycle(self):
+        """Return the function simulating one cycle in every lane.
+
+        The function is called as function(state, levels), where state is
+        returned by get_initial_state() and levels holds the lanes of each
+        source, and returns the new state and the lanes which did not
+        settle.
+        """
+        signals, memories, clocks = self.get_state_names()
+        lines = ["def run_cycle(state, levels):",
+                 "    (" + signals + ") = state[0]",
+                 "    (" + memories + ") = state[1]",
+                 "    (" + clocks + ") = state[2]",
+                 "    M = state[3]",
+                 "    oscillating = 0"]
+        lines.extend(self.get_cycle_lines("    ",
+                                          ["oscillating = changed"]))
+        lines.extend(["    state = ((" + signals + "), (" + memories +
+                      "), (" + clocks + "), M)",
+                      "    return state, oscillating"])
+        namespace = {}
+        exec("\n".join(lines), namespace)
+        return namespace["run_cycle"]
+
+    def get_initial_state(self, full):
+        """Return the present state of the devices, spread across the lanes.
+
+        The state holds the values of the signals, the D-type memories and
+        the CLK inputs of the D-types, with every lane set in full for a
+        HIGH level, and full itself.
+        """
+        high = [self.devices.HIGH, self.devices.RISING]
+        signals = [0] * len(self.signal_index)
+        for (device_id, output_id), index in self.signal_index.items():
+            signal = self.devices.get_device(device_id).outputs[output_id]
+            if signal in high:
+                signals[index] = full
+        memories = []
+        clocks = []
+        for device_id in self.d_types:
+            device = self.devices.get_device(device_id)
+            memories.append(full if device.dtype_memory in high else 0)
+            clocks.append(signals[self.signal_index[
+                device.inputs[self.devices.CLK_ID]]])
+        return (tuple(signals), tuple(memories), tuple(clocks), full)
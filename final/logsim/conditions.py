@@ -0,0 +1,168 @@
+"""Compile conditions on signal levels into fast checks.
+
+Used in the Logic Simulator project to find the cycles at which signals
+meet a condition, such as the trigger of a capture or a breakpoint. A
+condition is a list of terms joined by "and" and "or", where "and" binds
+more tightly. Each term is one of:
+
+    <signal> high      the signal is HIGH
+    <signal> low       the signal is LOW
+    <signal> rises     the signal has changed to HIGH in this cycle
+    <signal> falls     the signal has changed to LOW in this cycle
+    <signal> changes   the signal has changed in this cycle
+    cycle <N>          N cycles have been completed
+
+for example "CLK rises and D1.Q high or cycle 100".
+
+Classes
+-------
+Condition - parses a condition and compiles it into a function.
+"""
+
+
+class Condition:
+
+    """Parse a condition and compile it into a function.
+
+    The expression is parsed when the condition is made, and error_code is
+    set to NO_ERROR if it is valid. The compiled function takes the
+    previous and current signal levels, as tuples ordered like the signals
+    given to compile(), and the number of cycles completed, and returns
+    whether the condition is met. It is evaluated by Python without
+    interpreting the expression again.
+
+    Parameters
+    ----------
+    names: instance of the names.Names() class.
+    devices: instance of the devices.Devices() class.
+    expression: text of the condition.
+
+    Public methods
+    --------------
+    parse_expression(self): Parses the expression into terms.
+
+    read_signal(self, signal_name): Returns the device and output IDs of
+                                    the signal name.
+
+    compile(self, signals): Returns the function checking the condition.
+    """
+
+    def __init__(self, names, devices, expression):
+        """Parse the expression of the condition."""
+        self.names = names
+        self.devices = devices
+        self.expression = expression
+
+        [self.NO_ERROR, self.BAD_CONDITION,
+         self.BAD_SIGNAL] = self.names.unique_error_codes(3)
+        self.levels = ["high", "low", "rises", "falls", "changes"]
+
+        # terms stores a list of (level, signal) or ("cycle", number) terms
+        # for every group of terms joined by "and", and the groups are
+        # joined by "or". signals lists the (device_id, output_id) signals
+        # in the terms, and cycles the numbers of the cycle terms.
+        self.terms = []
+        self.signals = []
+        self.cycles = []
+        self.error_code = self.parse_expression()
+
+    def parse_expression(self):
+        """Parse the expression into terms.
+
+        Return NO_ERROR if successful, BAD_SIGNAL if a name is not an
+        output, or BAD_CONDITION if the expression is invalid otherwise.
+        """
+        words = self.expression.split()
+        if not words:
+            return self.BAD_CONDITION
+        group = []
+        self.terms.append(group)
+        position = 0
+        while True:
+            if position + 1 >= len(words):
+                return self.BAD_CONDITION
+            if words[position] == "cycle":
+                if not words[position + 1].isdigit():
+                    return self.BAD_CONDITION
+                cycle = int(words[position + 1])
+                group.append(("cycle", cycle))
+                self.cycles.append(cycle)
+            else:
+                signal = self.read_signal(words[position])
+                if signal is None:
+                    return self.BAD_SIGNAL
+                if words[position + 1] not in self.levels:
+                    return self.BAD_CONDITION
+                group.append((words[position + 1], signal))
+                if signal not in self.signals:
+                    self.signals.append(signal)
+            position += 2
+
+            if position == len(words):
+                return self.NO_ERROR
+            elif words[position] == "or":
+                group = []
+                self.terms.append(group)
+            elif words[position] != "and":
+                return self.BAD_CONDITION
+            position += 1
+
+    def read_signal(self, signal_name):
+        """Return the device and output IDs of the signal name.
+
+        Return None if the name is not an output of a device.
+        """
+        name_strings = signal_name.split(".")
+        if len(name_strings) > 2:
+            return None
+        device_id = self.names.query(name_strings[0])
+        if len(name_strings) == 2:
+            output_id = self.names.query(name_strings[1])
+            if output_id is None:
+                return None
+        else:
+            output_id = None
+        device = self.devices.get_device(device_id)
+        if device is None or output_id not in device.outputs:
+            return None
+        return (device_id, output_id)
+
+    def compile(self, signals):
+        """Return the function checking the condition.
+
+        signals is a list of (device_id, output_id) tuples containing every
+        signal of the condition, in the order of the signal levels passed to
+        the function. The function is called as function(previous, current,
+        cycle).
+        """
+        positions = {}
+        for position, signal in enumerate(signals):
+            positions.setdefault(signal, position)
+        HIGH = str(self.devices.HIGH)
+        LOW = str(self.devices.LOW)
+
+        groups = []
+        for group in self.terms:
+            sources = []
+            for level, argument in group:
+                if level == "cycle":
+                    sources.append("".join(["n == ", str(argument)]))
+                    continue
+                current = "".join(["c[", str(positions[argument]), "]"])
+                previous = "".join(["p[", str(positions[argument]), "]"])
+                if level == "high":
+                    sources.append(" ".join([current, "==", HIGH]))
+                elif level == "low":
+                    sources.append(" ".join([current, "==", LOW]))
+                elif level == "rises":
+                    sources.append(" ".join([current, "==", HIGH, "and",
+                                             previous, "!=", HIGH]))
+                elif level == "falls":
+                    sources.append(" ".join([current, "==", LOW, "and",
+                                             previous, "!=", LOW]))
+                else:
+                    sources.append(" ".join([current, "!=", previous]))
+            groups.append(" and ".join(sources))
+        source = "lambda p, c, n: " + " or ".join(
+            "".join(["(", group, ")"]) for group in groups)
+        return eval(source, {})
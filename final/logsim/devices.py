@@ -8,6 +8,7 @@ Classes
 Device - stores device properties.
 Devices - makes and stores all the devices in the logic network.
 """
+import copy
 import random
 import re
 
@@ -96,8 +97,16 @@ class Devices:
 
     cold_startup(self): Simulates cold start-up of D-types and clocks.
 
+    reset_startup(self): Starts D-types and clocks from a fixed reset state.
+
     make_device(self, device_id, device_kind, device_property=None): Creates
                        the specified device and returns errors if unsuccessful.
+
+    fork(self): Returns a branch of the devices that shares their structure.
+
+    get_state(self): Returns the simulation state of all devices.
+
+    set_state(self, state): Restores a state returned by get_state.
     """
 
     def __init__(self, names):
@@ -106,6 +115,8 @@ class Devices:
         self.names = names
 
         self.devices_list = []
+        # device_index stores {device_id: device} for fast look-up
+        self.device_index = {}
 
         gate_strings = ["AND", "OR", "NAND", "NOR", "XOR"]
         device_strings = ["CLOCK", "SWITCH", "DTYPE", "RC", "SIGGEN"]
@@ -130,12 +141,17 @@ class Devices:
 
         self.max_gate_inputs = 16
 
+        # Incremented whenever a device or port is added, so that structures
+        # cached by the network can be rebuilt
+        self.edit_count = 0
+
+        # Set of devices whose state has been changed since the network last
+        # executed, or None if every device must be executed again
+        self.changed_devices = None
+
     def get_device(self, device_id):
         """Return the Device object corresponding to device_id."""
-        for device in self.devices_list:
-            if device.device_id == device_id:
-                return device
-        return None
+        return self.device_index.get(device_id)
 
     def find_devices(self, device_kind=None):
         """Return a list of device IDs of the specified device_kind.
@@ -156,6 +172,8 @@ class Devices:
         new_device = Device(device_id)
         new_device.device_kind = device_kind
         self.devices_list.append(new_device)
+        self.device_index.setdefault(device_id, new_device)
+        self.edit_count += 1
 
     def add_input(self, device_id, input_id):
         """Add the specified input to the specified device.
@@ -165,6 +183,7 @@ class Devices:
         device = self.get_device(device_id)
         if device is not None:
             device.inputs.setdefault(input_id)
+            self.edit_count += 1
             return True
         else:
             return False
@@ -226,6 +245,8 @@ class Devices:
             return False
         else:
             device.switch_state = signal
+            if self.changed_devices is not None:
+                self.changed_devices.add(device_id)
             return True
 
     def make_switch(self, device_id, initial_state):
@@ -285,6 +306,7 @@ class Devices:
         Set the memory of the D-types to a random state and make the clocks
         begin from a random point in their cycles.
         """
+        self.changed_devices = None
         for device in self.devices_list:
             if device.device_kind == self.D_TYPE:
                 device.dtype_memory = random.choice([self.LOW, self.HIGH])
@@ -306,6 +328,22 @@ class Devices:
                                 signal=clock_signal)
                 device.clock_counter = 0
 
+    def reset_startup(self):
+        """Start D-types and clocks from a fixed reset state.
+
+        Unlike cold_startup, this sets the memory of the D-types to LOW and
+        makes the clocks begin LOW at the start of their cycles, so that
+        circuits can be compared from the same state.
+        """
+        self.cold_startup()
+        for device in self.devices_list:
+            if device.device_kind == self.D_TYPE:
+                device.dtype_memory = self.LOW
+            elif device.device_kind == self.CLOCK:
+                self.add_output(device.device_id, output_id=None,
+                                signal=self.LOW)
+                device.clock_counter = 0
+
     def make_device(self, device_id, device_kind, device_property=None):
         """Create the specified device.
 
@@ -385,3 +423,52 @@ class Devices:
             error_type = self.BAD_DEVICE
 
         return error_type
+
+    def fork(self):
+        """Return a branch of the devices that shares their structure.
+
+        The names, the device connectivity and the SIGGEN sequences are shared
+        with the branch, while the simulation state of every device is copied
+        so that the two can be simulated independently. Connections must not
+        be changed on either of them after forking.
+        """
+        forked_devices = copy.copy(self)
+        forked_devices.devices_list = []
+        forked_devices.device_index = {}
+        if self.changed_devices is not None:
+            forked_devices.changed_devices = set(self.changed_devices)
+        for device in self.devices_list:
+            forked_device = copy.copy(device)
+            forked_device.outputs = dict(device.outputs)
+            forked_devices.devices_list.append(forked_device)
+            forked_devices.device_index.setdefault(forked_device.device_id,
+                                                   forked_device)
+        return forked_devices
+
+    def get_state(self):
+        """Return the simulation state of all devices as a hashable tuple.
+
+        The state holds the outputs, D-type memories, switch states and
+        counters of the devices. Two equal states always evolve in the same
+        way, so the counters of RC devices past their high period are all
+        stored as one more than it. Clock counters must be up to date.
+        """
+        state = []
+        for device in self.devices_list:
+            counter = device.clock_counter
+            if device.device_kind == self.RC:
+                counter = min(counter, device.high_period + 1)
+            state.append((tuple(device.outputs.items()), device.dtype_memory,
+                          device.switch_state, counter))
+        return tuple(state)
+
+    def set_state(self, state):
+        """Restore a state returned by get_state.
+
+        Every device is executed again on the next simulation cycle.
+        """
+        self.changed_devices = None
+        for device, device_state in zip(self.devices_list, state):
+            [outputs, device.dtype_memory, device.switch_state,
+             device.clock_counter] = device_state
+            device.outputs.update(outputs)
@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+"""Check that every way of simulating a circuit gives the same results.
+
+Used in the Logic Simulator project to run the same circuit, cold start-up
+and switch stimulus through each simulation engine, and to report the first
+cycle and signal at which an engine diverges from the reference full sweep.
+
+Usage
+-----
+Show help: differential.py -h
+Check circuits: differential.py [-s <seed>] [-c <cycles>] [-t <toggles>]
+                [-g <size>] [<file path> ...]
+Without file paths, the files in circuit_files and generated circuits of
+every family are checked.
+
+Classes
+-------
+EveryDevice - a set of marked devices that always contains every device.
+DifferentialTester - compares the simulation engines on circuits.
+"""
+import contextlib
+import getopt
+import io
+import os
+import random
+import sys
+import tempfile
+
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+from scanner import Scanner
+from parse import Parser
+from simulator import Simulator
+from generator import CircuitGenerator
+
+
+class EveryDevice(set):
+
+    """A set of marked devices that always contains every device.
+
+    Used as the dirty devices of the network, it makes every device execute
+    in every iteration of every cycle. It must be created with the IDs of
+    all devices, so that every connected component is executed.
+    """
+
+    def __contains__(self, device_id):
+        """Return True for every device."""
+        return True
+
+    def discard(self, device_id):
+        """Keep the device marked."""
+
+
+class DifferentialTester:
+
+    """Compare the simulation engines on circuits.
+
+    Each engine is a way of running the same network: "sweep" executes every
+    device in every cycle and is the reference, "event" only executes the
+    devices whose inputs have changed and skips quiet cycles, "folding" also
+    folds constant gates, "periodic" stops executing once the network is
+    periodic, "processes" runs the connected components in two worker
+    processes and "pruned" only simulates the fan-in of the outputs of the
+    last device. The pruned engine is skipped if the reference fails, as
+    the failing devices may be among those it does not simulate.
+
+    Every output of the circuit is monitored. The switches are toggled at
+    random cycles, and the cold start-up is seeded, so that every engine
+    sees the same stimulus from the same initial state. The traces are
+    compared cycle by cycle, and the states of the devices are compared
+    before every toggle and at the end of the run. Only the traces and
+    devices an engine simulates are compared.
+
+    Parameters
+    ----------
+    seed: seed of the cold start-up, the stimulus and the generated circuits.
+    cycles: number of simulation cycles run on each engine.
+    toggles: number of switch toggles in the stimulus.
+
+    Public methods
+    --------------
+    load_circuit(self, path): Returns a simulator for the definition file, or
+                              None if it cannot be parsed.
+
+    make_stimulus(self, simulator): Returns the switch toggles applied to the
+                                    circuit.
+
+    run_engine(self, path, engine, stimulus): Runs the circuit on the engine
+                                  and returns its traces, states and error.
+
+    compare_runs(self, reference, run): Returns the first cycle and signal
+                                        at which the runs diverge.
+
+    check_file(self, path): Returns the divergences of the engines on the
+                            definition file.
+
+    check_definition(self, definition): Returns the divergences of the
+                                        engines on the definition.
+    """
+
+    def __init__(self, seed=0, cycles=60, toggles=4):
+        """Initialise the options and the list of engines."""
+        self.seed = seed
+        self.cycles = cycles
+        self.toggles = toggles
+
+        # The first engine is the reference the others are compared with
+        self.engines = ["sweep", "event", "folding", "periodic", "processes",
+                        "pruned"]
+
+    def load_circuit(self, path):
+        """Return a simulator for the definition file.
+
+        Every output of the circuit is monitored. Return None if the file
+        cannot be parsed.
+        """
+        names = Names()
+        devices = Devices(names)
+        network = Network(names, devices)
+        monitors = Monitors(names, devices, network)
+        parser = Parser(names, devices, network, monitors,
+                        Scanner(path, names))
+        with contextlib.redirect_stdout(io.StringIO()):
+            parsed = parser.parse_network()
+        if not parsed:
+            return None
+        for device in devices.devices_list:
+            for output_id in device.outputs:
+                monitors.make_monitor(device.device_id, output_id)
+        return Simulator(names, devices, network, monitors)
+
+    def make_stimulus(self, simulator):
+        """Return the switch toggles applied to the circuit.
+
+        The returned list holds (cycle, switch_id, signal) tuples in order of
+        cycle, each setting the switch after that many cycles.
+        """
+        devices = simulator.devices
+        switch_ids = devices.find_devices(devices.SWITCH)
+        if not switch_ids or self.cycles < 2:
+            return []
+        generator = random.Random(self.seed)
+        toggle_cycles = generator.sample(range(1, self.cycles),
+                                         min(self.toggles, self.cycles - 1))
+        stimulus = []
+        for cycle in sorted(toggle_cycles):
+            switch_id = generator.choice(switch_ids)
+            signal = generator.choice([devices.LOW, devices.HIGH])
+            stimulus.append((cycle, switch_id, signal))
+        return stimulus
+
+    def run_engine(self, path, engine, stimulus):
+        """Run the circuit in the definition file on the given engine.
+
+        Return a dictionary with the traces {signal_name: signal_list}, the
+        states [(cycle, state)] of the simulated devices before every toggle
+        and at the end, the names of those devices, and the error (cycle,
+        error_code) of the first failing cycle, or None if every cycle
+        succeeds.
+        """
+        simulator = self.load_circuit(path)
+        network = simulator.network
+        monitors = simulator.monitors
+        random.seed(self.seed)
+        simulator.reset()
+        if engine == "sweep":
+            # Mark every device for every iteration once the structures
+            # used to execute the network are up to date
+            update_dirty_devices = network.update_dirty_devices
+
+            def mark_every_device():
+                """Update the network and mark every device."""
+                update_dirty_devices()
+                network.dirty_devices = EveryDevice(
+                    network.devices.find_devices())
+
+            network.update_dirty_devices = mark_every_device
+        elif engine == "folding":
+            network.set_constant_folding(True)
+        elif engine == "periodic":
+            simulator.set_period_detection(True)
+        elif engine == "processes":
+            simulator.set_processes(2)
+        elif engine == "pruned" and simulator.devices.devices_list:
+            last_device_id = simulator.devices.devices_list[-1].device_id
+            for monitor in list(monitors.monitors_dictionary):
+                if monitor[0] != last_device_id:
+                    monitors.remove_monitor(*monitor)
+            monitors.set_pruning(True)
+        live_devices = network.find_fanin(list(monitors.monitors_dictionary))
+
+        states = []
+        error = None
+        for cycle, switch_id, signal in stimulus + [(self.cycles, None,
+                                                     None)]:
+            cycles = cycle - simulator.cycles_completed
+            if engine == "sweep":
+                error_code = network.NO_ERROR
+                for sweep in range(cycles):
+                    error_code = network.execute_network()
+                    if error_code != network.NO_ERROR:
+                        break
+                    simulator.monitors.record_signals()
+                    simulator.cycles_completed += 1
+            else:
+                error_code = simulator.run_network(cycles)
+            if error_code != network.NO_ERROR:
+                error = (simulator.cycles_completed + 1, error_code)
+                break
+            states.append((cycle, tuple(
+                device_state for device, device_state in
+                zip(simulator.devices.devices_list, simulator.get_state())
+                if device.device_id in live_devices)))
+            if switch_id is not None:
+                simulator.devices.set_switch(switch_id, signal)
+
+        traces = {}
+        for (device_id, output_id), signal_list in \
+                monitors.monitors_dictionary.items():
+            signal_name = simulator.devices.get_signal_name(device_id,
+                                                            output_id)
+            traces[signal_name] = signal_list
+        device_names = [simulator.names.get_name_string(device.device_id)
+                        for device in simulator.devices.devices_list
+                        if device.device_id in live_devices]
+        return {"traces": traces, "states": states, "error": error,
+                "device_names": device_names}
+
+    def compare_runs(self, reference, run):
+        """Return the first cycle and signal at which the runs diverge.
+
+        reference and run are dictionaries returned by run_engine(), and
+        the reference simulates every device. Only the signals and devices
+        of the run are compared. Cycles are counted from 1. Return None if
+        the runs agree, otherwise a (cycle, description) tuple of the
+        earliest divergence.
+        """
+        divergences = []
+        for signal_name, other_list in run["traces"].items():
+            signal_list = reference["traces"][signal_name]
+            for index, (signal, other) in enumerate(zip(signal_list,
+                                                        other_list)):
+                if signal != other:
+                    divergences.append((index + 1, signal_name))
+                    break
+            else:
+                if len(signal_list) != len(other_list):
+                    divergences.append((min(len(signal_list),
+                                            len(other_list)) + 1,
+                                        signal_name))
+
+        positions = {}
+        for position, device_name in enumerate(reference["device_names"]):
+            positions[device_name] = position
+        for (cycle, state), (other_cycle, other_state) in zip(
+                reference["states"], run["states"]):
+            divergent_names = [
+                device_name for device_name, other_device_state
+                in zip(run["device_names"], other_state)
+                if state[positions[device_name]] != other_device_state]
+            if divergent_names:
+                divergences.append((cycle, "state of " + divergent_names[0]))
+                break
+
+        if reference["error"] != run["error"]:
+            if reference["error"] is None:
+                cycle = run["error"][0]
+            elif run["error"] is None:
+                cycle = reference["error"][0]
+            else:
+                cycle = min(reference["error"][0], run["error"][0])
+            divergences.append((cycle, "error code"))
+
+        if not divergences:
+            return None
+        return min(divergences)
+
+    def check_file(self, path):
+        """Return the divergences of the engines on the definition file.
+
+        Each divergence is described by a line of text. Return None if the
+        file cannot be parsed.
+        """
+        simulator = self.load_circuit(path)
+        if simulator is None:
+            return None
+        stimulus = self.make_stimulus(simulator)
+        reference = self.run_engine(path, self.engines[0], stimulus)
+        divergences = []
+        for engine in self.engines[1:]:
+            if engine == "pruned" and reference["error"] is not None:
+                continue  # the failing devices may not be simulated
+            divergence = self.compare_runs(
+                reference, self.run_engine(path, engine, stimulus))
+            if divergence is not None:
+                cycle, signal_name = divergence
+                divergences.append("".join([
+                    engine, " diverges from ", self.engines[0],
+                    " at cycle ", str(cycle), " on ", signal_name]))
+        return divergences
+
+    def check_definition(self, definition):
+        """Return the divergences of the engines on the definition.
+
+        definition is the text of a definition file, such as one returned by
+        CircuitGenerator.generate().
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "circuit.txt")
+            with open(path, "w") as definition_file:
+                definition_file.write(definition)
+            return self.check_file(path)
+
+
+def main(arg_list):
+    """Parse the command line options and arguments specified in arg_list.
+
+    Check the given definition files, or the circuit files and generated
+    circuits, and exit with status 1 if any engine diverges.
+    """
+    usage_message = ("Usage:\n"
+                     "Show help: differential.py -h\n"
+                     "Check circuits: differential.py [-s <seed>] "
+                     "[-c <cycles>] [-t <toggles>] [-g <size>] "
+                     "[<file path> ...]")
+    try:
+        options, arguments = getopt.getopt(arg_list, "hs:c:t:g:")
+    except getopt.GetoptError:
+        print("Error: invalid command line arguments\n")
+        print(usage_message)
+        sys.exit()
+
+    seed = 0
+    cycles = 60
+    toggles = 4
+    size = 8
+    try:
+        for option, value in options:
+            if option == "-h":  # print the usage message
+                print(usage_message)
+                sys.exit()
+            elif option == "-s":
+                seed = int(value)
+            elif option == "-c":
+                cycles = int(value)
+            elif option == "-t":
+                toggles = int(value)
+            elif option == "-g":
+                size = int(value)
+    except ValueError:
+        print("Error: invalid number\n")
+        print(usage_message)
+        sys.exit()
+
+    tester = DifferentialTester(seed, cycles, toggles)
+    results = []
+    if arguments:
+        for path in arguments:
+            results.append((path, tester.check_file(path)))
+    else:
+        directory = os.path.dirname(os.path.abspath(__file__))
+        circuit_directory = os.path.join(directory, "circuit_files")
+        for file_name in sorted(os.listdir(circuit_directory)):
+            path = os.path.join(circuit_directory, file_name)
+            results.append((path, tester.check_file(path)))
+        generator = CircuitGenerator(seed)
+        for family in sorted(generator.families):
+            results.append((" ".join([family, str(size)]),
+                            tester.check_definition(
+                                generator.generate(family, size))))
+
+    diverged = False
+    for circuit, divergences in results:
+        if divergences is None:
+            print(circuit + ": skipped, cannot be parsed")
+            continue
+        if not divergences:
+            print(circuit + ": all engines agree")
+        for divergence in divergences:
+            print("".join([circuit, ": ", divergence]))
+            diverged = True
+    if diverged:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+"""Check two circuits for equivalence by random simulation.
+
+Used in the Logic Simulator project to check that a changed definition file
+still behaves as before. Both circuits must have switches of the same names
+and monitors of the same signal names. They are started from the reset
+state and driven with the same random switch levels, many random runs at
+once in the bits, or lanes, of Python integers, and their monitored outputs
+are compared in every cycle.
+
+A difference is reported with the switch events of the run which found it,
+in the format of a stimulus file. Otherwise, the number of runs bounds the
+probability that a random run would find a difference.
+
+Usage
+-----
+Show help: equivalence.py -h
+Check two circuits: equivalence.py -n <cycles> [-r <runs>] [-l <lanes>]
+                    [-p <processes>] [-s <seed>] <file path> <file path>
+
+Classes
+-------
+EquivalenceChecker - compares two circuits driven by random switches.
+"""
+import getopt
+import multiprocessing
+import random
+import sys
+
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+from scanner import Scanner
+from parse import Parser
+from compiled import CompiledCircuit
+
+
+class EquivalenceChecker:
+
+    """Compare two circuits driven by random switches.
+
+    Each circuit is compiled into a function simulating one cycle of many
+    runs at once. The runs are checked in batches of one run per lane, and
+    each batch draws its switch levels from its own random generator, so
+    the results do not depend on the number of processes the batches are
+    shared out between.
+
+    Parameters
+    ----------
+    first: instance of the compiled.CompiledCircuit() class.
+    second: instance of the compiled.CompiledCircuit() class.
+    lanes: number of runs simulated at once.
+    processes: number of worker processes the runs are shared out between.
+    seed: seed of the random switch levels.
+
+    Public methods
+    --------------
+    match_circuits(self): Matches the switches and monitors of the two
+                          circuits by name.
+
+    get_levels(self, number, source_levels, switch_lanes, full): Returns
+                               the lanes of the sources of a circuit in a
+                               cycle.
+
+    check_batch(self, batch, runs, cycles, source_levels): Simulates a
+                               batch of runs and returns the first
+                               difference found.
+
+    run_worker(self, batches, runs, cycles, source_levels, connection):
+                               Checks batches in a worker process and sends
+                               back the first difference.
+
+    run(self, runs, cycles): Checks the given number of random runs.
+
+    get_report(self): Returns the result of the check as a list of lines
+                      of text.
+    """
+
+    def __init__(self, first, second, lanes=1024, processes=1, seed=0):
+        """Initialise the checker and its results."""
+        self.circuits = [first, second]
+        self.lanes = lanes
+        self.processes = processes
+        self.seed = seed
+
+        [self.NO_ERROR, self.NO_MONITORS, self.SWITCHES_DIFFER,
+         self.MONITORS_DIFFER] = first.names.unique_error_codes(4)
+
+        # Set by match_circuits(): the switch names in the order of the
+        # first circuit, the monitored signal names and, for each circuit,
+        # the position of each source among the switch names or None, and
+        # the index of the variable of each monitored signal
+        self.switch_names = []
+        self.monitor_names = []
+        self.switch_positions = []
+        self.observed = []
+
+        # Results of the last run: counterexample is None or stores the
+        # run and cycle of the first difference, the switch levels in each
+        # cycle of the run and {monitor name: (first level, second level)}
+        # of the differing outputs, with None if a circuit did not settle
+        self.runs = 0
+        self.cycles = 0
+        self.counterexample = None
+
+    def match_circuits(self):
+        """Match the switches and monitors of the two circuits by name.
+
+        Return NO_ERROR, NO_MONITORS, SWITCHES_DIFFER, MONITORS_DIFFER, or
+        network.INPUTS_NOT_CONNECTED if an input is unconnected.
+        """
+        switch_sets = []
+        monitor_sets = []
+        for circuit in self.circuits:
+            error_code = circuit.build_circuit()
+            if error_code != circuit.network.NO_ERROR:
+                return error_code
+            devices = circuit.devices
+            switch_sets.append([
+                devices.get_signal_name(*source) for source in circuit.sources
+                if devices.get_device(source[0]).device_kind ==
+                devices.SWITCH])
+            monitor_sets.append([devices.get_signal_name(*monitor)
+                                 for monitor in
+                                 circuit.monitors.monitors_dictionary])
+        if not monitor_sets[0]:
+            return self.NO_MONITORS
+        if set(switch_sets[0]) != set(switch_sets[1]):
+            return self.SWITCHES_DIFFER
+        if set(monitor_sets[0]) != set(monitor_sets[1]):
+            return self.MONITORS_DIFFER
+
+        self.switch_names = switch_sets[0]
+        self.monitor_names = monitor_sets[0]
+        self.switch_positions = []
+        self.observed = []
+        for circuit, monitor_names in zip(self.circuits, monitor_sets):
+            devices = circuit.devices
+            self.switch_positions.append([
+                self.switch_names.index(devices.get_signal_name(*source))
+                if devices.get_device(source[0]).device_kind ==
+                devices.SWITCH else None for source in circuit.sources])
+            self.observed.append([
+                circuit.observed[monitor_names.index(monitor_name)]
+                for monitor_name in self.monitor_names])
+        return self.NO_ERROR
+
+    def get_levels(self, number, source_levels, switch_lanes, full):
+        """Return the lanes of the sources of a circuit in a cycle.
+
+        number is 0 for the first circuit and 1 for the second,
+        source_levels holds the levels of its sources in the cycle and
+        switch_lanes the random lanes of each switch name.
+        """
+        levels = []
+        for position, level in zip(self.switch_positions[number],
+                                   source_levels):
+            if position is not None:
+                levels.append(switch_lanes[position])
+            else:
+                levels.append(full if level else 0)
+        return levels
+
+    def check_batch(self, batch, runs, cycles, source_levels):
+        """Simulate a batch of runs and return the first difference found.
+
+        The batch holds runs number batch * self.lanes onwards, up to runs,
+        and source_levels holds the levels of the sources of each circuit
+        in every cycle. Return None if no difference is found.
+        """
+        lanes = min(self.lanes, runs - batch * self.lanes)
+        full = (1 << lanes) - 1
+        generator = random.Random("".join([str(self.seed), ".",
+                                           str(batch)]))
+        functions = [circuit.compile_cycle() for circuit in self.circuits]
+        states = [circuit.get_initial_state(full)
+                  for circuit in self.circuits]
+        stimulus = []
+        for cycle in range(cycles):
+            switch_lanes = [generator.getrandbits(lanes)
+                            for name in self.switch_names]
+            stimulus.append(switch_lanes)
+            oscillating = []
+            for number in range(2):
+                states[number], lanes_oscillating = functions[number](
+                    states[number], self.get_levels(
+                        number, source_levels[number][cycle], switch_lanes,
+                        full))
+                oscillating.append(lanes_oscillating)
+
+            # Lanes in which only one circuit settles differ, and lanes in
+            # which neither does are not compared
+            difference = oscillating[0] ^ oscillating[1]
+            settled = full & ~(oscillating[0] | oscillating[1])
+            for first_index, second_index in zip(*self.observed):
+                difference |= settled & (states[0][0][first_index] ^
+                                         states[1][0][second_index])
+            if not difference:
+                continue
+
+            lane = (difference & -difference).bit_length() - 1
+            outputs = {}
+            for monitor_name, first_index, second_index in zip(
+                    self.monitor_names, *self.observed):
+                output_levels = []
+                for number, index in enumerate([first_index, second_index]):
+                    if oscillating[number] >> lane & 1:
+                        output_levels.append(None)
+                    else:
+                        output_levels.append(
+                            states[number][0][index] >> lane & 1)
+                if output_levels[0] != output_levels[1]:
+                    outputs[monitor_name] = tuple(output_levels)
+            return {"run": batch * self.lanes + lane, "cycle": cycle + 1,
+                    "stimulus": [tuple(switch_lane >> lane & 1
+                                       for switch_lane in switch_lanes)
+                                 for switch_lanes in stimulus],
+                    "outputs": outputs}
+        return None
+
+    def run_worker(self, batches, runs, cycles, source_levels, connection):
+        """Check the batches and send back the first difference.
+
+        This is called in a worker process. The batches are checked in
+        order until a difference is found, and the difference, or None, is
+        sent through connection.
+        """
+        counterexample = None
+        for batch in batches:
+            counterexample = self.check_batch(batch, runs, cycles,
+                                              source_levels)
+            if counterexample is not None:
+                break
+        connection.send(counterexample)
+        connection.close()
+
+    def run(self, runs, cycles):
+        """Check the given number of random runs of the given cycles.
+
+        Both circuits start from the present state of their devices, which
+        is left unchanged. Return NO_ERROR if the check ran, whether or not
+        a difference was found, or the error code of match_circuits().
+        """
+        self.runs = runs
+        self.cycles = cycles
+        self.counterexample = None
+        error_code = self.match_circuits()
+        if error_code != self.NO_ERROR:
+            return error_code
+        source_levels = [circuit.get_source_levels(cycles)
+                         for circuit in self.circuits]
+
+        batches = list(range((runs + self.lanes - 1) // self.lanes))
+        groups = [batches[number::self.processes]
+                  for number in range(self.processes)]
+        groups = [group for group in groups if group]
+        connections = []
+        workers = []
+        if len(groups) < 2:
+            receiver, sender = multiprocessing.Pipe(duplex=False)
+            self.run_worker(batches, runs, cycles, source_levels, sender)
+            connections.append(receiver)
+        else:
+            for group in groups:
+                receiver, sender = multiprocessing.Pipe(duplex=False)
+                worker = multiprocessing.Process(
+                    target=self.run_worker,
+                    args=(group, runs, cycles, source_levels, sender))
+                worker.start()
+                sender.close()
+                connections.append(receiver)
+                workers.append(worker)
+
+        # The difference of the earliest run is kept, as with one process
+        for receiver in connections:
+            counterexample = receiver.recv()
+            if counterexample is None:
+                continue
+            if self.counterexample is None or \
+                    counterexample["run"] < self.counterexample["run"]:
+                self.counterexample = counterexample
+        for worker in workers:
+            worker.join()
+        return self.NO_ERROR
+
+    def get_report(self):
+        """Return the result of the check as a list of lines of text.
+
+        A difference is listed with the switch events of its run, which can
+        be saved as a stimulus file.
+        """
+        if self.counterexample is None:
+            # With no difference in n runs, a probability p of a run finding
+            # one is rejected at 95% confidence if (1 - p) ** n < 0.05
+            bound = 1 - 0.05 ** (1 / max(self.runs, 1))
+            return ["".join(["No difference found in ", str(self.runs),
+                             " random runs of ", str(self.cycles),
+                             " cycles"]),
+                    "".join(["A random run finds a difference with a "
+                             "probability below ", format(bound, ".2g"),
+                             " at 95% confidence"])]
+
+        counterexample = self.counterexample
+        lines = ["".join(["Difference found in random run ",
+                          str(counterexample["run"]), " at cycle ",
+                          str(counterexample["cycle"]), ":"])]
+        levels = {0: "0", 1: "1", None: "not settled"}
+        for monitor_name, (first, second) in sorted(
+                counterexample["outputs"].items()):
+            lines.append("".join(["  ", monitor_name, ": ", levels[first],
+                                  " in the first circuit, ", levels[second],
+                                  " in the second"]))
+        lines.append("Switch events of the run:")
+        last_levels = None
+        for cycle, switch_levels in enumerate(counterexample["stimulus"]):
+            for position, level in enumerate(switch_levels):
+                if last_levels is None or level != last_levels[position]:
+                    lines.append(" ".join([str(cycle),
+                                           self.switch_names[position],
+                                           str(level)]))
+            last_levels = switch_levels
+        return lines
+
+
+def main(arg_list):
+    """Parse the command line options and arguments specified in arg_list.
+
+    Check the circuits in the two definition files from their reset state
+    and print the result.
+    """
+    usage_message = ("Usage:\n"
+                     "Show help: equivalence.py -h\n"
+                     "Check two circuits: equivalence.py -n <cycles> "
+                     "[-r <runs>] [-l <lanes>] [-p <processes>] [-s <seed>] "
+                     "<file path> <file path>")
+    try:
+        options, arguments = getopt.getopt(arg_list, "hn:r:l:p:s:")
+    except getopt.GetoptError:
+        print("Error: invalid command line arguments\n")
+        print(usage_message)
+        sys.exit()
+
+    cycles = None
+    runs = 4096
+    lanes = 1024
+    processes = 1
+    seed = 0
+    for option, value in options:
+        if option == "-h":  # print the usage message
+            print(usage_message)
+            sys.exit()
+        elif not value.isdigit() or (option != "-s" and int(value) == 0):
+            print("Error: the options must be numbers greater than zero\n")
+            print(usage_message)
+            sys.exit()
+        elif option == "-n":
+            cycles = int(value)
+        elif option == "-r":
+            runs = int(value)
+        elif option == "-l":
+            lanes = int(value)
+        elif option == "-p":
+            processes = int(value)
+        elif option == "-s":
+            seed = int(value)
+    if cycles is None or len(arguments) != 2:
+        print("Error: a number of cycles and two file paths required\n")
+        print(usage_message)
+        sys.exit()
+
+    circuits = []
+    for path in arguments:
+        names = Names()
+        devices = Devices(names)
+        network = Network(names, devices)
+        monitors = Monitors(names, devices, network)
+        parser = Parser(names, devices, network, monitors,
+                        Scanner(path, names))
+        if not parser.parse_network():
+            print("".join(["Error: ", path, " could not be parsed"]))
+            sys.exit(1)
+        devices.reset_startup()
+        circuits.append(CompiledCircuit(names, devices, network, monitors))
+
+    checker = EquivalenceChecker(circuits[0], circuits[1], lanes, processes,
+                                 seed)
+    error_code = checker.run(runs, cycles)
+    if error_code == checker.NO_MONITORS:
+        print("Error: the first circuit has no monitored outputs")
+    elif error_code == checker.SWITCHES_DIFFER:
+        print("Error: the circuits have switches of different names")
+    elif error_code == checker.MONITORS_DIFFER:
+        print("Error: the circuits monitor signals of different names")
+    elif error_code != checker.NO_ERROR:
+        print("Error: a circuit has unconnected inputs")
+    else:
+        for line in checker.get_report():
+            print(line)
+        if checker.counterexample is None:
+            return
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
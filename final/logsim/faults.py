@@ -0,0 +1,509 @@
+#!/usr/bin/env python3
+"""Simulate single stuck-at faults on the inputs and outputs of devices.
+
+Used in the Logic Simulator project to measure how many faults a stimulus
+detects at the monitored outputs of a circuit. Every device output and input
+can be stuck at 0 or at 1. Many faulty machines are simulated at once by
+packing them into the bits, or lanes, of Python integers: lane 0 holds the
+fault-free machine and every other lane a machine with one fault, so one
+bitwise operation evaluates a gate in all of them. A fault is detected as
+soon as a monitored output of its machine differs from the fault-free one.
+
+Usage
+-----
+Show help: faults.py -h
+Simulate faults: faults.py -n <cycles> [-i <stimulus path>] [-l <lanes>]
+                 [-p <processes>] [-s <seed>] <file path>
+
+Classes
+-------
+FaultSimulator - simulates stuck-at faults in bit-parallel lanes.
+"""
+import getopt
+import multiprocessing
+import random
+import sys
+
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+from scanner import Scanner
+from parse import Parser
+from compiled import CompiledCircuit
+
+
+class FaultSimulator:
+
+    """Simulate stuck-at faults in bit-parallel lanes.
+
+    Faulty machines are simulated cycle by cycle from the present state of
+    the devices, with the switches set by a stimulus file, and compared
+    with the fault-free machine at the monitored outputs. Each batch of
+    faults is compiled by a compiled.CompiledCircuit() into one Python
+    function which evaluates every device with bitwise operations on
+    integers holding one lane per machine.
+
+    Detected faults are dropped: the batch stops once all of its faults
+    are detected, and its lanes are packed together whenever half of them
+    have been dropped. The faults are shared out between worker processes.
+
+    Parameters
+    ----------
+    names: instance of the names.Names() class.
+    devices: instance of the devices.Devices() class.
+    network: instance of the network.Network() class.
+    monitors: instance of the monitors.Monitors() class.
+    lanes: largest number of faulty machines simulated at once.
+    processes: number of worker processes the faults are shared out
+               between.
+
+    Public methods
+    --------------
+    list_faults(self): Returns every stuck-at fault of the devices.
+
+    get_fault_name(self, fault): Returns the name of the fault.
+
+    build_circuit(self): Indexes the signals and orders the devices.
+
+    compile_batch(self, faults): Returns the function simulating the
+                                 machines with the given faults.
+
+    get_initial_state(self, faults): Returns the state every machine
+                                     starts from.
+
+    pack_lanes(self, values, lanes): Returns the values with only the given
+                                     lanes, packed together.
+
+    simulate_batch(self, faults, source_levels): Simulates the machines
+                               with the given faults and returns the cycle
+                               each fault was detected at.
+
+    run_worker(self, faults, source_levels, connection): Simulates faults
+                               in a worker process and sends back the
+                               results.
+
+    run(self, cycles, stimulus_path=None): Simulates every fault for the
+                                           given number of cycles.
+
+    get_report(self, count=20): Returns the fault coverage as a list of
+                                lines of text.
+    """
+
+    def __init__(self, names, devices, network, monitors, lanes=1024,
+                 processes=1):
+        """Initialise the fault simulator and its results."""
+        self.names = names
+        self.devices = devices
+        self.network = network
+        self.monitors = monitors
+        self.lanes = lanes
+        self.processes = processes
+
+        [self.NO_ERROR, self.NO_MONITORS] = self.names.unique_error_codes(2)
+
+        # Cycles a batch runs for before its detected faults are dropped
+        self.chunk_cycles = 32
+
+        # Results of the last run: detected stores {fault: number of cycles
+        # completed when it was first detected}, oscillating lists the
+        # faults whose machines did not settle and undetected the other
+        # faults. good_traces stores {monitor: [signal levels]} of the
+        # fault-free machine.
+        self.faults = []
+        self.detected = {}
+        self.oscillating = []
+        self.undetected = []
+        self.good_traces = {}
+
+        self.circuit = CompiledCircuit(names, devices, network, monitors)
+
+    def list_faults(self):
+        """Return every stuck-at fault of the devices.
+
+        A fault is a (device_id, port_id, level) tuple, where port_id is an
+        input or output ID of the device and level is 0 or 1.
+        """
+        faults = []
+        for device in self.devices.devices_list:
+            for port_id in list(device.outputs) + list(device.inputs):
+                faults.append((device.device_id, port_id, 0))
+                faults.append((device.device_id, port_id, 1))
+        return faults
+
+    def get_fault_name(self, fault):
+        """Return the name of the fault, such as "G1.I2 stuck-at-0"."""
+        device_id, port_id, level = fault
+        return "".join([self.devices.get_signal_name(device_id, port_id),
+                        " stuck-at-", str(level)])
+
+    def build_circuit(self):
+        """Index the signals and order the devices.
+
+        Return NO_ERROR, NO_MONITORS if no output is monitored, or
+        network.INPUTS_NOT_CONNECTED if an input is unconnected.
+        """
+        error_code = self.circuit.build_circuit()
+        if error_code != self.network.NO_ERROR:
+            return error_code
+        if not self.circuit.observed:
+            return self.NO_MONITORS
+        return self.NO_ERROR
+
+    def compile_batch(self, faults):
+        """Return the function simulating the machines with the faults.
+
+        The fault in lane n is faults[n - 1]. Return the function and the
+        tuple of fault masks it is called with. The function is called as
+        function(state, sources, cycle, masks, dropped), where state is
+        returned by get_initial_state(), sources holds the levels of the
+        source devices in each cycle to run, spread across all lanes, cycle
+        is the number of cycles completed and dropped holds the lanes whose
+        faults have already been detected. It returns the new state and
+        cycle, the lanes detected, including the dropped lanes, and the
+        lanes oscillating, a list of (cycle, lanes) new detections and the
+        fault-free levels of the observed signals in each cycle.
+        """
+        # Each faulty port gets an AND mask clearing its stuck-at-0 lanes
+        # and an OR mask setting its stuck-at-1 lanes
+        port_masks = {}
+        for lane, (device_id, port_id, level) in enumerate(faults, 1):
+            port_masks.setdefault((device_id, port_id), [0, 0])
+            port_masks[(device_id, port_id)][level] |= 1 << lane
+        mask_names = {}
+        for number, port in enumerate(port_masks):
+            mask_names[port] = ("a" + str(number), "o" + str(number))
+
+        def force(expression, port):
+            """Return the expression with the faults of the port forced."""
+            if port not in mask_names:
+                return expression
+            and_mask, or_mask = mask_names[port]
+            return "".join(["(", expression, " & ", and_mask, " | ",
+                            or_mask, ")"])
+
+        signals, memories, clocks = self.circuit.get_state_names()
+        lines = ["def run_chunk(state, sources, cycle, masks, dropped):",
+                 "    (" + signals + ") = state[0]",
+                 "    (" + memories + ") = state[1]",
+                 "    (" + clocks + ") = state[2]",
+                 "    M = state[3]"]
+        if port_masks:
+            lines.append("    (" + ", ".join(
+                and_mask + ", " + or_mask
+                for and_mask, or_mask in mask_names.values()) + ",) = masks")
+        lines.extend(["    faulty = M ^ 1",
+                      "    detected = dropped",
+                      "    oscillating = 0",
+                      "    detections = []",
+                      "    good = []",
+                      "    for levels in sources:",
+                      "        cycle += 1"])
+        lines.extend(self.circuit.get_cycle_lines(
+            "        ", ["if changed & 1:",
+                         "    return None",
+                         "oscillating |= changed"], force))
+
+        observed = ["s" + str(index) for index in self.circuit.observed]
+        lines.append("        difference = " + " | ".join(
+            "(" + variable + " ^ (-(" + variable + " & 1) & M))"
+            for variable in observed))
+        lines.extend(["        new = difference & ~detected & ~oscillating",
+                      "        if new:",
+                      "            detected |= new",
+                      "            detections.append((cycle, new))",
+                      "        good.append((" + "".join(
+                          variable + " & 1, " for variable in observed) +
+                      "))",
+                      "        if faulty and detected | oscillating == "
+                      "faulty:",
+                      "            break",
+                      "    state = ((" + signals + "), (" + memories +
+                      "), (" + clocks + "), M)",
+                      "    return (state, cycle, detected, oscillating, "
+                      "detections, good)"])
+
+        masks = []
+        full = (1 << (len(faults) + 1)) - 1
+        for and_mask, or_mask in port_masks.values():
+            masks.extend([full ^ and_mask, or_mask])
+        namespace = {}
+        exec("\n".join(lines), namespace)
+        return namespace["run_chunk"], tuple(masks)
+
+    def get_initial_state(self, faults):
+        """Return the state every machine starts from.
+
+        The state holds the values of the signals, the D-type memories and
+        the CLK inputs of the D-types, spread across all lanes, and the mask
+        of all lanes.
+        """
+        signals, memories, clocks, full = self.circuit.get_initial_state(
+            (1 << (len(faults) + 1)) - 1)
+        clocks = list(clocks)
+        for number, device_id in enumerate(self.circuit.d_types):
+            for lane, fault in enumerate(faults, 1):
+                if fault[:2] == (device_id, self.devices.CLK_ID):
+                    clocks[number] = clocks[number] & ~(1 << lane) | \
+                        fault[2] << lane
+        return (signals, memories, tuple(clocks), full)
+
+    def pack_lanes(self, values, lanes):
+        """Return the values with only the given lanes, packed together.
+
+        lanes lists the lanes to keep, in order, starting with lane 0.
+        """
+        width = max(lanes) + 1
+        packed_values = []
+        for value in values:
+            bits = format(value, "b").zfill(width)[::-1]
+            packed_values.append(int("".join(
+                bits[lane] for lane in reversed(lanes)), 2))
+        return packed_values
+
+    def simulate_batch(self, faults, source_levels):
+        """Simulate the machines with the faults.
+
+        Return a dictionary mapping each detected fault to the cycle it was
+        detected at, and each fault whose machine did not settle to None,
+        and the fault-free levels of the observed signals in every cycle.
+        Return None instead if the fault-free machine does not settle.
+        """
+        results = {}
+        good = []
+        faults = list(faults)
+        state = self.get_initial_state(faults)
+        run_chunk, masks = self.compile_batch(faults)
+        cycle = 0
+        dropped = 0
+        while cycle < len(source_levels):
+            full = state[3]
+            sources = [tuple(full if level else 0 for level in levels)
+                       for levels in
+                       source_levels[cycle:cycle + self.chunk_cycles]]
+            chunk = run_chunk(state, sources, cycle, masks, dropped)
+            if chunk is None:
+                return None
+            state, cycle, detected, oscillating, detections, chunk_good = \
+                chunk
+            good.extend(chunk_good)
+            for detection_cycle, lanes in detections:
+                for lane, fault in enumerate(faults, 1):
+                    if lanes >> lane & 1:
+                        results[fault] = detection_cycle
+            for lane, fault in enumerate(faults, 1):
+                if oscillating >> lane & 1:
+                    results.setdefault(fault, None)
+
+            # Drop the detected faults once half of the lanes are unused.
+            # The fault-free machine alone is never recompiled.
+            dropped = detected | oscillating
+            if dropped and bin(dropped).count("1") * 2 >= len(faults):
+                lanes = [0] + [lane for lane in range(1, len(faults) + 1)
+                               if not dropped >> lane & 1]
+                faults = [faults[lane - 1] for lane in lanes[1:]]
+                if not faults:
+                    break
+                signals, memories, clocks, full = state
+                state = (tuple(self.pack_lanes(signals, lanes)),
+                         tuple(self.pack_lanes(memories, lanes)),
+                         tuple(self.pack_lanes(clocks, lanes)),
+                         (1 << len(lanes)) - 1)
+                run_chunk, masks = self.compile_batch(faults)
+                dropped = 0
+        return results, good
+
+    def run_worker(self, faults, source_levels, connection):
+        """Simulate the faults and send back the results.
+
+        This is called in a worker process. The faults are simulated in
+        batches of at most self.lanes, and the results of all batches, or
+        None if the fault-free machine does not settle, are sent through
+        connection.
+        """
+        results = {}
+        for start in range(0, len(faults), self.lanes):
+            batch_results = self.simulate_batch(
+                faults[start:start + self.lanes], source_levels)
+            if batch_results is None:
+                results = None
+                break
+            results.update(batch_results[0])
+        connection.send(results)
+        connection.close()
+
+    def run(self, cycles, stimulus_path=None):
+        """Simulate every fault for the given number of cycles.
+
+        The machines start from the present state of the devices, which is
+        left unchanged, and the switch events of the stimulus file at
+        stimulus_path are counted from this state. Return NO_ERROR if
+        successful, NO_MONITORS if no output is monitored,
+        network.INPUTS_NOT_CONNECTED if an input is unconnected,
+        network.OSCILLATING if the fault-free machine does not settle, or
+        the error code of the stimulus if it has an invalid line.
+        """
+        self.faults = []
+        self.detected = {}
+        self.oscillating = []
+        self.undetected = []
+        self.good_traces = {}
+        error_code = self.build_circuit()
+        if error_code != self.NO_ERROR:
+            return error_code
+        source_levels = self.circuit.get_source_levels(cycles,
+                                                       stimulus_path)
+        if not isinstance(source_levels, list):
+            return source_levels
+
+        # The fault-free machine is simulated on its own for its traces
+        good_run = self.simulate_batch([], source_levels)
+        if good_run is None:
+            return self.network.OSCILLATING
+        for number, monitor in enumerate(self.monitors.monitors_dictionary):
+            self.good_traces[monitor] = [
+                self.devices.HIGH if levels[number] else self.devices.LOW
+                for levels in good_run[1]]
+
+        self.faults = self.list_faults()
+        groups = [self.faults[number::self.processes]
+                  for number in range(self.processes)]
+        groups = [faults for faults in groups if faults]
+        connections = []
+        workers = []
+        results = {}
+        if len(groups) < 2:
+            receiver, sender = multiprocessing.Pipe(duplex=False)
+            self.run_worker(self.faults, source_levels, sender)
+            connections.append(receiver)
+        else:
+            for faults in groups:
+                receiver, sender = multiprocessing.Pipe(duplex=False)
+                worker = multiprocessing.Process(
+                    target=self.run_worker,
+                    args=(faults, source_levels, sender))
+                worker.start()
+                sender.close()
+                connections.append(receiver)
+                workers.append(worker)
+        for receiver in connections:
+            worker_results = receiver.recv()
+            if worker_results is None:
+                results = None
+            elif results is not None:
+                results.update(worker_results)
+        for worker in workers:
+            worker.join()
+        if results is None:
+            return self.network.OSCILLATING
+
+        for fault in self.faults:
+            if fault not in results:
+                self.undetected.append(fault)
+            elif results[fault] is None:
+                self.oscillating.append(fault)
+            else:
+                self.detected[fault] = results[fault]
+        return self.NO_ERROR
+
+    def get_report(self, count=20):
+        """Return the fault coverage as a list of lines of text.
+
+        At most count undetected faults are listed.
+        """
+        coverage = 100 * len(self.detected) / max(len(self.faults), 1)
+        lines = ["".join(["Fault coverage: ", str(len(self.detected)),
+                          " of ", str(len(self.faults)), " faults (",
+                          format(coverage, ".1f"), "%)"])]
+        if self.oscillating:
+            lines.append("".join(["Faults making the circuit oscillate: ",
+                                  str(len(self.oscillating))]))
+        if self.undetected:
+            lines.append("Undetected faults:")
+        for fault in self.undetected[:count]:
+            lines.append("  " + self.get_fault_name(fault))
+        if len(self.undetected) > count:
+            lines.append("".join(["  and ", str(len(self.undetected) - count),
+                                  " more"]))
+        return lines
+
+
+def main(arg_list):
+    """Parse the command line options and arguments specified in arg_list.
+
+    Simulate the stuck-at faults of the circuit in the definition file from
+    a cold start-up, observing its monitored outputs, and print the fault
+    coverage.
+    """
+    usage_message = ("Usage:\n"
+                     "Show help: faults.py -h\n"
+                     "Simulate faults: faults.py -n <cycles> "
+                     "[-i <stimulus path>] [-l <lanes>] [-p <processes>] "
+                     "[-s <seed>] <file path>")
+    try:
+        options, arguments = getopt.getopt(arg_list, "hn:i:l:p:s:")
+    except getopt.GetoptError:
+        print("Error: invalid command line arguments\n")
+        print(usage_message)
+        sys.exit()
+
+    cycles = None
+    stimulus_path = None
+    lanes = 1024
+    processes = 1
+    seed = 0
+    for option, value in options:
+        if option == "-h":  # print the usage message
+            print(usage_message)
+            sys.exit()
+        elif option == "-i":
+            stimulus_path = value
+        elif not value.isdigit() or (option != "-s" and int(value) == 0):
+            print("Error: the options must be numbers greater than zero\n")
+            print(usage_message)
+            sys.exit()
+        elif option == "-n":
+            cycles = int(value)
+        elif option == "-l":
+            lanes = int(value)
+        elif option == "-p":
+            processes = int(value)
+        elif option == "-s":
+            seed = int(value)
+    if cycles is None or len(arguments) != 1:
+        print("Error: a number of cycles and one file path required\n")
+        print(usage_message)
+        sys.exit()
+
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    monitors = Monitors(names, devices, network)
+    parser = Parser(names, devices, network, monitors,
+                    Scanner(arguments[0], names))
+    if not parser.parse_network():
+        print("Error: the definition file could not be parsed")
+        sys.exit(1)
+    random.seed(seed)
+    devices.cold_startup()
+
+    fault_simulator = FaultSimulator(names, devices, network, monitors,
+                                     lanes, processes)
+    error_code = fault_simulator.run(cycles, stimulus_path)
+    if error_code == fault_simulator.NO_MONITORS:
+        print("Error: the circuit has no monitored outputs")
+    elif error_code == network.INPUTS_NOT_CONNECTED:
+        print("Error: the circuit has unconnected inputs")
+    elif error_code == network.OSCILLATING:
+        print("Error: the fault-free circuit oscillates")
+    elif error_code != fault_simulator.NO_ERROR:
+        print("Error: the stimulus file has an invalid line")
+    else:
+        for line in fault_simulator.get_report():
+            print(line)
+        return
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
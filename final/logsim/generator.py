@@ -0,0 +1,401 @@
+#!/usr/bin/env python3
+"""Generate circuit definition files for scale testing.
+
+Used in the Logic Simulator project to write valid definition files for
+parameterised families of circuits, so that performance work has inputs of
+any size.
+
+Usage
+-----
+Show help: generator.py -h
+Write a circuit: generator.py [-s <seed>] [-o <file path>] <family> <size>
+
+Classes
+-------
+CircuitGenerator - writes definition files for families of circuits.
+"""
+import getopt
+import random
+import sys
+
+
+class CircuitGenerator:
+
+    """Write definition files for families of circuits.
+
+    Each family method returns the text of a definition file, which declares
+    one device per statement, then its connections, then its monitors. The
+    same seed always gives the same text.
+
+    Parameters
+    ----------
+    seed: seed of the random choices made by the generator.
+
+    Public methods
+    --------------
+    generate(self, family, size): Returns the definition of the given family
+                                  of circuits and size.
+
+    make_definition(self, devices, connections, monitors): Returns the text
+                                   of a definition file.
+
+    ripple_carry_adder(self, width): Returns a ripple-carry adder.
+
+    lookahead_adder(self, width): Returns a carry-lookahead adder.
+
+    counter(self, bits): Returns a synchronous counter made from D-types.
+
+    lfsr(self, bits): Returns a linear-feedback shift register.
+
+    random_dag(self, gates, fan_in=None): Returns random gates without
+                                          feedback.
+
+    nand_chain(self, depth): Returns a chain of inverting NAND gates.
+
+    latch_array(self, latches): Returns an array of gated D latches.
+    """
+
+    def __init__(self, seed=0):
+        """Initialise the random number generator and the families."""
+        self.random = random.Random(seed)
+
+        # families stores {family name: method returning a circuit of that
+        # family for a given size}
+        self.families = {"ripple": self.ripple_carry_adder,
+                         "lookahead": self.lookahead_adder,
+                         "counter": self.counter,
+                         "lfsr": self.lfsr,
+                         "dag": self.random_dag,
+                         "chain": self.nand_chain,
+                         "latches": self.latch_array}
+
+        # Taps of maximal-length LFSRs, counted from 1 at the input end
+        self.lfsr_taps = {2: [2, 1], 3: [3, 2], 4: [4, 3], 5: [5, 3],
+                          6: [6, 5], 7: [7, 6], 8: [8, 6, 5, 4],
+                          9: [9, 5], 10: [10, 7], 11: [11, 9],
+                          12: [12, 11, 10, 4], 13: [13, 12, 11, 8],
+                          14: [14, 13, 12, 2], 15: [15, 14],
+                          16: [16, 15, 13, 4]}
+
+    def generate(self, family, size):
+        """Return the definition of the given family of circuits and size.
+
+        Return None if the family does not exist.
+        """
+        if family not in self.families:
+            return None
+        return self.families[family](size)
+
+    def make_definition(self, devices, connections, monitors):
+        """Return the text of a definition file.
+
+        devices is a list of (device_kind, qualifier, name) tuples, where
+        qualifier is None if the kind takes none. connections is a list of
+        (output, input) tuples of signal names, such as ("D1.Q", "G1.I1"),
+        and monitors is a list of signal names.
+        """
+        lines = []
+        for device_kind, qualifier, name in devices:
+            if qualifier is None:
+                lines.append("".join([device_kind, " ", name, ";"]))
+            else:
+                lines.append("".join([device_kind, " ", str(qualifier), " ",
+                                      name, ";"]))
+        for output, input_name in connections:
+            lines.append("".join(["CONNECT ", output, " > ", input_name,
+                                  ";"]))
+        if monitors:
+            lines.append("".join(["MONITOR ", ", ".join(monitors), ";"]))
+        return "\n".join(lines) + "\n"
+
+    def ripple_carry_adder(self, width):
+        """Return a ripple-carry adder of the given width.
+
+        The operands are the switches A0, B0, A1, B1, ... and CIN, and the
+        sum bits S0, S1, ... and the carry out C<width> are monitored. A
+        carry takes about two iterations of the network to ripple through
+        each bit, so adders wider than about 8 bits can fail to settle
+        within the iteration limit.
+        """
+        devices = [("SWITCH", 0, "CIN")]
+        connections = []
+        carry = "CIN"
+        for bit in range(width):
+            a, b = "A" + str(bit), "B" + str(bit)
+            p, s, g = "P" + str(bit), "S" + str(bit), "G" + str(bit)
+            t, c = "T" + str(bit), "C" + str(bit + 1)
+            devices.extend([("SWITCH", self.random.randint(0, 1), a),
+                            ("SWITCH", self.random.randint(0, 1), b),
+                            ("XOR", None, p), ("XOR", None, s),
+                            ("AND", 2, g), ("AND", 2, t), ("OR", 2, c)])
+            connections.extend([(a, p + ".I1"), (b, p + ".I2"),
+                                (p, s + ".I1"), (carry, s + ".I2"),
+                                (a, g + ".I1"), (b, g + ".I2"),
+                                (p, t + ".I1"), (carry, t + ".I2"),
+                                (g, c + ".I1"), (t, c + ".I2")])
+            carry = c
+        monitors = ["S" + str(bit) for bit in range(width)] + [carry]
+        return self.make_definition(devices, connections, monitors)
+
+    def lookahead_adder(self, width):
+        """Return a carry-lookahead adder of the given width.
+
+        The carries of each block of four bits are computed directly from
+        the propagate and generate signals of the block and the carry into
+        it, and the carry rips from block to block. The switches and
+        monitored signals are the same as those of ripple_carry_adder.
+        """
+        devices = [("SWITCH", 0, "CIN")]
+        connections = []
+        for bit in range(width):
+            a, b = "A" + str(bit), "B" + str(bit)
+            p, g = "P" + str(bit), "G" + str(bit)
+            devices.extend([("SWITCH", self.random.randint(0, 1), a),
+                            ("SWITCH", self.random.randint(0, 1), b),
+                            ("XOR", None, p), ("AND", 2, g)])
+            connections.extend([(a, p + ".I1"), (b, p + ".I2"),
+                                (a, g + ".I1"), (b, g + ".I2")])
+
+        block_carry = "CIN"
+        carry = "CIN"
+        for bit in range(width):
+            block_start = bit - bit % 4
+            if bit == block_start:
+                block_carry = carry
+            s, c = "S" + str(bit), "C" + str(bit + 1)
+            devices.append(("XOR", None, s))
+            connections.extend([("P" + str(bit), s + ".I1"),
+                                (carry, s + ".I2")])
+
+            # C<bit+1> is G<bit>, or G<m> and P<m+1> ... P<bit> for every
+            # earlier bit m of the block, or the block carry and P<start>
+            # ... P<bit>
+            terms = ["G" + str(bit)]
+            for first_bit in range(bit, block_start - 1, -1):
+                if first_bit == block_start:
+                    generator = block_carry
+                else:
+                    generator = "G" + str(first_bit - 1)
+                term = "".join(["T", str(bit), "N", str(first_bit)])
+                devices.append(("AND", bit - first_bit + 2, term))
+                connections.append((generator, term + ".I1"))
+                for input_number, propagate_bit in enumerate(
+                        range(first_bit, bit + 1)):
+                    connections.append(("P" + str(propagate_bit),
+                                        "".join([term, ".I",
+                                                 str(input_number + 2)])))
+                terms.append(term)
+            devices.append(("OR", len(terms), c))
+            for input_number, term in enumerate(terms):
+                connections.append((term, "".join([c, ".I",
+                                                   str(input_number + 1)])))
+            carry = c
+        monitors = ["S" + str(bit) for bit in range(width)] + [carry]
+        return self.make_definition(devices, connections, monitors)
+
+    def counter(self, bits):
+        """Return a synchronous counter of D-types with the given bits.
+
+        Every D-type is clocked by CLK and toggles when all the lower bits
+        are HIGH, through the XOR gates X1, X2, ... and the carry chain of
+        AND gates K2, K3, .... The switch RST clears the count, and the
+        outputs D0.Q, D1.Q, ... are monitored.
+        """
+        devices = [("CLOCK", 1, "CLK"), ("SWITCH", 0, "RST"),
+                   ("SWITCH", 0, "ZERO")]
+        connections = []
+        carry = None  # HIGH when all the lower bits are HIGH
+        for bit in range(bits):
+            d = "D" + str(bit)
+            devices.append(("DTYPE", None, d))
+            connections.extend([("CLK", d + ".CLK"), ("ZERO", d + ".SET"),
+                                ("RST", d + ".CLEAR")])
+            if carry is None:
+                connections.append((d + ".QBAR", d + ".DATA"))
+                carry = d + ".Q"
+                continue
+            x = "X" + str(bit)
+            devices.append(("XOR", None, x))
+            connections.extend([(d + ".Q", x + ".I1"), (carry, x + ".I2"),
+                                (x, d + ".DATA")])
+            if bit < bits - 1:
+                k = "K" + str(bit + 1)
+                devices.append(("AND", 2, k))
+                connections.extend([(carry, k + ".I1"),
+                                    (d + ".Q", k + ".I2")])
+                carry = k
+        monitors = ["D" + str(bit) + ".Q" for bit in range(bits)]
+        return self.make_definition(devices, connections, monitors)
+
+    def lfsr(self, bits):
+        """Return a linear-feedback shift register with the given bits.
+
+        The D-types D0, D1, ... shift on every clock edge, and the XOR of the
+        tapped outputs is fed back to D0. Maximal-length taps are used for
+        up to 16 bits. The switch INIT sets every D-type, so that the
+        register does not lock up with all its outputs LOW.
+
+        The D-types are declared from the output end, as the network settles
+        each D-type before executing the next, so each one must sample the
+        output of the previous one before that changes.
+        """
+        if bits < 2:  # a single D-type feeds back its own output
+            taps = [1]
+        else:
+            taps = self.lfsr_taps.get(bits, [bits, bits - 1])
+        devices = [("CLOCK", 1, "CLK"), ("SWITCH", 0, "INIT"),
+                   ("SWITCH", 0, "ZERO")]
+        connections = []
+        for bit in range(bits - 1, -1, -1):
+            d = "D" + str(bit)
+            devices.append(("DTYPE", None, d))
+            connections.extend([("CLK", d + ".CLK"), ("INIT", d + ".SET"),
+                                ("ZERO", d + ".CLEAR")])
+            if bit > 0:
+                connections.append(("D" + str(bit - 1) + ".Q",
+                                    d + ".DATA"))
+
+        # XOR gates have two inputs, so the taps are combined in a chain
+        feedback = "D" + str(taps[0] - 1) + ".Q"
+        for number, tap in enumerate(taps[1:]):
+            x = "X" + str(number)
+            devices.append(("XOR", None, x))
+            connections.extend([(feedback, x + ".I1"),
+                                ("D" + str(tap - 1) + ".Q", x + ".I2")])
+            feedback = x
+        connections.append((feedback, "D0.DATA"))
+        monitors = ["D" + str(bit) + ".Q" for bit in range(bits)]
+        return self.make_definition(devices, connections, monitors)
+
+    def random_dag(self, gates, fan_in=None):
+        """Return the given number of random gates without feedback.
+
+        fan_in lists the relative weights of gates with 1, 2, ... inputs, and
+        defaults to mostly 2-input gates. Every input is connected to a
+        switch, the clock or an earlier gate, and the last gates are
+        monitored.
+        """
+        if fan_in is None:
+            fan_in = [1, 4, 2, 1]
+        devices = [("CLOCK", 2, "CLK")]
+        outputs = ["CLK"]
+        for switch in range(max(2, gates // 10)):
+            name = "SW" + str(switch)
+            devices.append(("SWITCH", self.random.randint(0, 1), name))
+            outputs.append(name)
+
+        connections = []
+        input_counts = range(1, len(fan_in) + 1)
+        for gate in range(gates):
+            name = "G" + str(gate)
+            [inputs] = self.random.choices(input_counts, fan_in)
+            if inputs == 2 and self.random.random() < 0.2:
+                devices.append(("XOR", None, name))
+            else:
+                device_kind = self.random.choice(["AND", "OR", "NAND",
+                                                  "NOR"])
+                devices.append((device_kind, inputs, name))
+            for input_number in range(inputs):
+                connections.append((self.random.choice(outputs),
+                                    "".join([name, ".I",
+                                             str(input_number + 1)])))
+            outputs.append(name)
+        monitors = ["G" + str(gate) for gate in range(max(0, gates - 4),
+                                                      gates)]
+        return self.make_definition(devices, connections, monitors)
+
+    def nand_chain(self, depth):
+        """Return a chain of inverting NAND gates of the given depth.
+
+        The clock drives N1, every gate drives the next, and the last gate
+        is monitored. Chains deeper than about 35 gates do not settle within
+        the iteration limit of the network, and are reported as oscillating.
+        """
+        devices = [("CLOCK", 1, "CLK")]
+        connections = []
+        output = "CLK"
+        for gate in range(1, depth + 1):
+            name = "N" + str(gate)
+            devices.append(("NAND", 1, name))
+            connections.append((output, name + ".I1"))
+            output = name
+        return self.make_definition(devices, connections, [output])
+
+    def latch_array(self, latches):
+        """Return an array of gated D latches made from NAND gates.
+
+        Every latch has its own data switch and is enabled by the shared
+        clock. The outputs Q0, Q1, ... are monitored.
+        """
+        devices = [("CLOCK", 2, "EN")]
+        connections = []
+        for latch in range(latches):
+            d, ni = "D" + str(latch), "NI" + str(latch)
+            ns, nr = "NS" + str(latch), "NR" + str(latch)
+            q, qb = "Q" + str(latch), "QB" + str(latch)
+            devices.extend([("SWITCH", self.random.randint(0, 1), d),
+                            ("NAND", 1, ni), ("NAND", 2, ns),
+                            ("NAND", 2, nr), ("NAND", 2, q),
+                            ("NAND", 2, qb)])
+            connections.extend([(d, ni + ".I1"),
+                                (d, ns + ".I1"), ("EN", ns + ".I2"),
+                                (ni, nr + ".I1"), ("EN", nr + ".I2"),
+                                (ns, q + ".I1"), (qb, q + ".I2"),
+                                (nr, qb + ".I1"), (q, qb + ".I2")])
+        monitors = ["Q" + str(latch) for latch in range(latches)]
+        return self.make_definition(devices, connections, monitors)
+
+
+def main(arg_list):
+    """Parse the command line options and arguments specified in arg_list.
+
+    Write the definition of the requested circuit to a file, or print it.
+    """
+    usage_message = ("Usage:\n"
+                     "Show help: generator.py -h\n"
+                     "Write a circuit: generator.py [-s <seed>] "
+                     "[-o <file path>] <family> <size>\n"
+                     "Families: ripple, lookahead, counter, lfsr, dag, "
+                     "chain, latches")
+    try:
+        options, arguments = getopt.getopt(arg_list, "hs:o:")
+    except getopt.GetoptError:
+        print("Error: invalid command line arguments\n")
+        print(usage_message)
+        sys.exit()
+
+    seed = 0
+    path = None
+    for option, value in options:
+        if option == "-h":  # print the usage message
+            print(usage_message)
+            sys.exit()
+        elif option == "-s":
+            if not value.isdigit():
+                print("Error: the seed must be a number\n")
+                print(usage_message)
+                sys.exit()
+            seed = int(value)
+        elif option == "-o":
+            path = value
+
+    if len(arguments) != 2 or not arguments[1].isdigit():
+        print("Error: a family and a size are required\n")
+        print(usage_message)
+        sys.exit()
+    [family, size] = arguments
+    definition = CircuitGenerator(seed).generate(family, int(size))
+    if definition is None:
+        print("Error: unknown family\n")
+        print(usage_message)
+        sys.exit()
+
+    if path is None:
+        print(definition, end="")
+    else:
+        with open(path, "w") as definition_file:
+            definition_file.write(definition)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -1,5 +1,5 @@
 """
-This module contains three classes that are used for custom windows
+This module contains six classes that are used for custom windows
 in the Gui and a function for raising error pop up messages
 
 Classes
@@ -11,6 +11,10 @@ WarningDialog(parent, message, caption)
 RoundedScrollWindow(parent, title, devices, canvas)
 
 DeviceMenu(parent, title, devices, canvas)
+
+StatsDialog(parent, caption, network)
+
+BreakpointDialog(parent, caption, simulator)
 """
 
 import wx
@@ -484,3 +488,203 @@ class DeviceMenu(wx.Dialog):
         Id = event.GetId()
         widget = self.FindWindowById(Id)
         self.device_name = widget.GetValue()
+
+
+class StatsDialog(wx.Dialog):
+    """Class that inherits from the wx.Dialog class and creates a panel
+    that turns profiling, activity statistics and toggle coverage of the
+    network on or off and displays the statistics recorded so far
+
+    Parameters
+    ----------
+    parent: the parent window that the dialog box belongs to
+    caption: the caption for the dialog box
+    network: Network object whose statistics are displayed
+
+    Public Methods
+    --------------
+    update_report(self): Updates the displayed statistics
+
+    on_profiling_check(self, event): Handles the event when the user
+        turns profiling on or off
+
+    on_activity_check(self, event): Handles the event when the user
+        turns activity statistics on or off
+
+    on_coverage_check(self, event): Handles the event when the user
+        turns toggle coverage on or off
+
+    on_reset_button(self, event): Handles the event when the user
+        presses the reset button by clearing the statistics
+    """
+
+    def __init__(self, parent, caption, network):
+        super().__init__(parent, title=caption,
+                         style=wx.DEFAULT_DIALOG_STYLE | wx.RESIZE_BORDER)
+        self.network = network
+
+        # Create the profiling check box and the statistics text
+        self.profiling_check = wx.CheckBox(
+            self, wx.ID_ANY, wx.GetTranslation("Profiling"))
+        self.profiling_check.SetValue(network.profiler is not None)
+        self.activity_check = wx.CheckBox(
+            self, wx.ID_ANY, wx.GetTranslation("Switching activity"))
+        self.activity_check.SetValue(network.activity is not None)
+        self.coverage_check = wx.CheckBox(
+            self, wx.ID_ANY, wx.GetTranslation("Toggle coverage"))
+        self.coverage_check.SetValue(network.coverage is not None)
+        self.report_text = wx.StaticText(self, wx.ID_ANY, "")
+        self.report_text.SetFont(wx.Font(
+            11, wx.FONTFAMILY_TELETYPE, wx.FONTSTYLE_NORMAL,
+            wx.FONTWEIGHT_NORMAL))
+
+        # Create the reset and OK buttons
+        reset_button = wx.Button(self, wx.ID_ANY,
+                                 wx.GetTranslation("Reset"))
+        ok_button = wx.Button(self, wx.ID_OK, "OK")
+        button_sizer = wx.BoxSizer(wx.HORIZONTAL)
+        button_sizer.Add(reset_button, 0, wx.ALL, 5)
+        button_sizer.Add(ok_button, 0, wx.ALL, 5)
+
+        sizer = wx.BoxSizer(wx.VERTICAL)
+        sizer.Add(self.profiling_check, 0, wx.ALL, 10)
+        sizer.Add(self.activity_check, 0, wx.LEFT | wx.RIGHT, 10)
+        sizer.Add(self.coverage_check, 0, wx.ALL, 10)
+        sizer.Add(self.report_text, 1, wx.EXPAND | wx.ALL, 10)
+        sizer.Add(button_sizer, 0, wx.ALIGN_CENTER | wx.ALL, 5)
+
+        self.profiling_check.Bind(wx.EVT_CHECKBOX, self.on_profiling_check)
+        self.activity_check.Bind(wx.EVT_CHECKBOX, self.on_activity_check)
+        self.coverage_check.Bind(wx.EVT_CHECKBOX, self.on_coverage_check)
+        reset_button.Bind(wx.EVT_BUTTON, self.on_reset_button)
+
+        self.SetSizer(sizer)
+        self.update_report()
+
+    def update_report(self):
+        """Updates the displayed statistics"""
+        lines = []
+        if self.network.profiler is not None:
+            lines.extend(self.network.profiler.get_report())
+        if self.network.activity is not None:
+            lines.extend(self.network.activity.get_report())
+        if self.network.coverage is not None:
+            lines.extend(self.network.coverage.get_report())
+        if lines:
+            self.report_text.SetLabel("\n".join(lines))
+        else:
+            self.report_text.SetLabel(wx.GetTranslation(
+                "Turn profiling, switching activity or toggle coverage on\n"
+                "and run the simulation to record statistics."))
+        self.Fit()
+
+    def on_profiling_check(self, event):
+        """Handles the event when the user turns profiling on or off"""
+        self.network.set_profiling(self.profiling_check.GetValue())
+        self.update_report()
+
+    def on_activity_check(self, event):
+        """Handles the event when the user turns activity statistics on or
+        off"""
+        self.network.set_activity(self.activity_check.GetValue())
+        self.update_report()
+
+    def on_coverage_check(self, event):
+        """Handles the event when the user turns toggle coverage on or
+        off"""
+        self.network.set_coverage(self.coverage_check.GetValue())
+        self.update_report()
+
+    def on_reset_button(self, event):
+        """Handles the event when the user presses the reset button by
+        clearing the statistics"""
+        if self.network.profiler is not None:
+            self.network.profiler.reset()
+        if self.network.activity is not None:
+            self.network.activity.reset()
+        if self.network.coverage is not None:
+            self.network.coverage.reset()
+        self.update_report()
+
+
+class BreakpointDialog(wx.Dialog):
+    """Class that inherits from the wx.Dialog class and creates a panel
+    for adding conditions that stop runs of the simulation at the cycle
+    they are met at, and for removing them
+
+    Parameters
+    ----------
+    parent: the parent window that the dialog box belongs to
+    caption: the caption for the dialog box
+    simulator: Simulator object whose breakpoints are edited
+
+    Public Methods
+    --------------
+    update_list(self): Updates the displayed breakpoints
+
+    on_add_button(self, event): Handles the event when the user presses
+        the add button by adding the entered condition
+
+    on_clear_button(self, event): Handles the event when the user
+        presses the clear button by removing all breakpoints
+    """
+
+    def __init__(self, parent, caption, simulator):
+        super().__init__(parent, title=caption,
+                         style=wx.DEFAULT_DIALOG_STYLE | wx.RESIZE_BORDER)
+        self.simulator = simulator
+
+        # Create the list of breakpoints and the condition entry
+        self.list_text = wx.StaticText(self, wx.ID_ANY, "")
+        help_text = wx.StaticText(self, wx.ID_ANY, wx.GetTranslation(
+            "Stop when, for example: D1.Q high, CLK rises and SW1 low,\n"
+            "G1 changes, cycle 100"))
+        self.condition_entry = wx.TextCtrl(self, wx.ID_ANY, "",
+                                           size=(300, -1),
+                                           style=wx.TE_PROCESS_ENTER)
+
+        # Create the add, clear and OK buttons
+        add_button = wx.Button(self, wx.ID_ANY, wx.GetTranslation("Add"))
+        clear_button = wx.Button(self, wx.ID_ANY,
+                                 wx.GetTranslation("Clear"))
+        ok_button = wx.Button(self, wx.ID_OK, "OK")
+        button_sizer = wx.BoxSizer(wx.HORIZONTAL)
+        button_sizer.Add(add_button, 0, wx.ALL, 5)
+        button_sizer.Add(clear_button, 0, wx.ALL, 5)
+        button_sizer.Add(ok_button, 0, wx.ALL, 5)
+
+        sizer = wx.BoxSizer(wx.VERTICAL)
+        sizer.Add(self.list_text, 1, wx.EXPAND | wx.ALL, 10)
+        sizer.Add(help_text, 0, wx.ALL, 10)
+        sizer.Add(self.condition_entry, 0, wx.EXPAND | wx.ALL, 10)
+        sizer.Add(button_sizer, 0, wx.ALIGN_CENTER | wx.ALL, 5)
+
+        add_button.Bind(wx.EVT_BUTTON, self.on_add_button)
+        self.condition_entry.Bind(wx.EVT_TEXT_ENTER, self.on_add_button)
+        clear_button.Bind(wx.EVT_BUTTON, self.on_clear_button)
+
+        self.SetSizer(sizer)
+        self.update_list()
+
+    def update_list(self):
+        """Updates the displayed breakpoints"""
+        if self.simulator.breakpoints:
+            self.list_text.SetLabel("\n".join(self.simulator.breakpoints))
+        else:
+            self.list_text.SetLabel(wx.GetTranslation("No breakpoints"))
+        self.Fit()
+
+    def on_add_button(self, event):
+        """Handles the event when the user presses the add button by
+        adding the entered condition"""
+        if self.simulator.add_breakpoint(self.condition_entry.GetValue()):
+            self.condition_entry.SetValue("")
+            self.update_list()
+        else:
+            error_pop_up(wx.GetTranslation('Invalid breakpoint condition'))
+
+    def on_clear_button(self, event):
+        """Handles the event when the user presses the clear button by
+        removing all breakpoints"""
+        self.simulator.clear_breakpoints()
+        self.update_list()
@@ -1678,11 +1678,13 @@ class InteractiveCanvas(wxcanvas.GLCanvas):
         oy = (size.height - event.GetY() - self.pan_y) / self.zoom
         for switch in self.switch_GL_list:
             if switch.is_clicked(ox, oy):
+                # set_switch lets the network re-execute only the devices
+                # driven by this switch on the next cycle
                 if switch.device.switch_state:
-                    switch.device.switch_state = 0
+                    self.devices.set_switch(switch.device.device_id, 0)
                     switch.device.outputs[None] = 0
                 else:
-                    switch.device.switch_state = 1
+                    self.devices.set_switch(switch.device.device_id, 1)
                     switch.device.outputs[None] = 1
                 break
 
@@ -2,6 +2,7 @@ from names import Names
 from devices import Devices
 from network import Network
 from monitors import Monitors
+from simulator import Simulator
 from scanner import Scanner
 from parse import Parser
 
@@ -12,7 +13,8 @@ import builtins
 from gui_plotting_canvas import TraceCanvas
 from gui_interactive_canvas import InteractiveCanvas
 from gui_components import error_pop_up, DeviceMenu, RoundedScrollWindow, \
-    CustomDialog, WarningDialog
+    CustomDialog, WarningDialog, StatsDialog, BreakpointDialog
+from stimulus import Stimulus
 
 
 class GuiLinux(wx.Frame):
@@ -59,6 +61,10 @@ class GuiLinux(wx.Frame):
         there is a tick to animate the logic circuit display and
         plotting of the monitor traces cycle by cycle.
 
+    is_stimulus_error(self, error_code):
+        Returns True if a run failed on an invalid line of the stimulus
+        file rather than in the network
+
     on_sash_position_change_side(self, event):
         Handles the event where the sash position of the window changes
         - this is used to constrain the sidebar to either appear
@@ -110,6 +116,8 @@ class GuiLinux(wx.Frame):
         self.first_run = True
         self.cycles = 10
         self.cycles_completed = cyc_comp
+        self.simulator = Simulator(names, devices, network, monitors,
+                                   cyc_comp)
         self.font_buttons = wx.Font(
             14, wx.FONTFAMILY_DEFAULT,    # font to be used for all buttons
             wx.FONTSTYLE_NORMAL, wx.FONTWEIGHT_BOLD)
@@ -149,6 +157,9 @@ class GuiLinux(wx.Frame):
         fileMenu.Append(wx.ID_ANY, _("&Save Circuit"))
         fileMenu.Append(wx.ID_ANY, _("&Load Circuit"))
         fileMenu.AppendSubMenu(langMenu, _("&Choose Language"))
+        fileMenu.Append(wx.ID_ANY, _("S&tatistics"))
+        fileMenu.Append(wx.ID_ANY, _("Load St&imulus"))
+        fileMenu.Append(wx.ID_ANY, _("&Breakpoints"))
         menuBar.Append(fileMenu, _("&Menu"))
         self.SetMenuBar(menuBar)
         self.SetMinSize((900, 766))
@@ -159,6 +170,9 @@ class GuiLinux(wx.Frame):
         self.dark_id = themeMenu.FindItemByPosition(1).GetId()
         self.save_id = fileMenu.FindItemByPosition(3).GetId()
         self.load_id = fileMenu.FindItemByPosition(4).GetId()
+        self.stats_id = fileMenu.FindItemByPosition(6).GetId()
+        self.stimulus_id = fileMenu.FindItemByPosition(7).GetId()
+        self.breakpoint_id = fileMenu.FindItemByPosition(8).GetId()
         self.chinese_id = langMenu.FindItemByPosition(0).GetId()
         self.eng_id = langMenu.FindItemByPosition(1).GetId()
         self.german_id = langMenu.FindItemByPosition(2).GetId()
@@ -387,6 +401,39 @@ class GuiLinux(wx.Frame):
             mb.ShowModal()
             mb.Destroy()
 
+        if Id == self.stats_id:
+            # Display panel for turning profiling on and off and showing
+            # the statistics recorded by the network
+            dialog = StatsDialog(self, wx.GetTranslation("Statistics"),
+                                 self.network)
+            dialog.ShowModal()
+            dialog.Destroy()
+
+        if Id == self.breakpoint_id:
+            # Display panel for adding and removing the conditions that
+            # stop runs
+            dialog = BreakpointDialog(self, wx.GetTranslation("Breakpoints"),
+                                      self.simulator)
+            dialog.ShowModal()
+            dialog.Destroy()
+
+        if Id == self.stimulus_id:
+            # Apply the switch events of a stimulus file during runs,
+            # counted from the cold start-up of the next run
+            dialog = wx.FileDialog(
+                self, message=wx.GetTranslation("Choose a stimulus file"),
+                style=wx.FD_OPEN)
+
+            if dialog.ShowModal() == wx.ID_OK:
+                try:
+                    self.simulator.set_stimulus(Stimulus(
+                        self.names, self.devices, dialog.GetPath()))
+                except OSError:
+                    error_pop_up(wx.GetTranslation(
+                        'Stimulus could not be loaded from file'))
+
+            dialog.Destroy()
+
         if Id == self.save_id:
             circuit_string = self.circuit_canvas.create_file_string()
             dialog = wx.FileDialog(
@@ -492,6 +539,9 @@ class GuiLinux(wx.Frame):
             gui_new = GuiLinux(
                 "Logic Simulator", self.names, self.devices, self.network,
                 self.monitors, self.dark_mode, lang, self.cycles_completed)
+            gui_new.simulator.set_stimulus(self.simulator.stimulus)
+            for expression in self.simulator.breakpoints:
+                gui_new.simulator.add_breakpoint(expression)
             self.Close()
             gui_new.Show(True)
 
@@ -522,28 +572,28 @@ class GuiLinux(wx.Frame):
 
         # if the number of cycles provided is valid
         if self.cycles is not None and self.cycles > 0:
-            self.cycles_completed = 0
-            self.monitors.reset_monitors()
-            self.devices.cold_startup()
+            self.simulator.reset()
 
             # execute run for specified no. cycles
-            for i in range(self.cycles):
-                error_code = self.network.execute_network()
-                if error_code == self.network.NO_ERROR:
-                    self.monitors.record_signals()
-                    self.cycles_completed += 1
-
-                # show error messages if run fails
-                elif error_code == \
-                        self.network.OSCILLATING:
-                    error_pop_up(
-                        _('Run failed to execute - network oscillating'))
-                    return
-                elif error_code == \
-                        self.network.INPUTS_NOT_CONNECTED:
-                    error_pop_up(_('Run failed to execute - make sure all '
-                                 'devices are connected'))
-                    return
+            error_code = self.simulator.run_network(self.cycles)
+            self.cycles_completed = self.simulator.cycles_completed
+
+            # show error messages if run fails
+            if error_code == self.network.OSCILLATING:
+                error_pop_up(
+                    _('Run failed to execute - network oscillating'))
+                return
+            elif error_code == self.network.INPUTS_NOT_CONNECTED:
+                error_pop_up(_('Run failed to execute - make sure all '
+                             'devices are connected'))
+                return
+            elif self.is_stimulus_error(error_code):
+                error_pop_up(_('Run failed to execute - invalid line in '
+                             'stimulus file'))
+                return
+            elif error_code != self.network.NO_ERROR:
+                error_pop_up(_('Run failed to execute'))
+                return
 
             # adds continue button to GUI after first run has been executed
             if self.first_run:
@@ -570,6 +620,12 @@ class GuiLinux(wx.Frame):
             self.trace_canvas.Refresh()  # call plotting event for canvases
             self.circuit_canvas.Refresh()
 
+            # show where the run stopped if a breakpoint was met
+            if self.simulator.breakpoint_cycle is not None:
+                wx.MessageBox(_('Stopped at breakpoint after cycle') +
+                              f" {self.simulator.breakpoint_cycle}",
+                              _('Breakpoint'), wx.OK | wx.ICON_INFORMATION)
+
         else:  # show error dialogue box if given cycle no. is not valid
             error_pop_up(_('Please select valid '
                          'number of cycles greater than zero'))
@@ -594,15 +650,13 @@ class GuiLinux(wx.Frame):
         if lab == _('Animate'):
             # perform cold startup if simulating from scratch
             if self.cycles_completed == 0:
-                self.monitors.reset_monitors()
-                self.devices.cold_startup()
+                self.simulator.reset()
 
             # start animation if network can be executed successfully
             # run network for one cycle
-            error_code = self.network.execute_network()
+            error_code = self.simulator.run_network(1)
             if error_code == self.network.NO_ERROR:
-                self.monitors.record_signals()
-                self.cycles_completed += 1
+                self.cycles_completed = self.simulator.cycles_completed
                 self.trace_canvas.continue_pan_reset = True
                 self.trace_canvas.Refresh()
                 self.circuit_canvas.Refresh()
@@ -641,6 +695,13 @@ class GuiLinux(wx.Frame):
                 error_pop_up(_('Run failed to execute - make sure all '
                              'devices are connected'))
                 return
+            elif self.is_stimulus_error(error_code):
+                error_pop_up(_('Run failed to execute - invalid line in '
+                             'stimulus file'))
+                return
+            elif error_code != self.network.NO_ERROR:
+                error_pop_up(_('Run failed to execute'))
+                return
 
         elif lab == _('Stop'):
             button.SetLabel(_('Animate'))
@@ -653,16 +714,23 @@ class GuiLinux(wx.Frame):
         plotting of the monitor traces"""
         # execute network for one cycle on tick then update canvases
         # and update cycles completed text widget
-        error_code = self.network.execute_network()
+        error_code = self.simulator.run_network(1)
         if error_code == self.network.NO_ERROR:
-            self.monitors.record_signals()
-            self.cycles_completed += 1
+            self.cycles_completed = self.simulator.cycles_completed
             # change pan to include far right of plot if necessary
             self.trace_canvas.continue_pan_reset = True
             self.trace_canvas.Refresh()
             self.circuit_canvas.Refresh()
             self.cycles_comp_text.SetLabel(
                 f"{_('Cycles Completed')}: {self.cycles_completed}")
+            # stop the animation at the cycle a breakpoint is met
+            if self.simulator.breakpoint_cycle is not None:
+                self.animate_button.SetLabel(_('Animate'))
+                self.animation_constraint = False
+                self.timer.Stop()
+                wx.MessageBox(_('Stopped at breakpoint after cycle') +
+                              f" {self.simulator.breakpoint_cycle}",
+                              _('Breakpoint'), wx.OK | wx.ICON_INFORMATION)
 
         # show error messages if run fails
         elif error_code == self.network.OSCILLATING:
@@ -678,6 +746,27 @@ class GuiLinux(wx.Frame):
             self.animation_constraint = False
             self.timer.Stop()
             return
+        elif self.is_stimulus_error(error_code):
+            error_pop_up(_('Run failed to execute - invalid line in '
+                         'stimulus file'))
+            self.animate_button.SetLabel(_('Animate'))
+            self.animation_constraint = False
+            self.timer.Stop()
+            return
+        elif error_code != self.network.NO_ERROR:
+            error_pop_up(_('Run failed to execute'))
+            self.animate_button.SetLabel(_('Animate'))
+            self.animation_constraint = False
+            self.timer.Stop()
+            return
+
+    def is_stimulus_error(self, error_code):
+        """Return True if the run failed on an invalid line of the
+        stimulus file rather than in the network"""
+        stimulus = self.simulator.stimulus
+        return stimulus is not None and \
+            error_code == stimulus.error_code and \
+            error_code != stimulus.NO_ERROR
 
     def on_sash_position_change_side(self, event):
         """Handles the event where the sash position of the window
@@ -738,31 +827,39 @@ class GuiLinux(wx.Frame):
             return
 
         if self.cycles > 0:  # if the number of cycles provided is valid
-            # execute network for one cycle on tick then update canvases
+            # execute network for specified no. cycles then update canvases
             # and update cycles completed text widget
-            for i in range(self.cycles):
-                error_code = self.network.execute_network()
-                if error_code == self.network.NO_ERROR:
-                    self.monitors.record_signals()
-                    self.cycles_completed += 1
-                    # change pan to include far right of plot if necessary
-                    self.trace_canvas.continue_pan_reset = True
-                    self.trace_canvas.Refresh()
-                    self.circuit_canvas.Refresh()
-                    self.cycles_comp_text.SetLabel(
-                        f"{_('Cycles Completed')}: {self.cycles_completed}")
-
-                # show error messages if run fails
-                elif error_code == \
-                        self.network.OSCILLATING:
-                    error_pop_up(
-                        _('Run failed to execute - network oscillating'))
-                    return
-                elif error_code == \
-                        self.network.INPUTS_NOT_CONNECTED:
-                    error_pop_up(_('Run failed to execute - make sure all '
-                                 'devices are connected'))
-                    return
+            error_code = self.simulator.run_network(self.cycles)
+            self.cycles_completed = self.simulator.cycles_completed
+            # change pan to include far right of plot if necessary
+            self.trace_canvas.continue_pan_reset = True
+            self.trace_canvas.Refresh()
+            self.circuit_canvas.Refresh()
+            self.cycles_comp_text.SetLabel(
+                f"{_('Cycles Completed')}: {self.cycles_completed}")
+
+            # show error messages if run fails
+            if error_code == self.network.OSCILLATING:
+                error_pop_up(
+                    _('Run failed to execute - network oscillating'))
+                return
+            elif error_code == self.network.INPUTS_NOT_CONNECTED:
+                error_pop_up(_('Run failed to execute - make sure all '
+                             'devices are connected'))
+                return
+            elif self.is_stimulus_error(error_code):
+                error_pop_up(_('Run failed to execute - invalid line in '
+                             'stimulus file'))
+                return
+            elif error_code != self.network.NO_ERROR:
+                error_pop_up(_('Run failed to execute'))
+                return
+
+            # show where the run stopped if a breakpoint was met
+            if self.simulator.breakpoint_cycle is not None:
+                wx.MessageBox(_('Stopped at breakpoint after cycle') +
+                              f" {self.simulator.breakpoint_cycle}",
+                              _('Breakpoint'), wx.OK | wx.ICON_INFORMATION)
 
         else:  # show error dialogue box if cycle no. is not valid
             error_pop_up(_('Please select valid '
@@ -869,6 +966,7 @@ class GuiLinux(wx.Frame):
         self.first_run = True
         self.cycles = 10
         self.cycles_completed = 0
+        self.simulator = Simulator(names, devices, network, monitors)
 
         self.plotting_sizer.Detach(self.trace_canvas)
         self.circuit_sizer.Detach(self.circuit_canvas)
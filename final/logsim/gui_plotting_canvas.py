@@ -168,8 +168,8 @@ class TraceCanvas(wxcanvas.GLCanvas):
         #  Iterate through monitors and plot trace for each one
         for device_id, output_id in self.monitors.monitors_dictionary:
             monitor_name = self.devices.get_signal_name(device_id, output_id)
-            signal_list = self.monitors.monitors_dictionary[(device_id,
-                                                             output_id)]
+            signal_list = list(self.monitors.monitors_dictionary[
+                (device_id, output_id)])
             vertices = []
 
             # randomly choose viable trace colour if not already chosen
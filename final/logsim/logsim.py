@@ -9,8 +9,13 @@ Usage
 Show help: logsim.py -h
 Command line user interface: logsim.py -c <file path>
 Graphical user interface: logsim.py <file path>
+Profiled run: logsim.py -s <cycles> [-p <stats prefix>] [-m]
+              [-v <coverage path>] <file path>
+Switch events from a stimulus file can be applied in any of these with
+-i <stimulus path>.
 """
 import getopt
+import os
 import sys
 import tempfile
 import wx
@@ -22,9 +27,85 @@ from monitors import Monitors
 from scanner import Scanner
 from parse import Parser
 from userint import UserInterface
+from simulator import Simulator
+from phases import PhaseProfiler
+from stimulus import Stimulus
 from gui_linux import GuiLinux
 
 
+def scan_file(path):
+    """Read every symbol in the file at path and return how many there are."""
+    scanner = Scanner(path, Names())
+    symbol_count = 0
+    while scanner.get_symbol().type != scanner.EOF:
+        symbol_count += 1
+    return symbol_count
+
+
+def set_stimulus(simulator, stimulus_path):
+    """Set the stimulus of the simulator to the file at stimulus_path.
+
+    Nothing is done if stimulus_path is None. Return False if the file
+    cannot be opened.
+    """
+    if stimulus_path is None:
+        return True
+    try:
+        simulator.set_stimulus(Stimulus(simulator.names, simulator.devices,
+                                        stimulus_path))
+    except OSError:
+        print("Error: the stimulus file could not be opened")
+        return False
+    return True
+
+
+def run_profiled(path, cycles, profile_prefix, trace_memory,
+                 stimulus_path=None, coverage_path=None):
+    """Simulate the file at path for a number of cycles without a user
+    interface, measuring the scan, parse, build and simulate phases.
+
+    The measurements are printed, and the pstats files are written if
+    profile_prefix is not None. The switch events of the stimulus file at
+    stimulus_path are applied if it is not None. If coverage_path is not
+    None, the toggle coverage of the run is merged into the coverage file
+    at that path.
+    """
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    monitors = Monitors(names, devices, network)
+    simulator = Simulator(names, devices, network, monitors)
+    phase_profiler = PhaseProfiler(profile_prefix, trace_memory)
+
+    phase_profiler.run_phase("scan", scan_file, path)
+    scanner = Scanner(path, names)
+    parser = Parser(names, devices, network, monitors, scanner)
+    if not phase_profiler.run_phase("parse", parser.parse_network):
+        print("Error: the definition file could not be parsed")
+        return
+    if not set_stimulus(simulator, stimulus_path):
+        return
+
+    if coverage_path is not None:
+        network.set_coverage(True)
+        if os.path.exists(coverage_path):
+            network.coverage.load(coverage_path)
+
+    simulator.reset()
+    phase_profiler.run_phase("build", network.prepare_network)
+    if phase_profiler.run_phase("simulate", simulator.run_network,
+                                cycles) != network.NO_ERROR:
+        print("Error: the network failed after",
+              simulator.cycles_completed, "cycles")
+    for line in phase_profiler.get_report():
+        print(line)
+
+    if coverage_path is not None:
+        network.coverage.save(coverage_path)
+        for line in network.coverage.get_report():
+            print(line)
+
+
 def main(arg_list):
     """Parse the command line options and arguments specified in arg_list.
     Run either the command line user interface, the graphical user interface,
@@ -33,14 +114,53 @@ def main(arg_list):
     usage_message = ("Usage:\n"
                      "Show help: logsim.py -h\n"
                      "Command line user interface: logsim.py -c <file path>\n"
-                     "Graphical user interface: logsim.py <file path>")
+                     "Graphical user interface: logsim.py <file path>\n"
+                     "Profiled run: logsim.py -s <cycles> [-p <stats prefix>]"
+                     " [-m] [-v <coverage path>] <file path>\n"
+                     "Add -i <stimulus path> to apply the switch events of a "
+                     "stimulus file")
     try:
-        options, arguments = getopt.getopt(arg_list, "hctl:")
+        options, arguments = getopt.getopt(arg_list, "hctl:s:p:mi:v:")
     except getopt.GetoptError:
         print("Error: invalid command line arguments\n")
         print(usage_message)
         sys.exit()
 
+    # Options for a profiled run without a user interface
+    cycles = None
+    profile_prefix = None
+    trace_memory = False
+    stimulus_path = None
+    coverage_path = None
+    for option, value in options:
+        if option == "-s":
+            if not value.isdigit():
+                print("Error: the number of cycles must be a number\n")
+                print(usage_message)
+                sys.exit()
+            cycles = int(value)
+        elif option == "-p":
+            profile_prefix = value
+        elif option == "-m":
+            trace_memory = True
+        elif option == "-i":
+            stimulus_path = value
+        elif option == "-v":
+            coverage_path = value
+    if cycles is not None:
+        if len(arguments) != 1:  # wrong number of arguments
+            print("Error: one file path required\n")
+            print(usage_message)
+            sys.exit()
+        run_profiled(arguments[0], cycles, profile_prefix, trace_memory,
+                     stimulus_path, coverage_path)
+        sys.exit()
+    elif profile_prefix is not None or trace_memory or \
+            coverage_path is not None:
+        print("Error: -p, -m and -v are only used with -s\n")
+        print(usage_message)
+        sys.exit()
+
     # Initialise instances of the four inner simulator classes
     names = Names()
     devices = Devices(names)
@@ -56,7 +176,8 @@ def main(arg_list):
             if parser.parse_network():
                 # Initialise an instance of the userint.UserInterface() class
                 userint = UserInterface(names, devices, network, monitors)
-                userint.command_interface()
+                if set_stimulus(userint.simulator, stimulus_path):
+                    userint.command_interface()
             print(parser.error_count)
             sys.exit()
 
@@ -68,6 +189,7 @@ def main(arg_list):
                 app = wx.App()
                 gui = GuiLinux("Logic Simulator", names, devices, network,
                                monitors)
+                set_stimulus(gui.simulator, stimulus_path)
                 gui.Show(True)
                 app.MainLoop()
 
@@ -91,6 +213,7 @@ def main(arg_list):
     app = wx.App()
     gui = GuiLinux("Logic Simulator", names, devices, network,
                    monitors)
+    set_stimulus(gui.simulator, stimulus_path)
     gui.Show(True)
     app.MainLoop()
     sys.exit()
@@ -9,6 +9,12 @@ Monitors - records and displays specified output signals.
 
 """
 import collections
+import copy
+import itertools
+import time
+
+from conditions import Condition
+from traces import Trace
 
 
 class Monitors:
@@ -18,6 +24,13 @@ class Monitors:
     This class contains functions for recording and displaying the signal state
     of outputs specified by their device and port IDs.
 
+    If a trigger is set, the monitors work like a logic analyser: the
+    trigger condition is checked in every cycle, and only the windows of
+    cycles around the cycles it is met at are kept. The levels of the last
+    cycles are kept in a ring buffer, so that the cycles before a trigger
+    can be captured. The signal traces are not recorded while a trigger is
+    set.
+
     Parameters
     ----------
     names: instance of the names.Names() class.
@@ -35,7 +48,27 @@ class Monitors:
     get_monitor_signal(self, device_id, output_id): Returns the signal level of
                                                     the specified monitor.
 
-    record_signals(self): Records the current signal level of all monitors.
+    record_signals(self, cycles=1): Records the current signal level of all
+                                    monitors for the given number of cycles.
+
+    capture_signals(self, cycles=1): Checks the trigger and keeps the signal
+                                     levels of the cycles in its windows.
+
+    capture_cycle(self, previous, levels): Checks the trigger and keeps the
+                                           signal levels of one cycle.
+
+    set_trigger(self, expression, pre_cycles=0, post_cycles=0): Sets the
+                    trigger condition and the windows of cycles captured.
+
+    reset_captures(self): Clears the captured windows.
+
+    get_captures(self): Returns the captured windows.
+
+    repeat_signals(self, period, cycles): Extends every signal trace by
+                            repeating its last period signal levels.
+
+    extend_signals(self, signals): Extends the signal traces of the given
+                                   monitors by the given signal levels.
 
     get_signal_names(self): Returns two lists of signal names: monitored and
                             not monitored.
@@ -44,7 +77,14 @@ class Monitors:
 
     get_margin(self): Returns the length of the longest monitor's name.
 
-    display_signals(self): Displays signal trace(s) in the text console.
+    display_signals(self, signals=None): Displays signal trace(s) in the
+                                         text console.
+
+    set_pruning(self, pruning): Sets whether only the devices the monitors
+                                depend on are simulated.
+
+    fork(self, devices, network): Returns a branch of the monitors that shares
+                                  the recorded traces.
     """
 
     def __init__(self, names, devices, network):
@@ -54,11 +94,36 @@ class Monitors:
         self.devices = devices
 
         # monitors_dictionary stores
-        # {(device_id, output_id): [signal_list]}
+        # {(device_id, output_id): signal_list}, where each signal_list is a
+        # traces.Trace() which shares its levels with forked branches
         self.monitors_dictionary = collections.OrderedDict()
 
-        [self.NO_ERROR, self.NOT_OUTPUT,
-         self.MONITOR_PRESENT] = self.names.unique_error_codes(3)
+        # True if the network only simulates the devices that the monitored
+        # signals depend on
+        self.pruning = False
+
+        [self.NO_ERROR, self.NOT_OUTPUT, self.MONITOR_PRESENT,
+         self.NOT_MONITORED, self.TRIGGER_SET] = \
+            self.names.unique_error_codes(5)
+
+        # trigger is the compiled function of the trigger condition, or None
+        # if every cycle is recorded. pre_cycles and post_cycles are the
+        # numbers of cycles captured before and after each trigger.
+        self.trigger = None
+        self.trigger_condition = None
+        self.pre_cycles = 0
+        self.post_cycles = 0
+
+        # captures stores a [trigger cycle, first cycle, [levels of each
+        # cycle]] list for every captured window, with the levels of the
+        # monitors as a tuple. pre_trigger holds the levels of the last
+        # cycles, and previous_levels those of the last cycle. Cycles are
+        # counted from 1 since the monitors were reset.
+        self.captures = []
+        self.pre_trigger = collections.deque(maxlen=0)
+        self.previous_levels = None
+        self.captured_cycles = 0
+        self.post_cycles_left = 0  # of the window being captured
 
     def make_monitor(self, device_id, output_id, cycles_completed=0):
         """Add the specified signal to the monitors dictionary.
@@ -66,7 +131,9 @@ class Monitors:
         Return NO_ERROR if successful, or the corresponding error if not.
         """
         monitor_device = self.devices.get_device(device_id)
-        if monitor_device is None:
+        if self.trigger is not None:
+            return self.TRIGGER_SET
+        elif monitor_device is None:
             return self.network.DEVICE_ABSENT
         elif output_id not in monitor_device.outputs:
             return self.NOT_OUTPUT
@@ -77,19 +144,25 @@ class Monitors:
             # monitor, then initialise the signal trace with an n-length list
             # of BLANK signals. Otherwise, initialise the trace with an empty
             # list.
-            self.monitors_dictionary[(device_id, output_id)] = [
-                self.devices.BLANK] * cycles_completed
+            self.monitors_dictionary[(device_id, output_id)] = Trace(
+                [self.devices.BLANK] * cycles_completed)
+            if self.pruning:
+                self.network.prune_network(list(self.monitors_dictionary))
             return self.NO_ERROR
 
     def remove_monitor(self, device_id, output_id):
         """Remove the specified signal from the monitors dictionary.
 
-        Return True if successful.
+        Return True if successful. Monitors cannot be removed while a
+        trigger is set.
         """
-        if (device_id, output_id) not in self.monitors_dictionary:
+        if (device_id, output_id) not in self.monitors_dictionary or \
+                self.trigger is not None:
             return False
         else:
             del self.monitors_dictionary[(device_id, output_id)]
+            if self.pruning:
+                self.network.prune_network(list(self.monitors_dictionary))
             return True
 
     def get_monitor_signal(self, device_id, output_id):
@@ -102,15 +175,152 @@ class Monitors:
         else:
             return None
 
-    def record_signals(self):
+    def record_signals(self, cycles=1):
         """Record the current signal level for every monitor.
 
-        This function is called at every simulation cycle.
+        This function is called at every simulation cycle. If cycles is more
+        than one, the signal levels are recorded for that many cycles at once,
+        which is used when the network is unchanged for several cycles.
         """
-        for device_id, output_id in self.monitors_dictionary:
-            signal_level = self.get_monitor_signal(device_id, output_id)
-            self.monitors_dictionary[(device_id,
-                                      output_id)].append(signal_level)
+        profiler = self.network.profiler
+        if profiler is not None:
+            start_time = time.perf_counter()
+        if self.trigger is not None:
+            self.capture_signals(cycles)
+        else:
+            for device_id, output_id in self.monitors_dictionary:
+                signal_level = self.get_monitor_signal(device_id, output_id)
+                self.monitors_dictionary[(device_id, output_id)].append_run(
+                    signal_level, cycles)
+        if profiler is not None:
+            profiler.record_monitors(time.perf_counter() - start_time)
+
+    def capture_signals(self, cycles=1):
+        """Check the trigger and keep the signal levels in its windows.
+
+        The current signal levels are taken for the given number of cycles.
+        The repeated cycles after the first are skipped in one step while
+        the trigger cannot be met.
+        """
+        get_output_signal = self.network.get_output_signal
+        levels = tuple(get_output_signal(device_id, output_id)
+                       for device_id, output_id in self.monitors_dictionary)
+        if self.previous_levels is None:  # no edge in the first cycle
+            self.previous_levels = levels
+        self.capture_cycle(self.previous_levels, levels)
+        self.previous_levels = levels
+
+        cycles_left = cycles - 1
+        while cycles_left > 0:
+            if self.post_cycles_left:  # in the window after a trigger
+                window_cycles = min(cycles_left, self.post_cycles_left)
+                self.captures[-1][2].extend(itertools.repeat(levels,
+                                                             window_cycles))
+                self.post_cycles_left -= window_cycles
+            elif not self.trigger_condition.cycles and \
+                    not self.trigger(levels, levels, self.captured_cycles):
+                # The unchanged levels cannot meet the trigger
+                window_cycles = cycles_left
+            else:
+                self.capture_cycle(levels, levels)
+                cycles_left -= 1
+                continue
+            self.pre_trigger.extend(itertools.repeat(
+                levels, min(window_cycles, self.pre_cycles)))
+            self.captured_cycles += window_cycles
+            cycles_left -= window_cycles
+
+    def capture_cycle(self, previous, levels):
+        """Check the trigger and keep the signal levels of one cycle.
+
+        previous and levels are the signal levels of the monitors in the
+        last cycle and in this cycle. The trigger is not checked in the
+        window after a trigger.
+        """
+        self.captured_cycles += 1
+        if self.post_cycles_left:
+            self.captures[-1][2].append(levels)
+            self.post_cycles_left -= 1
+        elif self.trigger(previous, levels, self.captured_cycles):
+            window = list(self.pre_trigger)
+            window.append(levels)
+            self.captures.append([self.captured_cycles,
+                                  self.captured_cycles - len(window) + 1,
+                                  window])
+            self.post_cycles_left = self.post_cycles
+        self.pre_trigger.append(levels)
+
+    def set_trigger(self, expression, pre_cycles=0, post_cycles=0):
+        """Set the trigger condition and the windows of cycles captured.
+
+        expression is a condition on monitored signals, see the conditions
+        module, or None to record every cycle again. pre_cycles and
+        post_cycles cycles are captured before and after every cycle the
+        condition is met at. The captured windows are cleared. Return
+        NO_ERROR if successful, NOT_MONITORED if the condition has a signal
+        which is not monitored, or the error code of the condition.
+        """
+        if expression is None:
+            self.trigger = None
+            self.trigger_condition = None
+            self.reset_captures()
+            return self.NO_ERROR
+        condition = Condition(self.names, self.devices, expression)
+        if condition.error_code != condition.NO_ERROR:
+            return condition.error_code
+        for signal in condition.signals:
+            if signal not in self.monitors_dictionary:
+                return self.NOT_MONITORED
+        self.trigger = condition.compile(list(self.monitors_dictionary))
+        self.trigger_condition = condition
+        self.pre_cycles = pre_cycles
+        self.post_cycles = post_cycles
+        self.reset_captures()
+        return self.NO_ERROR
+
+    def reset_captures(self):
+        """Clear the captured windows and the levels of the last cycles."""
+        self.captures = []
+        self.pre_trigger = collections.deque(maxlen=self.pre_cycles)
+        self.previous_levels = None
+        self.captured_cycles = 0
+        self.post_cycles_left = 0
+
+    def get_captures(self):
+        """Return the captured windows.
+
+        The returned list has a (trigger cycle, first cycle, signals) tuple
+        for every window, where signals is a dictionary {(device_id,
+        output_id): [signal_list]} like the monitors dictionary.
+        """
+        captures = []
+        for trigger_cycle, first_cycle, window in self.captures:
+            signals = collections.OrderedDict()
+            for position, monitor in enumerate(self.monitors_dictionary):
+                signals[monitor] = [levels[position] for levels in window]
+            captures.append((trigger_cycle, first_cycle, signals))
+        return captures
+
+    def repeat_signals(self, period, cycles):
+        """Extend every signal trace by repeating its last period signals.
+
+        The traces are extended by the given number of cycles, which is used
+        when the network has become periodic.
+        """
+        for signal_list in self.monitors_dictionary.values():
+            repeated_signals = signal_list[len(signal_list) - period:]
+            signal_list.extend(itertools.islice(
+                itertools.cycle(repeated_signals), cycles))
+
+    def extend_signals(self, signals):
+        """Extend the signal traces of the given monitors.
+
+        signals is a dictionary {(device_id, output_id): [signal_list]} of
+        signal levels recorded elsewhere, such as by a worker process, which
+        are appended to the traces of the monitors.
+        """
+        for monitor, signal_list in signals.items():
+            self.monitors_dictionary[monitor].extend(signal_list)
 
     def get_signal_names(self):
         """Return two signal name lists: monitored and not monitored."""
@@ -133,10 +343,12 @@ class Monitors:
     def reset_monitors(self):
         """Clear the memory of all the monitors.
 
-        The list of stored signal levels for each monitor is deleted.
+        The list of stored signal levels for each monitor is deleted, and so
+        are the captured windows.
         """
         for device_id, output_id in self.monitors_dictionary:
-            self.monitors_dictionary[(device_id, output_id)] = []
+            self.monitors_dictionary[(device_id, output_id)] = Trace()
+        self.reset_captures()
 
     def get_margin(self):
         """Return the length of the longest monitor's name.
@@ -155,13 +367,33 @@ class Monitors:
         else:
             return None
 
-    def display_signals(self):
-        """Display the signal trace(s) in the text console."""
+    def display_signals(self, signals=None):
+        """Display the signal trace(s) in the text console.
+
+        signals is a dictionary {(device_id, output_id): [signal_list]} of
+        the traces to display, or None for the monitors dictionary. If a
+        trigger is set, the captured windows are displayed instead of the
+        monitors dictionary.
+        """
+        if signals is None and self.trigger is not None:
+            captures = self.get_captures()
+            if not captures:
+                print("Trigger not met.")
+            for trigger_cycle, first_cycle, window_signals in captures:
+                last_cycle = first_cycle + len(
+                    next(iter(window_signals.values()))) - 1
+                print("".join(["Trigger at cycle ", str(trigger_cycle),
+                               ", cycles ", str(first_cycle), " to ",
+                               str(last_cycle), ":"]))
+                self.display_signals(window_signals)
+            return
+        if signals is None:
+            signals = self.monitors_dictionary
         margin = self.get_margin()
-        for device_id, output_id in self.monitors_dictionary:
+        for device_id, output_id in signals:
             monitor_name = self.devices.get_signal_name(device_id, output_id)
             name_length = len(monitor_name)
-            signal_list = self.monitors_dictionary[(device_id, output_id)]
+            signal_list = signals[(device_id, output_id)]
             print(monitor_name + (margin - name_length) * " ", end=": ")
             for signal in signal_list:
                 if signal == self.devices.HIGH:
@@ -175,3 +407,37 @@ class Monitors:
                 if signal == self.devices.BLANK:
                     print(" ", end="")
             print("\n", end="")
+
+    def set_pruning(self, pruning):
+        """Set whether only the devices the monitors depend on are simulated.
+
+        If pruning is True, the network only simulates the fan-in of the
+        monitored outputs, which is updated whenever a monitor is made or
+        removed.
+        """
+        self.pruning = pruning
+        if pruning:
+            self.network.prune_network(list(self.monitors_dictionary))
+        else:
+            self.network.prune_network(None)
+
+    def fork(self, devices, network):
+        """Return a branch of the monitors that shares the recorded traces.
+
+        devices and network are the branches returned by Devices.fork() and
+        Network.fork(). The signal levels recorded so far are shared by both
+        monitors without being copied, and each records its own levels
+        after them.
+        """
+        forked_monitors = copy.copy(self)
+        forked_monitors.devices = devices
+        forked_monitors.network = network
+        forked_monitors.monitors_dictionary = collections.OrderedDict(
+            (monitor, signal_list.fork())
+            for monitor, signal_list in self.monitors_dictionary.items())
+        forked_monitors.captures = [[trigger_cycle, first_cycle, list(window)]
+                                    for trigger_cycle, first_cycle, window
+                                    in self.captures]
+        forked_monitors.pre_trigger = collections.deque(
+            self.pre_trigger, maxlen=self.pre_cycles)
+        return forked_monitors
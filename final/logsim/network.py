@@ -6,6 +6,13 @@ Classes
 --------
 Network - builds and executes the network.
 """
+import copy
+import time
+
+from activity import Activity
+from toggles import ToggleCoverage
+from profiler import Profiler
+from scheduler import Scheduler
 
 
 class Network:
@@ -31,6 +38,9 @@ class Network:
     get_output_signal(self, device_id, output_id): Returns the signal level at
                                                    the given output.
 
+    get_input_signals(self, device): Returns the signal levels at the outputs
+                                     connected to the inputs of the device.
+
     make_connection(self, first_device_id, first_port_id, second_device_id,
                     second_port_id): Connects the first device to the second
                                      device.
@@ -57,8 +67,83 @@ class Network:
     update_clocks(self): If it is time to do so, sets clock signals to RISING
                          or FALLING.
 
+    update_RC(self): If it is time to do so, sets RC signals to FALLING.
+
+    update_siggen(self): If it is time to do so, sets siggen signals to RISING
+                         or FALLING.
+
+    update_source(self, device): Updates the counter and, if it is time, the
+                                 signal of a clock, RC or SIGGEN device.
+
+    update_sources(self): Updates the clock, RC and SIGGEN devices due in this
+                          cycle.
+
+    prepare_network(self): Rebuilds the structures used to execute the
+                           network and marks the devices to execute.
+
     execute_network(self): Executes all the devices in the network for one
                            simulation cycle.
+
+    execute_component(self, component_plan): Executes the devices of a
+                                   connected component until they settle.
+
+    build_fanout(self): Returns the fan-out index of the network.
+
+    build_plan(self): Builds the execution plan of the network.
+
+    find_components(self): Returns the connected components of the network.
+
+    mark_changed(self, device_id): Marks the device and its fan-out for
+                                   execution.
+
+    update_dirty_devices(self): Marks the devices changed since the last
+                                cycle for execution.
+
+    execute_if_dirty(self, device_id, execute_function, *args): Executes the
+                          device if it is marked, and marks its fan-out if its
+                          outputs change.
+
+    find_fanin(self, outputs): Returns the IDs of all devices that the given
+                               outputs depend on.
+
+    prune_network(self, outputs): Only simulates the devices that the given
+                                  outputs depend on.
+
+    set_part(self, device_ids): Only simulates the given devices, as one part
+                                of a partitioned network.
+
+    find_live_devices(self, device_kind): Returns the IDs of the simulated
+                                          devices of the given kind.
+
+    fold_constants(self): Folds the gates with constant outputs into
+                          constants and returns how many were folded.
+
+    unfold_constants(self, switch_id): Reactivates the gates folded because
+                                       of the given switch.
+
+    build_folded_fanout(self, fanout): Returns the fan-out index without the
+                                       folded gates.
+
+    set_constant_folding(self, constant_folding): Sets whether gates are
+                               folded again after switches are toggled.
+
+    set_profiling(self, profiling): Sets whether evaluations, settle
+                                    iterations and timings are recorded.
+
+    set_activity(self, activity): Sets whether the toggles, HIGH cycles and
+                                  glitches of every output are counted.
+
+    set_coverage(self, coverage): Sets whether the outputs which have risen
+                                  and fallen are recorded.
+
+    get_quiet_cycles(self, cycles): Returns how many of the next cycles will
+                                    leave every signal unchanged.
+
+    skip_quiet_cycles(self, cycles): Moves on by the given number of quiet
+                                     cycles without executing the network.
+
+    fork(self, devices): Returns a branch of the network that executes the
+                         given forked devices.
     """
 
     def __init__(self, names, devices):
@@ -72,6 +157,62 @@ class Network:
          self.OSCILLATING] = self.names.unique_error_codes(8)
         self.steady_state = True  # for checking if signals have settled
 
+        # fanout stores {device_id: [IDs of devices with inputs connected to
+        # its outputs]}, and is rebuilt when devices or connections are added
+        self.fanout = None
+        self.fanout_edit_count = None
+
+        # Outputs whose fan-in is simulated, and the set of IDs of the
+        # devices in that fan-in. Both are None if every device is simulated.
+        self.live_outputs = None
+        self.live_devices = None
+
+        # Set of the IDs of the devices of the part simulated by this network
+        # if it is one part of a partitioned network, otherwise None
+        self.part_devices = None
+
+        # folded_devices stores {device_id: set of IDs of the switches its
+        # constant output depends on}. Folded gates are left out of the
+        # fan-out index, so they are not executed when their other inputs
+        # change.
+        self.folded_devices = {}
+        self.constant_folding = False
+        self.fold_outdated = True  # folded_devices needs updating
+
+        # Set of devices which may change when executed. All other devices
+        # are settled and are skipped. None if every device must be executed.
+        self.dirty_devices = None
+
+        # plan stores a {device_kind: [IDs of the simulated devices of that
+        # kind]} dictionary for each connected component, component_index
+        # stores {device_id: index of its component}, and connected_outputs
+        # stores {device_id: [(outputs dictionary of the connected device,
+        # output_id) for each input]}. They are rebuilt when devices or
+        # connections are added.
+        self.plan = None
+        self.component_index = None
+        self.connected_outputs = None
+        self.plan_edit_count = None
+
+        # Finds the clock, RC and SIGGEN devices due to update in each cycle
+        self.scheduler = Scheduler(devices)
+
+        # Number of iterations to wait for the signals to settle before
+        # declaring the network unstable
+        self.iteration_limit = 20
+        self.component_iterations = 0  # taken by the last component settled
+
+        # Records evaluations and timings if profiling is set, otherwise None
+        self.profiler = None
+
+        # Counts the switching of every output if activity statistics are
+        # set, otherwise None
+        self.activity = None
+
+        # Records the toggle coverage of every output if it is set,
+        # otherwise None
+        self.coverage = None
+
     def get_connected_output(self, device_id, input_id):
         """Return the output connected to the given input.
 
@@ -109,6 +250,20 @@ class Network:
                 return device.outputs[output_id]
         return None
 
+    def get_input_signals(self, device):
+        """Return the signal levels at the outputs connected to the device.
+
+        The signals are listed in the order of the inputs of the device, with
+        None for unconnected inputs. The execution plan is used if it is up to
+        date.
+        """
+        if self.plan is None or \
+                self.plan_edit_count != self.devices.edit_count:
+            return [self.get_input_signal(device.device_id, input_id)
+                    for input_id in device.inputs]
+        return [outputs.get(output_id) for outputs, output_id
+                in self.connected_outputs[device.device_id]]
+
     def make_connection(self, first_device_id, first_port_id, second_device_id,
                         second_port_id):
         """Connect the first device to the second device.
@@ -154,6 +309,9 @@ class Network:
         else:  # first_port_id not a valid input or output port
             error_type = self.PORT_ABSENT
 
+        if error_type == self.NO_ERROR:
+            self.fanout = None
+            self.plan = None
         return error_type
 
     def check_network(self):
@@ -226,15 +384,11 @@ class Network:
         Return True if successful.
         """
         device = self.devices.get_device(device_id)
-        input_signal_list = []
-        for input_id in device.inputs:
-            input_signal = self.get_input_signal(device_id, input_id)
-            if input_signal is None:  # this input is unconnected
-                return self.INPUTS_NOT_CONNECTED
+        input_signal_list = self.get_input_signals(device)
+        if None in input_signal_list:  # an input is unconnected
+            return self.INPUTS_NOT_CONNECTED
 
-        for input_id in device.inputs:
-            input_signal = self.get_input_signal(device_id, input_id)
-            input_signal_list.append(input_signal)
+        for input_signal in input_signal_list:
             if device.device_kind != self.devices.XOR:
                 if input_signal != x:
                     output_signal = self.invert_signal(y)
@@ -264,8 +418,8 @@ class Network:
         """
         device = self.devices.get_device(device_id)
 
-        for input_id in device.inputs:
-            input_signal = self.get_input_signal(device_id, input_id)
+        input_signal_list = self.get_input_signals(device)
+        for input_id, input_signal in zip(device.inputs, input_signal_list):
             if input_signal is None:  # if the input is unconnected
                 return self.INPUTS_NOT_CONNECTED
             if input_id == self.devices.CLK_ID:
@@ -337,121 +491,618 @@ class Network:
         """If it is time to do so, set clock signals to RISING or FALLING."""
         clock_devices = self.devices.find_devices(self.devices.CLOCK)
         for device_id in clock_devices:
-            device = self.devices.get_device(device_id)
-            if device.clock_counter == device.clock_half_period:
-                device.clock_counter = 0
-                output_signal = self.get_output_signal(device_id,
-                                                       output_id=None)
-                if output_signal == self.devices.HIGH:
-                    device.outputs[None] = self.devices.FALLING
-                elif output_signal == self.devices.LOW:
-                    device.outputs[None] = self.devices.RISING
-            device.clock_counter += 1
+            self.update_source(self.devices.get_device(device_id))
 
     def update_RC(self):
         """If it is time to do so, set clock signals to FALLING."""
         RC_devices = self.devices.find_devices(self.devices.RC)
         for device_id in RC_devices:
-            device = self.devices.get_device(device_id)
-            output_signal = self.get_output_signal(device_id,
-                                                   output_id=None)
-            if output_signal == self.devices.HIGH and\
-                    device.clock_counter == device.high_period:
-                device.outputs[None] = self.devices.FALLING
-            device.clock_counter += 1
+            self.update_source(self.devices.get_device(device_id))
 
     def update_siggen(self):
         """If it is time to do so, set siggen signals to RISING or FALLING."""
         siggen_devices = self.devices.find_devices(self.devices.SIGGEN)
         for device_id in siggen_devices:
-            device = self.devices.get_device(device_id)
+            self.update_source(self.devices.get_device(device_id))
+
+    def update_source(self, device):
+        """Update the counter and, if it is time, the signal of the device.
+
+        device is a clock, RC or SIGGEN device object. Its output is set to
+        RISING or FALLING where necessary.
+        """
+        device_id = device.device_id
+        output_signal = device.outputs[None]
+        target_signal = None  # the signal the output should move towards
+
+        if device.device_kind == self.devices.CLOCK:
+            if device.clock_counter == device.clock_half_period:
+                device.clock_counter = 0
+                target_signal = self.invert_signal(output_signal)
 
+        elif device.device_kind == self.devices.RC:
+            if output_signal == self.devices.HIGH and\
+                    device.clock_counter == device.high_period:
+                target_signal = self.devices.LOW
+
+        elif device.device_kind == self.devices.SIGGEN:
             if device.clock_counter >= len(device.sequence):
                 device.clock_counter = 0
             target_signal = device.sequence[device.clock_counter]
-            output_signal = self.get_output_signal(device_id,
-                                                   output_id=None)
-            if target_signal != output_signal:
-                if output_signal == self.devices.HIGH:
-                    device.outputs[None] = self.devices.FALLING
-                elif output_signal == self.devices.LOW:
-                    device.outputs[None] = self.devices.RISING
-            device.clock_counter += 1
+
+        if target_signal is not None and target_signal != output_signal:
+            if output_signal == self.devices.HIGH:
+                device.outputs[None] = self.devices.FALLING
+                self.mark_changed(device_id)
+            elif output_signal == self.devices.LOW:
+                device.outputs[None] = self.devices.RISING
+                self.mark_changed(device_id)
+        device.clock_counter += 1
+
+    def update_sources(self):
+        """Update the clock, RC and SIGGEN devices due in this cycle.
+
+        The scheduler finds the devices whose signals may change, so the
+        counters of the other devices are not updated. Call
+        scheduler.sync_counters() to bring them up to date.
+        """
+        for device in self.scheduler.advance():
+            self.update_source(device)
+            self.scheduler.schedule(device)
+
+    def build_fanout(self):
+        """Return the fan-out index of the network.
+
+        The index maps every device ID to a list of the IDs of the devices
+        whose inputs are connected to its outputs. Only the simulated devices
+        are listed if the network is pruned.
+        """
+        live_devices = self.live_devices
+        fanout = {}
+        for device in self.devices.devices_list:
+            fanout[device.device_id] = []
+        for device in self.devices.devices_list:
+            for connected_output in device.inputs.values():
+                if connected_output is None:  # unconnected input
+                    continue
+                if live_devices is not None and \
+                        device.device_id not in live_devices:
+                    continue
+                output_device_id = connected_output[0]
+                dependents = fanout[output_device_id]
+                if device.device_id not in dependents:
+                    dependents.append(device.device_id)
+        return fanout
+
+    def build_plan(self):
+        """Build the execution plan of the network.
+
+        The plan lists the simulated devices of each kind in every connected
+        component, and resolves every input to the outputs dictionary of the
+        device connected to it, so that input signals are read without
+        looking up devices.
+        """
+        self.component_index = {}
+        self.plan = []
+        for component, device_ids in enumerate(self.find_components()):
+            component_plan = {}
+            for device_kind in self.devices.gate_types + \
+                    self.devices.device_types:
+                component_plan[device_kind] = []
+            for device_id in device_ids:
+                self.component_index[device_id] = component
+            self.plan.append(component_plan)
+        for device_kind in self.devices.gate_types + self.devices.device_types:
+            for device_id in self.find_live_devices(device_kind):
+                component = self.component_index[device_id]
+                self.plan[component][device_kind].append(device_id)
+
+        self.connected_outputs = {}
+        for device in self.devices.devices_list:
+            connected_outputs = []
+            for connected_output in device.inputs.values():
+                if connected_output is None:  # unconnected input
+                    connected_outputs.append(({}, None))
+                    continue
+                (output_device_id, output_id) = connected_output
+                output_device = self.devices.get_device(output_device_id)
+                connected_outputs.append((output_device.outputs, output_id))
+            self.connected_outputs[device.device_id] = connected_outputs
+        self.plan_edit_count = self.devices.edit_count
+
+    def find_components(self):
+        """Return the connected components of the network.
+
+        Each component is a list of the IDs of the devices connected to each
+        other, directly or through other devices. The components are ordered
+        by their first device.
+        """
+        component_index = {}
+        components = []
+        for device in self.devices.devices_list:
+            component_index[device.device_id] = len(components)
+            components.append([device.device_id])
+
+        # Merge the components of the devices at both ends of each connection
+        for device in self.devices.devices_list:
+            for connected_output in device.inputs.values():
+                if connected_output is None:  # unconnected input
+                    continue
+                first = component_index[connected_output[0]]
+                second = component_index[device.device_id]
+                if first == second:
+                    continue
+                if len(components[first]) < len(components[second]):
+                    first, second = second, first
+                for device_id in components[second]:
+                    component_index[device_id] = first
+                components[first].extend(components[second])
+                components[second] = []
+
+        device_order = {}
+        for position, device in enumerate(self.devices.devices_list):
+            device_order[device.device_id] = position
+        components = [sorted(device_ids, key=device_order.get)
+                      for device_ids in components if device_ids]
+        components.sort(key=lambda device_ids: device_order[device_ids[0]])
+        return components
+
+    def mark_changed(self, device_id):
+        """Mark the device and its fan-out for execution.
+
+        This is called whenever the outputs or state of the device change.
+        Devices left out by prune_network() are never marked, as they are not
+        executed.
+        """
+        if self.activity is not None:
+            self.activity.record_outputs(device_id)
+        if self.coverage is not None:
+            self.coverage.record_outputs(device_id)
+        if self.dirty_devices is not None:
+            if self.live_devices is None or device_id in self.live_devices:
+                self.dirty_devices.add(device_id)
+            self.dirty_devices.update(self.fanout[device_id])
+
+    def update_dirty_devices(self):
+        """Mark the devices changed since the last cycle for execution.
+
+        The fan-out index is rebuilt if devices or connections have been
+        added. Every device is marked after a cold start-up or a change in
+        the network structure, otherwise only the toggled switches and the
+        devices they drive are marked.
+        """
+        if self.fanout is None or \
+                self.fanout_edit_count != self.devices.edit_count:
+            if self.live_outputs is None:
+                self.live_devices = None
+            else:
+                self.live_devices = self.find_fanin(self.live_outputs)
+            if self.part_devices is not None:
+                if self.live_devices is None:
+                    self.live_devices = set(self.part_devices)
+                else:
+                    self.live_devices &= self.part_devices
+            self.fanout = self.build_fanout()
+            self.fanout_edit_count = self.devices.edit_count
+            self.folded_devices = {}
+            self.fold_outdated = True
+            self.dirty_devices = None
+        if self.plan is None or \
+                self.plan_edit_count != self.devices.edit_count:
+            self.build_plan()
+
+        changed_devices = self.devices.changed_devices
+        if changed_devices is None or self.dirty_devices is None:
+            self.dirty_devices = set(self.fanout)
+            if self.live_devices is not None:
+                self.dirty_devices &= self.live_devices
+        else:
+            for device_id in changed_devices:
+                if self.folded_devices:
+                    self.unfold_constants(device_id)
+                self.mark_changed(device_id)
+        self.devices.changed_devices = set()
+
+    def execute_if_dirty(self, device_id, execute_function, *args):
+        """Execute the device if it is marked, and mark its fan-out if needed.
+
+        A device which is not marked is settled, as neither its inputs nor its
+        outputs have changed since it was last executed, so executing it would
+        have no effect. Return the error code of execute_function, or NO_ERROR
+        if the device is skipped.
+        """
+        if device_id not in self.dirty_devices:
+            return self.NO_ERROR
+        self.dirty_devices.discard(device_id)
+        if self.profiler is not None:
+            self.profiler.count_evaluation(device_id)
+
+        steady_state = self.steady_state
+        self.steady_state = True
+        error_code = execute_function(device_id, *args)
+        if not self.steady_state:  # the outputs of the device have changed
+            self.mark_changed(device_id)
+        elif error_code != self.NO_ERROR:  # execute the device again
+            self.dirty_devices.add(device_id)
+        self.steady_state = self.steady_state and steady_state
+        return error_code
+
+    def find_fanin(self, outputs):
+        """Return the IDs of all devices that the given outputs depend on.
+
+        outputs is a list of (device_id, output_id) tuples. The returned set
+        contains the devices of the outputs themselves and every device
+        connected to their inputs, directly or through other devices
+        including D-types.
+        """
+        fanin = set()
+        unvisited = [device_id for device_id, output_id in outputs]
+        while unvisited:
+            device_id = unvisited.pop()
+            if device_id in fanin:
+                continue
+            fanin.add(device_id)
+            device = self.devices.get_device(device_id)
+            if device is None:
+                continue
+            for connected_output in device.inputs.values():
+                if connected_output is not None:
+                    unvisited.append(connected_output[0])
+        return fanin
+
+    def prune_network(self, outputs):
+        """Only simulate the devices that the given outputs depend on.
+
+        outputs is a list of (device_id, output_id) tuples, usually the
+        monitored outputs, or None to simulate every device again. The
+        devices outside the fan-in of the outputs keep their signals until
+        they are simulated again, and D-types among them miss any clock
+        edges in the meantime.
+        """
+        self.live_outputs = outputs
+        # rebuild the simulated devices on the next cycle
+        self.fanout = None
+        self.plan = None
+
+    def set_part(self, device_ids):
+        """Only simulate the given devices, as one part of a network.
+
+        device_ids is a set of device IDs, or None to simulate every device
+        again. The outputs of the other devices are set from outside, and
+        mark_changed() must be called for each one that changes.
+        """
+        self.part_devices = device_ids
+        # rebuild the simulated devices on the next cycle
+        self.fanout = None
+        self.plan = None
+
+    def find_live_devices(self, device_kind):
+        """Return the IDs of the simulated devices of the given kind."""
+        device_id_list = self.devices.find_devices(device_kind)
+        if self.live_devices is None:
+            return device_id_list
+        return [device_id for device_id in device_id_list
+                if device_id in self.live_devices]
+
+    def fold_constants(self):
+        """Fold the gates with constant outputs into constants.
+
+        A switch whose output has settled to its switch state is constant. A
+        gate is constant if one of its inputs is constant and forces its
+        output, such as an AND gate with a LOW input or an OR gate with a HIGH
+        input, or if all of its inputs are constant. Constant gates whose
+        outputs have settled are folded: they are no longer executed when
+        their other inputs change, until a switch they depend on is toggled.
+        Return the number of folded gates.
+        """
+        LOW = self.devices.LOW
+        HIGH = self.devices.HIGH
+        # {gate kind: (x, y)}, see execute_gate()
+        gate_rules = {self.devices.AND: (HIGH, HIGH),
+                      self.devices.OR: (LOW, LOW),
+                      self.devices.NAND: (HIGH, LOW),
+                      self.devices.NOR: (LOW, HIGH),
+                      self.devices.XOR: (None, None)}
+        fanout = self.build_fanout()
+
+        # constants stores {device_id: set of switch IDs it depends on}
+        constants = {}
+        unvisited = []
+        for device_id in self.devices.find_devices(self.devices.SWITCH):
+            device = self.devices.get_device(device_id)
+            if device.outputs[None] == device.switch_state:
+                constants[device_id] = {device_id}
+                unvisited.extend(fanout[device_id])
+
+        while unvisited:
+            device_id = unvisited.pop()
+            device = self.devices.get_device(device_id)
+            if device_id in constants or device.device_kind not in gate_rules:
+                continue
+            [x, y] = gate_rules[device.device_kind]
+
+            # List the signals of the constant inputs and their switches
+            constant_inputs = []
+            for connected_output in device.inputs.values():
+                if connected_output is not None and \
+                        connected_output[0] in constants:
+                    signal = self.get_output_signal(*connected_output)
+                    constant_inputs.append(
+                        (signal, constants[connected_output[0]]))
+
+            target = None
+            for signal, switch_ids in constant_inputs:
+                if x is not None and signal != x:
+                    # This input forces the output of the gate
+                    target = self.invert_signal(y)
+                    break
+            else:
+                if len(constant_inputs) == len(device.inputs):
+                    switch_ids = set()
+                    for signal, input_switch_ids in constant_inputs:
+                        switch_ids = switch_ids | input_switch_ids
+                    if x is not None:
+                        target = y
+                    elif constant_inputs[0][0] == constant_inputs[1][0]:
+                        target = LOW  # XOR gate with equal inputs
+                    else:
+                        target = HIGH
+
+            if target is not None and device.outputs[None] == target:
+                constants[device_id] = switch_ids
+                unvisited.extend(fanout[device_id])
+
+        self.folded_devices = {}
+        for device in self.devices.devices_list:
+            if device.device_kind != self.devices.SWITCH and \
+                    device.device_id in constants:
+                self.folded_devices[device.device_id] = \
+                    constants[device.device_id]
+        self.fanout = self.build_folded_fanout(fanout)
+        self.fold_outdated = False
+        return len(self.folded_devices)
+
+    def unfold_constants(self, switch_id):
+        """Reactivate the gates folded because of the given switch.
+
+        The gates are executed again whenever their inputs change.
+        """
+        folded_devices = {}
+        for device_id, switch_ids in self.folded_devices.items():
+            if switch_id not in switch_ids:
+                folded_devices[device_id] = switch_ids
+        if len(folded_devices) != len(self.folded_devices):
+            self.folded_devices = folded_devices
+            self.fanout = self.build_folded_fanout(self.build_fanout())
+            self.fold_outdated = True
+
+    def build_folded_fanout(self, fanout):
+        """Return the fan-out index without the folded gates."""
+        folded_fanout = {}
+        for device_id, dependents in fanout.items():
+            folded_fanout[device_id] = [
+                dependent for dependent in dependents
+                if dependent not in self.folded_devices]
+        return folded_fanout
+
+    def set_constant_folding(self, constant_folding):
+        """Set whether gates are folded again after switches are toggled.
+
+        If constant_folding is True, the gates are folded whenever the
+        network settles after a toggled switch has reactivated some of them,
+        or after devices or connections have been added.
+        """
+        self.constant_folding = constant_folding
+        if not constant_folding and self.folded_devices:
+            self.folded_devices = {}
+            self.fanout = None  # rebuild the fan-out index on the next cycle
+            if self.profiler is not None:
+                self.profiler.record_folding(0)
+
+    def set_profiling(self, profiling):
+        """Set whether evaluations, settle iterations and timings are recorded.
+
+        If profiling is True, a profiler is made unless there already is one,
+        and the statistics are kept in self.profiler. Otherwise the profiler
+        is removed, so that the network does not record anything.
+        """
+        if not profiling:
+            self.profiler = None
+        elif self.profiler is None:
+            self.profiler = Profiler(self.devices, self.iteration_limit)
+            self.profiler.record_folding(len(self.folded_devices))
+
+    def set_activity(self, activity):
+        """Set whether the switching of every output is counted.
+
+        If activity is True, an activity collector is made unless there
+        already is one, and the counts are kept in self.activity. Otherwise
+        the collector is removed, so that the network does not count
+        anything.
+        """
+        if not activity:
+            self.activity = None
+        elif self.activity is None:
+            self.activity = Activity(self.devices)
+
+    def set_coverage(self, coverage):
+        """Set whether the outputs which have risen and fallen are recorded.
+
+        If coverage is True, a toggle coverage collector is made unless
+        there already is one, and the coverage is kept in self.coverage.
+        Otherwise the collector is removed.
+        """
+        if not coverage:
+            self.coverage = None
+        elif self.coverage is None:
+            self.coverage = ToggleCoverage(self.devices)
+
+    def prepare_network(self):
+        """Rebuild the structures used to execute the network if necessary.
+
+        The devices changed since the last cycle are then marked for
+        execution. This is done at the start of every cycle, and can also be
+        called beforehand, for example to time it separately from the
+        simulation.
+        """
+        if self.devices.changed_devices is None:  # after a cold start-up
+            self.scheduler.build()
+            if self.activity is not None:
+                self.activity.sync_levels()
+        elif self.activity is not None:
+            self.activity.build_index()
+        if self.coverage is not None:
+            self.coverage.build_index()
+        # Only execute the devices which have changed and their fan-out
+        self.update_dirty_devices()
 
     def execute_network(self):
         """Execute all the devices in the network for one simulation cycle.
 
         Return True if successful and the network does not oscillate.
         """
-        clock_devices = self.devices.find_devices(self.devices.CLOCK)
-        switch_devices = self.devices.find_devices(self.devices.SWITCH)
-        d_type_devices = self.devices.find_devices(self.devices.D_TYPE)
-        and_devices = self.devices.find_devices(self.devices.AND)
-        or_devices = self.devices.find_devices(self.devices.OR)
-        nand_devices = self.devices.find_devices(self.devices.NAND)
-        nor_devices = self.devices.find_devices(self.devices.NOR)
-        xor_devices = self.devices.find_devices(self.devices.XOR)
-        RC_devices = self.devices.find_devices(self.devices.RC)
-        siggen_devices = self.devices.find_devices(self.devices.SIGGEN)
+        self.prepare_network()
+
+        profiler = self.profiler
+        if profiler is not None:
+            start_time = time.perf_counter()
 
         # This sets clock signals to RISING or FALLING, where necessary
-        self.update_clocks()
-        self.update_RC()
-        self.update_siggen()
+        self.update_sources()
 
-        # Number of iterations to wait for the signals to settle before
-        # declaring the network unstable
-        iteration_limit = 20
+        if profiler is not None:
+            sources_time = time.perf_counter()
+        iterations = 0
+
+        # Devices in different connected components never affect each other,
+        # so each component with marked devices is settled on its own. Every
+        # component is settled even if another one fails.
+        error_code = self.NO_ERROR
+        components = sorted(set(self.component_index[device_id]
+                                for device_id in self.dirty_devices))
+        for component in components:
+            component_error_code = self.execute_component(
+                self.plan[component])
+            if error_code == self.NO_ERROR:
+                error_code = component_error_code
+            iterations = max(iterations, self.component_iterations)
+
+        if profiler is not None:
+            profiler.record_cycle(iterations, error_code == self.NO_ERROR,
+                                  sources_time - start_time,
+                                  time.perf_counter() - sources_time)
+        if self.activity is not None:
+            self.activity.end_cycle()
+
+        if error_code == self.NO_ERROR and self.constant_folding and \
+                self.fold_outdated:
+            folded_gates = self.fold_constants()
+            if profiler is not None:
+                profiler.record_folding(folded_gates)
+        return error_code
+
+    def execute_component(self, component_plan):
+        """Execute the devices of a connected component until they settle.
+
+        component_plan is the entry of the execution plan for the component.
+        Return NO_ERROR if successful and the component does not oscillate.
+        """
+        clock_devices = component_plan[self.devices.CLOCK]
+        switch_devices = component_plan[self.devices.SWITCH]
+        d_type_devices = component_plan[self.devices.D_TYPE]
+        and_devices = component_plan[self.devices.AND]
+        or_devices = component_plan[self.devices.OR]
+        nand_devices = component_plan[self.devices.NAND]
+        nor_devices = component_plan[self.devices.NOR]
+        xor_devices = component_plan[self.devices.XOR]
+        RC_devices = component_plan[self.devices.RC]
+        siggen_devices = component_plan[self.devices.SIGGEN]
+
+        iteration_limit = self.iteration_limit
+
+        # Devices which are not marked are settled and are skipped
+        dirty_devices = self.dirty_devices
 
         iterations = 0
         while iterations < iteration_limit:
             iterations += 1
+            self.component_iterations = iterations
             self.steady_state = True
 
             for device_id in switch_devices:  # execute switch devices
-                error_code = self.execute_switch(device_id)
+                if device_id not in dirty_devices:  # settled device
+                    continue
+                error_code = self.execute_if_dirty(device_id,
+                                                   self.execute_switch)
                 if error_code != self.NO_ERROR:
                     return error_code
             # Execute D-type devices before clocks to catch the rising edge of
             # the clock
             for device_id in d_type_devices:  # execute DTYPE devices
-                error_code = self.execute_d_type(device_id)
-                if not self.execute_d_type(device_id):
+                if device_id not in dirty_devices:  # settled device
+                    continue
+                error_code = self.execute_if_dirty(device_id,
+                                                   self.execute_d_type)
+                if not self.execute_if_dirty(device_id, self.execute_d_type):
                     return False
             for device_id in clock_devices:  # complete clock executions
-                error_code = self.execute_clock(device_id)
+                if device_id not in dirty_devices:  # settled device
+                    continue
+                error_code = self.execute_if_dirty(device_id,
+                                                   self.execute_clock)
                 if error_code != self.NO_ERROR:
                     return error_code
             for device_id in RC_devices:  # complete RC executions
-                error_code = self.execute_clock(device_id)
+                if device_id not in dirty_devices:  # settled device
+                    continue
+                error_code = self.execute_if_dirty(device_id,
+                                                   self.execute_clock)
                 if error_code != self.NO_ERROR:
                     return error_code
             for device_id in siggen_devices:  # complete SIGGEN executions
-                error_code = self.execute_clock(device_id)
+                if device_id not in dirty_devices:  # settled device
+                    continue
+                error_code = self.execute_if_dirty(device_id,
+                                                   self.execute_clock)
                 if error_code != self.NO_ERROR:
                     return error_code
             for device_id in and_devices:  # execute AND gate devices
-                error_code = self.execute_gate(device_id, self.devices.HIGH,
-                                               self.devices.HIGH)
+                if device_id not in dirty_devices:  # settled device
+                    continue
+                error_code = self.execute_if_dirty(
+                    device_id, self.execute_gate, self.devices.HIGH,
+                    self.devices.HIGH)
                 if error_code != self.NO_ERROR:
                     return error_code
             for device_id in or_devices:  # execute OR gate devices
-                error_code = self.execute_gate(device_id, self.devices.LOW,
-                                               self.devices.LOW)
+                if device_id not in dirty_devices:  # settled device
+                    continue
+                error_code = self.execute_if_dirty(
+                    device_id, self.execute_gate, self.devices.LOW,
+                    self.devices.LOW)
                 if error_code != self.NO_ERROR:
                     return error_code
             for device_id in nand_devices:  # execute NAND gate devices
-                error_code = self.execute_gate(device_id, self.devices.HIGH,
-                                               self.devices.LOW)
+                if device_id not in dirty_devices:  # settled device
+                    continue
+                error_code = self.execute_if_dirty(
+                    device_id, self.execute_gate, self.devices.HIGH,
+                    self.devices.LOW)
                 if error_code != self.NO_ERROR:
                     return error_code
             for device_id in nor_devices:  # execute NOR gate devices
-                error_code = self.execute_gate(device_id, self.devices.LOW,
-                                               self.devices.HIGH)
+                if device_id not in dirty_devices:  # settled device
+                    continue
+                error_code = self.execute_if_dirty(
+                    device_id, self.execute_gate, self.devices.LOW,
+                    self.devices.HIGH)
                 if error_code != self.NO_ERROR:
                     return error_code
             for device_id in xor_devices:  # execute XOR devices
-                error_code = self.execute_gate(device_id, None, None)
+                if device_id not in dirty_devices:  # settled device
+                    continue
+                error_code = self.execute_if_dirty(device_id,
+                                                   self.execute_gate)
                 if error_code != self.NO_ERROR:
                     return error_code
             if self.steady_state:
@@ -460,3 +1111,47 @@ class Network:
             return self.NO_ERROR
         else:
             return self.OSCILLATING
+
+    def get_quiet_cycles(self, cycles):
+        """Return how many of the next cycles leave every signal unchanged.
+
+        A cycle is quiet if every device has settled, no switch has been set
+        and no clock, RC or SIGGEN device is due to update. At most cycles is
+        returned.
+        """
+        if self.dirty_devices is None or self.dirty_devices or \
+                self.devices.changed_devices != set() or \
+                self.fanout is None or \
+                self.fanout_edit_count != self.devices.edit_count:
+            return 0
+        next_event = self.scheduler.get_next_event()
+        if next_event is None:  # no device will change its output again
+            return cycles
+        return min(cycles, next_event - self.scheduler.cycle - 1)
+
+    def skip_quiet_cycles(self, cycles):
+        """Move on by the given number of quiet cycles without executing.
+
+        cycles must not be more than get_quiet_cycles() returns.
+        """
+        self.scheduler.skip(cycles)
+        if self.profiler is not None:
+            self.profiler.record_skipped_cycles(cycles)
+        if self.activity is not None:
+            self.activity.skip_cycles(cycles)
+
+    def fork(self, devices):
+        """Return a branch of the network that executes the given devices.
+
+        devices is a branch returned by Devices.fork(). The branch does not
+        count activity or record coverage.
+        """
+        forked_network = copy.copy(self)
+        forked_network.devices = devices
+        forked_network.activity = None
+        forked_network.coverage = None
+        forked_network.scheduler = self.scheduler.fork(devices)
+        forked_network.plan = None  # the plan refers to the devices' outputs
+        if self.dirty_devices is not None:
+            forked_network.dirty_devices = set(self.dirty_devices)
+        return forked_network
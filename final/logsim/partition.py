@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""Partition the network into balanced parts.
+
+Used in the Logic Simulator project to split the devices of a circuit into a
+number of parts of similar size with few connections between them.
+
+Usage
+-----
+Show help: partition.py -h
+Partition a circuit: partition.py [-k <parts>] [-p <passes>] <file path>
+
+Classes
+-------
+Partitioner - splits the devices into balanced parts with a small cut.
+"""
+import collections
+import getopt
+import math
+import sys
+
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+from scanner import Scanner
+from parse import Parser
+
+
+class Partitioner:
+
+    """Split the devices into balanced parts with a small cut.
+
+    The parts are first grown by breadth-first search over the connections
+    from seed devices, and then refined by label propagation: devices are
+    moved to the part most of their neighbours are in, as long as this
+    reduces the number of connections between parts and keeps the parts
+    balanced.
+
+    Parameters
+    ----------
+    devices: instance of the devices.Devices() class.
+
+    Public methods
+    --------------
+    build_neighbours(self): Returns the devices connected to each device.
+
+    partition(self, parts, passes=4): Returns a partition of the devices
+                                      into the given number of parts.
+
+    get_cut_size(self, partition): Returns the number of connections between
+                                   different parts.
+
+    get_balance(self, partition, parts): Returns the size of the largest part
+                                         relative to the mean size.
+
+    get_report(self, partition, parts): Returns the sizes, cut size and
+                                        balance of the parts as a list of
+                                        lines of text.
+    """
+
+    def __init__(self, devices):
+        """Initialise the allowed imbalance of the parts."""
+        self.devices = devices
+
+        # Parts may be this much larger than the mean size after refinement
+        self.imbalance = 0.05
+
+    def build_neighbours(self):
+        """Return the devices connected to each device.
+
+        The returned dictionary maps every device ID to a list of the IDs of
+        the devices connected to its inputs or outputs.
+        """
+        neighbours = {}
+        for device in self.devices.devices_list:
+            neighbours[device.device_id] = []
+        for device in self.devices.devices_list:
+            for connected_output in device.inputs.values():
+                if connected_output is None:  # unconnected input
+                    continue
+                output_device_id = connected_output[0]
+                if output_device_id == device.device_id:
+                    continue
+                if output_device_id not in neighbours[device.device_id]:
+                    neighbours[device.device_id].append(output_device_id)
+                    neighbours[output_device_id].append(device.device_id)
+        return neighbours
+
+    def partition(self, parts, passes=4):
+        """Return a partition of the devices into the given number of parts.
+
+        The partition maps every device ID to its part, numbered from 0 to
+        parts - 1. passes is the number of label propagation passes.
+        """
+        neighbours = self.build_neighbours()
+        device_ids = [device.device_id for device in self.devices.devices_list]
+        part_size = math.ceil(len(device_ids) / parts)
+
+        # Grow each part from the first device without a part
+        partition = {}
+        unassigned = iter(device_ids)
+        for part in range(parts):
+            size = 0
+            queue = collections.deque()
+            while size < part_size:
+                if not queue:
+                    seed = next((device_id for device_id in unassigned
+                                 if device_id not in partition), None)
+                    if seed is None:  # every device has a part
+                        break
+                    partition[seed] = part
+                    size += 1
+                    queue.append(seed)
+                    continue
+                device_id = queue.popleft()
+                for neighbour in neighbours[device_id]:
+                    if neighbour not in partition and size < part_size:
+                        partition[neighbour] = part
+                        size += 1
+                        queue.append(neighbour)
+
+        # Move devices to the part most of their neighbours are in
+        sizes = [0] * parts
+        for part in partition.values():
+            sizes[part] += 1
+        largest_size = math.floor(len(device_ids) / parts *
+                                  (1 + self.imbalance))
+        largest_size = max(largest_size, part_size)
+        for _ in range(passes):
+            moved = False
+            for device_id in device_ids:
+                part = partition[device_id]
+                neighbour_counts = [0] * parts
+                for neighbour in neighbours[device_id]:
+                    neighbour_counts[partition[neighbour]] += 1
+                best_part = part
+                for other_part in range(parts):
+                    if sizes[other_part] < largest_size and \
+                            neighbour_counts[other_part] > \
+                            neighbour_counts[best_part]:
+                        best_part = other_part
+                if best_part != part:
+                    partition[device_id] = best_part
+                    sizes[part] -= 1
+                    sizes[best_part] += 1
+                    moved = True
+            if not moved:
+                break
+        return partition
+
+    def get_cut_size(self, partition):
+        """Return the number of connections between different parts."""
+        cut_size = 0
+        for device in self.devices.devices_list:
+            for connected_output in device.inputs.values():
+                if connected_output is None:  # unconnected input
+                    continue
+                if partition[connected_output[0]] != \
+                        partition[device.device_id]:
+                    cut_size += 1
+        return cut_size
+
+    def get_balance(self, partition, parts):
+        """Return the size of the largest part relative to the mean size.
+
+        A balance of 1.0 means that all parts are the same size.
+        """
+        if not partition:
+            return 1.0
+        sizes = [0] * parts
+        for part in partition.values():
+            sizes[part] += 1
+        return max(sizes) / (len(partition) / parts)
+
+    def get_report(self, partition, parts):
+        """Return the sizes, cut size and balance of the parts as text.
+
+        The report is returned as a list of lines.
+        """
+        connections = sum(1 for device in self.devices.devices_list
+                          for connected_output in device.inputs.values()
+                          if connected_output is not None)
+        sizes = [0] * parts
+        for part in partition.values():
+            sizes[part] += 1
+        lines = ["".join(["Devices: ", str(len(partition)), ", parts: ",
+                          str(parts)]),
+                 "".join(["Cut size: ", str(self.get_cut_size(partition)),
+                          " of ", str(connections), " connections"]),
+                 "".join(["Balance: ",
+                          format(self.get_balance(partition, parts), ".3f"),
+                          " (largest part relative to the mean)"])]
+        for part, size in enumerate(sizes):
+            lines.append("".join(["Part ", str(part), ": ", str(size),
+                                  " devices"]))
+        return lines
+
+
+def main(arg_list):
+    """Parse the command line options and arguments specified in arg_list.
+
+    Partition the devices of the circuit in the definition file and print
+    the sizes, cut size and balance of the parts.
+    """
+    usage_message = ("Usage:\n"
+                     "Show help: partition.py -h\n"
+                     "Partition a circuit: partition.py [-k <parts>] "
+                     "[-p <passes>] <file path>")
+    try:
+        options, arguments = getopt.getopt(arg_list, "hk:p:")
+    except getopt.GetoptError:
+        print("Error: invalid command line arguments\n")
+        print(usage_message)
+        sys.exit()
+
+    parts = 2
+    passes = 4
+    for option, value in options:
+        if option == "-h":  # print the usage message
+            print(usage_message)
+            sys.exit()
+        elif not value.isdigit() or int(value) == 0:
+            print("Error: the options must be numbers greater than zero\n")
+            print(usage_message)
+            sys.exit()
+        elif option == "-k":
+            parts = int(value)
+        elif option == "-p":
+            passes = int(value)
+    if len(arguments) != 1:
+        print("Error: one file path required\n")
+        print(usage_message)
+        sys.exit()
+
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    monitors = Monitors(names, devices, network)
+    parser = Parser(names, devices, network, monitors,
+                    Scanner(arguments[0], names))
+    if not parser.parse_network():
+        print("Error: the definition file could not be parsed")
+        sys.exit(1)
+
+    partitioner = Partitioner(devices)
+    partition = partitioner.partition(parts, passes)
+    for line in partitioner.get_report(partition, parts):
+        print(line)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
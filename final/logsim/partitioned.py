@@ -0,0 +1,293 @@
+"""Run the parts of a partitioned network in parallel worker processes.
+
+Used in the Logic Simulator project to share a single connected circuit
+between several processes. The devices are split into balanced parts with
+few connections between them, each process executes the devices of one part,
+and the levels of the outputs connected to other parts are exchanged through
+shared arrays at barriers within every settling iteration.
+
+Classes
+-------
+PartitionedRun - runs each part of the network in its own process.
+"""
+import multiprocessing
+import threading
+
+from partition import Partitioner
+
+
+class PartitionedRun:
+
+    """Run each part of the network in its own process.
+
+    The devices are split into parts by a partition.Partitioner(). Every
+    process runs the same settling iterations as the network, executing
+    the devices kind by kind in the order of the devices, but only the
+    devices of its part. As the network executes the devices in turn, a
+    device sees the new level of any device executed before it in the same
+    iteration. The iteration is therefore cut into steps, so that whenever
+    a device reads an output of another part, the device of that output is
+    in an earlier step or executed after it. At the end of each step, every
+    process writes the outputs of its devices read by other parts to a
+    shared array, waits for the others at a barrier and reads their
+    outputs, marking the devices they drive for execution if they have
+    changed. The traces and states are then the same as those of a run in a
+    single process.
+
+    The shared arrays come in pairs used in alternate steps, so that a
+    process never overwrites levels another may still be reading. Every
+    process updates all the clocks, RC and SIGGEN devices, so that their
+    levels agree before the first step without being exchanged.
+
+    Parameters
+    ----------
+    devices: instance of the devices.Devices() class.
+    network: instance of the network.Network() class.
+    monitors: instance of the monitors.Monitors() class.
+    parts: number of parts, and of processes.
+
+    Public methods
+    --------------
+    build_steps(self): Splits the settling iteration into steps and indexes
+                       the outputs exchanged in each.
+
+    execute_cycle(self, part): Executes the devices of the part for one
+                               simulation cycle.
+
+    exchange(self, part, step, steady): Shares the outputs of the devices
+                               in the step with the other parts and returns
+                               True if every part is steady.
+
+    run_worker(self, device_ids, cycles, connection): Runs the given part
+                               and sends back its traces and states.
+    """
+
+    def __init__(self, devices, network, monitors, parts):
+        """Partition the devices and build the steps of an iteration."""
+        self.devices = devices
+        self.network = network
+        self.monitors = monitors
+
+        # partition stores {device_id: part}, and groups lists the device
+        # IDs of every part with at least one device
+        self.partition = Partitioner(devices).partition(parts)
+        self.parts = parts
+        self.groups = [[] for part in range(parts)]
+        for device in devices.devices_list:
+            self.groups[self.partition[device.device_id]].append(
+                device.device_id)
+        self.groups = [device_ids for device_ids in self.groups
+                       if device_ids]
+
+        # Set by build_steps(): steps stores, for each part, a list of the
+        # (device_id, execute_function, args, twice) entries it executes in
+        # every step, published stores, for each part, a list of the
+        # (outputs dictionary, output_id, index) of the outputs it writes in
+        # every step, and read stores, for each part, a list of the
+        # (device_id, outputs dictionary, output_id, index) of the outputs of
+        # other parts it reads in every step
+        self.steps = []
+        self.published = []
+        self.read = []
+
+        # Two arrays of the exchanged levels and two of the flags set by the
+        # parts which are not steady, and the barrier at the end of each
+        # step. exchanges counts the steps completed by this process.
+        self.levels = []
+        self.flags = []
+        self.barrier = None
+        self.exchanges = 0
+
+    def build_steps(self):
+        """Split the settling iteration into steps.
+
+        The outputs each part writes and reads at the end of every step are
+        indexed, and the shared arrays and the barrier are created.
+        """
+        devices = self.devices
+        network = self.network
+        network.prepare_network()
+        partition = self.partition
+
+        # The devices in the order the network executes them, with the
+        # function and arguments each is executed with
+        sequence = []
+        for device_kind, execute_function, args in [
+                (devices.SWITCH, network.execute_switch, ()),
+                (devices.D_TYPE, network.execute_d_type, ()),
+                (devices.CLOCK, network.execute_clock, ()),
+                (devices.RC, network.execute_clock, ()),
+                (devices.SIGGEN, network.execute_clock, ()),
+                (devices.AND, network.execute_gate,
+                 (devices.HIGH, devices.HIGH)),
+                (devices.OR, network.execute_gate,
+                 (devices.LOW, devices.LOW)),
+                (devices.NAND, network.execute_gate,
+                 (devices.HIGH, devices.LOW)),
+                (devices.NOR, network.execute_gate,
+                 (devices.LOW, devices.HIGH)),
+                (devices.XOR, network.execute_gate, ())]:
+            for device_id in network.find_live_devices(device_kind):
+                sequence.append((device_id, execute_function, args,
+                                 device_kind == devices.D_TYPE))
+
+        # Start a new step before any device reading an output of another
+        # part whose device is already in the current step
+        readers = {}  # {(device_id, output_id): set of parts reading it}
+        device_steps = [[]]
+        current_step = set()
+        for entry in sequence:
+            device_id = entry[0]
+            part = partition[device_id]
+            cut_sources = set()
+            for connected_output in \
+                    devices.get_device(device_id).inputs.values():
+                if connected_output is not None and \
+                        partition[connected_output[0]] != part:
+                    readers.setdefault(connected_output, set()).add(part)
+                    cut_sources.add(connected_output[0])
+            if cut_sources & current_step:
+                device_steps.append([])
+                current_step = set()
+            device_steps[-1].append(entry)
+            current_step.add(device_id)
+
+        self.steps = [[[] for step in device_steps]
+                      for part in range(self.parts)]
+        self.published = [[[] for step in device_steps]
+                          for part in range(self.parts)]
+        self.read = [[[] for step in device_steps]
+                     for part in range(self.parts)]
+        index = 0
+        for step, entries in enumerate(device_steps):
+            for entry in entries:
+                device_id = entry[0]
+                part = partition[device_id]
+                self.steps[part][step].append(entry)
+                outputs = devices.get_device(device_id).outputs
+                for output_id in outputs:
+                    reading_parts = readers.get((device_id, output_id))
+                    if not reading_parts:
+                        continue
+                    self.published[part][step].append(
+                        (outputs, output_id, index))
+                    for reading_part in reading_parts:
+                        self.read[reading_part][step].append(
+                            (device_id, outputs, output_id, index))
+                    index += 1
+
+        self.levels = [multiprocessing.Array("q", index, lock=False)
+                       for buffer in range(2)]
+        self.flags = [multiprocessing.Array("b", self.parts, lock=False)
+                      for buffer in range(2)]
+        self.barrier = multiprocessing.Barrier(len(self.groups))
+        self.exchanges = 0
+
+    def execute_cycle(self, part):
+        """Execute the devices of the part for one simulation cycle.
+
+        This is called in a worker process, in step with the other parts.
+        Return NO_ERROR if successful and the network does not oscillate,
+        as network.execute_network() does. The barrier is broken if an
+        execution fails, so that the other parts stop too.
+        """
+        network = self.network
+        network.prepare_network()
+        network.update_sources()
+        dirty_devices = network.dirty_devices
+        execute_if_dirty = network.execute_if_dirty
+        steps = self.steps[part]
+        last_step = len(steps) - 1
+
+        for iteration in range(network.iteration_limit):
+            network.steady_state = True
+            for step, entries in enumerate(steps):
+                for device_id, execute_function, args, twice in entries:
+                    if device_id not in dirty_devices:  # settled device
+                        continue
+                    error_code = execute_if_dirty(device_id,
+                                                  execute_function, *args)
+                    if twice:  # D-types are executed twice, as in the network
+                        if not execute_if_dirty(device_id, execute_function):
+                            self.barrier.abort()
+                            return False
+                    elif error_code != network.NO_ERROR:
+                        self.barrier.abort()
+                        return error_code
+                steady = self.exchange(part, step, network.steady_state)
+                if step == last_step and steady:
+                    return network.NO_ERROR
+        return network.OSCILLATING
+
+    def exchange(self, part, step, steady):
+        """Share the outputs of the devices in the step with the other parts.
+
+        The outputs of the part read by other parts are written to the
+        shared array, and once every part has written its own, the outputs
+        of other parts read by this part are updated, marking the devices
+        they drive if they have changed. steady is False if an output of the
+        part has changed in this iteration. Return True if every part is
+        steady.
+        """
+        buffer = self.exchanges % 2
+        self.exchanges += 1
+        levels = self.levels[buffer]
+        flags = self.flags[buffer]
+        for outputs, output_id, index in self.published[part][step]:
+            levels[index] = outputs[output_id]
+        flags[part] = not steady
+        self.barrier.wait()
+
+        mark_changed = self.network.mark_changed
+        for device_id, outputs, output_id, index in self.read[part][step]:
+            level = levels[index]
+            if outputs[output_id] != level:
+                outputs[output_id] = level
+                mark_changed(device_id)
+        return not any(flags)
+
+    def run_worker(self, device_ids, cycles, connection):
+        """Run the given part and send back its traces and states.
+
+        This is called in a worker process, and is given one of the lists
+        in groups. The error code, or None if another part failed, the
+        signals recorded by the monitors of the part, the state of the
+        devices and no coverage bits are sent through connection, as
+        simulator.Simulator.run_worker() sends them.
+        """
+        network = self.network
+        part = self.partition[device_ids[0]]
+        device_set = set(device_ids)
+        network.set_part(device_set)
+        trace_lengths = {}
+        for monitor, signal_list in self.monitors.monitors_dictionary.items():
+            trace_lengths[monitor] = len(signal_list)
+
+        # Every part settles the same cycles and the same quiet cycles
+        error_code = network.NO_ERROR
+        completed_cycles = 0
+        try:
+            while completed_cycles < cycles:
+                quiet_cycles = network.get_quiet_cycles(
+                    cycles - completed_cycles)
+                if quiet_cycles:
+                    network.skip_quiet_cycles(quiet_cycles)
+                    self.monitors.record_signals(quiet_cycles)
+                    completed_cycles += quiet_cycles
+                    continue
+                error_code = self.execute_cycle(part)
+                if error_code != network.NO_ERROR:
+                    break
+                self.monitors.record_signals()
+                completed_cycles += 1
+        except threading.BrokenBarrierError:  # another part failed
+            error_code = None
+
+        signals = {}
+        for monitor, signal_list in self.monitors.monitors_dictionary.items():
+            if monitor[0] in device_set:
+                signals[monitor] = signal_list[trace_lengths[monitor]:]
+        network.scheduler.sync_counters()
+        connection.send((error_code, signals, self.devices.get_state(),
+                         None))
+        connection.close()
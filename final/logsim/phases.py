@@ -0,0 +1,109 @@
+"""Time and profile the phases of a simulation.
+
+Used in the Logic Simulator project to measure the scan, parse, build and
+simulate phases of a definition file separately, optionally under cProfile
+and tracemalloc, so that performance evidence can be reproduced.
+
+Classes
+-------
+PhaseProfiler - runs and measures the phases of a simulation.
+"""
+import cProfile
+import io
+import pstats
+import time
+import tracemalloc
+
+
+class PhaseProfiler:
+
+    """Run and measure the phases of a simulation.
+
+    Every phase is timed. If a profile prefix is given, each phase also runs
+    under cProfile and its statistics are written to the file
+    <profile_prefix>.<phase>.pstats, which can be loaded with the pstats
+    module. If memory tracing is set, each phase also runs under tracemalloc
+    and its peak memory and largest allocations are recorded.
+
+    Parameters
+    ----------
+    profile_prefix: path prefix of the pstats files, or None for no cProfile.
+    trace_memory: True to trace the memory allocated in each phase.
+    top: number of functions and allocations listed for each phase.
+
+    Public methods
+    --------------
+    run_phase(self, phase, function, *args): Runs the function as the given
+                                 phase and returns its result.
+
+    get_report(self): Returns the measurements as a list of lines of text.
+    """
+
+    def __init__(self, profile_prefix=None, trace_memory=False, top=10):
+        """Initialise the options and the measurements."""
+        self.profile_prefix = profile_prefix
+        self.trace_memory = trace_memory
+        self.top = top
+
+        # phases stores the phase names in the order they were run, and
+        # wall_times, profile_summaries, memory_peaks and memory_summaries
+        # store {phase: measurement}
+        self.phases = []
+        self.wall_times = {}
+        self.profile_summaries = {}
+        self.memory_peaks = {}
+        self.memory_summaries = {}
+
+    def run_phase(self, phase, function, *args):
+        """Run the function with the given arguments as the given phase.
+
+        Return the result of the function.
+        """
+        if self.profile_prefix is not None:
+            profile = cProfile.Profile()
+        if self.trace_memory:
+            tracemalloc.start()
+
+        start_time = time.perf_counter()
+        if self.profile_prefix is not None:
+            result = profile.runcall(function, *args)
+        else:
+            result = function(*args)
+        self.wall_times[phase] = time.perf_counter() - start_time
+        self.phases.append(phase)
+
+        if self.trace_memory:
+            snapshot = tracemalloc.take_snapshot()
+            self.memory_peaks[phase] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            statistics = snapshot.statistics("lineno")[:self.top]
+            self.memory_summaries[phase] = [str(statistic)
+                                            for statistic in statistics]
+        if self.profile_prefix is not None:
+            profile.dump_stats("".join([self.profile_prefix, ".", phase,
+                                        ".pstats"]))
+            summary = io.StringIO()
+            stats = pstats.Stats(profile, stream=summary)
+            stats.sort_stats("cumulative").print_stats(self.top)
+            self.profile_summaries[phase] = summary.getvalue()
+        return result
+
+    def get_report(self):
+        """Return the measurements as a list of lines of text."""
+        lines = ["Wall time (ms):"]
+        for phase in self.phases:
+            lines.append("".join(["  ", phase, ": ",
+                                  format(self.wall_times[phase] * 1000,
+                                         ".1f")]))
+        for phase in self.phases:
+            if phase in self.memory_peaks:
+                lines.append("".join(["Memory of ", phase, " phase (peak ",
+                                      str(self.memory_peaks[phase]),
+                                      " bytes):"]))
+                for line in self.memory_summaries[phase]:
+                    lines.append("".join(["  ", line]))
+            if phase in self.profile_summaries:
+                lines.append("".join(["Profile of ", phase, " phase:"]))
+                lines.extend(self.profile_summaries[phase].strip(
+                    "\n").splitlines())
+        return lines
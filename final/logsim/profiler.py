@@ -0,0 +1,158 @@
+"""Count and time the work done by the network.
+
+Used in the Logic Simulator project to find out why a circuit is slow to
+simulate, by counting device evaluations and settle iterations and timing
+the parts of each simulation cycle.
+
+Classes
+-------
+Profiler - records evaluation counts, settle iterations and timings.
+"""
+import collections
+
+
+class Profiler:
+
+    """Record evaluation counts, settle iterations and timings.
+
+    The network calls this class while profiling is set, and does not call it
+    at all otherwise. Every device evaluation is counted, as is the number of
+    iterations each executed cycle took to settle. The time spent updating
+    the clock, RC and SIGGEN devices, evaluating the other devices, and
+    recording the monitored signals is also added up, and the number of
+    gates folded into constants is kept.
+
+    Parameters
+    ----------
+    devices: instance of the devices.Devices() class.
+    iteration_limit: number of iterations after which the network is
+                     declared to be oscillating.
+
+    Public methods
+    --------------
+    reset(self): Clears all counts and timings.
+
+    count_evaluation(self, device_id): Counts one evaluation of the device.
+
+    record_cycle(self, iterations, settled, source_time, settle_time):
+                     Records an executed simulation cycle.
+
+    record_skipped_cycles(self, cycles): Records cycles which were skipped
+                                         because no signal could change.
+
+    record_monitors(self, monitor_time): Records time spent recording the
+                                         monitored signals.
+
+    record_folding(self, folded_gates): Records the number of gates folded
+                                        into constants.
+
+    get_kind_evaluations(self): Returns the number of evaluations of each
+                                device kind.
+
+    get_report(self): Returns the statistics as a list of lines of text.
+    """
+
+    def __init__(self, devices, iteration_limit):
+        """Initialise the counts and timings."""
+        self.devices = devices
+        self.iteration_limit = iteration_limit
+        self.reset()
+
+        # The number of gates currently folded into constants, which is not
+        # cleared by reset() as the gates stay folded
+        self.folded_gates = 0
+
+    def reset(self):
+        """Clear all counts and timings."""
+        # device_evaluations stores {device_id: number of evaluations}
+        self.device_evaluations = collections.Counter()
+
+        # settle_histogram[n] is the number of executed cycles which took n
+        # iterations to settle, where 0 means that no device was executed
+        self.settle_histogram = [0] * (self.iteration_limit + 1)
+        self.unsettled_cycles = 0  # cycles which did not settle
+
+        self.executed_cycles = 0
+        self.skipped_cycles = 0
+
+        # Time in seconds spent in each part of the simulation cycles
+        self.source_time = 0
+        self.settle_time = 0
+        self.monitor_time = 0
+
+    def count_evaluation(self, device_id):
+        """Count one evaluation of the device."""
+        self.device_evaluations[device_id] += 1
+
+    def record_cycle(self, iterations, settled, source_time, settle_time):
+        """Record an executed simulation cycle.
+
+        iterations is the largest number of iterations any connected
+        component took to settle, and settled is False if the cycle failed.
+        source_time and settle_time are the times spent updating the clock,
+        RC and SIGGEN devices and evaluating the devices.
+        """
+        self.executed_cycles += 1
+        self.settle_histogram[iterations] += 1
+        if not settled:
+            self.unsettled_cycles += 1
+        self.source_time += source_time
+        self.settle_time += settle_time
+
+    def record_skipped_cycles(self, cycles):
+        """Record cycles which were skipped because no signal could change."""
+        self.skipped_cycles += cycles
+
+    def record_monitors(self, monitor_time):
+        """Record time spent recording the monitored signals."""
+        self.monitor_time += monitor_time
+
+    def record_folding(self, folded_gates):
+        """Record the number of gates folded into constants."""
+        self.folded_gates = folded_gates
+
+    def get_kind_evaluations(self):
+        """Return the number of evaluations of each device kind.
+
+        The returned dictionary maps every device kind with at least one
+        evaluation to its number of evaluations.
+        """
+        kind_evaluations = collections.Counter()
+        for device_id, evaluations in self.device_evaluations.items():
+            device = self.devices.get_device(device_id)
+            if device is not None:
+                kind_evaluations[device.device_kind] += evaluations
+        return dict(kind_evaluations)
+
+    def get_report(self):
+        """Return the statistics as a list of lines of text."""
+        get_name_string = self.devices.names.get_name_string
+        lines = ["".join(["Cycles executed: ", str(self.executed_cycles),
+                          ", skipped: ", str(self.skipped_cycles),
+                          ", not settled: ", str(self.unsettled_cycles)])]
+        lines.append("".join([
+            "Time (ms): sources ", format(self.source_time * 1000, ".1f"),
+            ", devices ", format(self.settle_time * 1000, ".1f"),
+            ", monitors ", format(self.monitor_time * 1000, ".1f")]))
+        lines.append("".join(["Constant gates folded: ",
+                              str(self.folded_gates)]))
+
+        lines.append("Evaluations per device kind:")
+        kind_evaluations = self.get_kind_evaluations()
+        for device_kind in sorted(kind_evaluations,
+                                  key=kind_evaluations.get, reverse=True):
+            lines.append("".join(["  ", get_name_string(device_kind), ": ",
+                                  str(kind_evaluations[device_kind])]))
+
+        lines.append("Most evaluated devices:")
+        for device_id, evaluations in \
+                self.device_evaluations.most_common(5):
+            lines.append("".join(["  ", get_name_string(device_id), ": ",
+                                  str(evaluations)]))
+
+        lines.append("Settle iterations per cycle:")
+        for iterations, cycles in enumerate(self.settle_histogram):
+            if cycles:
+                lines.append("".join(["  ", str(iterations), ": ",
+                                      str(cycles)]))
+        return lines
@@ -0,0 +1,559 @@
+#!/usr/bin/env python3
+"""Explore the states of a sequential circuit reachable from its reset state.
+
+Used in the Logic Simulator project to list every state a circuit built from
+D-types can reach, and the finite-state machine of its transitions. The
+state of a circuit is packed into one integer holding the memories of its
+D-types, the levels of its switches in the last cycle, the outputs of its
+gates on loops, such as latches made of gates, and the phase of its clocks,
+RC and SIGGEN devices in their cycles.
+
+Every combination of the switches is tried from every state at once, in the
+bits, or lanes, of Python integers. The states already visited are kept in a
+set, which is spilled to a file on disk when it grows too large.
+
+Usage
+-----
+Show help: reachable.py -h
+Explore states: reachable.py [-m <states in memory>] [-d <spill directory>]
+                [-o <transitions path>] [-n <state limit>] <file path>
+
+Classes
+-------
+StateExplorer - searches the reachable states breadth-first.
+"""
+import getopt
+import math
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+from scanner import Scanner
+from parse import Parser
+from compiled import CompiledCircuit
+
+
+class StateExplorer:
+
+    """Search the reachable states breadth-first.
+
+    The state packs, from the least significant bit up, the outputs of the
+    gates on loops, the memories of the D-types, the levels of the
+    switches, and the phase, which counts the cycles since the reset state
+    until the clocks, RC and SIGGEN devices repeat. Each state is expanded
+    by settling the circuit in the state with one call of the compiled
+    cycle function, and then simulating the next cycle with every
+    combination of the switches in its own lane.
+
+    The visited states are kept in a set of at most max_states states, and
+    moved to an SQLite database on disk whenever it is full, whose table of
+    states is indexed by its primary key. A level of the search
+    with more than max_states states is kept in a temporary file.
+
+    Parameters
+    ----------
+    circuit: instance of the compiled.CompiledCircuit() class.
+    max_states: largest number of states kept in memory.
+    spill_dir: directory the states are spilled to, or None for the system
+               temporary directory.
+
+    Public methods
+    --------------
+    build_states(self): Finds the fields of the state and the levels of the
+                        sources in each phase.
+
+    pack_state(self, phase, switches, memories, loops): Returns the state
+                               holding the given fields.
+
+    unpack_state(self, state): Returns the fields of the state.
+
+    get_reset_state(self): Returns the state of the devices.
+
+    get_successors(self, state): Returns the next state for every
+                                 combination of the switches.
+
+    get_state_bytes(self, state): Returns the state packed into bytes.
+
+    add_visited(self, state): Adds the state to the visited states and
+                              returns True if it was not visited before.
+
+    write_level(self, level_file, states): Appends states to the file of a
+                                           level of the search.
+
+    read_level(self, level_file): Yields the states of a level of the search.
+
+    explore(self, limit=None): Searches the reachable states and yields
+                               every transition.
+
+    run(self, transitions_path=None, limit=None): Searches the reachable
+                               states and writes the transitions to a file.
+
+    get_state_name(self, state): Returns the fields of the state as text.
+
+    get_report(self): Returns the result of the search as a list of lines
+                      of text.
+    """
+
+    def __init__(self, circuit, max_states=1000000, spill_dir=None):
+        """Initialise the explorer and its results."""
+        self.circuit = circuit
+        self.names = circuit.names
+        self.devices = circuit.devices
+        self.network = circuit.network
+        self.max_states = max_states
+        self.spill_dir = spill_dir
+
+        [self.NO_ERROR, self.TOO_MANY_SWITCHES,
+         self.TOO_MANY_PHASES] = self.names.unique_error_codes(3)
+
+        self.max_switches = 16
+        self.max_phases = 1 << 16
+
+        # Set by build_states(): switches lists the positions of the
+        # switches among the sources, timed those of the clocks, RC and
+        # SIGGEN devices, phase_levels their levels in each phase and
+        # next_phases the phase following each phase
+        self.switches = []
+        self.timed = []
+        self.phase_levels = []
+        self.next_phases = []
+
+        # The visited states not yet spilled, and the connection to the
+        # database they are spilled to once there are max_states of them,
+        # in its own temporary directory
+        self.visited = set()
+        self.spilled = None
+        self.spill_path = None
+
+        # Compiled by explore()
+        self.run_cycle = None
+
+        # Results of the last search: depth is the most cycles needed to
+        # reach a state, and oscillating counts the unsettled states and
+        # transitions into unsettled states
+        self.states = 0
+        self.transitions = 0
+        self.oscillating = 0
+        self.depth = 0
+
+    def build_states(self):
+        """Find the fields of the state and the levels of the sources.
+
+        Return NO_ERROR, network.INPUTS_NOT_CONNECTED if an input is
+        unconnected, TOO_MANY_SWITCHES, or TOO_MANY_PHASES if the sources
+        take too long to repeat.
+        """
+        error_code = self.circuit.build_circuit()
+        if error_code != self.network.NO_ERROR:
+            return error_code
+        devices = self.devices
+        source_devices = [devices.get_device(device_id)
+                          for device_id, output_id in self.circuit.sources]
+        self.switches = [number for number, device in
+                         enumerate(source_devices)
+                         if device.device_kind == devices.SWITCH]
+        self.timed = [number for number, device in enumerate(source_devices)
+                      if device.device_kind != devices.SWITCH]
+        if len(self.switches) > self.max_switches:
+            return self.TOO_MANY_SWITCHES
+
+        # Phase 0 is the reset state. The levels of the RC devices settle
+        # once they fall, and the clocks and SIGGEN devices then repeat
+        # every period cycles.
+        if not self.timed:
+            self.phase_levels = [()]
+            self.next_phases = [0]
+            return self.NO_ERROR
+        settle = 0
+        period = 1
+        for number in self.timed:
+            device = source_devices[number]
+            if device.device_kind == devices.CLOCK:
+                period = period * 2 * device.clock_half_period // math.gcd(
+                    period, 2 * device.clock_half_period)
+            elif device.device_kind == devices.SIGGEN:
+                period = period * len(device.sequence) // math.gcd(
+                    period, len(device.sequence))
+            else:
+                settle = max(settle, device.high_period + 1)
+        if settle + period >= self.max_phases:
+            return self.TOO_MANY_PHASES
+        high = [devices.HIGH, devices.RISING]
+        self.phase_levels = [tuple(
+            int(source_devices[number].outputs[None] in high)
+            for number in self.timed)]
+        for levels in self.circuit.get_source_levels(settle + period):
+            self.phase_levels.append(tuple(levels[number]
+                                           for number in self.timed))
+        self.next_phases = list(range(1, settle + period + 1))
+        self.next_phases.append(settle + 1)
+        return self.NO_ERROR
+
+    def pack_state(self, phase, switches, memories, loops):
+        """Return the state holding the given fields.
+
+        switches, memories and loops hold the level of the nth switch,
+        D-type or gate on a loop in their nth bit.
+        """
+        state = phase << len(self.switches) | switches
+        state = state << len(self.circuit.d_types) | memories
+        return state << len(self.circuit.loop_gates) | loops
+
+    def unpack_state(self, state):
+        """Return the phase, switches, memories and loops of the state."""
+        fields = []
+        for count in [len(self.circuit.loop_gates),
+                      len(self.circuit.d_types), len(self.switches)]:
+            fields.append(state & ((1 << count) - 1))
+            state >>= count
+        return (state, fields[2], fields[1], fields[0])
+
+    def get_reset_state(self):
+        """Return the state of the devices, in phase 0."""
+        devices = self.devices
+        high = [devices.HIGH, devices.RISING]
+        switches = 0
+        for bit, number in enumerate(self.switches):
+            device_id = self.circuit.sources[number][0]
+            if devices.get_device(device_id).switch_state in high:
+                switches |= 1 << bit
+        memories = 0
+        for bit, device_id in enumerate(self.circuit.d_types):
+            if devices.get_device(device_id).dtype_memory in high:
+                memories |= 1 << bit
+        loops = 0
+        for bit, device_id in enumerate(self.circuit.loop_gates):
+            if devices.get_device(device_id).outputs[None] in high:
+                loops |= 1 << bit
+        return self.pack_state(0, switches, memories, loops)
+
+    def get_successors(self, state):
+        """Return the next state for every combination of the switches.
+
+        The returned list holds the next state when the nth switch is set
+        to the nth bit of the list index, or None where the circuit does not
+        settle. Return None instead if the circuit does not settle in the
+        state itself.
+        """
+        circuit = self.circuit
+        phase, switches, memories, loops = self.unpack_state(state)
+        lanes = 1 << len(self.switches)
+        full = (1 << lanes) - 1
+
+        # Settle the circuit in the state, without any clock edge, and then
+        # run the next cycle with each combination of the switches
+        signals = [0] * len(circuit.signal_index)
+        for bit, device_id in enumerate(circuit.loop_gates):
+            if loops >> bit & 1:
+                signals[circuit.signal_index[(device_id, None)]] = full
+        state_lanes = (tuple(signals),
+                       tuple(full if memories >> bit & 1 else 0
+                             for bit in range(len(circuit.d_types))),
+                       (full,) * len(circuit.d_types), full)
+        levels = [0] * len(circuit.sources)
+        for bit, number in enumerate(self.switches):
+            levels[number] = full if switches >> bit & 1 else 0
+        for number, level in zip(self.timed, self.phase_levels[phase]):
+            levels[number] = full if level else 0
+        state_lanes, oscillating = self.run_cycle(state_lanes, levels)
+        if oscillating:
+            return None
+
+        next_phase = self.next_phases[phase]
+        for bit, number in enumerate(self.switches):
+            run = 1 << bit  # lanes alternate in runs of 0 and 1
+            levels[number] = ((1 << 2 * run) - (1 << run)) * (
+                full // ((1 << 2 * run) - 1))
+        for number, level in zip(self.timed, self.phase_levels[next_phase]):
+            levels[number] = full if level else 0
+        state_lanes, oscillating = self.run_cycle(state_lanes, levels)
+
+        # Read the memories and loop outputs of each lane, most significant
+        # first, by transposing their bits
+        values = list(reversed(state_lanes[1]))
+        values.extend(state_lanes[0][circuit.signal_index[(device_id, None)]]
+                      for device_id in reversed(circuit.loop_gates))
+        columns = ["0" * lanes]
+        columns.extend(format(value, "b").zfill(lanes)[::-1]
+                       for value in values)
+        successors = []
+        first = self.pack_state(next_phase, 0, 0, 0)
+        shift = len(values)
+        for lane, bits in enumerate(zip(*columns)):
+            if oscillating >> lane & 1:
+                successors.append(None)
+            else:
+                successors.append(first | lane << shift |
+                                  int("".join(bits), 2))
+        return successors
+
+    def get_state_bytes(self, state):
+        """Return the state packed into the fewest bytes, lowest first."""
+        return state.to_bytes((state.bit_length() + 7) // 8 or 1, "little")
+
+    def add_visited(self, state):
+        """Add the state to the visited states.
+
+        Return True if the state was not visited before.
+        """
+        if state in self.visited:
+            return False
+        if self.spilled is not None and self.spilled.execute(
+                "SELECT 1 FROM states WHERE state = ?",
+                (self.get_state_bytes(state),)).fetchone() is not None:
+            return False
+        if len(self.visited) >= self.max_states:
+            if self.spilled is None:
+                self.spill_path = tempfile.mkdtemp(dir=self.spill_dir)
+                self.spilled = sqlite3.connect(os.path.join(
+                    self.spill_path, "states.db"))
+                # The database is thrown away after the search, so it
+                # need not survive a crash
+                self.spilled.execute("PRAGMA journal_mode = OFF")
+                self.spilled.execute("PRAGMA synchronous = OFF")
+                self.spilled.execute("CREATE TABLE states (state BLOB "
+                                     "PRIMARY KEY) WITHOUT ROWID")
+            self.spilled.executemany(
+                "INSERT INTO states VALUES (?)",
+                ((self.get_state_bytes(visited_state),)
+                 for visited_state in self.visited))
+            self.spilled.commit()
+            self.visited = set()
+        self.visited.add(state)
+        return True
+
+    def write_level(self, level_file, states):
+        """Append the states to the file of a level of the search.
+
+        The states are written in blocks of at most 255, each starting with
+        its number of states, and each state with its number of bytes.
+        """
+        for start in range(0, len(states), 255):
+            block = states[start:start + 255]
+            level_file.write(bytes([len(block)]))
+            for state in block:
+                data = self.get_state_bytes(state)
+                level_file.write(bytes([len(data)]) + data)
+
+    def read_level(self, level_file):
+        """Yield the states of a level of the search, in order."""
+        level_file.seek(0)
+        while True:
+            count = level_file.read(1)
+            if not count:
+                return
+            for number in range(count[0]):
+                size = level_file.read(1)[0]
+                yield int.from_bytes(level_file.read(size), "little")
+
+    def explore(self, limit=None):
+        """Search the reachable states and yield every transition.
+
+        build_states() must have returned NO_ERROR. Each transition is
+        yielded as a (state, switches, next state) tuple, where switches
+        holds the levels of the switches in the next cycle and the next
+        state is None if the circuit does not settle. The search stops
+        after limit states, if given.
+        """
+        self.visited = set()
+        self.spilled = None
+        self.states = 0
+        self.transitions = 0
+        self.oscillating = 0
+        self.depth = 0
+        self.run_cycle = self.circuit.compile_cycle()
+
+        reset_state = self.get_reset_state()
+        self.add_visited(reset_state)
+        self.states = 1
+        level = [reset_state]
+        level_file = None
+        try:
+            while level or level_file is not None:
+                next_level = []
+                next_file = None
+                states = level if level_file is None else \
+                    self.read_level(level_file)
+                for state in states:
+                    successors = self.get_successors(state)
+                    if successors is None:  # the state itself is unsettled
+                        self.oscillating += 1
+                        continue
+                    for switches, next_state in enumerate(successors):
+                        self.transitions += 1
+                        yield (state, switches, next_state)
+                        if next_state is None:
+                            self.oscillating += 1
+                        elif self.add_visited(next_state):
+                            self.states += 1
+                            next_level.append(next_state)
+                            if limit is not None and self.states >= limit:
+                                return
+
+                    # Keep a large level on disk
+                    if len(next_level) >= self.max_states:
+                        if next_file is None:
+                            next_file = tempfile.TemporaryFile(
+                                dir=self.spill_dir)
+                        self.write_level(next_file, next_level)
+                        next_level = []
+                if next_file is not None:
+                    self.write_level(next_file, next_level)
+                    next_level = []
+                if level_file is not None:
+                    level_file.close()
+                level = next_level
+                level_file = next_file
+                if level or level_file is not None:
+                    self.depth += 1
+        finally:
+            if level_file is not None:
+                level_file.close()
+            if self.spilled is not None:
+                self.spilled.close()
+                self.spilled = None
+                shutil.rmtree(self.spill_path)
+
+    def run(self, transitions_path=None, limit=None):
+        """Search the reachable states and write the transitions to a file.
+
+        Each line of the file holds a state, the levels of the switches in
+        the next cycle and the next state, or "-" if the circuit does not
+        settle. Return NO_ERROR or the error code of build_states().
+        """
+        error_code = self.build_states()
+        if error_code != self.NO_ERROR:
+            return error_code
+        if transitions_path is None:
+            for transition in self.explore(limit):
+                pass
+            return self.NO_ERROR
+        with open(transitions_path, "w") as transitions_file:
+            transitions_file.write("# " + self.get_state_name(None) + "\n")
+            for state, switches, next_state in self.explore(limit):
+                transitions_file.write(" ".join([
+                    str(state), str(switches),
+                    "-" if next_state is None else str(next_state)]) + "\n")
+        return self.NO_ERROR
+
+    def get_state_name(self, state):
+        """Return the fields of the state as text.
+
+        The fields are listed as phase, switches, D-types and gates, each
+        with its devices from the most significant bit. Return the names
+        of the devices in place of their levels if state is None.
+        """
+        get_name_string = self.names.get_name_string
+        fields = [
+            ("switches", [get_name_string(self.circuit.sources[number][0])
+                          for number in self.switches]),
+            ("D-types", [get_name_string(device_id)
+                         for device_id in self.circuit.d_types]),
+            ("gates", [get_name_string(device_id)
+                       for device_id in self.circuit.loop_gates])]
+        if state is None:
+            return "; ".join(["phase"] + [
+                field + " " + " ".join(reversed(device_names))
+                for field, device_names in fields if device_names])
+        phase, switches, memories, loops = self.unpack_state(state)
+        text = ["phase " + str(phase)]
+        for (field, device_names), value in zip(fields,
+                                                [switches, memories, loops]):
+            if device_names:
+                text.append(field + " " + format(value, "b").zfill(
+                    len(device_names)))
+        return "; ".join(text)
+
+    def get_report(self):
+        """Return the result of the search as a list of lines of text."""
+        lines = ["".join(["Reachable states: ", str(self.states),
+                          ", transitions: ", str(self.transitions),
+                          ", search depth: ", str(self.depth)])]
+        if self.oscillating:
+            lines.append("".join(["Unsettled states or transitions: ",
+                                  str(self.oscillating)]))
+        lines.append("State fields: " + self.get_state_name(None))
+        return lines
+
+
+def main(arg_list):
+    """Parse the command line options and arguments specified in arg_list.
+
+    Search the states of the circuit in the definition file reachable from
+    its reset state and print the result.
+    """
+    usage_message = ("Usage:\n"
+                     "Show help: reachable.py -h\n"
+                     "Explore states: reachable.py [-m <states in memory>] "
+                     "[-d <spill directory>] [-o <transitions path>] "
+                     "[-n <state limit>] <file path>")
+    try:
+        options, arguments = getopt.getopt(arg_list, "hm:d:o:n:")
+    except getopt.GetoptError:
+        print("Error: invalid command line arguments\n")
+        print(usage_message)
+        sys.exit()
+
+    max_states = 1000000
+    spill_dir = None
+    transitions_path = None
+    limit = None
+    for option, value in options:
+        if option == "-h":  # print the usage message
+            print(usage_message)
+            sys.exit()
+        elif option == "-d":
+            spill_dir = value
+        elif option == "-o":
+            transitions_path = value
+        elif not value.isdigit() or int(value) == 0:
+            print("Error: the options must be numbers greater than zero\n")
+            print(usage_message)
+            sys.exit()
+        elif option == "-m":
+            max_states = int(value)
+        elif option == "-n":
+            limit = int(value)
+    if len(arguments) != 1:
+        print("Error: one file path required\n")
+        print(usage_message)
+        sys.exit()
+
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    monitors = Monitors(names, devices, network)
+    parser = Parser(names, devices, network, monitors,
+                    Scanner(arguments[0], names))
+    if not parser.parse_network():
+        print("Error: the definition file could not be parsed")
+        sys.exit(1)
+    devices.reset_startup()
+
+    explorer = StateExplorer(CompiledCircuit(names, devices, network,
+                                             monitors),
+                             max_states, spill_dir)
+    error_code = explorer.run(transitions_path, limit)
+    if error_code == network.INPUTS_NOT_CONNECTED:
+        print("Error: the circuit has unconnected inputs")
+    elif error_code == explorer.TOO_MANY_SWITCHES:
+        print("".join(["Error: the circuit has more than ",
+                       str(explorer.max_switches), " switches"]))
+    elif error_code == explorer.TOO_MANY_PHASES:
+        print("Error: the clocks, RC and SIGGEN devices take too long to "
+              "repeat")
+    else:
+        for line in explorer.get_report():
+            print(line)
+        return
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,204 @@
+"""Schedule the transitions of clocks, RC and SIGGEN devices.
+
+Used in the Logic Simulator project to find the devices whose output signals
+are due to change in each simulation cycle, without counting cycles on every
+device.
+
+Classes
+-------
+Scheduler - holds the next transition time of every clock, RC and SIGGEN.
+"""
+import copy
+import heapq
+
+
+class Scheduler:
+
+    """Hold the next transition time of every clock, RC and SIGGEN device.
+
+    The scheduler keeps a calendar queue mapping simulation cycles to the
+    devices which are due to update in that cycle, so that each cycle only the
+    devices which may change their output are processed. The clock_counter of
+    a device is only brought up to date when the device is due, or when
+    sync_counters() is called.
+
+    Parameters
+    ----------
+    devices: instance of the devices.Devices() class.
+
+    Public methods
+    --------------
+    build(self): Schedules every clock, RC and SIGGEN device from its current
+                 counter.
+
+    advance(self): Moves on to the next cycle and returns the devices due to
+                   update in it.
+
+    skip(self, cycles): Moves on by the given number of cycles in which no
+                        device is due.
+
+    schedule(self, device): Schedules the next update of the device after it
+                            has been updated.
+
+    get_next_event(self): Returns the next cycle in which a device is due.
+
+    get_counter(self, device): Returns the current counter of the device.
+
+    sync_counters(self): Brings the counters of all devices up to date.
+
+    fork(self, devices): Returns a copy of the scheduler for the given forked
+                         devices.
+    """
+
+    def __init__(self, devices):
+        """Initialise the calendar queue and the cycle count."""
+        self.devices = devices
+
+        self.cycle = 0  # number of cycles the scheduler has advanced
+
+        # calendar stores {cycle: [devices due to update in that cycle]}, and
+        # event_cycles is a heap of the cycles in the calendar
+        self.calendar = {}
+        self.event_cycles = []
+
+        # synced_cycles stores {device_id: cycle in which the device's
+        # clock_counter was last brought up to date}
+        self.synced_cycles = {}
+
+    def build(self):
+        """Schedule every clock, RC and SIGGEN device from its current counter.
+
+        Every SIGGEN device is due in the next cycle, as its output is checked
+        against its sequence.
+        """
+        self.calendar = {}
+        self.event_cycles = []
+        self.synced_cycles = {}
+        source_kinds = [self.devices.CLOCK, self.devices.RC,
+                        self.devices.SIGGEN]
+        for device in self.devices.devices_list:
+            if device.device_kind in source_kinds:
+                self.synced_cycles[device.device_id] = self.cycle
+                if device.device_kind == self.devices.SIGGEN:
+                    self.add_event(device, 1)
+                else:
+                    self.add_event(device, self.get_cycles_to_update(device))
+
+    def add_event(self, device, cycles):
+        """Add the device to the calendar in the given number of cycles.
+
+        The device is not added if cycles is None.
+        """
+        if cycles is None:
+            return
+        event_cycle = self.cycle + cycles
+        if event_cycle not in self.calendar:
+            self.calendar[event_cycle] = []
+            heapq.heappush(self.event_cycles, event_cycle)
+        self.calendar[event_cycle].append(device)
+
+    def get_cycles_to_update(self, device):
+        """Return the number of cycles until the device is next due to update.
+
+        The device's clock_counter must be up to date. Return None if the
+        device will never change its output again.
+        """
+        counter = device.clock_counter
+        if device.device_kind == self.devices.CLOCK:
+            period = device.clock_half_period
+        elif device.device_kind == self.devices.RC:
+            period = device.high_period
+        else:  # SIGGEN: find the next change in the sequence
+            sequence = device.sequence
+            for cycles in range(1, len(sequence) + 1):
+                index = (counter + cycles - 1) % len(sequence)
+                if sequence[index] != sequence[index - 1]:
+                    return cycles
+            return None
+        # Clocks and RCs update when their counter reaches the period
+        if counter > period:
+            return None
+        return period - counter + 1
+
+    def advance(self):
+        """Move on to the next cycle and return the devices due to update.
+
+        The counters of the returned devices are brought up to date.
+        """
+        self.cycle += 1
+        if self.event_cycles and self.event_cycles[0] == self.cycle:
+            heapq.heappop(self.event_cycles)
+        due_devices = self.calendar.pop(self.cycle, [])
+        for device in due_devices:
+            # The counters are updated by the network during this cycle
+            device.clock_counter = self.get_counter(device, self.cycle - 1)
+            self.synced_cycles[device.device_id] = self.cycle
+        return due_devices
+
+    def skip(self, cycles):
+        """Move on by the given number of cycles in which no device is due."""
+        self.cycle += cycles
+
+    def schedule(self, device):
+        """Schedule the next update of the device after it has been updated.
+
+        A SIGGEN device whose output has not settled to its sequence is due
+        again in the next cycle.
+        """
+        if device.device_kind == self.devices.SIGGEN:
+            index = (device.clock_counter - 1) % len(device.sequence)
+            output_signal = device.outputs[None]
+            if output_signal not in [self.devices.RISING,
+                                     self.devices.FALLING] and \
+                    output_signal != device.sequence[index]:
+                self.add_event(device, 1)
+                return
+        self.add_event(device, self.get_cycles_to_update(device))
+
+    def get_next_event(self):
+        """Return the next cycle in which a device is due to update.
+
+        Return None if no device will change its output again.
+        """
+        if self.event_cycles:
+            return self.event_cycles[0]
+        return None
+
+    def get_counter(self, device, cycle=None):
+        """Return the counter of the device in the given cycle.
+
+        The current cycle is used if cycle is None. The device must not be due
+        to update between its last update and the given cycle.
+        """
+        if cycle is None:
+            cycle = self.cycle
+        cycles = cycle - self.synced_cycles[device.device_id]
+        if device.device_kind == self.devices.SIGGEN and cycles > 0:
+            length = len(device.sequence)
+            return (device.clock_counter + cycles - 1) % length + 1
+        return device.clock_counter + cycles
+
+    def sync_counters(self):
+        """Bring the counters of all scheduled devices up to date."""
+        for device in self.devices.devices_list:
+            if device.device_id in self.synced_cycles:
+                device.clock_counter = self.get_counter(device)
+                self.synced_cycles[device.device_id] = self.cycle
+
+    def fork(self, devices):
+        """Return a copy of the scheduler for the given forked devices.
+
+        devices is a branch returned by Devices.fork().
+        """
+        forked_scheduler = copy.copy(self)
+        forked_scheduler.devices = devices
+        forked_devices = {}
+        for device in devices.devices_list:
+            forked_devices[device.device_id] = device
+        forked_scheduler.calendar = {}
+        for event_cycle, due_devices in self.calendar.items():
+            forked_scheduler.calendar[event_cycle] = [
+                forked_devices[device.device_id] for device in due_devices]
+        forked_scheduler.event_cycles = list(self.event_cycles)
+        forked_scheduler.synced_cycles = dict(self.synced_cycles)
+        return forked_scheduler
@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+"""Serve logic simulations over a Unix-domain socket.
+
+Used in the Logic Simulator project to keep parsed circuits in memory, so
+that many runs of the same circuit do not pay for starting Python, scanning
+and parsing each time.
+
+Every message is a 4-byte big-endian length followed by that many bytes of
+JSON. A request is an object with a "command" and its arguments, and the
+response is an object with "ok" set to true and the results, or "ok" set to
+false and an "error" message. The commands are:
+
+    load {"path"}: simulate the circuit in the definition file, parsing it
+                   only if it is not in memory or has changed.
+    run {"cycles"}: run the circuit from a cold start-up.
+    continue {"cycles"}: continue the run.
+    set_switch {"switch", "level"}: set a switch to 0 or 1.
+    get_traces {}: return the traces {signal name: [signal levels]}.
+
+Usage
+-----
+Show help: server.py -h
+Start the server: server.py [-w <workers>] <socket path>
+
+Classes
+-------
+SimulationServer - serves the simulation commands of many sessions.
+SimulationClient - sends commands to a simulation server.
+"""
+import asyncio
+import concurrent.futures
+import getopt
+import json
+import os
+import socket
+import struct
+import sys
+
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+from scanner import Scanner
+from parse import Parser
+from simulator import Simulator
+
+
+class SimulationServer:
+
+    """Serve the simulation commands of many sessions.
+
+    Each connection to the socket is a session with its own simulation.
+    Sessions are handled concurrently by an asyncio event loop, while
+    parsing and runs are done in a pool of worker threads so that short
+    commands of other sessions are not held up. Every circuit is parsed
+    once and kept in memory, and each session loading it gets a fork of
+    the parsed simulation, which shares its structure.
+
+    The worker threads keep the event loop responsive, but they share the
+    interpreter lock, so runs of different sessions take turns rather than
+    running in parallel, and more workers do not make them faster. A
+    process pool would have to copy the simulation of the session to and
+    from a worker process for every command, so the server runs many
+    simulations at once only by being started several times.
+
+    Parameters
+    ----------
+    socket_path: path of the Unix-domain socket.
+    workers: number of worker threads, or None for the default.
+
+    Public methods
+    --------------
+    serve(self): Serves sessions until the server is stopped.
+
+    stop(self): Stops the server from any thread.
+
+    get_circuit(self, path): Returns the parsed simulation of the definition
+                             file.
+
+    handle_session(self, reader, writer): Handles the requests of one
+                                          connection.
+
+    handle_request(self, session, request): Returns the response to the
+                                            request.
+
+    load_command(self, session, request): Loads a circuit into the session.
+
+    run_command(self, session, request): Runs the circuit from a cold
+                                         start-up.
+
+    continue_command(self, session, request): Continues the run.
+
+    get_run_error(self, simulator, error_code): Returns the error message
+                                                of a failed run.
+
+    set_switch_command(self, session, request): Sets a switch.
+
+    get_traces_command(self, session, request): Returns the traces.
+
+    read_message(self, reader): Returns the next message of a connection.
+
+    write_message(self, writer, message): Writes a message to a connection.
+    """
+
+    def __init__(self, socket_path, workers=None):
+        """Initialise the server, its circuits and its worker pool."""
+        self.socket_path = socket_path
+        self.executor = concurrent.futures.ThreadPoolExecutor(workers)
+
+        # circuits stores {absolute path: (modification time, simulator)}
+        # for every parsed definition file, and circuit_locks stops two
+        # sessions from parsing the same file at once
+        self.circuits = {}
+        self.circuit_locks = {}
+
+        self.commands = {"load": self.load_command,
+                         "run": self.run_command,
+                         "continue": self.continue_command,
+                         "set_switch": self.set_switch_command,
+                         "get_traces": self.get_traces_command}
+
+        # Set when the server is serving, to stop it from other threads
+        self.loop = None
+        self.stopped = None
+
+    async def serve(self):
+        """Serve sessions until the server is stopped."""
+        self.loop = asyncio.get_running_loop()
+        self.stopped = asyncio.Event()
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+        server = await asyncio.start_unix_server(self.handle_session,
+                                                 path=self.socket_path)
+        async with server:
+            await self.stopped.wait()
+        os.remove(self.socket_path)
+        self.executor.shutdown()
+
+    def stop(self):
+        """Stop the server. This can be called from any thread."""
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.stopped.set)
+
+    def get_circuit(self, path):
+        """Return the parsed simulation of the definition file.
+
+        The file is parsed if it is not in memory or has been modified since
+        it was parsed. Return None if it cannot be parsed. This is called in
+        a worker thread.
+        """
+        modification_time = os.path.getmtime(path)
+        if path in self.circuits and \
+                self.circuits[path][0] == modification_time:
+            return self.circuits[path][1]
+
+        names = Names()
+        devices = Devices(names)
+        network = Network(names, devices)
+        monitors = Monitors(names, devices, network)
+        parser = Parser(names, devices, network, monitors,
+                        Scanner(path, names))
+        if not parser.parse_network():
+            return None
+        simulator = Simulator(names, devices, network, monitors)
+        self.circuits[path] = (modification_time, simulator)
+        return simulator
+
+    async def handle_session(self, reader, writer):
+        """Handle the requests of one connection until it is closed."""
+        session = {"simulator": None}
+        try:
+            while True:
+                try:
+                    request = await self.read_message(reader)
+                except ValueError:
+                    response = {"ok": False, "error": "invalid message"}
+                else:
+                    if request is None:  # the connection was closed
+                        break
+                    response = await self.handle_request(session, request)
+                self.write_message(writer, response)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def handle_request(self, session, request):
+        """Return the response to the request of the session."""
+        if not isinstance(request, dict) or \
+                request.get("command") not in self.commands:
+            return {"ok": False, "error": "unknown command"}
+        if request["command"] != "load" and session["simulator"] is None:
+            return {"ok": False, "error": "no circuit loaded"}
+        try:
+            return await self.commands[request["command"]](session, request)
+        except (KeyError, TypeError, ValueError):
+            return {"ok": False, "error": "invalid arguments"}
+
+    async def load_command(self, session, request):
+        """Load the circuit in the definition file into the session."""
+        path = os.path.abspath(request["path"])
+        if not os.path.isfile(path):
+            return {"ok": False, "error": "file not found"}
+        lock = self.circuit_locks.setdefault(path, asyncio.Lock())
+        async with lock:
+            simulator = await self.loop.run_in_executor(
+                self.executor, self.get_circuit, path)
+        if simulator is None:
+            return {"ok": False, "error": "circuit could not be parsed"}
+        session["simulator"] = simulator.fork()
+        return {"ok": True,
+                "devices": len(simulator.devices.devices_list),
+                "monitors": simulator.monitors.get_signal_names()[0]}
+
+    async def run_command(self, session, request):
+        """Run the circuit of the session from a cold start-up."""
+        cycles = int(request["cycles"])
+        if cycles < 0:
+            raise ValueError
+        simulator = session["simulator"]
+        simulator.reset()
+        return await self.continue_command(session, request)
+
+    async def continue_command(self, session, request):
+        """Continue the run of the session."""
+        cycles = int(request["cycles"])
+        if cycles < 0:
+            raise ValueError
+        simulator = session["simulator"]
+        error_code = await self.loop.run_in_executor(
+            self.executor, simulator.run_network, cycles)
+        if error_code != simulator.network.NO_ERROR:
+            return {"ok": False,
+                    "error": self.get_run_error(simulator, error_code),
+                    "cycles_completed": simulator.cycles_completed}
+        return {"ok": True, "cycles_completed": simulator.cycles_completed}
+
+    def get_run_error(self, simulator, error_code):
+        """Return the error message of a run that failed with error_code."""
+        stimulus = simulator.stimulus
+        if stimulus is not None and error_code == stimulus.error_code and \
+                error_code != stimulus.NO_ERROR:
+            return "".join(["invalid stimulus on line ",
+                            str(stimulus.line_number)])
+        if error_code == simulator.network.OSCILLATING:
+            return "network oscillating"
+        if error_code == simulator.network.INPUTS_NOT_CONNECTED:
+            return "inputs not connected"
+        return "run failed"
+
+    async def set_switch_command(self, session, request):
+        """Set a switch of the circuit of the session."""
+        simulator = session["simulator"]
+        switch_id = simulator.names.query(request["switch"])
+        level = int(request["level"])
+        if level not in [0, 1] or \
+                not simulator.devices.set_switch(switch_id, level):
+            return {"ok": False, "error": "invalid switch"}
+        return {"ok": True}
+
+    async def get_traces_command(self, session, request):
+        """Return the traces recorded in the session."""
+        simulator = session["simulator"]
+        traces = {}
+        for (device_id, output_id), signal_list in \
+                simulator.monitors.monitors_dictionary.items():
+            signal_name = simulator.devices.get_signal_name(device_id,
+                                                            output_id)
+            traces[signal_name] = list(signal_list)
+        return {"ok": True, "traces": traces,
+                "cycles_completed": simulator.cycles_completed}
+
+    async def read_message(self, reader):
+        """Return the next message of a connection.
+
+        Return None if the connection is closed. Raise ValueError if the
+        message is not valid JSON.
+        """
+        try:
+            header = await reader.readexactly(4)
+            [length] = struct.unpack(">I", header)
+            body = await reader.readexactly(length)
+        except asyncio.IncompleteReadError:
+            return None
+        return json.loads(body.decode("utf-8"))
+
+    def write_message(self, writer, message):
+        """Write a message to a connection."""
+        body = json.dumps(message, separators=(",", ":")).encode("utf-8")
+        writer.write(struct.pack(">I", len(body)) + body)
+
+
+class SimulationClient:
+
+    """Send commands to a simulation server.
+
+    Parameters
+    ----------
+    socket_path: path of the Unix-domain socket of the server.
+
+    Public methods
+    --------------
+    request(self, command, **arguments): Sends a command and returns the
+                                         response.
+
+    receive(self, length): Returns the given number of bytes read from the
+                           connection.
+
+    close(self): Closes the connection.
+    """
+
+    def __init__(self, socket_path):
+        """Connect to the server."""
+        self.connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.connection.connect(socket_path)
+
+    def request(self, command, **arguments):
+        """Send the command with its arguments and return the response."""
+        arguments["command"] = command
+        body = json.dumps(arguments, separators=(",", ":")).encode("utf-8")
+        self.connection.sendall(struct.pack(">I", len(body)) + body)
+        [length] = struct.unpack(">I", self.receive(4))
+        return json.loads(self.receive(length).decode("utf-8"))
+
+    def receive(self, length):
+        """Return the given number of bytes read from the connection."""
+        data = b""
+        while len(data) < length:
+            chunk = self.connection.recv(length - len(data))
+            if not chunk:
+                raise ConnectionError("the server closed the connection")
+            data += chunk
+        return data
+
+    def close(self):
+        """Close the connection."""
+        self.connection.close()
+
+
+def main(arg_list):
+    """Parse the command line options and arguments specified in arg_list.
+
+    Serve simulations on the given socket until interrupted.
+    """
+    usage_message = ("Usage:\n"
+                     "Show help: server.py -h\n"
+                     "Start the server: server.py [-w <workers>] "
+                     "<socket path>")
+    try:
+        options, arguments = getopt.getopt(arg_list, "hw:")
+    except getopt.GetoptError:
+        print("Error: invalid command line arguments\n")
+        print(usage_message)
+        sys.exit()
+
+    workers = None
+    for option, value in options:
+        if option == "-h":  # print the usage message
+            print(usage_message)
+            sys.exit()
+        elif option == "-w":
+            if not value.isdigit() or int(value) == 0:
+                print("Error: the number of workers must be a number\n")
+                print(usage_message)
+                sys.exit()
+            workers = int(value)
+    if len(arguments) != 1:
+        print("Error: one socket path required\n")
+        print(usage_message)
+        sys.exit()
+
+    server = SimulationServer(arguments[0], workers)
+    try:
+        asyncio.run(server.serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
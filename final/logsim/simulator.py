@@ -0,0 +1,461 @@
+"""Run and branch logic simulations.
+
+Used in the Logic Simulator project to run the network for a number of
+simulation cycles while recording the monitored signals, and to fork a
+simulation into branches that continue independently from the same state.
+
+Classes
+-------
+Simulator - runs the network and records the monitored signals.
+"""
+import multiprocessing
+
+from conditions import Condition
+from partitioned import PartitionedRun
+
+
+class Simulator:
+
+    """Run the network and record the monitored signals.
+
+    This class executes the network for a number of simulation cycles,
+    recording the signal levels of all monitors after every cycle. A running
+    simulation can be forked into a branch that shares the circuit structure
+    and the traces recorded so far, so that several continuations can be
+    explored from a common point without rebuilding the circuit.
+
+    If period detection is set, the state of the devices is stored after
+    every cycle. Once a state repeats, the network is periodic and the
+    remaining cycles of the run are recorded by repeating the signals of the
+    last period instead of executing the network.
+
+    If more than one process is set, the connected components of the network
+    are shared out between worker processes, each of which runs its
+    components for the whole run. As the components do not affect each
+    other, the traces and device states the workers send back are the same
+    as those of a run in a single process. A network with a single
+    component is instead split into parts by a partitioned.PartitionedRun(),
+    whose workers exchange the signals connecting their parts in every
+    settling iteration.
+
+    If a stimulus is set, its events are read as the run reaches their
+    cycles, and the switches are set between two cycles of the same run.
+
+    If breakpoints are set, their conditions are compiled into one check,
+    which is run after every cycle. A run stops at the first cycle the
+    check is met at, leaving the devices in their state at that cycle, and
+    can then be continued. Period detection and worker processes are not
+    used while breakpoints are set.
+
+    Parameters
+    ----------
+    names: instance of the names.Names() class.
+    devices: instance of the devices.Devices() class.
+    network: instance of the network.Network() class.
+    monitors: instance of the monitors.Monitors() class.
+    cycles_completed: number of simulation cycles already completed.
+
+    Public methods
+    --------------
+    reset(self): Clears the monitors and simulates a cold start-up.
+
+    run_network(self, cycles): Runs the network for the specified number of
+                               simulation cycles, applying the stimulus.
+
+    run_segment(self, cycles): Runs the network for the specified number of
+                               simulation cycles without the stimulus.
+
+    set_period_detection(self, period_detection): Sets whether runs stop
+                                   executing once the network is periodic.
+
+    get_state(self): Returns the current simulation state of the devices.
+
+    set_stimulus(self, stimulus): Sets the stimulus whose events are applied
+                                  during runs.
+
+    add_breakpoint(self, expression): Adds a condition that stops runs at
+                                      the cycle it is met at.
+
+    clear_breakpoints(self): Removes all breakpoints.
+
+    get_breakpoint_levels(self): Returns the current levels of the signals
+                                 of the breakpoints.
+
+    set_processes(self, processes): Sets the number of worker processes runs
+                                    are shared out between.
+
+    group_components(self): Returns the device IDs of the connected
+                            components each worker process runs.
+
+    run_processes(self, cycles): Runs the connected components, or the parts
+                                 of a single component, of the network in
+                                 worker processes.
+
+    run_worker(self, device_ids, cycles, connection): Runs the given devices
+                               and sends back their traces and states.
+
+    fork(self): Returns a branch of the simulation.
+    """
+
+    def __init__(self, names, devices, network, monitors, cycles_completed=0):
+        """Initialise the simulation and the number of completed cycles."""
+        self.names = names
+        self.devices = devices
+        self.network = network
+        self.monitors = monitors
+
+        self.cycles_completed = cycles_completed
+
+        # If period detection is set, transient_cycles and period are set to
+        # the number of cycles completed before the network became periodic
+        # and to its period when this is detected during a run
+        self.period_detection = False
+        self.transient_cycles = None
+        self.period = None
+
+        # Runs are shared out between this many worker processes if there is
+        # more than one
+        self.processes = 1
+
+        # Sets the switches at the cycles given in a stimulus file if set
+        self.stimulus = None
+
+        # breakpoints stores the expressions of the breakpoint conditions,
+        # breakpoint_check their compiled check, or None if there are none,
+        # and breakpoint_signals the signals it reads. breakpoint_cycle is
+        # set to the cycle the last run stopped at if it met a breakpoint.
+        self.breakpoints = []
+        self.breakpoint_check = None
+        self.breakpoint_condition = None
+        self.breakpoint_signals = []
+        self.breakpoint_cycle = None
+
+    def reset(self):
+        """Clear the monitors and simulate a cold start-up of the devices.
+
+        The stimulus, if any, is read from the start again.
+        """
+        self.cycles_completed = 0
+        self.monitors.reset_monitors()
+        self.devices.cold_startup()
+        if self.stimulus is not None:
+            self.stimulus.reset()
+
+    def run_network(self, cycles):
+        """Run the network for the specified number of simulation cycles.
+
+        If a stimulus is set, the run is split at the cycles of its events,
+        and the switches of each event are set before the following cycle.
+        If a breakpoint is met, the run stops early and breakpoint_cycle is
+        set to the cycle it stopped at. Return network.NO_ERROR if
+        successful, the error code returned by the network if a cycle fails,
+        or the error code of the stimulus if it has an invalid line.
+        """
+        end_cycle = self.cycles_completed + cycles
+        self.breakpoint_cycle = None
+        while True:
+            segment_end_cycle = end_cycle
+            if self.stimulus is not None:
+                error_code = self.stimulus.apply_events(self.cycles_completed)
+                if error_code != self.stimulus.NO_ERROR:
+                    return error_code
+                next_cycle = self.stimulus.get_next_cycle()
+                if next_cycle is not None:
+                    segment_end_cycle = min(end_cycle, next_cycle)
+
+            error_code = self.run_segment(segment_end_cycle -
+                                          self.cycles_completed)
+            if error_code != self.network.NO_ERROR or \
+                    self.cycles_completed >= end_cycle or \
+                    self.breakpoint_cycle is not None:
+                return error_code
+
+    def run_segment(self, cycles):
+        """Run the network for the specified number of simulation cycles.
+
+        The stimulus is not read. Cycles in which no signal can change are
+        not executed, and the unchanged signals are recorded for all of them
+        at once. If period detection is set, every cycle is executed until
+        the network is found to be periodic, unless the monitors have a
+        trigger, breakpoints are set or the network counts activity. If a
+        breakpoint is met, the run stops at that cycle and breakpoint_cycle
+        is set to it. Return network.NO_ERROR if successful, or the error
+        code returned by the network if a cycle fails.
+        """
+        # Triggers, breakpoints and activity statistics check every cycle, so
+        # the traces are neither repeated nor recorded by worker processes
+        # while one is set
+        check_cycles = self.monitors.trigger is not None or \
+            self.breakpoint_check is not None or \
+            self.network.activity is not None
+        period_detection = self.period_detection and not check_cycles
+        if self.processes > 1 and not self.period_detection and \
+                not check_cycles:
+            if self.run_processes(cycles):
+                return self.network.NO_ERROR
+
+        breakpoint_check = self.breakpoint_check
+        if breakpoint_check is not None:
+            levels = self.get_breakpoint_levels()
+
+        start_cycle = self.cycles_completed
+        end_cycle = start_cycle + cycles
+        self.transient_cycles = None
+        self.period = None
+        states = []  # the state after each cycle of this run
+        state_cycles = {}  # {state: first cycle it was reached at}
+
+        while self.cycles_completed < end_cycle:
+            remaining_cycles = end_cycle - self.cycles_completed
+            if period_detection:
+                quiet_cycles = 0
+            else:
+                quiet_cycles = self.network.get_quiet_cycles(
+                    remaining_cycles)
+            if quiet_cycles and breakpoint_check is not None:
+                # The levels stay the same, so only stop at the first quiet
+                # cycle or at the next cycle of a cycle condition
+                if breakpoint_check(levels, levels,
+                                    self.cycles_completed + 1):
+                    quiet_cycles = 1
+                for cycle in self.breakpoint_condition.cycles:
+                    if cycle > self.cycles_completed:
+                        quiet_cycles = min(quiet_cycles,
+                                           cycle - self.cycles_completed)
+            if quiet_cycles:
+                self.network.skip_quiet_cycles(quiet_cycles)
+                self.monitors.record_signals(quiet_cycles)
+                self.cycles_completed += quiet_cycles
+                if breakpoint_check is not None and \
+                        breakpoint_check(levels, levels,
+                                         self.cycles_completed):
+                    self.breakpoint_cycle = self.cycles_completed
+                    break
+                continue
+
+            error_code = self.network.execute_network()
+            if error_code != self.network.NO_ERROR:
+                return error_code
+            self.monitors.record_signals()
+            self.cycles_completed += 1
+            if breakpoint_check is not None:
+                previous_levels = levels
+                levels = self.get_breakpoint_levels()
+                if breakpoint_check(previous_levels, levels,
+                                    self.cycles_completed):
+                    self.breakpoint_cycle = self.cycles_completed
+                    break
+
+            if period_detection:
+                state = self.get_state()
+                if state in state_cycles:  # the network is periodic
+                    self.transient_cycles = state_cycles[state]
+                    self.period = self.cycles_completed - self.transient_cycles
+                    self.monitors.repeat_signals(self.period,
+                                                 remaining_cycles - 1)
+
+                    # Restore the state the devices would reach at the end
+                    end_state_cycle = self.transient_cycles + (
+                        end_cycle - self.transient_cycles) % self.period
+                    self.devices.set_state(
+                        states[end_state_cycle - start_cycle - 1])
+                    self.cycles_completed = end_cycle
+                    break
+                states.append(state)
+                state_cycles[state] = self.cycles_completed
+        return self.network.NO_ERROR
+
+    def set_period_detection(self, period_detection):
+        """Set whether runs stop executing once the network is periodic."""
+        self.period_detection = period_detection
+
+    def get_state(self):
+        """Return the current simulation state of the devices.
+
+        Two equal states always lead to the same signals in later cycles, as
+        long as no switches are set and no devices or connections are added.
+        """
+        self.network.scheduler.sync_counters()
+        return self.devices.get_state()
+
+    def set_stimulus(self, stimulus):
+        """Set the stimulus whose events are applied during runs.
+
+        stimulus is an instance of the stimulus.Stimulus() class, or None to
+        stop applying events. Events due before the current cycle are applied
+        at the start of the next run.
+        """
+        if self.stimulus is not None and self.stimulus is not stimulus:
+            self.stimulus.close()
+        self.stimulus = stimulus
+
+    def add_breakpoint(self, expression):
+        """Add a condition that stops runs at the cycle it is met at.
+
+        expression is a condition on any outputs, see the conditions
+        module. The conditions of all breakpoints are compiled into one
+        check. Return True if the condition is valid.
+        """
+        condition = Condition(self.names, self.devices, expression)
+        if condition.error_code != condition.NO_ERROR:
+            return False
+        self.breakpoints.append(expression)
+
+        # A check is met if any of the conditions is met
+        condition = Condition(self.names, self.devices,
+                              " or ".join(self.breakpoints))
+        self.breakpoint_signals = condition.signals
+        self.breakpoint_check = condition.compile(condition.signals)
+        self.breakpoint_condition = condition
+        return True
+
+    def clear_breakpoints(self):
+        """Remove all breakpoints."""
+        self.breakpoints = []
+        self.breakpoint_check = None
+        self.breakpoint_condition = None
+        self.breakpoint_signals = []
+
+    def get_breakpoint_levels(self):
+        """Return the current levels of the signals of the breakpoints."""
+        get_output_signal = self.network.get_output_signal
+        return tuple(get_output_signal(device_id, output_id)
+                     for device_id, output_id in self.breakpoint_signals)
+
+    def set_processes(self, processes):
+        """Set the number of worker processes runs are shared out between."""
+        self.processes = processes
+
+    def group_components(self):
+        """Return the device IDs of the components each worker process runs.
+
+        The connected components of the network are shared out between at
+        most the number of processes set, largest first to the group with
+        the fewest devices. The returned list has a list of device IDs for
+        every group with at least one component.
+        """
+        groups = [[] for process in range(self.processes)]
+        components = self.network.find_components()
+        components.sort(key=len, reverse=True)
+        for device_ids in components:
+            smallest_group = min(groups, key=len)
+            smallest_group.extend(device_ids)
+        return [device_ids for device_ids in groups if device_ids]
+
+    def run_processes(self, cycles):
+        """Run the components of the network in worker processes.
+
+        A network with a single component is split into parts, each run by
+        a worker. Return True if every worker completed the run, in which
+        case their traces and device states have been merged into this
+        simulation. Return False if the network cannot be shared out, or any
+        cycle fails, in which case this simulation is left unchanged so that
+        the run can be repeated in this process.
+        """
+        groups = self.group_components()
+        run_worker = self.run_worker
+        coverage = self.network.coverage
+        if len(groups) < 2:
+            # The parts do not record coverage
+            if coverage is not None:
+                return False
+            partitioned_run = PartitionedRun(self.devices, self.network,
+                                             self.monitors, self.processes)
+            groups = partitioned_run.groups
+            if len(groups) < 2:
+                return False
+            partitioned_run.build_steps()
+            run_worker = partitioned_run.run_worker
+        if coverage is not None:  # the workers must use the same bits
+            coverage.build_index()
+
+        connections = []
+        workers = []
+        for device_ids in groups:
+            receiver, sender = multiprocessing.Pipe(duplex=False)
+            worker = multiprocessing.Process(
+                target=run_worker, args=(device_ids, cycles, sender))
+            worker.start()
+            sender.close()
+            connections.append(receiver)
+            workers.append(worker)
+        results = []
+        for receiver in connections:
+            try:
+                results.append(receiver.recv())
+            except EOFError:  # the worker exited without sending results
+                results.append(None)
+        for worker in workers:
+            worker.join()
+        if any(result is None or result[0] != self.network.NO_ERROR
+               for result in results):
+            return False
+
+        # Merge the states of the devices each worker ran
+        self.network.scheduler.sync_counters()
+        state = list(self.devices.get_state())
+        positions = {}
+        for position, device in enumerate(self.devices.devices_list):
+            positions[device.device_id] = position
+        for device_ids, (error_code, signals, worker_state,
+                         coverage_bits) in zip(groups, results):
+            for device_id in device_ids:
+                position = positions[device_id]
+                state[position] = worker_state[position]
+            self.monitors.extend_signals(signals)
+            if coverage is not None:
+                coverage.merge_bits(*coverage_bits)
+        self.devices.set_state(tuple(state))
+        self.cycles_completed += cycles
+        self.transient_cycles = None
+        self.period = None
+        return True
+
+    def run_worker(self, device_ids, cycles, connection):
+        """Run the given devices and send back their traces and states.
+
+        This is called in a worker process. Only the given devices are
+        simulated, and the error code, the signals recorded by their
+        monitors, the state of the devices and the toggle coverage bits, if
+        coverage is set, are sent through connection.
+        """
+        device_set = set(device_ids)
+        if self.network.live_outputs is None:
+            outputs = [(device_id, output_id) for device_id in device_ids
+                       for output_id in
+                       self.devices.get_device(device_id).outputs]
+        else:
+            outputs = [(device_id, output_id) for device_id, output_id
+                       in self.network.live_outputs
+                       if device_id in device_set]
+        self.network.prune_network(outputs)
+        trace_lengths = {}
+        for monitor, signal_list in self.monitors.monitors_dictionary.items():
+            trace_lengths[monitor] = len(signal_list)
+        self.processes = 1
+        error_code = self.run_segment(cycles)
+
+        signals = {}
+        for monitor, signal_list in self.monitors.monitors_dictionary.items():
+            if monitor[0] in device_set:
+                signals[monitor] = signal_list[trace_lengths[monitor]:]
+        coverage_bits = None
+        if self.network.coverage is not None:
+            coverage_bits = self.network.coverage.get_bits()
+        connection.send((error_code, signals, self.get_state(),
+                         coverage_bits))
+        connection.close()
+
+    def fork(self):
+        """Return a branch of the simulation.
+
+        The branch shares the names, the connectivity and the recorded traces
+        with this simulation, and continues from its current state. Switches
+        can then be set and cycles run on either without affecting the other.
+        The branch has no stimulus or breakpoints.
+        """
+        devices = self.devices.fork()
+        network = self.network.fork(devices)
+        monitors = self.monitors.fork(devices, network)
+        return Simulator(self.names, devices, network, monitors,
+                         self.cycles_completed)
@@ -0,0 +1,131 @@
+"""Read timed switch events from a stimulus file.
+
+Used in the Logic Simulator project to set switches at given simulation
+cycles during a run. Each line of a stimulus file holds one event:
+
+    <cycle> <switch name> <0 or 1>
+
+which sets the switch after that many cycles have been completed since the
+cold start-up, so the new level is first seen in the following cycle. The
+cycles must not decrease from one event to the next. Blank lines and lines
+starting with # are ignored. The file is read lazily, one event ahead of the
+simulation, so files of any length can be replayed.
+
+Classes
+-------
+Stimulus - reads the events of a stimulus file and sets the switches.
+"""
+
+
+class Stimulus:
+
+    """Read the events of a stimulus file and set the switches.
+
+    The file is opened when the stimulus is made and read from the start
+    again on every reset. Reading stops at the first invalid line, whose
+    error code and line number are then stored.
+
+    Parameters
+    ----------
+    names: instance of the names.Names() class.
+    devices: instance of the devices.Devices() class.
+    path: path of the stimulus file.
+
+    Public methods
+    --------------
+    reset(self): Reads the stimulus file from the start again.
+
+    read_event(self): Reads the next event of the stimulus file.
+
+    get_next_cycle(self): Returns the cycle of the next event.
+
+    apply_events(self, cycle): Sets the switches of all events due by the
+                               given cycle.
+
+    close(self): Closes the stimulus file.
+    """
+
+    def __init__(self, names, devices, path):
+        """Open the stimulus file and read its first event."""
+        self.names = names
+        self.devices = devices
+        self.path = path
+
+        [self.NO_ERROR, self.BAD_EVENT, self.NOT_SWITCH,
+         self.EVENT_ORDER] = self.names.unique_error_codes(4)
+
+        self.stimulus_file = None
+        self.line_number = 0  # of the last line read
+        self.next_event = None  # (cycle, switch_id, signal), None at the end
+        self.error_code = self.NO_ERROR
+        self.reset()
+
+    def reset(self):
+        """Read the stimulus file from the start again."""
+        self.close()
+        self.stimulus_file = open(self.path)
+        self.line_number = 0
+        self.next_event = None
+        self.error_code = self.NO_ERROR
+        self.read_event()
+
+    def read_event(self):
+        """Read the next event of the stimulus file into self.next_event.
+
+        self.next_event is set to None at the end of the file, or if the
+        line is invalid, in which case self.error_code is also set.
+        """
+        if self.next_event is None:
+            last_cycle = 0
+        else:
+            last_cycle = self.next_event[0]
+        self.next_event = None
+        if self.stimulus_file is None or self.error_code != self.NO_ERROR:
+            return
+
+        for line in self.stimulus_file:
+            self.line_number += 1
+            words = line.split()
+            if not words or words[0].startswith("#"):
+                continue
+
+            if len(words) != 3 or not words[0].isdigit() or \
+                    words[2] not in ["0", "1"]:
+                self.error_code = self.BAD_EVENT
+                return
+            cycle = int(words[0])
+            switch_id = self.names.query(words[1])
+            device = self.devices.get_device(switch_id)
+            if device is None or device.device_kind != self.devices.SWITCH:
+                self.error_code = self.NOT_SWITCH
+                return
+            if cycle < last_cycle:
+                self.error_code = self.EVENT_ORDER
+                return
+            self.next_event = (cycle, switch_id, int(words[2]))
+            return
+        self.close()  # end of the file
+
+    def get_next_cycle(self):
+        """Return the cycle of the next event, or None if there is none."""
+        if self.next_event is None:
+            return None
+        return self.next_event[0]
+
+    def apply_events(self, cycle):
+        """Set the switches of all events due by the given cycle.
+
+        Return NO_ERROR if successful, or the error code of the first
+        invalid line of the file.
+        """
+        while self.next_event is not None and self.next_event[0] <= cycle:
+            event_cycle, switch_id, signal = self.next_event
+            self.devices.set_switch(switch_id, signal)
+            self.read_event()
+        return self.error_code
+
+    def close(self):
+        """Close the stimulus file."""
+        if self.stimulus_file is not None:
+            self.stimulus_file.close()
+            self.stimulus_file = None
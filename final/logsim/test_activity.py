@@ -0,0 +1,108 @@
+"""Test the activity module."""
+import pytest
+
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+from simulator import Simulator
+
+
+@pytest.fixture
+def new_simulator():
+    """Return a Simulator instance with a switch driving a pulse generator.
+
+    Sw1 > Nand1 > And1 and Sw1 > And1, with And1 monitored.
+    """
+    new_names = Names()
+    new_devices = Devices(new_names)
+    new_network = Network(new_names, new_devices)
+    new_monitors = Monitors(new_names, new_devices, new_network)
+
+    [SW1_ID, NAND1_ID, AND1_ID, I1, I2] = new_names.lookup(
+        ["Sw1", "Nand1", "And1", "I1", "I2"])
+    new_devices.make_device(SW1_ID, new_devices.SWITCH, 0)
+    new_devices.make_device(NAND1_ID, new_devices.NAND, 1)
+    new_devices.make_device(AND1_ID, new_devices.AND, 2)
+    new_network.make_connection(SW1_ID, None, NAND1_ID, I1)
+    new_network.make_connection(SW1_ID, None, AND1_ID, I1)
+    new_network.make_connection(NAND1_ID, None, AND1_ID, I2)
+    new_monitors.make_monitor(AND1_ID, None)
+
+    return Simulator(new_names, new_devices, new_network, new_monitors)
+
+
+def test_set_activity(new_simulator):
+    """Test if the network only counts activity while it is set."""
+    network = new_simulator.network
+
+    new_simulator.reset()
+    new_simulator.run_network(2)
+    assert network.activity is None
+
+    network.set_activity(True)
+    activity = network.activity
+    new_simulator.run_network(2)
+    network.set_activity(True)
+    assert network.activity is activity
+    assert activity.cycles == 2
+
+    network.set_activity(False)
+    assert network.activity is None
+
+
+def test_count_toggles(new_simulator):
+    """Test if toggles, HIGH cycles and glitches are counted."""
+    simulator = new_simulator
+    devices = simulator.devices
+    network = simulator.network
+    [SW1_ID, NAND1_ID, AND1_ID] = devices.names.lookup(["Sw1", "Nand1",
+                                                        "And1"])
+    network.set_activity(True)
+
+    simulator.reset()
+    simulator.run_network(4)
+    devices.set_switch(SW1_ID, devices.HIGH)
+    simulator.run_network(3)
+    devices.set_switch(SW1_ID, devices.LOW)
+    simulator.run_network(5)
+
+    # {output: (rises, falls, HIGH cycles, glitches)}. Nand1 rises from its
+    # initial LOW output in the first cycle, and And1 pulses HIGH while
+    # Sw1 rises.
+    assert network.activity.cycles == 12
+    assert network.activity.get_statistics() == {
+        (SW1_ID, None): (1, 1, 3, 0),
+        (NAND1_ID, None): (2, 1, 9, 0),
+        (AND1_ID, None): (1, 1, 0, 1)}
+
+    report = network.activity.get_report(2)
+    assert report[0] == "Cycles recorded: 12, toggles: 7, glitches: 1"
+    assert len(report) == 4
+
+
+def test_count_clock(new_simulator):
+    """Test if skipped cycles are counted at the levels they were at."""
+    simulator = new_simulator
+    devices = simulator.devices
+    network = simulator.network
+    [CL1_ID] = devices.names.lookup(["Cl1"])
+    devices.make_device(CL1_ID, devices.CLOCK, 3)
+    network.set_activity(True)
+
+    simulator.reset()
+    clock = devices.get_device(CL1_ID)
+    clock.clock_counter = 0
+    clock.outputs[None] = devices.LOW
+    simulator.run_network(20)
+
+    rises, falls, high_cycles, glitches = \
+        network.activity.get_statistics()[(CL1_ID, None)]
+    assert (rises, falls, glitches) == (3, 3, 0)
+    assert high_cycles == 9
+
+    # Counts start again from the present levels after a reset
+    network.activity.reset()
+    simulator.run_network(2)
+    assert network.activity.get_statistics()[(CL1_ID, None)] == \
+        (1, 0, 1, 0)
@@ -0,0 +1,76 @@
+"""Test the benchmark module."""
+import json
+
+import pytest
+
+from benchmark import Benchmark, main
+
+
+def test_time_size():
+    """Test if time_size times every phase of a generated circuit."""
+    benchmark = Benchmark("dag", cycles=5, repeats=2)
+    timings = benchmark.time_size(20)
+
+    assert timings["family"] == "dag"
+    assert timings["size"] == 20
+    assert timings["devices"] > 20
+    assert timings["cycles"] == 5
+    for name in benchmark.times:
+        assert timings[name] >= 0
+    assert timings["failed_cycles"] == 0
+    assert timings["cycles_per_second"] > 0
+
+
+def test_failed_cycles():
+    """Test if cycles which do not settle are recorded and not rated."""
+    benchmark = Benchmark("chain", cycles=5)
+    timings = benchmark.time_size(100)
+    assert timings["failed_cycles"] == 4
+    assert timings["cycles_per_second"] is None
+
+    baseline = {"results": [dict(timings, failed_cycles=0,
+                                 cycles_per_second=1.0)]}
+    assert benchmark.compare(baseline, {"results": [timings]}) == [
+        "chain 100: 4 of 5 cycles failed"]
+    assert benchmark.compare({"results": [timings]}, baseline) == []
+
+
+def test_compare():
+    """Test if compare flags only the times and rates which got worse."""
+    benchmark = Benchmark()
+    baseline = {"results": [{"family": "dag", "size": 100, "parse_time": 1.0,
+                             "build_time": 1.0, "cycles_per_second": 100},
+                            {"family": "dag", "size": 1000,
+                             "parse_time": 1.0}]}
+    results = {"results": [{"family": "dag", "size": 100, "parse_time": 1.05,
+                            "build_time": 2.0, "cycles_per_second": 50},
+                           {"family": "dag", "size": 10000,
+                            "parse_time": 9.0}]}
+
+    regressions = benchmark.compare(baseline, results)
+    assert len(regressions) == 2
+    assert regressions[0].startswith("dag 100 build_time: 1 -> 2 ")
+    assert regressions[1].startswith("dag 100 cycles_per_second: 100 -> 50 ")
+    assert benchmark.compare(baseline, results, tolerance=1.5) == []
+
+
+def test_main(tmp_path):
+    """Test if main writes the results and compares them with a baseline."""
+    path = str(tmp_path / "results.json")
+    main(["-s", "10,20", "-c", "3", "-o", path])
+    with open(path) as results_file:
+        results = json.load(results_file)
+    assert results["environment"]["cycles"] == 3
+    assert [result["size"] for result in results["results"]] == [10, 20]
+
+    # Results never regress against themselves
+    main(["-b", path, path])
+
+    slow_path = str(tmp_path / "slow.json")
+    for result in results["results"]:
+        result["parse_time"] *= 2
+    with open(slow_path, "w") as results_file:
+        json.dump(results, results_file)
+    with pytest.raises(SystemExit) as exit_info:
+        main(["-b", path, slow_path])
+    assert exit_info.value.code == 1
@@ -0,0 +1,66 @@
+"""Test the compiled module."""
+import random
+
+import pytest
+
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+from scanner import Scanner
+from parse import Parser
+from simulator import Simulator
+from generator import CircuitGenerator
+from compiled import CompiledCircuit
+
+
+SHIFT_REGISTER = """DTYPE D1, D2, D3, D4;
+CLOCK 2 CLK;
+SWITCH 0 ZERO, 1 IN;
+CONNECT IN > D1.DATA, D1.Q > D2.DATA, D2.QBAR > D3.DATA, D3.Q > D4.DATA;
+CONNECT CLK > D1.CLK, CLK > D2.CLK, CLK > D3.CLK, CLK > D4.CLK;
+CONNECT ZERO > D1.SET, ZERO > D2.SET, ZERO > D3.SET, ZERO > D4.SET;
+CONNECT ZERO > D1.CLEAR, ZERO > D2.CLEAR, ZERO > D3.CLEAR, ZERO > D4.CLEAR;
+MONITOR D1.Q, D2.Q, D3.Q, D4.Q;
+"""
+
+
+@pytest.mark.parametrize("family", ["ripple", "counter", "lfsr", "dag",
+                                    "chain", "latches", "shift"])
+def test_compile_cycle(tmp_path, family):
+    """Test if every lane follows the signals of the simulator.
+
+    In the shift register, the network passes the new level of each D-type
+    on to the next within a clock edge.
+    """
+    path = tmp_path / "circuit.txt"
+    if family == "shift":
+        path.write_text(SHIFT_REGISTER)
+    else:
+        path.write_text(CircuitGenerator(1).generate(family, 5))
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    monitors = Monitors(names, devices, network)
+    parser = Parser(names, devices, network, monitors,
+                    Scanner(str(path), names))
+    assert parser.parse_network()
+    random.seed(1)
+    devices.cold_startup()
+
+    circuit = CompiledCircuit(names, devices, network, monitors)
+    assert circuit.build_circuit() == network.NO_ERROR
+    source_levels = circuit.get_source_levels(30)
+    run_cycle = circuit.compile_cycle()
+    state = circuit.get_initial_state(7)
+
+    simulator = Simulator(names, devices, network, monitors)
+    assert simulator.run_network(30)
+    for cycle, levels in enumerate(source_levels):
+        state, oscillating = run_cycle(
+            state, [7 if level else 0 for level in levels])
+        assert not oscillating
+        for monitor, index in zip(monitors.monitors_dictionary,
+                                  circuit.observed):
+            signal = monitors.monitors_dictionary[monitor][cycle]
+            assert state[0][index] == (7 if signal == devices.HIGH else 0)
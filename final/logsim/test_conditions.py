@@ -0,0 +1,68 @@
+"""Test the conditions module."""
+import pytest
+
+from names import Names
+from devices import Devices
+from conditions import Condition
+
+
+@pytest.fixture
+def new_devices():
+    """Return a Devices class instance with a switch and a D-type."""
+    new_names = Names()
+    new_devices = Devices(new_names)
+    [SW1_ID, D1_ID] = new_names.lookup(["Sw1", "D1"])
+    new_devices.make_device(SW1_ID, new_devices.SWITCH, 0)
+    new_devices.make_device(D1_ID, new_devices.D_TYPE)
+    return new_devices
+
+
+@pytest.mark.parametrize("expression, error", [
+    ("", "BAD_CONDITION"),
+    ("Sw1", "BAD_CONDITION"),
+    ("Sw1 up", "BAD_CONDITION"),
+    ("Sw1 high and", "BAD_CONDITION"),
+    ("Sw1 high but D1.Q low", "BAD_CONDITION"),
+    ("cycle x", "BAD_CONDITION"),
+    ("Sw2 high", "BAD_SIGNAL"),
+    ("D1 high", "BAD_SIGNAL"),
+    ("D1.DATA high", "BAD_SIGNAL"),
+    ("D1.Q.Q high", "BAD_SIGNAL"),
+])
+def test_parse_expression_gives_errors(new_devices, expression, error):
+    """Test if invalid expressions give the correct errors."""
+    condition = Condition(new_devices.names, new_devices, expression)
+    assert condition.error_code == getattr(condition, error)
+
+
+def test_parse_expression(new_devices):
+    """Test if parse_expression lists the terms and signals."""
+    [SW1_ID, D1_ID, Q_ID] = new_devices.names.lookup(["Sw1", "D1", "Q"])
+    condition = Condition(new_devices.names, new_devices,
+                          "Sw1 rises and D1.Q high or cycle 7 and Sw1 low")
+    assert condition.error_code == condition.NO_ERROR
+    assert condition.terms == [[("rises", (SW1_ID, None)),
+                                ("high", (D1_ID, Q_ID))],
+                               [("cycle", 7), ("low", (SW1_ID, None))]]
+    assert condition.signals == [(SW1_ID, None), (D1_ID, Q_ID)]
+    assert condition.cycles == [7]
+
+
+@pytest.mark.parametrize("expression, previous, current, cycle, result", [
+    ("Sw1 high", (0, 0), (1, 0), 1, True),
+    ("Sw1 low", (0, 0), (1, 0), 1, False),
+    ("Sw1 rises", (1, 0), (1, 0), 1, False),
+    ("Sw1 rises", (0, 0), (1, 0), 1, True),
+    ("Sw1 falls", (1, 0), (0, 0), 1, True),
+    ("D1.Q changes", (1, 0), (1, 1), 1, True),
+    ("D1.Q changes", (1, 1), (1, 1), 1, False),
+    ("Sw1 high and D1.Q high", (0, 0), (1, 0), 1, False),
+    ("Sw1 low and D1.Q low or cycle 4", (0, 0), (1, 0), 4, True),
+    ("cycle 4", (0, 0), (1, 0), 5, False),
+])
+def test_compile(new_devices, expression, previous, current, cycle, result):
+    """Test if the compiled function checks the condition."""
+    [SW1_ID, D1_ID, Q_ID] = new_devices.names.lookup(["Sw1", "D1", "Q"])
+    condition = Condition(new_devices.names, new_devices, expression)
+    check = condition.compile([(SW1_ID, None), (D1_ID, Q_ID)])
+    assert check(previous, current, cycle) == result
@@ -170,3 +170,48 @@ def test_set_RC(new_devices):
     RC_object = new_devices.get_device(RC_ID)
 
     assert RC_object.high_period == 4
+
+
+def test_get_state(new_devices):
+    """Test if set_state restores the state returned by get_state."""
+    names = new_devices.names
+    [D1_ID, RC_ID] = names.lookup(["D1", "RC1"])
+    new_devices.make_device(D1_ID, new_devices.D_TYPE)
+    new_devices.make_device(RC_ID, new_devices.RC, 4)
+    d_type = new_devices.get_device(D1_ID)
+    rc = new_devices.get_device(RC_ID)
+
+    d_type.dtype_memory = new_devices.HIGH
+    state = new_devices.get_state()
+
+    # RC counters past the high period make no difference to the state
+    rc.clock_counter = 5
+    assert new_devices.get_state() != state
+    d_type.dtype_memory = new_devices.LOW
+    rc.outputs[None] = new_devices.LOW
+    rc_state = new_devices.get_state()
+    rc.clock_counter = 9
+    assert new_devices.get_state() == rc_state
+
+    new_devices.changed_devices = set()
+    new_devices.set_state(state)
+    assert new_devices.get_state() == state
+    assert d_type.dtype_memory == new_devices.HIGH
+    assert rc.outputs[None] == new_devices.HIGH
+    assert new_devices.changed_devices is None
+
+
+def test_reset_startup(new_devices):
+    """Test if reset_startup always gives the same state."""
+    names = new_devices.names
+    [D1_ID, CL1_ID] = names.lookup(["D1", "Cl1"])
+    new_devices.make_device(D1_ID, new_devices.D_TYPE)
+    new_devices.make_device(CL1_ID, new_devices.CLOCK, 5)
+    d_type = new_devices.get_device(D1_ID)
+    clock = new_devices.get_device(CL1_ID)
+
+    for repeat in range(10):
+        new_devices.reset_startup()
+        assert d_type.dtype_memory == new_devices.LOW
+        assert clock.outputs[None] == new_devices.LOW
+        assert clock.clock_counter == 0
@@ -0,0 +1,90 @@
+"""Test the differential module."""
+import glob
+import os
+
+import pytest
+
+from network import Network
+from generator import CircuitGenerator
+from differential import DifferentialTester
+
+circuit_directory = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                 "circuit_files")
+
+
+@pytest.fixture
+def tester():
+    """Return a new instance of the DifferentialTester class."""
+    return DifferentialTester(seed=1, cycles=40, toggles=6)
+
+
+@pytest.mark.parametrize("path", sorted(glob.glob(
+    os.path.join(circuit_directory, "*.txt"))))
+def test_circuit_files(tester, path):
+    """Test if every engine agrees on the circuit files."""
+    assert tester.check_file(path) == []
+
+
+@pytest.mark.parametrize("family", ["ripple", "lookahead", "counter",
+                                    "lfsr", "dag", "chain", "latches"])
+def test_generated_circuits(tester, family):
+    """Test if every engine agrees on the generated circuits."""
+    definition = CircuitGenerator(1).generate(family, 6)
+    assert tester.check_definition(definition) == []
+
+
+def test_sweep_executes_every_device(tester, tmp_path, monkeypatch):
+    """Test if the reference executes every gate in every iteration."""
+    executed_gates = []
+    iterations = []
+    execute_gate = Network.execute_gate
+    execute_component = Network.execute_component
+
+    def mock_execute_gate(network, device_id, *args):
+        executed_gates.append(device_id)
+        return execute_gate(network, device_id, *args)
+
+    def mock_execute_component(network, component_plan):
+        error_code = execute_component(network, component_plan)
+        iterations.append(network.component_iterations)
+        return error_code
+
+    monkeypatch.setattr(Network, "execute_gate", mock_execute_gate)
+    monkeypatch.setattr(Network, "execute_component", mock_execute_component)
+    path = tmp_path / "circuit.txt"
+    path.write_text(CircuitGenerator(1).generate("ripple", 4))
+    devices = tester.load_circuit(str(path)).devices
+    gate_ids = [device.device_id for device in devices.devices_list
+                if device.device_kind in devices.gate_types]
+
+    stimulus = tester.make_stimulus(tester.load_circuit(str(path)))
+    assert tester.run_engine(str(path), "sweep", stimulus)["error"] is None
+    assert max(iterations) > 1
+    assert len(executed_gates) == sum(iterations) * len(gate_ids)
+
+
+def test_compare_runs(tester):
+    """Test if compare_runs finds the earliest divergence."""
+    reference = {"traces": {"A": [0, 1, 1], "B": [0, 0, 1]},
+                 "states": [(2, ((0,), (1,))), (3, ((1,), (1,)))],
+                 "error": None, "device_names": ["A", "B"]}
+    assert tester.compare_runs(reference, reference) is None
+
+    run = dict(reference, traces={"A": [0, 1, 0], "B": [0, 0, 1]})
+    assert tester.compare_runs(reference, run) == (3, "A")
+    run = dict(reference, states=[(2, ((0,), (0,))), (3, ((1,), (1,)))])
+    assert tester.compare_runs(reference, run) == (2, "state of B")
+    run = dict(reference, traces={"A": [0], "B": [0]}, error=(2, 13))
+    assert tester.compare_runs(reference, run) == (2, "A")
+
+
+def test_divergent_engine(monkeypatch):
+    """Test if a faulty engine is reported at the first divergent cycle."""
+    # Folded gates are never reactivated when their switches are toggled
+    monkeypatch.setattr(Network, "unfold_constants",
+                        lambda network, switch_id: None)
+    tester = DifferentialTester(seed=1, cycles=80, toggles=10)
+    divergences = tester.check_definition(
+        CircuitGenerator(1).generate("dag", 8))
+    assert len(divergences) == 1
+    assert divergences[0].startswith("folding diverges from sweep at cycle ")
@@ -0,0 +1,90 @@
+"""Test the equivalence module."""
+import pytest
+
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+from scanner import Scanner
+from parse import Parser
+from compiled import CompiledCircuit
+from equivalence import EquivalenceChecker
+
+xor_gate = """SWITCH 0 A, 0 B, 0 EN;
+XOR X1;
+DTYPE D1;
+AND 2 G1;
+CONNECT A > X1.I1, B > X1.I2, X1 > G1.I1, EN > G1.I2;
+CONNECT G1 > D1.DATA, A > D1.CLK, B > D1.SET, EN > D1.CLEAR;
+MONITOR X1, D1.Q;
+"""
+
+nand_gates = """SWITCH 0 EN, 0 B, 0 A;
+NAND 2 N1, 2 N2, 2 N3, 2 X1;
+DTYPE D1;
+AND 2 G1;
+CONNECT A > N1.I1, B > N1.I2, A > N2.I1, N1 > N2.I2, B > N3.I1;
+CONNECT N1 > N3.I2, N2 > X1.I1, N3 > X1.I2, X1 > G1.I1, EN > G1.I2;
+CONNECT G1 > D1.DATA, A > D1.CLK, B > D1.SET, EN > D1.CLEAR;
+MONITOR X1, D1.Q;
+"""
+
+
+def load_circuit(tmp_path, name, definition):
+    """Return a CompiledCircuit instance of the definition, after reset."""
+    path = tmp_path / name
+    path.write_text(definition)
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    monitors = Monitors(names, devices, network)
+    parser = Parser(names, devices, network, monitors,
+                    Scanner(str(path), names))
+    assert parser.parse_network()
+    devices.reset_startup()
+    return CompiledCircuit(names, devices, network, monitors)
+
+
+def test_equivalent_circuits(tmp_path):
+    """Test if an XOR gate made of NAND gates matches an XOR gate."""
+    checker = EquivalenceChecker(load_circuit(tmp_path, "a.txt", xor_gate),
+                                 load_circuit(tmp_path, "b.txt", nand_gates),
+                                 lanes=64)
+    assert checker.run(200, 20) == checker.NO_ERROR
+    assert checker.counterexample is None
+    assert checker.get_report() == [
+        "No difference found in 200 random runs of 20 cycles",
+        "A random run finds a difference with a probability below 0.015 "
+        "at 95% confidence"]
+
+
+@pytest.mark.parametrize("lanes, processes", [(64, 1), (64, 3)])
+def test_different_circuits(tmp_path, lanes, processes):
+    """Test if the first difference is found, whatever the processes."""
+    changed = nand_gates.replace("B > D1.SET", "A > D1.SET")
+    checker = EquivalenceChecker(load_circuit(tmp_path, "a.txt", xor_gate),
+                                 load_circuit(tmp_path, "b.txt", changed),
+                                 lanes, processes)
+    assert checker.run(1000, 20) == checker.NO_ERROR
+    counterexample = checker.counterexample
+    assert counterexample["run"] == 8
+    assert counterexample["cycle"] == 1
+    assert counterexample["outputs"] == {"D1.Q": (0, 1)}
+
+    # D1 is set in the second circuit only, by A alone
+    assert counterexample["stimulus"][0][checker.switch_names.index(
+        "A")] == 1
+    assert counterexample["stimulus"][0][checker.switch_names.index(
+        "B")] == 0
+    assert checker.get_report()[:3] == [
+        "Difference found in random run 8 at cycle 1:",
+        "  D1.Q: 0 in the first circuit, 1 in the second",
+        "Switch events of the run:"]
+
+
+def test_names_differ(tmp_path):
+    """Test if circuits with different switches are not compared."""
+    renamed = nand_gates.replace("EN", "ENABLE")
+    checker = EquivalenceChecker(load_circuit(tmp_path, "a.txt", xor_gate),
+                                 load_circuit(tmp_path, "b.txt", renamed))
+    assert checker.run(100, 10) == checker.SWITCHES_DIFFER
@@ -0,0 +1,162 @@
+"""Test the faults module."""
+import pytest
+
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+from simulator import Simulator
+from faults import FaultSimulator
+
+
+@pytest.fixture
+def new_fault_simulator():
+    """Return a FaultSimulator instance with two switches and a loop.
+
+    Sw1 and Sw2 > And1, with And1 monitored, and Sw3 > Nand1, with the
+    output of Nand1 fed back to its second input.
+    """
+    new_names = Names()
+    new_devices = Devices(new_names)
+    new_network = Network(new_names, new_devices)
+    new_monitors = Monitors(new_names, new_devices, new_network)
+
+    [SW1_ID, SW2_ID, SW3_ID, AND1_ID, NAND1_ID, I1, I2] = new_names.lookup(
+        ["Sw1", "Sw2", "Sw3", "And1", "Nand1", "I1", "I2"])
+    new_devices.make_device(SW1_ID, new_devices.SWITCH, 0)
+    new_devices.make_device(SW2_ID, new_devices.SWITCH, 0)
+    new_devices.make_device(SW3_ID, new_devices.SWITCH, 0)
+    new_devices.make_device(AND1_ID, new_devices.AND, 2)
+    new_devices.make_device(NAND1_ID, new_devices.NAND, 2)
+    new_network.make_connection(SW1_ID, None, AND1_ID, I1)
+    new_network.make_connection(SW2_ID, None, AND1_ID, I2)
+    new_network.make_connection(SW3_ID, None, NAND1_ID, I1)
+    new_network.make_connection(NAND1_ID, None, NAND1_ID, I2)
+    new_monitors.make_monitor(AND1_ID, None)
+    new_devices.cold_startup()
+
+    return FaultSimulator(new_names, new_devices, new_network, new_monitors)
+
+
+@pytest.fixture
+def stimulus_path(tmp_path):
+    """Return the path of a stimulus setting Sw1 and then Sw2."""
+    path = tmp_path / "stimulus.txt"
+    path.write_text("2 Sw1 1\n4 Sw2 1\n")
+    return str(path)
+
+
+def test_list_faults(new_fault_simulator):
+    """Test if every input and output has both stuck-at faults."""
+    fault_simulator = new_fault_simulator
+    faults = fault_simulator.list_faults()
+    names = [fault_simulator.get_fault_name(fault) for fault in faults]
+
+    assert len(faults) == 18
+    assert names[:6] == ["Sw1 stuck-at-0", "Sw1 stuck-at-1",
+                         "Sw2 stuck-at-0", "Sw2 stuck-at-1",
+                         "Sw3 stuck-at-0", "Sw3 stuck-at-1"]
+    assert "And1.I2 stuck-at-1" in names
+
+
+def test_run_faults(new_fault_simulator, stimulus_path):
+    """Test if faults are detected in the first cycle they change And1.
+
+    Sw1 and Sw2 are first seen HIGH in the third and fifth cycles.
+    """
+    fault_simulator = new_fault_simulator
+    [SW1_ID, SW2_ID, AND1_ID, NAND1_ID, I1, I2] = \
+        fault_simulator.names.lookup(
+            ["Sw1", "Sw2", "And1", "Nand1", "I1", "I2"])
+
+    assert fault_simulator.run(8, stimulus_path) == fault_simulator.NO_ERROR
+    assert fault_simulator.good_traces == {(AND1_ID, None): [0] * 4 + [1] * 4}
+    assert fault_simulator.detected == {
+        (SW1_ID, None, 0): 5, (SW2_ID, None, 0): 5, (AND1_ID, I1, 0): 5,
+        (AND1_ID, I2, 0): 5, (AND1_ID, None, 0): 5, (SW2_ID, None, 1): 3,
+        (AND1_ID, I2, 1): 3, (AND1_ID, None, 1): 1}
+    assert (SW1_ID, None, 1) in fault_simulator.undetected
+    assert (AND1_ID, I1, 1) in fault_simulator.undetected
+
+    # Nand1 is unobserved, but oscillates once its first input is stuck HIGH
+    assert (NAND1_ID, I1, 1) in fault_simulator.oscillating
+    assert fault_simulator.get_report()[:2] == [
+        "Fault coverage: 8 of 18 faults (44.4%)",
+        "Faults making the circuit oscillate: 2"]
+
+
+def test_lanes_and_processes(new_fault_simulator, stimulus_path):
+    """Test if the results do not depend on the lanes and processes."""
+    fault_simulator = new_fault_simulator
+    fault_simulator.run(8, stimulus_path)
+    results = (fault_simulator.detected, fault_simulator.oscillating,
+               fault_simulator.undetected)
+
+    for lanes, processes in [(1, 1), (3, 2)]:
+        fault_simulator.lanes = lanes
+        fault_simulator.processes = processes
+        fault_simulator.run(8, stimulus_path)
+        assert (fault_simulator.detected, fault_simulator.oscillating,
+                fault_simulator.undetected) == results
+
+
+def test_shift_register():
+    """Test if the fault-free machine matches the network on a counter.
+
+    D3.QBAR > D1.DATA, D1.Q > D2.DATA and D2.Q > D3.DATA, all clocked by Clk,
+    form a Johnson counter. The network executes D1 before D2 and D3, so
+    the new level of each D-type reaches the next within a clock edge.
+    """
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    monitors = Monitors(names, devices, network)
+
+    [CLK_ID, ZERO_ID, D1_ID, D2_ID, D3_ID] = names.lookup(
+        ["Clk", "Zero", "D1", "D2", "D3"])
+    devices.make_device(CLK_ID, devices.CLOCK, 2)
+    devices.make_device(ZERO_ID, devices.SWITCH, 0)
+    for device_id in [D1_ID, D2_ID, D3_ID]:
+        devices.make_device(device_id, devices.D_TYPE)
+        network.make_connection(CLK_ID, None, device_id, devices.CLK_ID)
+        network.make_connection(ZERO_ID, None, device_id, devices.SET_ID)
+        network.make_connection(ZERO_ID, None, device_id, devices.CLEAR_ID)
+        monitors.make_monitor(device_id, devices.Q_ID)
+    network.make_connection(D3_ID, devices.QBAR_ID, D1_ID, devices.DATA_ID)
+    network.make_connection(D1_ID, devices.Q_ID, D2_ID, devices.DATA_ID)
+    network.make_connection(D2_ID, devices.Q_ID, D3_ID, devices.DATA_ID)
+    devices.reset_startup()
+
+    fault_simulator = FaultSimulator(names, devices, network, monitors)
+    assert fault_simulator.run(24) == fault_simulator.NO_ERROR
+    simulator = Simulator(names, devices, network, monitors)
+    assert simulator.run_network(24) == network.NO_ERROR
+    assert fault_simulator.good_traces == monitors.monitors_dictionary
+    assert fault_simulator.good_traces[(D3_ID, devices.Q_ID)][:8] == \
+        [0, 0, 1, 1, 1, 1, 0, 0]
+
+
+def test_fault_free_batch(new_fault_simulator, monkeypatch):
+    """Test if the fault-free machine alone is compiled only once."""
+    fault_simulator = new_fault_simulator
+    compiled_batches = []
+    compile_batch = fault_simulator.compile_batch
+
+    def mock_compile_batch(faults):
+        compiled_batches.append(faults)
+        return compile_batch(faults)
+
+    monkeypatch.setattr(fault_simulator, "compile_batch", mock_compile_batch)
+    assert fault_simulator.build_circuit() == fault_simulator.NO_ERROR
+    source_levels = fault_simulator.circuit.get_source_levels(100)
+    results, good = fault_simulator.simulate_batch([], source_levels)
+    assert results == {}
+    assert len(good) == 100
+    assert compiled_batches == [[]]
+
+
+def test_no_monitors(new_fault_simulator):
+    """Test if a run without monitored outputs returns an error."""
+    fault_simulator = new_fault_simulator
+    fault_simulator.monitors.monitors_dictionary.clear()
+    assert fault_simulator.run(8) == fault_simulator.NO_MONITORS
@@ -0,0 +1,118 @@
+"""Test the generator module."""
+import pytest
+
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+from scanner import Scanner
+from parse import Parser
+from generator import CircuitGenerator
+
+
+def load_definition(definition, tmp_path):
+    """Parse the definition and return its names, devices and network."""
+    path = tmp_path / "circuit.txt"
+    path.write_text(definition)
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    monitors = Monitors(names, devices, network)
+    parser = Parser(names, devices, network, monitors,
+                    Scanner(str(path), names))
+    assert parser.parse_network()
+    return names, devices, network
+
+
+def get_number(names, devices, network, signal_names):
+    """Return the number whose bits are the given signals, LSB first."""
+    number = 0
+    for bit, signal_name in enumerate(signal_names):
+        if "." in signal_name:
+            device_name, port_name = signal_name.split(".")
+            port_id = names.query(port_name)
+        else:
+            device_name, port_id = signal_name, None
+        signal = network.get_output_signal(names.query(device_name),
+                                           port_id)
+        if signal == devices.HIGH:
+            number += 1 << bit
+    return number
+
+
+@pytest.mark.parametrize("family", ["ripple", "lookahead", "counter",
+                                    "lfsr", "dag", "chain", "latches"])
+@pytest.mark.parametrize("size", [1, 5, 16])
+def test_generate(family, size, tmp_path):
+    """Test if every family gives a valid circuit which runs."""
+    generator = CircuitGenerator()
+    names, devices, network = load_definition(
+        generator.generate(family, size), tmp_path)
+
+    assert network.check_network()
+    for cycle in range(10):
+        assert network.execute_network() == network.NO_ERROR
+
+
+def test_generate_is_reproducible():
+    """Test if the same seed gives the same circuit."""
+    assert CircuitGenerator(3).generate("dag", 50) == \
+        CircuitGenerator(3).generate("dag", 50)
+    assert CircuitGenerator(3).generate("dag", 50) != \
+        CircuitGenerator(4).generate("dag", 50)
+    assert CircuitGenerator().generate("adder", 4) is None
+
+
+@pytest.mark.parametrize("family", ["ripple", "lookahead"])
+def test_adders(family, tmp_path):
+    """Test if the adders add their operands."""
+    width = 6
+    names, devices, network = load_definition(
+        CircuitGenerator().generate(family, width), tmp_path)
+    sum_signals = ["S" + str(bit) for bit in range(width)]
+    sum_signals.append("C" + str(width))
+
+    for a, b, carry in [(0, 0, 0), (37, 26, 1), (63, 1, 0), (21, 42, 1)]:
+        for bit in range(width):
+            devices.set_switch(names.query("A" + str(bit)), a >> bit & 1)
+            devices.set_switch(names.query("B" + str(bit)), b >> bit & 1)
+        devices.set_switch(names.query("CIN"), carry)
+        assert network.execute_network() == network.NO_ERROR
+        assert get_number(names, devices, network, sum_signals) == \
+            a + b + carry
+
+
+def test_counter(tmp_path):
+    """Test if the counter counts the rising clock edges."""
+    bits = 4
+    names, devices, network = load_definition(
+        CircuitGenerator().generate("counter", bits), tmp_path)
+    q_signals = ["D" + str(bit) + ".Q" for bit in range(bits)]
+
+    devices.set_switch(names.query("RST"), 1)
+    network.execute_network()
+    devices.set_switch(names.query("RST"), 0)
+    counts = []
+    for cycle in range(40):
+        network.execute_network()
+        counts.append(get_number(names, devices, network, q_signals))
+    # The clock rises every other cycle
+    assert counts[1::2] == [(counts[1] + edge) % 16 for edge in range(20)]
+
+
+def test_lfsr(tmp_path):
+    """Test if the LFSR goes through every non-zero state."""
+    bits = 4
+    names, devices, network = load_definition(
+        CircuitGenerator().generate("lfsr", bits), tmp_path)
+    q_signals = ["D" + str(bit) + ".Q" for bit in range(bits)]
+
+    devices.set_switch(names.query("INIT"), 1)
+    network.execute_network()
+    devices.set_switch(names.query("INIT"), 0)
+    states = []
+    for cycle in range(60):
+        network.execute_network()
+        states.append(get_number(names, devices, network, q_signals))
+    assert sorted(set(states)) == list(range(1, 16))
+    assert states[1::2][:15] == states[1::2][15:]
@@ -120,6 +120,83 @@ def test_record_signals(new_monitors):
         (OR1_ID, None): [LOW, HIGH, HIGH]}
 
 
+def test_record_signals_for_cycles(new_monitors):
+    """Test if record_signals records unchanged signals for several cycles."""
+    names = new_monitors.names
+    devices = new_monitors.devices
+    network = new_monitors.network
+
+    [SW1_ID, SW2_ID, OR1_ID] = names.lookup(["Sw1", "Sw2", "Or1"])
+
+    HIGH = devices.HIGH
+    LOW = devices.LOW
+
+    devices.set_switch(SW1_ID, HIGH)
+    network.execute_network()
+    new_monitors.record_signals(3)
+
+    assert new_monitors.monitors_dictionary == {
+        (SW1_ID, None): [HIGH, HIGH, HIGH],
+        (SW2_ID, None): [LOW, LOW, LOW],
+        (OR1_ID, None): [HIGH, HIGH, HIGH]}
+
+
+def test_repeat_signals(new_monitors):
+    """Test if repeat_signals repeats the last period of every trace."""
+    names = new_monitors.names
+    devices = new_monitors.devices
+    network = new_monitors.network
+
+    [SW1_ID, SW2_ID, OR1_ID] = names.lookup(["Sw1", "Sw2", "Or1"])
+
+    HIGH = devices.HIGH
+    LOW = devices.LOW
+
+    network.execute_network()
+    new_monitors.record_signals()
+    devices.set_switch(SW1_ID, HIGH)
+    network.execute_network()
+    new_monitors.record_signals()
+
+    new_monitors.repeat_signals(2, 3)
+
+    assert new_monitors.monitors_dictionary == {
+        (SW1_ID, None): [LOW, HIGH, LOW, HIGH, LOW],
+        (SW2_ID, None): [LOW, LOW, LOW, LOW, LOW],
+        (OR1_ID, None): [LOW, HIGH, LOW, HIGH, LOW]}
+
+
+def test_set_pruning(new_monitors):
+    """Test if pruning follows the monitored signals as they change."""
+    names = new_monitors.names
+    devices = new_monitors.devices
+    network = new_monitors.network
+
+    [SW1_ID, SW2_ID, OR1_ID, OR2_ID, I1] = names.lookup(["Sw1", "Sw2", "Or1",
+                                                         "Or2", "I1"])
+    devices.make_device(OR2_ID, devices.OR, 1)
+    network.make_connection(SW1_ID, None, OR2_ID, I1)
+
+    new_monitors.remove_monitor(SW1_ID, None)
+    new_monitors.remove_monitor(SW2_ID, None)
+    new_monitors.remove_monitor(OR1_ID, None)
+    new_monitors.set_pruning(True)
+    assert network.live_outputs == []
+
+    devices.set_switch(SW1_ID, devices.HIGH)
+    network.execute_network()
+    assert network.get_output_signal(OR2_ID, None) == devices.LOW
+
+    new_monitors.make_monitor(OR2_ID, None)
+    assert network.live_outputs == [(OR2_ID, None)]
+    network.execute_network()
+    assert network.get_output_signal(OR2_ID, None) == devices.HIGH
+    assert network.live_devices == {SW1_ID, OR2_ID}
+
+    new_monitors.set_pruning(False)
+    assert network.live_outputs is None
+
+
 def test_get_margin(new_monitors):
     """Test if get_margin returns the length of the longest monitor name."""
     names = new_monitors.names
@@ -197,3 +274,71 @@ def test_display_signals(capsys, new_monitors):
             "Clock1: -__--__--__--__--__-" in traces)
 
     assert "" in traces  # additional empty line at the end
+
+
+def run_cycles(monitors, switch_levels):
+    """Set the switches, execute the network and record every cycle."""
+    [SW1_ID, SW2_ID] = monitors.names.lookup(["Sw1", "Sw2"])
+    for sw1_level, sw2_level in switch_levels:
+        monitors.devices.set_switch(SW1_ID, sw1_level)
+        monitors.devices.set_switch(SW2_ID, sw2_level)
+        monitors.network.execute_network()
+        monitors.record_signals()
+
+
+def test_set_trigger(new_monitors):
+    """Test if set_trigger returns the correct errors."""
+    names = new_monitors.names
+    [SW1_ID, OR1_ID] = names.lookup(["Sw1", "Or1"])
+    new_monitors.remove_monitor(OR1_ID, None)
+
+    assert new_monitors.set_trigger("Or1 high") == new_monitors.NOT_MONITORED
+    assert new_monitors.set_trigger("Sw1 up") != new_monitors.NO_ERROR
+    assert new_monitors.trigger is None
+    assert new_monitors.set_trigger("Sw1 rises", 2, 1) == \
+        new_monitors.NO_ERROR
+
+    # Monitors cannot change while the trigger is set
+    assert new_monitors.make_monitor(OR1_ID, None) == new_monitors.TRIGGER_SET
+    assert not new_monitors.remove_monitor(SW1_ID, None)
+    assert new_monitors.set_trigger(None) == new_monitors.NO_ERROR
+    assert new_monitors.make_monitor(OR1_ID, None) == new_monitors.NO_ERROR
+
+
+def test_capture_signals(new_monitors):
+    """Test if only the windows around the trigger cycles are kept."""
+    names = new_monitors.names
+    [SW1_ID, SW2_ID, OR1_ID] = names.lookup(["Sw1", "Sw2", "Or1"])
+    new_monitors.set_trigger("Sw1 rises and Sw2 high", 2, 1)
+
+    run_cycles(new_monitors, [(0, 0), (0, 1), (1, 1), (1, 1), (0, 1),
+                              (1, 0), (0, 1), (1, 1), (1, 1), (1, 1)])
+    assert new_monitors.monitors_dictionary == {(SW1_ID, None): [],
+                                                (SW2_ID, None): [],
+                                                (OR1_ID, None): []}
+    assert new_monitors.get_captures() == [
+        (3, 1, {(SW1_ID, None): [0, 0, 1, 1],
+                (SW2_ID, None): [0, 1, 1, 1],
+                (OR1_ID, None): [0, 1, 1, 1]}),
+        (8, 6, {(SW1_ID, None): [1, 0, 1, 1],
+                (SW2_ID, None): [0, 1, 1, 1],
+                (OR1_ID, None): [1, 1, 1, 1]})]
+
+    new_monitors.reset_monitors()
+    assert new_monitors.get_captures() == []
+
+
+def test_capture_signals_for_cycles(new_monitors):
+    """Test if repeated cycles are captured like single cycles."""
+    new_monitors.set_trigger("Sw2 high or cycle 3", 2, 2)
+    run_cycles(new_monitors, [(1, 0)])
+    new_monitors.record_signals(5)
+    run_cycles(new_monitors, [(1, 1)])
+    new_monitors.record_signals(7)
+    captures = new_monitors.get_captures()
+
+    new_monitors.reset_monitors()
+    run_cycles(new_monitors, [(1, 0)] * 6 + [(1, 1)] * 8)
+    assert new_monitors.get_captures() == captures
+    assert [capture[:2] for capture in captures] == [(3, 1), (7, 5),
+                                                     (10, 8), (13, 11)]
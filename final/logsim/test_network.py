@@ -1,9 +1,14 @@
 """Test the network module."""
+import random
+
 import pytest
 
 from names import Names
 from devices import Devices
 from network import Network
+from monitors import Monitors
+from scanner import Scanner
+from parse import Parser
 
 
 @pytest.fixture
@@ -350,6 +355,24 @@ def test_oscillating_network(new_network):
     assert network.execute_network() == network.OSCILLATING
 
 
+def test_oscillating_component(new_network):
+    """Test if other components settle when one component oscillates."""
+    network = new_network
+    devices = network.devices
+    names = devices.names
+
+    [NOR1, SW1, OR1, I1] = names.lookup(["Nor1", "Sw1", "Or1", "I1"])
+    devices.make_device(NOR1, devices.NOR, 1)
+    devices.make_device(SW1, devices.SWITCH, 1)
+    devices.make_device(OR1, devices.OR, 1)
+    network.make_connection(NOR1, None, NOR1, I1)
+    network.make_connection(SW1, None, OR1, I1)
+
+    assert network.find_components() == [[NOR1], [SW1, OR1]]
+    assert network.execute_network() == network.OSCILLATING
+    assert network.get_output_signal(OR1, None) == devices.HIGH
+
+
 def test_transient_devices(new_network):
     network = new_network
     new_devices = network.devices
@@ -418,3 +441,277 @@ def test_transient_devices(new_network):
     RC_out = network.get_output_signal(RC_ID, None)
     SIGGEN_out = network.get_output_signal(SIGGEN_ID, None)
     assert RC_out == new_devices.LOW and SIGGEN_out == new_devices.HIGH
+
+
+def test_build_fanout(network_with_devices):
+    """Test if build_fanout maps each device to the devices it drives."""
+    network = network_with_devices
+    names = network.devices.names
+
+    [SW1_ID, SW2_ID, OR1_ID, I1, I2] = names.lookup(["Sw1", "Sw2", "Or1", "I1",
+                                                     "I2"])
+    assert network.build_fanout() == {SW1_ID: [], SW2_ID: [], OR1_ID: []}
+
+    network.make_connection(SW1_ID, None, OR1_ID, I1)
+    network.make_connection(SW2_ID, None, OR1_ID, I2)
+    assert network.build_fanout() == {SW1_ID: [OR1_ID], SW2_ID: [OR1_ID],
+                                      OR1_ID: []}
+
+
+def test_build_plan(network_with_devices):
+    """Test if the execution plan reads inputs from the connected outputs."""
+    network = network_with_devices
+    devices = network.devices
+    names = devices.names
+
+    [SW1_ID, SW2_ID, OR1_ID, I1, I2] = names.lookup(["Sw1", "Sw2", "Or1", "I1",
+                                                     "I2"])
+    or_gate = devices.get_device(OR1_ID)
+    network.make_connection(SW1_ID, None, OR1_ID, I1)
+
+    network.build_plan()
+    assert network.component_index == {SW1_ID: 0, SW2_ID: 1, OR1_ID: 0}
+    assert network.plan[0][devices.SWITCH] == [SW1_ID]
+    assert network.plan[0][devices.OR] == [OR1_ID]
+    assert network.plan[1][devices.SWITCH] == [SW2_ID]
+    assert network.plan[1][devices.OR] == []
+
+    devices.get_device(SW1_ID).outputs[None] = devices.HIGH
+    assert network.get_input_signals(or_gate) == [devices.HIGH, None]
+
+    # Connecting an input makes the plan out of date
+    network.make_connection(SW2_ID, None, OR1_ID, I2)
+    assert network.plan is None
+    assert network.get_input_signals(or_gate) == [devices.HIGH, devices.LOW]
+
+
+def test_switch_executes_fanout_only(new_network, monkeypatch):
+    """Test if toggling a switch only executes the devices it drives."""
+    network = new_network
+    devices = network.devices
+    names = devices.names
+
+    [SW1_ID, SW2_ID, OR1_ID, OR2_ID, AND1_ID, I1,
+     I2] = names.lookup(["Sw1", "Sw2", "Or1", "Or2", "And1", "I1", "I2"])
+    devices.make_device(SW1_ID, devices.SWITCH, 0)
+    devices.make_device(SW2_ID, devices.SWITCH, 0)
+    devices.make_device(OR1_ID, devices.OR, 1)
+    devices.make_device(OR2_ID, devices.OR, 1)
+    devices.make_device(AND1_ID, devices.AND, 1)
+
+    # Sw1 > Or1 > And1 and Sw2 > Or2 are independent
+    network.make_connection(SW1_ID, None, OR1_ID, I1)
+    network.make_connection(OR1_ID, None, AND1_ID, I1)
+    network.make_connection(SW2_ID, None, OR2_ID, I1)
+    network.execute_network()
+
+    executed_gates = []
+    execute_gate = network.execute_gate
+
+    def record_gate(device_id, x=None, y=None):
+        executed_gates.append(device_id)
+        return execute_gate(device_id, x, y)
+
+    monkeypatch.setattr(network, "execute_gate", record_gate)
+
+    # Nothing has changed, so nothing is executed
+    assert network.execute_network() == network.NO_ERROR
+    assert executed_gates == []
+
+    devices.set_switch(SW1_ID, devices.HIGH)
+    assert network.execute_network() == network.NO_ERROR
+    assert set(executed_gates) == {OR1_ID, AND1_ID}
+    assert network.get_output_signal(AND1_ID, None) == devices.HIGH
+    assert network.get_output_signal(OR2_ID, None) == devices.LOW
+
+
+class EveryDevice(set):
+    """A set of marked devices that always contains every device.
+
+    It must be created with the IDs of all devices, so that every connected
+    component is executed.
+    """
+
+    def __contains__(self, device_id):
+        """Return True for every device."""
+        return True
+
+    def discard(self, device_id):
+        """Keep the device marked."""
+
+
+@pytest.mark.parametrize("circuit_file", [
+    "circuit_files/alldevice.txt",
+    "circuit_files/flip_flop.txt",
+    "circuit_files/master_slave.txt",
+    "circuit_files/rc_input.txt",
+    "definition_file1.txt",
+])
+@pytest.mark.parametrize("constant_folding", [False, True])
+def test_incremental_matches_full_execution(circuit_file, constant_folding,
+                                            monkeypatch):
+    """Test if skipping settled and folded devices gives the same signals as
+    executing every device in every cycle."""
+    signals = {}
+    for full_execution in [False, True]:
+        names = Names()
+        devices = Devices(names)
+        network = Network(names, devices)
+        monitors = Monitors(names, devices, network)
+        scanner = Scanner(circuit_file, names)
+        Parser(names, devices, network, monitors, scanner).parse_network()
+        network.set_constant_folding(constant_folding and
+                                     not full_execution)
+        if full_execution:  # mark every device in every iteration
+            update_dirty_devices = network.update_dirty_devices
+
+            def mark_every_device(network=network,
+                                  update_dirty_devices=update_dirty_devices):
+                update_dirty_devices()
+                network.dirty_devices = EveryDevice(
+                    network.devices.find_devices())
+
+            monkeypatch.setattr(network, "update_dirty_devices",
+                                mark_every_device)
+
+        random.seed(4)
+        devices.cold_startup()
+        switch_ids = devices.find_devices(devices.SWITCH)
+        signals[full_execution] = []
+        for cycle in range(60):
+            if switch_ids and cycle % 7 == 6:  # toggle a switch
+                switch_id = switch_ids[cycle % len(switch_ids)]
+                switch = devices.get_device(switch_id)
+                devices.set_switch(switch.device_id, 1 - switch.switch_state)
+            network.execute_network()
+            signals[full_execution].append(
+                [dict(device.outputs) for device in devices.devices_list])
+
+    assert signals[False] == signals[True]
+
+
+def test_prune_network(new_network):
+    """Test if prune_network only simulates the fan-in of the outputs."""
+    network = new_network
+    devices = network.devices
+    names = devices.names
+
+    [SW1_ID, SW2_ID, CL_ID, D_ID, OR1_ID, OR2_ID,
+     I1] = names.lookup(["Sw1", "Sw2", "Clock1", "D1", "Or1", "Or2", "I1"])
+    devices.make_device(SW1_ID, devices.SWITCH, 1)
+    devices.make_device(SW2_ID, devices.SWITCH, 1)
+    devices.make_device(CL_ID, devices.CLOCK, 1)
+    devices.make_device(D_ID, devices.D_TYPE)
+    devices.make_device(OR1_ID, devices.OR, 1)
+    devices.make_device(OR2_ID, devices.OR, 1)
+
+    # Sw1 > D1.DATA, D1.Q > Or1, and Sw2 > Or2 is not in the fan-in of Or1
+    network.make_connection(SW1_ID, None, D_ID, devices.DATA_ID)
+    network.make_connection(CL_ID, None, D_ID, devices.CLK_ID)
+    network.make_connection(SW1_ID, None, D_ID, devices.SET_ID)
+    network.make_connection(SW2_ID, None, D_ID, devices.CLEAR_ID)
+    network.make_connection(D_ID, devices.Q_ID, OR1_ID, I1)
+    network.make_connection(SW2_ID, None, OR2_ID, I1)
+    devices.set_switch(SW2_ID, devices.LOW)
+
+    assert network.find_fanin([(OR1_ID, None)]) == {OR1_ID, D_ID, SW1_ID,
+                                                    SW2_ID, CL_ID}
+    assert network.find_fanin([(OR2_ID, None)]) == {OR2_ID, SW2_ID}
+
+    network.prune_network([(D_ID, devices.Q_ID)])
+    network.execute_network()
+    assert network.get_output_signal(D_ID, devices.Q_ID) == devices.HIGH
+    assert network.get_output_signal(OR1_ID, None) == devices.LOW
+    assert network.get_output_signal(OR2_ID, None) == devices.LOW
+
+    # Or1 is simulated again once every device is simulated
+    network.prune_network(None)
+    network.execute_network()
+    assert network.get_output_signal(OR1_ID, None) == devices.HIGH
+
+
+def test_prune_network_quiet_cycles(new_network):
+    """Test if quiet cycles are still skipped once the network is pruned."""
+    network = new_network
+    devices = network.devices
+    names = devices.names
+
+    [SW1_ID, SW2_ID, CL_ID, AND1_ID, OR1_ID, I1,
+     I2] = names.lookup(["Sw1", "Sw2", "Clock1", "And1", "Or1", "I1", "I2"])
+    devices.make_device(SW1_ID, devices.SWITCH, 1)
+    devices.make_device(SW2_ID, devices.SWITCH, 0)
+    devices.make_device(CL_ID, devices.CLOCK, 10)
+    devices.make_device(AND1_ID, devices.AND, 2)
+    devices.make_device(OR1_ID, devices.OR, 1)
+
+    # Clock1 and Sw1 > And1, and Sw2 > Or1 is not in the fan-in of And1
+    network.make_connection(CL_ID, None, AND1_ID, I1)
+    network.make_connection(SW1_ID, None, AND1_ID, I2)
+    network.make_connection(SW2_ID, None, OR1_ID, I1)
+    clock = devices.get_device(CL_ID)
+    clock.clock_counter = 0
+
+    network.prune_network([(AND1_ID, None)])
+    assert network.execute_network() == network.NO_ERROR
+    assert network.dirty_devices == set()
+    assert network.get_quiet_cycles(100) == 9
+
+    # Toggling a switch outside the fan-in leaves nothing to execute
+    devices.set_switch(SW2_ID, devices.HIGH)
+    assert network.execute_network() == network.NO_ERROR
+    assert network.dirty_devices == set()
+    assert network.get_output_signal(OR1_ID, None) == devices.LOW
+    assert network.get_quiet_cycles(100) == 8
+
+
+def test_fold_constants(new_network, monkeypatch):
+    """Test if gates driven by constant switches are folded until one of
+    their switches is toggled."""
+    network = new_network
+    devices = network.devices
+    names = devices.names
+
+    [SW1_ID, SW2_ID, CL_ID, AND1_ID, OR1_ID, XOR1_ID, I1,
+     I2] = names.lookup(["Sw1", "Sw2", "Clock1", "And1", "Or1", "Xor1", "I1",
+                         "I2"])
+    devices.make_device(SW1_ID, devices.SWITCH, 0)
+    devices.make_device(SW2_ID, devices.SWITCH, 1)
+    devices.make_device(CL_ID, devices.CLOCK, 1)
+    devices.make_device(AND1_ID, devices.AND, 2)
+    devices.make_device(OR1_ID, devices.OR, 2)
+    devices.make_device(XOR1_ID, devices.XOR)
+
+    # And1 is forced LOW by Sw1, Or1 is forced HIGH by Sw2 and Xor1 has two
+    # constant inputs
+    network.make_connection(SW1_ID, None, AND1_ID, I1)
+    network.make_connection(CL_ID, None, AND1_ID, I2)
+    network.make_connection(CL_ID, None, OR1_ID, I1)
+    network.make_connection(SW2_ID, None, OR1_ID, I2)
+    network.make_connection(AND1_ID, None, XOR1_ID, I1)
+    network.make_connection(OR1_ID, None, XOR1_ID, I2)
+
+    network.execute_network()
+    assert network.fold_constants() == 3
+    assert network.folded_devices == {AND1_ID: {SW1_ID}, OR1_ID: {SW2_ID},
+                                      XOR1_ID: {SW1_ID, SW2_ID}}
+
+    executed_gates = []
+    execute_gate = network.execute_gate
+
+    def record_gate(device_id, x=None, y=None):
+        executed_gates.append(device_id)
+        return execute_gate(device_id, x, y)
+
+    monkeypatch.setattr(network, "execute_gate", record_gate)
+
+    # The clock toggles every cycle, but the folded gates are not executed
+    for _ in range(4):
+        network.execute_network()
+    assert executed_gates == []
+
+    devices.set_switch(SW1_ID, devices.HIGH)
+    network.execute_network()
+    assert network.folded_devices == {OR1_ID: {SW2_ID}}
+    assert AND1_ID in executed_gates
+    assert network.get_output_signal(AND1_ID, None) == \
+        network.get_output_signal(CL_ID, None)
@@ -0,0 +1,102 @@
+"""Test the partition module."""
+import math
+
+import pytest
+
+from names import Names
+from devices import Devices
+from network import Network
+from partition import Partitioner, main
+
+
+@pytest.fixture
+def two_clusters():
+    """Return a Partitioner for two chains of gates joined by one connection.
+
+    Sw1 > Or1 > Or2 > Or3 and Sw2 > Or4 > Or5 > Or6, with Or3 > Or4.
+    """
+    new_names = Names()
+    new_devices = Devices(new_names)
+    new_network = Network(new_names, new_devices)
+
+    [SW1_ID, SW2_ID, I1, I2] = new_names.lookup(["Sw1", "Sw2", "I1", "I2"])
+    gate_ids = new_names.lookup(["Or1", "Or2", "Or3", "Or4", "Or5", "Or6"])
+    new_devices.make_device(SW1_ID, new_devices.SWITCH, 0)
+    new_devices.make_device(SW2_ID, new_devices.SWITCH, 0)
+    for gate_id in gate_ids:
+        new_devices.make_device(gate_id, new_devices.OR, 2)
+
+    new_network.make_connection(SW1_ID, None, gate_ids[0], I1)
+    new_network.make_connection(SW2_ID, None, gate_ids[3], I1)
+    for first_id, second_id in zip(gate_ids, gate_ids[1:]):
+        new_network.make_connection(first_id, None, second_id, I2)
+
+    return Partitioner(new_devices)
+
+
+def test_build_neighbours(two_clusters):
+    """Test if build_neighbours lists the devices connected to each device."""
+    partitioner = two_clusters
+    names = partitioner.devices.names
+    [SW1_ID, OR1_ID, OR2_ID] = names.lookup(["Sw1", "Or1", "Or2"])
+
+    neighbours = partitioner.build_neighbours()
+    assert neighbours[SW1_ID] == [OR1_ID]
+    assert sorted(neighbours[OR1_ID]) == sorted([SW1_ID, OR2_ID])
+
+
+def test_partition(two_clusters):
+    """Test if the chains are split into two balanced parts."""
+    partitioner = two_clusters
+    names = partitioner.devices.names
+    [SW1_ID, SW2_ID, OR3_ID, OR4_ID] = names.lookup(["Sw1", "Sw2", "Or3",
+                                                     "Or4"])
+
+    partition = partitioner.partition(2)
+    assert sorted(partition) == sorted(partitioner.devices.find_devices())
+    assert partitioner.get_cut_size(partition) == 1
+    assert partitioner.get_balance(partition, 2) == 1.0
+    assert partition[SW1_ID] == partition[OR3_ID]
+    assert partition[SW2_ID] == partition[OR4_ID]
+    assert partition[SW1_ID] != partition[SW2_ID]
+
+
+@pytest.mark.parametrize("parts", [1, 3, 8])
+def test_partition_sizes(two_clusters, parts):
+    """Test if every part is within the allowed imbalance."""
+    partitioner = two_clusters
+
+    partition = partitioner.partition(parts)
+    assert set(partition.values()) <= set(range(parts))
+    if parts == 1:
+        assert partitioner.get_cut_size(partition) == 0
+    # Parts cannot be smaller than whole devices
+    smallest_balance = math.ceil(8 / parts) / (8 / parts)
+    assert partitioner.get_balance(partition, parts) <= \
+        max(1 + partitioner.imbalance, smallest_balance)
+
+
+def test_get_report(two_clusters):
+    """Test if the report gives the cut size, balance and part sizes."""
+    partitioner = two_clusters
+    partition = partitioner.partition(2)
+    assert partitioner.get_report(partition, 2) == [
+        "Devices: 8, parts: 2", "Cut size: 1 of 7 connections",
+        "Balance: 1.000 (largest part relative to the mean)",
+        "Part 0: 4 devices", "Part 1: 4 devices"]
+
+
+def test_main(tmp_path, capsys):
+    """Test if main partitions a definition file and prints the report."""
+    path = tmp_path / "circuit.txt"
+    path.write_text("SWITCH 0 SW1; SWITCH 0 SW2; OR 2 G1; OR 2 G2;\n"
+                    "CONNECT SW1 > G1.I1; CONNECT SW2 > G1.I2;\n"
+                    "CONNECT G1 > G2.I1; CONNECT SW2 > G2.I2;\n")
+    main(["-k", "2", str(path)])
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0] == "Devices: 4, parts: 2"
+    assert lines[1].endswith(" of 4 connections")
+    assert lines[3:] == ["Part 0: 2 devices", "Part 1: 2 devices"]
+
+    with pytest.raises(SystemExit):
+        main(["-k", "0", str(path)])
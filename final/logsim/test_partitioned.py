@@ -0,0 +1,80 @@
+"""Test the partitioned module."""
+import multiprocessing
+
+import pytest
+
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+from partitioned import PartitionedRun
+
+
+@pytest.fixture
+def new_chain():
+    """Return the devices, network and monitors of a chain of OR gates.
+
+    Sw1 > Or1 > Or2 > Or3 > Or4, with Or4 monitored.
+    """
+    new_names = Names()
+    new_devices = Devices(new_names)
+    new_network = Network(new_names, new_devices)
+    new_monitors = Monitors(new_names, new_devices, new_network)
+
+    [SW1_ID, I1] = new_names.lookup(["Sw1", "I1"])
+    gate_ids = new_names.lookup(["Or1", "Or2", "Or3", "Or4"])
+    new_devices.make_device(SW1_ID, new_devices.SWITCH, 0)
+    for gate_id in gate_ids:
+        new_devices.make_device(gate_id, new_devices.OR, 1)
+    for first_id, second_id in zip([SW1_ID] + gate_ids, gate_ids):
+        new_network.make_connection(first_id, None, second_id, I1)
+    new_monitors.make_monitor(gate_ids[-1], None)
+    new_devices.cold_startup()
+
+    return new_devices, new_network, new_monitors
+
+
+def test_build_steps(new_chain):
+    """Test if Or3 waits for Or2, which the network executes before it."""
+    devices, network, monitors = new_chain
+    [SW1_ID, OR1_ID, OR2_ID, OR3_ID, OR4_ID] = devices.names.lookup(
+        ["Sw1", "Or1", "Or2", "Or3", "Or4"])
+    partitioned_run = PartitionedRun(devices, network, monitors, 2)
+    assert partitioned_run.groups == [[SW1_ID, OR1_ID, OR2_ID],
+                                      [OR3_ID, OR4_ID]]
+
+    partitioned_run.build_steps()
+    assert [[[entry[0] for entry in entries] for entries in steps]
+            for steps in partitioned_run.steps] == [
+                [[SW1_ID, OR1_ID, OR2_ID], []], [[], [OR3_ID, OR4_ID]]]
+    or2_outputs = devices.get_device(OR2_ID).outputs
+    assert partitioned_run.published == [[[(or2_outputs, None, 0)], []],
+                                         [[], []]]
+    assert partitioned_run.read == [[[], []],
+                                    [[(OR2_ID, or2_outputs, None, 0)], []]]
+    assert len(partitioned_run.levels[0]) == 1
+
+
+def test_exchange(new_chain):
+    """Test if a changed output of another part marks the devices it drives.
+    """
+    devices, network, monitors = new_chain
+    [OR2_ID, OR3_ID] = devices.names.lookup(["Or2", "Or3"])
+    partitioned_run = PartitionedRun(devices, network, monitors, 2)
+    partitioned_run.build_steps()
+
+    # Run Or3's part in this process, as if the other part had published
+    # Or2 HIGH
+    network.set_part(set(partitioned_run.groups[1]))
+    network.prepare_network()
+    network.dirty_devices = set()
+    partitioned_run.barrier = multiprocessing.Barrier(1)
+    partitioned_run.levels[0][0] = devices.HIGH
+    or2_outputs = devices.get_device(OR2_ID).outputs
+    or2_outputs[None] = devices.LOW
+
+    assert partitioned_run.exchange(1, 0, True) is True
+    assert or2_outputs[None] == devices.HIGH
+    assert network.dirty_devices == {OR3_ID}
+    assert partitioned_run.exchange(1, 1, False) is False
+    assert partitioned_run.exchanges == 2
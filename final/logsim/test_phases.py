@@ -0,0 +1,42 @@
+"""Test the phases module."""
+import pstats
+
+from phases import PhaseProfiler
+
+
+def add(x, y):
+    """Return the sum of x and y."""
+    return x + y
+
+
+def test_run_phase():
+    """Test if run_phase returns the result and times the phase."""
+    phase_profiler = PhaseProfiler()
+
+    assert phase_profiler.run_phase("add", add, 2, 3) == 5
+    assert phase_profiler.phases == ["add"]
+    assert phase_profiler.wall_times["add"] >= 0
+    assert phase_profiler.profile_summaries == {}
+    assert phase_profiler.memory_peaks == {}
+
+    report = phase_profiler.get_report()
+    assert report[0] == "Wall time (ms):"
+    assert report[1].startswith("  add: ")
+
+
+def test_run_phase_profiled(tmp_path):
+    """Test if run_phase writes the pstats file and traces memory."""
+    profile_prefix = str(tmp_path / "run")
+    phase_profiler = PhaseProfiler(profile_prefix, trace_memory=True, top=3)
+
+    assert phase_profiler.run_phase("build", list, range(1000)) == \
+        list(range(1000))
+
+    stats = pstats.Stats(profile_prefix + ".build.pstats")
+    assert stats.total_calls > 0
+    assert phase_profiler.memory_peaks["build"] > 0
+    assert len(phase_profiler.memory_summaries["build"]) <= 3
+
+    report = phase_profiler.get_report()
+    assert "Profile of build phase:" in report
+    assert report[2].startswith("Memory of build phase (peak ")
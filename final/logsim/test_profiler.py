@@ -0,0 +1,130 @@
+"""Test the profiler module."""
+import pytest
+
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+from simulator import Simulator
+
+
+@pytest.fixture
+def new_simulator():
+    """Return a Simulator instance with a switch driving two NOT gates.
+
+    Sw1 > Nand1 > Nand2, with Nand2 monitored.
+    """
+    new_names = Names()
+    new_devices = Devices(new_names)
+    new_network = Network(new_names, new_devices)
+    new_monitors = Monitors(new_names, new_devices, new_network)
+
+    [SW1_ID, NAND1_ID, NAND2_ID, I1] = new_names.lookup(["Sw1", "Nand1",
+                                                         "Nand2", "I1"])
+    new_devices.make_device(SW1_ID, new_devices.SWITCH, 0)
+    new_devices.make_device(NAND1_ID, new_devices.NAND, 1)
+    new_devices.make_device(NAND2_ID, new_devices.NAND, 1)
+    new_network.make_connection(SW1_ID, None, NAND1_ID, I1)
+    new_network.make_connection(NAND1_ID, None, NAND2_ID, I1)
+    new_monitors.make_monitor(NAND2_ID, None)
+
+    return Simulator(new_names, new_devices, new_network, new_monitors)
+
+
+def test_set_profiling(new_simulator):
+    """Test if the network only records statistics while profiling is set."""
+    network = new_simulator.network
+
+    new_simulator.reset()
+    new_simulator.run_network(2)
+    assert network.profiler is None
+
+    network.set_profiling(True)
+    profiler = network.profiler
+    new_simulator.run_network(2)
+    network.set_profiling(True)
+    assert network.profiler is profiler
+    assert profiler.skipped_cycles == 2
+
+    network.set_profiling(False)
+    assert network.profiler is None
+
+
+def test_profile_cycles(new_simulator):
+    """Test if evaluations and settle iterations are counted."""
+    simulator = new_simulator
+    devices = simulator.devices
+    network = simulator.network
+    [SW1_ID, NAND1_ID, NAND2_ID] = devices.names.lookup(["Sw1", "Nand1",
+                                                         "Nand2"])
+
+    network.set_profiling(True)
+    profiler = network.profiler
+    simulator.reset()
+    simulator.run_network(3)
+
+    # Devices are executed in the first cycle only, and each gate is
+    # executed again until its output has settled
+    assert profiler.executed_cycles == 1
+    assert profiler.skipped_cycles == 2
+    assert profiler.device_evaluations == {SW1_ID: 1, NAND1_ID: 3,
+                                           NAND2_ID: 4}
+    assert profiler.settle_histogram[4] == 1
+
+    # The switch change ripples through both gates in the next cycle
+    devices.set_switch(SW1_ID, devices.HIGH)
+    simulator.run_network(1)
+    assert profiler.executed_cycles == 2
+    assert profiler.settle_histogram[4] == 2
+    assert profiler.unsettled_cycles == 0
+    assert profiler.get_kind_evaluations() == {devices.SWITCH: 4,
+                                               devices.NAND: 14}
+
+    report = profiler.get_report()
+    assert report[0] == "Cycles executed: 2, skipped: 2, not settled: 0"
+    assert "  NAND: 14" in report
+
+    assert "Constant gates folded: 0" in report
+
+    profiler.reset()
+    assert profiler.executed_cycles == 0
+    assert profiler.device_evaluations == {}
+    assert sum(profiler.settle_histogram) == 0
+
+
+def test_profile_oscillating_network(new_simulator):
+    """Test if cycles which do not settle are counted."""
+    network = new_simulator.network
+    devices = new_simulator.devices
+    [NOR1_ID, I1] = devices.names.lookup(["Nor1", "I1"])
+
+    devices.make_device(NOR1_ID, devices.NOR, 1)
+    network.make_connection(NOR1_ID, None, NOR1_ID, I1)
+    network.set_profiling(True)
+
+    assert network.execute_network() == network.OSCILLATING
+    profiler = network.profiler
+    assert profiler.unsettled_cycles == 1
+    assert profiler.settle_histogram[network.iteration_limit] == 1
+
+
+def test_profile_folding(new_simulator):
+    """Test if the number of gates folded into constants is recorded."""
+    simulator = new_simulator
+    network = simulator.network
+
+    network.set_profiling(True)
+    network.set_constant_folding(True)
+    simulator.reset()
+    simulator.run_network(1)
+    profiler = network.profiler
+    assert profiler.folded_gates == 2
+    assert "Constant gates folded: 2" in profiler.get_report()
+
+    profiler.reset()
+    network.set_profiling(False)
+    network.set_profiling(True)
+    assert network.profiler.folded_gates == 2
+
+    network.set_constant_folding(False)
+    assert network.profiler.folded_gates == 0
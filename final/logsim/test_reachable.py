@@ -0,0 +1,135 @@
+"""Test the reachable module."""
+import shutil
+import sqlite3
+
+import pytest
+
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+from compiled import CompiledCircuit
+from reachable import StateExplorer
+
+
+@pytest.fixture
+def new_explorer():
+    """Return a StateExplorer instance for a D-type toggled by a switch.
+
+    D1.Q and En > X1 > D1.DATA, with Clk, of half period 1, at D1.CLK and
+    Zero at both D1.SET and D1.CLEAR.
+    """
+    new_names = Names()
+    new_devices = Devices(new_names)
+    new_network = Network(new_names, new_devices)
+    new_monitors = Monitors(new_names, new_devices, new_network)
+
+    [CLK_ID, EN_ID, ZERO_ID, X1_ID, D1_ID, I1,
+     I2] = new_names.lookup(["Clk", "En", "Zero", "X1", "D1", "I1", "I2"])
+    new_devices.make_device(CLK_ID, new_devices.CLOCK, 1)
+    new_devices.make_device(EN_ID, new_devices.SWITCH, 0)
+    new_devices.make_device(ZERO_ID, new_devices.SWITCH, 0)
+    new_devices.make_device(X1_ID, new_devices.XOR)
+    new_devices.make_device(D1_ID, new_devices.D_TYPE)
+    new_network.make_connection(D1_ID, new_devices.Q_ID, X1_ID, I1)
+    new_network.make_connection(EN_ID, None, X1_ID, I2)
+    new_network.make_connection(X1_ID, None, D1_ID, new_devices.DATA_ID)
+    new_network.make_connection(CLK_ID, None, D1_ID, new_devices.CLK_ID)
+    new_network.make_connection(ZERO_ID, None, D1_ID, new_devices.SET_ID)
+    new_network.make_connection(ZERO_ID, None, D1_ID, new_devices.CLEAR_ID)
+    new_devices.reset_startup()
+
+    return StateExplorer(CompiledCircuit(new_names, new_devices,
+                                         new_network, new_monitors))
+
+
+def test_build_states(new_explorer):
+    """Test if the clock phases repeat after the reset state."""
+    explorer = new_explorer
+    assert explorer.build_states() == explorer.NO_ERROR
+    assert len(explorer.switches) == 2
+    assert explorer.phase_levels == [(0,), (0,), (1,)]
+    assert explorer.next_phases == [1, 2, 1]
+
+    for number in range(explorer.max_switches):
+        [SW_ID] = explorer.names.lookup(["Sw" + str(number)])
+        explorer.devices.make_device(SW_ID, explorer.devices.SWITCH, 0)
+    assert explorer.build_states() == explorer.TOO_MANY_SWITCHES
+
+
+def test_pack_state(new_explorer):
+    """Test if a packed state unpacks to the same fields."""
+    explorer = new_explorer
+    explorer.build_states()
+    state = explorer.pack_state(2, 1, 1, 0)
+    assert explorer.unpack_state(state) == (2, 1, 1, 0)
+    assert explorer.get_state_name(state) == \
+        "phase 2; switches 01; D-types 1"
+    assert explorer.get_reset_state() == 0
+
+
+def test_get_successors(new_explorer):
+    """Test if the D-type samples DATA only on a clock edge."""
+    explorer = new_explorer
+    explorer.build_states()
+    explorer.run_cycle = explorer.circuit.compile_cycle()
+
+    # The clock rises into phase 2. DATA is sampled from the switches of
+    # the last cycle, while Zero clears D1 at once.
+    successors = explorer.get_successors(explorer.pack_state(1, 0, 1, 0))
+    assert successors == [explorer.pack_state(2, 0, 1, 0),
+                          explorer.pack_state(2, 1, 1, 0),
+                          explorer.pack_state(2, 2, 0, 0),
+                          explorer.pack_state(2, 3, 0, 0)]
+    successors = explorer.get_successors(explorer.pack_state(1, 1, 1, 0))
+    assert successors[0] == explorer.pack_state(2, 0, 0, 0)
+    successors = explorer.get_successors(explorer.pack_state(2, 1, 1, 0))
+    assert successors[1] == explorer.pack_state(1, 1, 1, 0)
+
+
+def test_add_visited(new_explorer, tmp_path):
+    """Test if states spilled to the database are still found."""
+    explorer = new_explorer
+    explorer.max_states = 2
+    explorer.spill_dir = str(tmp_path)
+    assert [explorer.add_visited(state) for state in range(5)] == [True] * 5
+    assert isinstance(explorer.spilled, sqlite3.Connection)
+    assert explorer.visited == {4}
+    assert explorer.spilled.execute(
+        "SELECT state FROM states ORDER BY state").fetchall() == [
+            (b"\x00",), (b"\x01",), (b"\x02",), (b"\x03",)]
+    assert [explorer.add_visited(state) for state in range(6)] == \
+        [False] * 5 + [True]
+    assert explorer.get_state_bytes(300) == b"\x2c\x01"
+    explorer.spilled.close()
+    shutil.rmtree(explorer.spill_path)
+
+
+@pytest.mark.parametrize("max_states", [1, 2, 1000])
+def test_explore(new_explorer, max_states):
+    """Test if spilling to disk does not change the search."""
+    explorer = new_explorer
+    explorer.max_states = max_states
+    explorer.build_states()
+    transitions = list(explorer.explore())
+    assert len(transitions) == explorer.transitions == 52
+    assert explorer.states == 13
+    assert explorer.depth == 3
+    assert not explorer.oscillating
+    assert len(set(state for state, switches, next_state
+                   in transitions)) == 13
+
+    explorer.max_states = 1000
+    assert list(explorer.explore()) == transitions
+    assert list(explorer.explore(limit=5)) == transitions[:4]
+
+
+def test_run(new_explorer, tmp_path):
+    """Test if every transition is written to the file."""
+    explorer = new_explorer
+    path = tmp_path / "transitions.txt"
+    assert explorer.run(str(path)) == explorer.NO_ERROR
+    lines = path.read_text().splitlines()
+    assert lines[0] == "# phase; switches Zero En; D-types D1"
+    assert len(lines) == 53
+    assert lines[1] == "0 0 8"
@@ -0,0 +1,123 @@
+"""Test the scheduler module."""
+import pytest
+
+from names import Names
+from devices import Devices
+from network import Network
+from scheduler import Scheduler
+
+
+@pytest.fixture
+def new_devices():
+    """Return a Devices instance with a clock, an RC and two SIGGENs."""
+    new_names = Names()
+    new_devices = Devices(new_names)
+
+    [CL1_ID, RC1_ID, SG1_ID, SG2_ID] = new_names.lookup(["Cl1", "Rc1", "Sg1",
+                                                         "Sg2"])
+    new_devices.make_device(CL1_ID, new_devices.CLOCK, 3)
+    new_devices.make_device(RC1_ID, new_devices.RC, 4)
+    new_devices.make_device(SG1_ID, new_devices.SIGGEN, "00111")
+    new_devices.make_device(SG2_ID, new_devices.SIGGEN, "11")
+    return new_devices
+
+
+def test_build(new_devices):
+    """Test if build schedules every device from its counter."""
+    devices = new_devices
+    scheduler = Scheduler(devices)
+    [CL1_ID, RC1_ID] = devices.names.lookup(["Cl1", "Rc1"])
+    clock = devices.get_device(CL1_ID)
+    rc = devices.get_device(RC1_ID)
+
+    clock.clock_counter = 1
+    rc.clock_counter = 0
+    scheduler.build()
+
+    # Every SIGGEN is due first, then the clock when its counter reaches 3
+    assert scheduler.get_next_event() == 1
+    assert len(scheduler.advance()) == 2
+    assert scheduler.get_next_event() == 3
+    assert scheduler.advance() == []
+    assert scheduler.advance() == [clock]
+    assert clock.clock_counter == 3
+    assert scheduler.get_next_event() == 5
+    assert scheduler.advance() == []
+    assert scheduler.advance() == [rc]
+    assert rc.clock_counter == 4
+
+
+def test_schedule_siggen(new_devices):
+    """Test if SIGGEN devices are only due when their sequence changes."""
+    devices = new_devices
+    scheduler = Scheduler(devices)
+    [SG1_ID, SG2_ID] = devices.names.lookup(["Sg1", "Sg2"])
+    siggen = devices.get_device(SG1_ID)
+    constant_siggen = devices.get_device(SG2_ID)
+
+    scheduler.build()
+    for device in scheduler.advance():
+        device.clock_counter += 1
+        device.outputs[None] = device.sequence[0]
+        scheduler.schedule(device)
+
+    # The constant SIGGEN is never due again
+    due_cycles = []
+    for cycle in range(2, 12):
+        due_devices = scheduler.advance()
+        assert constant_siggen not in due_devices
+        if siggen in due_devices:
+            due_cycles.append(cycle)
+            siggen.outputs[None] = siggen.sequence[siggen.clock_counter % 5]
+            siggen.clock_counter += 1
+            scheduler.schedule(siggen)
+    assert due_cycles == [3, 6, 8, 11]
+
+
+def test_sync_counters(new_devices):
+    """Test if sync_counters gives the same counters as updating each cycle."""
+    devices = new_devices
+    names = devices.names
+    scheduled_network = Network(names, devices)
+
+    # Simulate a copy of the devices with a counter update every cycle
+    reference_devices = devices.fork()
+    reference_network = Network(names, reference_devices)
+
+    devices.cold_startup()
+    for device, reference_device in zip(devices.devices_list,
+                                        reference_devices.devices_list):
+        reference_device.clock_counter = device.clock_counter
+        reference_device.outputs[None] = device.outputs[None]
+
+    for cycle in range(17):
+        scheduled_network.execute_network()
+        reference_network.update_clocks()
+        reference_network.update_RC()
+        reference_network.update_siggen()
+        for device in reference_devices.devices_list:
+            reference_network.execute_clock(device.device_id)
+
+        scheduled_network.scheduler.sync_counters()
+        for device, reference_device in zip(devices.devices_list,
+                                            reference_devices.devices_list):
+            assert device.clock_counter == reference_device.clock_counter
+            assert device.outputs == reference_device.outputs
+
+
+def test_fork(new_devices):
+    """Test if a forked scheduler updates the forked devices."""
+    devices = new_devices
+    scheduler = Scheduler(devices)
+    [CL1_ID] = devices.names.lookup(["Cl1"])
+
+    devices.get_device(CL1_ID).clock_counter = 3
+    scheduler.build()
+
+    forked_devices = devices.fork()
+    forked_scheduler = scheduler.fork(forked_devices)
+    forked_clock = forked_devices.get_device(CL1_ID)
+
+    assert forked_clock in forked_scheduler.advance()
+    assert scheduler.cycle == 0
+    assert scheduler.get_next_event() == 1
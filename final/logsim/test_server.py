@@ -0,0 +1,101 @@
+"""Test the server module."""
+import asyncio
+import os
+import threading
+import time
+
+import pytest
+
+from server import SimulationServer, SimulationClient
+
+circuit_directory = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                 "circuit_files")
+
+
+@pytest.fixture
+def server(tmp_path):
+    """Run a SimulationServer in a thread and stop it after the test."""
+    socket_path = str(tmp_path / "logsim.sock")
+    new_server = SimulationServer(socket_path, workers=2)
+    thread = threading.Thread(target=asyncio.run, args=(new_server.serve(),))
+    thread.start()
+    while not os.path.exists(socket_path):
+        time.sleep(0.01)
+    yield new_server
+    new_server.stop()
+    thread.join()
+    assert not os.path.exists(socket_path)
+
+
+def test_session(server):
+    """Test if a session loads, runs and continues a circuit."""
+    client = SimulationClient(server.socket_path)
+    path = os.path.join(circuit_directory, "basic.txt")
+
+    response = client.request("load", path=path)
+    assert response["ok"]
+    assert response["devices"] == 6
+    assert response["monitors"] == ["G1"]
+
+    assert client.request("run", cycles=3) == {"ok": True,
+                                               "cycles_completed": 3}
+    assert client.request("set_switch", switch="SW2", level=1) == {"ok": True}
+    assert client.request("continue", cycles=2)["cycles_completed"] == 5
+    response = client.request("get_traces")
+    assert response["traces"] == {"G1": [0, 0, 0, 1, 1]}
+    client.close()
+
+
+def test_sessions_share_parsed_circuit(server):
+    """Test if sessions reuse the parsed circuit and run independently."""
+    path = os.path.join(circuit_directory, "basic.txt")
+    first_client = SimulationClient(server.socket_path)
+    second_client = SimulationClient(server.socket_path)
+    assert first_client.request("load", path=path)["ok"]
+    assert second_client.request("load", path=path)["ok"]
+    assert len(server.circuits) == 1
+
+    first_client.request("set_switch", switch="SW2", level=1)
+    first_client.request("run", cycles=2)
+    second_client.request("run", cycles=4)
+    assert first_client.request("get_traces")["traces"] == {"G1": [1, 1]}
+    assert second_client.request("get_traces")["traces"] == \
+        {"G1": [0, 0, 0, 0]}
+    first_client.close()
+    second_client.close()
+
+
+def test_errors(server, tmp_path):
+    """Test if invalid requests give errors without ending the session."""
+    client = SimulationClient(server.socket_path)
+    assert client.request("run", cycles=2) == {"ok": False,
+                                               "error": "no circuit loaded"}
+    assert client.request("jump")["error"] == "unknown command"
+    assert client.request("load", path=str(tmp_path / "none.txt"))[
+        "error"] == "file not found"
+
+    assert client.request("load", path=os.path.join(
+        circuit_directory, "basic.txt"))["ok"]
+    assert client.request("run", cycles=-1)["error"] == "invalid arguments"
+    assert client.request("run")["error"] == "invalid arguments"
+    assert client.request("set_switch", switch="G1", level=1)["error"] == \
+        "invalid switch"
+    assert client.request("run", cycles=1)["ok"]
+    client.close()
+
+
+def test_run_errors(server, tmp_path):
+    """Test if failed runs report what went wrong."""
+    path = tmp_path / "oscillator.txt"
+    path.write_text("NAND 1 G1;\nCONNECT G1 > G1.I1;\nMONITOR G1;\n")
+    client = SimulationClient(server.socket_path)
+    assert client.request("load", path=str(path))["ok"]
+    assert client.request("run", cycles=2) == {
+        "ok": False, "error": "network oscillating", "cycles_completed": 0}
+
+    simulator = server.circuits[str(path)][1]
+    network = simulator.network
+    assert server.get_run_error(simulator, network.INPUTS_NOT_CONNECTED) == \
+        "inputs not connected"
+    assert server.get_run_error(simulator, False) == "run failed"
+    client.close()
@@ -0,0 +1,375 @@
+"""Test the simulator module."""
+import multiprocessing
+
+import pytest
+
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+from simulator import Simulator
+
+
+@pytest.fixture
+def new_simulator():
+    """Return a Simulator instance with two switches driving an OR gate."""
+    new_names = Names()
+    new_devices = Devices(new_names)
+    new_network = Network(new_names, new_devices)
+    new_monitors = Monitors(new_names, new_devices, new_network)
+
+    [SW1_ID, SW2_ID, OR1_ID, I1, I2] = new_names.lookup(["Sw1", "Sw2", "Or1",
+                                                        "I1", "I2"])
+    new_devices.make_device(SW1_ID, new_devices.SWITCH, 0)
+    new_devices.make_device(SW2_ID, new_devices.SWITCH, 0)
+    new_devices.make_device(OR1_ID, new_devices.OR, 2)
+
+    new_network.make_connection(SW1_ID, None, OR1_ID, I1)
+    new_network.make_connection(SW2_ID, None, OR1_ID, I2)
+
+    new_monitors.make_monitor(SW1_ID, None)
+    new_monitors.make_monitor(OR1_ID, None)
+
+    return Simulator(new_names, new_devices, new_network, new_monitors)
+
+
+def test_run_network(new_simulator):
+    """Test if run_network executes and records the given number of cycles."""
+    simulator = new_simulator
+    devices = simulator.devices
+    [SW1_ID, OR1_ID] = simulator.names.lookup(["Sw1", "Or1"])
+
+    LOW = devices.LOW
+    HIGH = devices.HIGH
+
+    simulator.reset()
+    assert simulator.run_network(2) == simulator.network.NO_ERROR
+    devices.set_switch(SW1_ID, HIGH)
+    assert simulator.run_network(2) == simulator.network.NO_ERROR
+
+    assert simulator.cycles_completed == 4
+    assert simulator.monitors.monitors_dictionary == {
+        (SW1_ID, None): [LOW, LOW, HIGH, HIGH],
+        (OR1_ID, None): [LOW, LOW, HIGH, HIGH]}
+
+
+def test_run_network_gives_error(new_simulator):
+    """Test if run_network stops at the first cycle that fails."""
+    simulator = new_simulator
+    devices = simulator.devices
+    network = simulator.network
+    [NOR1_ID, I1] = simulator.names.lookup(["Nor1", "I1"])
+
+    # Connect a NOR gate to itself
+    devices.make_device(NOR1_ID, devices.NOR, 1)
+    network.make_connection(NOR1_ID, None, NOR1_ID, I1)
+
+    simulator.reset()
+    assert simulator.run_network(5) == network.OSCILLATING
+    assert simulator.cycles_completed == 0
+
+
+def test_run_network_skips_quiet_cycles(new_simulator, monkeypatch):
+    """Test if run_network only executes cycles in which signals can change."""
+    simulator = new_simulator
+    devices = simulator.devices
+    network = simulator.network
+    [CL1_ID, OR2_ID, I1] = simulator.names.lookup(["Cl1", "Or2", "I1"])
+
+    LOW = devices.LOW
+    HIGH = devices.HIGH
+
+    # Add a clock of half period 5 driving a monitored OR gate
+    devices.make_device(CL1_ID, devices.CLOCK, 5)
+    devices.make_device(OR2_ID, devices.OR, 1)
+    network.make_connection(CL1_ID, None, OR2_ID, I1)
+    simulator.monitors.make_monitor(OR2_ID, None)
+
+    executed_cycles = []
+    execute_network = network.execute_network
+
+    def mock_execute_network():
+        executed_cycles.append(simulator.cycles_completed)
+        return execute_network()
+
+    monkeypatch.setattr(network, "execute_network", mock_execute_network)
+
+    simulator.reset()
+    clock = devices.get_device(CL1_ID)
+    clock.clock_counter = 0
+    clock.outputs[None] = LOW
+    assert simulator.run_network(20) == network.NO_ERROR
+
+    # The first cycle after start-up and the clock edges are executed
+    assert executed_cycles == [0, 5, 10, 15]
+    assert simulator.monitors.monitors_dictionary[(OR2_ID, None)] == (
+        [LOW] * 5 + [HIGH] * 5 + [LOW] * 5 + [HIGH] * 5)
+
+
+def test_period_detection(new_simulator):
+    """Test if periodic runs are extrapolated to the same signals."""
+    simulator = new_simulator
+    devices = simulator.devices
+    network = simulator.network
+    [CL1_ID, OR2_ID, I1, SW2_ID] = simulator.names.lookup(["Cl1", "Or2", "I1",
+                                                          "Sw2"])
+
+    # Add a clock of half period 3 driving a monitored OR gate
+    devices.make_device(CL1_ID, devices.CLOCK, 3)
+    devices.make_device(OR2_ID, devices.OR, 1)
+    network.make_connection(CL1_ID, None, OR2_ID, I1)
+    simulator.monitors.make_monitor(OR2_ID, None)
+
+    simulator.reset()
+    branch = simulator.fork()
+    branch.set_period_detection(True)
+
+    assert branch.run_network(50) == network.NO_ERROR
+    assert branch.period == 6
+    assert branch.transient_cycles == 1
+    assert branch.cycles_completed == 50
+
+    # The branch continues from the state the devices reach after 50 cycles
+    branch.devices.set_switch(SW2_ID, devices.HIGH)
+    branch.run_network(10)
+    simulator.run_network(50)
+    simulator.devices.set_switch(SW2_ID, devices.HIGH)
+    simulator.run_network(10)
+    assert branch.monitors.monitors_dictionary == \
+        simulator.monitors.monitors_dictionary
+
+
+def test_run_network_in_processes(new_simulator):
+    """Test if components run in worker processes give the same signals."""
+    simulator = new_simulator
+    devices = simulator.devices
+    network = simulator.network
+    [CL1_ID, OR2_ID, I1, SW1_ID] = simulator.names.lookup(["Cl1", "Or2", "I1",
+                                                          "Sw1"])
+
+    # Add a clock driving a monitored OR gate as a second component
+    devices.make_device(CL1_ID, devices.CLOCK, 3)
+    devices.make_device(OR2_ID, devices.OR, 1)
+    network.make_connection(CL1_ID, None, OR2_ID, I1)
+    simulator.monitors.make_monitor(OR2_ID, None)
+
+    simulator.reset()
+    simulator.run_network(2)
+    branch = simulator.fork()
+    branch.set_processes(2)
+    assert len(branch.group_components()) == 2
+
+    for run_simulator in [simulator, branch]:
+        assert run_simulator.run_network(20) == network.NO_ERROR
+        run_simulator.devices.set_switch(SW1_ID, devices.HIGH)
+        assert run_simulator.run_network(7) == network.NO_ERROR
+    assert branch.cycles_completed == 29
+    assert branch.monitors.monitors_dictionary == \
+        simulator.monitors.monitors_dictionary
+
+
+def test_run_network_in_parts(new_simulator):
+    """Test if the parts of one component run in worker processes give the
+    same signals and states."""
+    simulator = new_simulator
+    devices = simulator.devices
+    network = simulator.network
+    [CL1_ID, SW1_ID, OR1_ID, AND1_ID, I1, I2] = simulator.names.lookup(
+        ["Cl1", "Sw1", "Or1", "And1", "I1", "I2"])
+
+    # Add a shift register clocked by Cl1 and fed by Or1, with And1 of Or1
+    # and the last D-type, all in the same component
+    d_type_ids = simulator.names.lookup(["D1", "D2", "D3", "D4"])
+    devices.make_device(CL1_ID, devices.CLOCK, 2)
+    devices.make_device(AND1_ID, devices.AND, 2)
+    data_output = (OR1_ID, None)
+    for d_type_id in d_type_ids:
+        devices.make_device(d_type_id, devices.D_TYPE)
+        network.make_connection(*data_output, d_type_id, devices.DATA_ID)
+        network.make_connection(CL1_ID, None, d_type_id, devices.CLK_ID)
+        network.make_connection(AND1_ID, None, d_type_id, devices.SET_ID)
+        network.make_connection(AND1_ID, None, d_type_id, devices.CLEAR_ID)
+        simulator.monitors.make_monitor(d_type_id, devices.Q_ID)
+        data_output = (d_type_id, devices.QBAR_ID)
+    network.make_connection(OR1_ID, None, AND1_ID, I1)
+    network.make_connection(*data_output, AND1_ID, I2)
+
+    simulator.reset()
+    branch = simulator.fork()
+    branch.set_processes(3)
+    assert len(branch.group_components()) == 1
+
+    for run_simulator in [simulator, branch]:
+        assert run_simulator.run_network(20) == network.NO_ERROR
+        run_simulator.devices.set_switch(SW1_ID, devices.HIGH)
+        assert run_simulator.run_network(7) == network.NO_ERROR
+    assert branch.run_processes(9)
+    assert simulator.run_network(9) == network.NO_ERROR
+    assert branch.cycles_completed == 36
+    assert branch.monitors.monitors_dictionary == \
+        simulator.monitors.monitors_dictionary
+    assert branch.get_state() == simulator.get_state()
+
+
+def test_run_worker_skips_quiet_cycles(new_simulator, monkeypatch):
+    """Test if a worker process still skips the quiet cycles of its
+    components."""
+    simulator = new_simulator
+    devices = simulator.devices
+    network = simulator.network
+    [CL1_ID, OR2_ID, I1] = simulator.names.lookup(["Cl1", "Or2", "I1"])
+
+    # Add a clock of half period 5 driving a monitored OR gate as a second
+    # component
+    devices.make_device(CL1_ID, devices.CLOCK, 5)
+    devices.make_device(OR2_ID, devices.OR, 1)
+    network.make_connection(CL1_ID, None, OR2_ID, I1)
+    simulator.monitors.make_monitor(OR2_ID, None)
+
+    simulator.reset()
+    clock = devices.get_device(CL1_ID)
+    clock.clock_counter = 0
+    clock.outputs[None] = devices.LOW
+    branch = simulator.fork()
+
+    executed_cycles = []
+    execute_network = branch.network.execute_network
+
+    def mock_execute_network():
+        executed_cycles.append(branch.cycles_completed)
+        return execute_network()
+
+    monkeypatch.setattr(branch.network, "execute_network",
+                        mock_execute_network)
+
+    # Run the worker of the clock's component in this process
+    receiver, sender = multiprocessing.Pipe(duplex=False)
+    branch.run_worker([CL1_ID, OR2_ID], 20, sender)
+    error_code, signals, state, coverage_bits = receiver.recv()
+    assert error_code == network.NO_ERROR
+    assert executed_cycles == [0, 5, 10, 15]
+    assert signals[(OR2_ID, None)] == (
+        [devices.LOW] * 5 + [devices.HIGH] * 5 + [devices.LOW] * 5 +
+        [devices.HIGH] * 5)
+
+
+def test_fork(new_simulator):
+    """Test if forked branches continue independently from a common state."""
+    simulator = new_simulator
+    devices = simulator.devices
+    [SW1_ID, SW2_ID, OR1_ID] = simulator.names.lookup(["Sw1", "Sw2", "Or1"])
+
+    LOW = devices.LOW
+    HIGH = devices.HIGH
+
+    simulator.reset()
+    simulator.run_network(2)
+
+    branch = simulator.fork()
+    assert branch.cycles_completed == 2
+
+    # The branch shares the connectivity of every device
+    for device, forked_device in zip(devices.devices_list,
+                                     branch.devices.devices_list):
+        assert forked_device is not device
+        assert forked_device.inputs is device.inputs
+
+    branch.devices.set_switch(SW2_ID, HIGH)
+    branch.run_network(2)
+    simulator.run_network(1)
+
+    assert devices.get_device(SW2_ID).switch_state == LOW
+    assert simulator.monitors.monitors_dictionary == {
+        (SW1_ID, None): [LOW, LOW, LOW],
+        (OR1_ID, None): [LOW, LOW, LOW]}
+    assert branch.monitors.monitors_dictionary == {
+        (SW1_ID, None): [LOW, LOW, LOW, LOW],
+        (OR1_ID, None): [LOW, LOW, HIGH, HIGH]}
+
+
+def test_fork_shares_traces(new_simulator):
+    """Test if a branch shares the recorded levels without copying them."""
+    simulator = new_simulator
+    [SW1_ID] = simulator.names.lookup(["Sw1"])
+
+    simulator.reset()
+    simulator.run_network(3)
+    trace = simulator.monitors.monitors_dictionary[(SW1_ID, None)]
+
+    branch = simulator.fork()
+    branch_trace = branch.monitors.monitors_dictionary[(SW1_ID, None)]
+    assert branch_trace is not trace
+    assert branch_trace.segments[0] is trace.segments[0]
+
+    # Each records its own levels after the shared ones
+    branch.run_network(1)
+    simulator.run_network(2)
+    assert branch_trace.segments[0] is trace.segments[0]
+    assert branch_trace.prefix_length == 3
+    assert branch.monitors.monitors_dictionary[(SW1_ID, None)] == [0] * 4
+    assert (len(branch_trace), len(trace)) == (4, 5)
+
+
+def test_breakpoint_stops_run(new_simulator):
+    """Test if runs stop at the cycle a breakpoint is met at."""
+    simulator = new_simulator
+    devices = simulator.devices
+    network = simulator.network
+    [SW1_ID, CL1_ID, OR2_ID, I1] = simulator.names.lookup(["Sw1", "Cl1",
+                                                           "Or2", "I1"])
+    LOW = devices.LOW
+
+    # Add a clock of half period 3 driving an OR gate
+    devices.make_device(CL1_ID, devices.CLOCK, 3)
+    devices.make_device(OR2_ID, devices.OR, 1)
+    network.make_connection(CL1_ID, None, OR2_ID, I1)
+
+    assert simulator.add_breakpoint("Or2 rises")
+    simulator.reset()
+    clock = devices.get_device(CL1_ID)
+    clock.clock_counter = 0
+    clock.outputs[None] = LOW
+    assert simulator.run_network(20) == network.NO_ERROR
+    assert simulator.breakpoint_cycle == 4
+    assert simulator.cycles_completed == 4
+    assert len(simulator.monitors.monitors_dictionary[(SW1_ID, None)]) == 4
+
+    # Continuing runs on to the next time the breakpoint is met
+    assert simulator.run_network(20) == network.NO_ERROR
+    assert simulator.breakpoint_cycle == 10
+    assert simulator.cycles_completed == 10
+
+    # Quiet cycles are skipped up to a cycle condition
+    simulator.clear_breakpoints()
+    assert simulator.breakpoints == []
+    assert simulator.add_breakpoint("cycle 13")
+    assert simulator.run_network(20) == network.NO_ERROR
+    assert simulator.breakpoint_cycle == 13
+    assert simulator.run_network(5) == network.NO_ERROR
+    assert simulator.breakpoint_cycle is None
+    assert simulator.cycles_completed == 18
+
+
+def test_breakpoint_levels(new_simulator):
+    """Test if a level condition stops the run in its first cycle."""
+    simulator = new_simulator
+    [SW1_ID] = simulator.names.lookup(["Sw1"])
+
+    assert simulator.add_breakpoint("Or1 high and Sw2 low")
+    assert simulator.add_breakpoint("cycle 50")
+    simulator.reset()
+    assert simulator.run_network(10) == simulator.network.NO_ERROR
+    assert simulator.breakpoint_cycle is None
+    simulator.devices.set_switch(SW1_ID, simulator.devices.HIGH)
+    assert simulator.run_network(10) == simulator.network.NO_ERROR
+    assert simulator.breakpoint_cycle == 11
+
+
+@pytest.mark.parametrize("expression", ["", "Or1", "Or1 up", "Or9 high",
+                                        "Or1 high and", "cycle x"])
+def test_add_invalid_breakpoint(new_simulator, expression):
+    """Test if invalid breakpoint conditions are not added."""
+    simulator = new_simulator
+    assert not simulator.add_breakpoint(expression)
+    assert simulator.breakpoints == []
+    assert simulator.breakpoint_check is None
@@ -0,0 +1,117 @@
+"""Test the stimulus module."""
+import pytest
+
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+from simulator import Simulator
+from stimulus import Stimulus
+
+
+@pytest.fixture
+def new_simulator():
+    """Return a Simulator instance with two switches driving an OR gate."""
+    new_names = Names()
+    new_devices = Devices(new_names)
+    new_network = Network(new_names, new_devices)
+    new_monitors = Monitors(new_names, new_devices, new_network)
+
+    [SW1_ID, SW2_ID, OR1_ID, I1, I2] = new_names.lookup(["Sw1", "Sw2", "Or1",
+                                                        "I1", "I2"])
+    new_devices.make_device(SW1_ID, new_devices.SWITCH, 0)
+    new_devices.make_device(SW2_ID, new_devices.SWITCH, 0)
+    new_devices.make_device(OR1_ID, new_devices.OR, 2)
+
+    new_network.make_connection(SW1_ID, None, OR1_ID, I1)
+    new_network.make_connection(SW2_ID, None, OR1_ID, I2)
+
+    new_monitors.make_monitor(SW1_ID, None)
+    new_monitors.make_monitor(OR1_ID, None)
+
+    return Simulator(new_names, new_devices, new_network, new_monitors)
+
+
+def make_stimulus(simulator, tmp_path, text):
+    """Write the stimulus file and return a Stimulus instance reading it."""
+    path = tmp_path / "stimulus.txt"
+    path.write_text(text)
+    return Stimulus(simulator.names, simulator.devices, str(path))
+
+
+def test_read_event(new_simulator, tmp_path):
+    """Test if read_event skips comments and reads events in order."""
+    stimulus = make_stimulus(new_simulator, tmp_path,
+                             "# cycle switch level\n\n3 Sw1 1\n3 Sw2 1\n")
+    [SW1_ID, SW2_ID] = new_simulator.names.lookup(["Sw1", "Sw2"])
+
+    assert stimulus.next_event == (3, SW1_ID, 1)
+    assert stimulus.line_number == 3
+    stimulus.read_event()
+    assert stimulus.next_event == (3, SW2_ID, 1)
+    stimulus.read_event()
+    assert stimulus.next_event is None
+    assert stimulus.get_next_cycle() is None
+    assert stimulus.error_code == stimulus.NO_ERROR
+
+    stimulus.reset()
+    assert stimulus.get_next_cycle() == 3
+
+
+@pytest.mark.parametrize("text, error", [
+    ("3 Sw1\n", "BAD_EVENT"),
+    ("3 Sw1 2\n", "BAD_EVENT"),
+    ("x Sw1 1\n", "BAD_EVENT"),
+    ("3 Or1 1\n", "NOT_SWITCH"),
+    ("3 Sw9 1\n", "NOT_SWITCH"),
+    ("3 Sw1 1\n2 Sw1 0\n", "EVENT_ORDER"),
+])
+def test_invalid_event(new_simulator, tmp_path, text, error):
+    """Test if invalid lines stop the stimulus with the right error."""
+    stimulus = make_stimulus(new_simulator, tmp_path, text)
+    stimulus.apply_events(5)
+    assert stimulus.error_code == getattr(stimulus, error)
+    assert stimulus.next_event is None
+    assert stimulus.line_number == len(text.splitlines())
+
+
+@pytest.mark.parametrize("option", [None, "period", "processes"])
+def test_run_network_with_stimulus(new_simulator, tmp_path, option):
+    """Test if the switches are set at the exact cycles of the events."""
+    simulator = new_simulator
+    devices = simulator.devices
+    [SW1_ID, OR1_ID] = simulator.names.lookup(["Sw1", "Or1"])
+    LOW = devices.LOW
+    HIGH = devices.HIGH
+    if option == "period":
+        simulator.set_period_detection(True)
+    elif option == "processes":
+        simulator.set_processes(2)
+    simulator.set_stimulus(make_stimulus(
+        simulator, tmp_path, "0 Sw2 0\n3 Sw1 1\n5 Sw1 0\n5 Sw2 1\n9 Sw2 0\n"))
+
+    simulator.reset()
+    assert simulator.run_network(4) == simulator.network.NO_ERROR
+    assert simulator.run_network(4) == simulator.network.NO_ERROR
+    assert simulator.cycles_completed == 8
+    assert simulator.monitors.monitors_dictionary == {
+        (SW1_ID, None): [LOW, LOW, LOW, HIGH, HIGH, LOW, LOW, LOW],
+        (OR1_ID, None): [LOW, LOW, LOW, HIGH, HIGH, HIGH, HIGH, HIGH]}
+    assert simulator.stimulus.get_next_cycle() == 9
+
+    # The stimulus is read from the start again after a reset
+    simulator.reset()
+    assert simulator.run_network(4) == simulator.network.NO_ERROR
+    assert simulator.monitors.monitors_dictionary[(SW1_ID, None)] == \
+        [LOW, LOW, LOW, HIGH]
+
+
+def test_run_network_with_invalid_stimulus(new_simulator, tmp_path):
+    """Test if run_network stops when the stimulus has an invalid line."""
+    simulator = new_simulator
+    simulator.set_stimulus(make_stimulus(simulator, tmp_path,
+                                         "2 Sw1 1\n4 Sw3 1\n"))
+    simulator.reset()
+    assert simulator.run_network(6) == simulator.stimulus.NOT_SWITCH
+    assert simulator.cycles_completed == 2
+    assert simulator.stimulus.line_number == 2
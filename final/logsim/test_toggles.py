@@ -0,0 +1,110 @@
+"""Test the toggles module."""
+import json
+
+import pytest
+
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+from simulator import Simulator
+from toggles import main
+
+
+@pytest.fixture
+def new_simulator():
+    """Return a Simulator instance with two separate components.
+
+    Sw1 > Nand1 and Cl1 > Or1, with Or1 monitored.
+    """
+    new_names = Names()
+    new_devices = Devices(new_names)
+    new_network = Network(new_names, new_devices)
+    new_monitors = Monitors(new_names, new_devices, new_network)
+
+    [SW1_ID, NAND1_ID, CL1_ID, OR1_ID, I1] = new_names.lookup(
+        ["Sw1", "Nand1", "Cl1", "Or1", "I1"])
+    new_devices.make_device(SW1_ID, new_devices.SWITCH, 0)
+    new_devices.make_device(NAND1_ID, new_devices.NAND, 1)
+    new_devices.make_device(CL1_ID, new_devices.CLOCK, 3)
+    new_devices.make_device(OR1_ID, new_devices.OR, 1)
+    new_network.make_connection(SW1_ID, None, NAND1_ID, I1)
+    new_network.make_connection(CL1_ID, None, OR1_ID, I1)
+    new_monitors.make_monitor(OR1_ID, None)
+
+    return Simulator(new_names, new_devices, new_network, new_monitors)
+
+
+def test_record_outputs(new_simulator):
+    """Test if the outputs which have risen and fallen are recorded."""
+    simulator = new_simulator
+    devices = simulator.devices
+    network = simulator.network
+    [SW1_ID, NAND1_ID] = devices.names.lookup(["Sw1", "Nand1"])
+    network.set_coverage(True)
+    coverage = network.coverage
+
+    simulator.reset()
+    simulator.run_network(10)
+    devices.set_switch(SW1_ID, devices.HIGH)
+    simulator.run_network(2)
+
+    # Nand1 rises from its initial LOW output in the first cycle
+    assert coverage.get_coverage() == {"Sw1": [True, False],
+                                       "Nand1": [True, True],
+                                       "Cl1": [True, True],
+                                       "Or1": [True, True]}
+    assert coverage.uncovered_outputs[NAND1_ID] == []
+    assert len(coverage.uncovered_outputs[SW1_ID]) == 1
+    assert coverage.get_report() == [
+        "Toggle coverage: 3 of 4 outputs (75.0%)",
+        "Outputs not toggled both ways:", "  Sw1: never fell"]
+
+    coverage.reset()
+    assert coverage.get_coverage()["Cl1"] == [False, False]
+
+
+def test_coverage_in_processes(new_simulator):
+    """Test if the coverage recorded by worker processes is merged."""
+    simulator = new_simulator
+    network = simulator.network
+    network.set_coverage(True)
+    simulator.set_processes(2)
+
+    simulator.reset()
+    simulator.run_network(1)  # set the random start-up in this process
+    network.coverage.reset()
+    assert simulator.run_network(10) == network.NO_ERROR
+    assert network.coverage.get_coverage() == {"Sw1": [False, False],
+                                               "Nand1": [False, False],
+                                               "Cl1": [True, True],
+                                               "Or1": [True, True]}
+
+
+def test_merge_coverage(new_simulator, tmp_path, capsys):
+    """Test if coverage is merged by signal name across runs and files."""
+    network = new_simulator.network
+    network.set_coverage(True)
+    coverage = network.coverage
+    first_path = str(tmp_path / "first.json")
+    second_path = str(tmp_path / "second.json")
+    merged_path = str(tmp_path / "merged.json")
+    with open(first_path, "w") as coverage_file:
+        json.dump({"Sw1": [False, True], "Other": [True, False]},
+                  coverage_file)
+
+    coverage.load(first_path)
+    coverage.merge({"Sw1": [True, False]})
+    coverage.save(second_path)
+    with open(second_path) as coverage_file:
+        assert json.load(coverage_file) == {"Sw1": [True, True],
+                                            "Nand1": [False, False],
+                                            "Cl1": [False, False],
+                                            "Or1": [False, False],
+                                            "Other": [True, False]}
+
+    main(["-o", merged_path, first_path, second_path])
+    assert capsys.readouterr().out.startswith(
+        "Toggle coverage: 1 of 5 outputs (20.0%)\n")
+    with open(merged_path) as coverage_file:
+        assert json.load(coverage_file)["Other"] == [True, False]
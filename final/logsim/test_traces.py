@@ -0,0 +1,77 @@
+"""Test the traces module."""
+import pytest
+
+from traces import Trace
+
+
+def test_fork():
+    """Test if forked traces share their levels and record their own."""
+    trace = Trace([1, 0, 1])
+    branch = trace.fork()
+    trace.append(0)
+    branch.extend([1, 1])
+    nested_branch = branch.fork()
+    nested_branch.append(0)
+
+    assert trace == [1, 0, 1, 0]
+    assert branch == [1, 0, 1, 1, 1]
+    assert nested_branch == [1, 0, 1, 1, 1, 0]
+    assert branch.segments[0] is trace.segments[0]
+    assert nested_branch.segments == branch.segments
+    assert len(nested_branch.suffix) == 1
+
+
+def test_indexing():
+    """Test if levels are read across the segments and the suffix."""
+    trace = Trace([1, 0, 1])
+    trace = trace.fork()
+    trace.extend([0, 0])
+    trace = trace.fork()
+    trace.append(1)
+
+    assert len(trace) == 6
+    assert [trace[index] for index in range(-6, 6)] == [1, 0, 1, 0, 0, 1] * 2
+    assert trace[4:] == [0, 1]
+    assert trace[1:4] == [0, 1, 0]
+    assert trace[::-2] == [1, 0, 0]
+    with pytest.raises(IndexError):
+        trace[6]
+    with pytest.raises(IndexError):
+        trace[-7]
+
+
+def test_equality():
+    """Test if a trace equals the lists and traces of the same levels."""
+    trace = Trace([0, 1])
+    assert trace == Trace([0, 1])
+    assert [0, 1] == trace
+    assert {"A": [0, 1]} == {"A": trace}
+    assert trace != [0, 1, 1]
+    assert trace != (0, 1)
+
+
+def test_append_run():
+    """Test if runs are stored once and read like the levels they hold."""
+    trace = Trace([1, 0])
+    trace.append_run(1, 10**9)
+    trace.append_run(1, 2)
+    trace.append(0)
+    branch = trace.fork()
+    trace.append_run(0, 3)
+    branch.append_run(1, 1)
+
+    assert len(trace.segments) == 4
+    assert trace.segments[1].cycles == 10**9 + 2
+    assert len(trace) == 10**9 + 8
+    assert (trace[1], trace[2], trace[10**9 + 4], trace[-1]) == (0, 1, 0, 0)
+    assert trace[10**9:] == [1, 1, 1, 1, 0, 0, 0, 0]
+    assert branch[10**9 + 1:] == [1, 1, 1, 0, 1]
+    assert len(branch.segments) == 3
+    assert branch.segments[2] is trace.segments[2]
+
+    trace = Trace([0])
+    trace.append_run(1, 2)
+    trace.append_run(0, 0)
+    assert trace == [0, 1, 1]
+    assert list(trace) == [0, 1, 1]
+    assert trace[::-1] == [1, 1, 0]
@@ -0,0 +1,92 @@
+"""Test the truthtable module."""
+import os
+
+import pytest
+
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+from truthtable import TruthTable
+
+
+@pytest.fixture
+def new_truth_table():
+    """Return a TruthTable instance with three switches and two gates.
+
+    Sw1 and Sw2 > Xor1, and Xor1 and Sw3 > Nand1, with Nand1 and Xor1
+    monitored. Sw4 drives nothing.
+    """
+    new_names = Names()
+    new_devices = Devices(new_names)
+    new_network = Network(new_names, new_devices)
+    new_monitors = Monitors(new_names, new_devices, new_network)
+
+    [SW1_ID, SW2_ID, SW3_ID, SW4_ID, XOR1_ID, NAND1_ID, I1,
+     I2] = new_names.lookup(["Sw1", "Sw2", "Sw3", "Sw4", "Xor1", "Nand1",
+                             "I1", "I2"])
+    for switch_id in [SW1_ID, SW2_ID, SW3_ID, SW4_ID]:
+        new_devices.make_device(switch_id, new_devices.SWITCH, 0)
+    new_devices.make_device(NAND1_ID, new_devices.NAND, 2)
+    new_devices.make_device(XOR1_ID, new_devices.XOR)
+    new_network.make_connection(SW1_ID, None, XOR1_ID, I1)
+    new_network.make_connection(SW2_ID, None, XOR1_ID, I2)
+    new_network.make_connection(XOR1_ID, None, NAND1_ID, I1)
+    new_network.make_connection(SW3_ID, None, NAND1_ID, I2)
+    new_monitors.make_monitor(NAND1_ID, None)
+    new_monitors.make_monitor(XOR1_ID, None)
+
+    return TruthTable(new_names, new_devices, new_network, new_monitors)
+
+
+def test_build_circuit(new_truth_table):
+    """Test if only the switches and gates driving the outputs are used."""
+    truth_table = new_truth_table
+    [SW1_ID, SW2_ID, SW3_ID, XOR1_ID, NAND1_ID] = \
+        truth_table.names.lookup(["Sw1", "Sw2", "Sw3", "Xor1", "Nand1"])
+
+    assert truth_table.build_circuit() == truth_table.NO_ERROR
+    assert truth_table.switches == [SW1_ID, SW2_ID, SW3_ID]
+    assert truth_table.gates == [XOR1_ID, NAND1_ID]
+
+    # A loop makes the outputs depend on the state of the circuit
+    NAND1_ID, I2 = truth_table.names.lookup(["Nand1", "I2"])
+    truth_table.devices.get_device(NAND1_ID).inputs[I2] = (NAND1_ID, None)
+    assert truth_table.build_circuit() == truth_table.NOT_COMBINATIONAL
+
+
+@pytest.mark.parametrize("chunk_bits", [0, 1, 16])
+def test_run(new_truth_table, chunk_bits):
+    """Test if the tables do not depend on the size of the chunks."""
+    truth_table = new_truth_table
+    truth_table.chunk_bits = chunk_bits
+
+    assert truth_table.run() == truth_table.NO_ERROR
+    assert list(truth_table.get_rows()) == [
+        ((0, 0, 0), (1, 0)), ((0, 0, 1), (1, 0)), ((0, 1, 0), (1, 1)),
+        ((0, 1, 1), (0, 1)), ((1, 0, 0), (1, 1)), ((1, 0, 1), (0, 1)),
+        ((1, 1, 0), (1, 0)), ((1, 1, 1), (1, 0))]
+    assert list(truth_table.get_minterms(1)) == [2, 3, 4, 5]
+    assert truth_table.get_report(count=2) == [
+        "Sw1 Sw2 Sw3 | Nand1 Xor1",
+        "  0   0   0 |     1    0",
+        "  0   0   1 |     1    0",
+        "... 6 more rows",
+        "Nand1: 6 minterms",
+        "Xor1: 4 minterms"]
+
+
+def test_cache(new_truth_table, tmp_path):
+    """Test if the tables are saved to and loaded from the cache."""
+    truth_table = new_truth_table
+    truth_table.cache_dir = str(tmp_path)
+    assert truth_table.run() == truth_table.NO_ERROR
+    tables = truth_table.tables
+    path = os.path.join(str(tmp_path),
+                        truth_table.get_circuit_hash() + ".table")
+    assert os.path.exists(path)
+
+    truth_table.tables = []
+    truth_table.chunk_bits = None  # evaluating the circuit would fail
+    assert truth_table.run() == truth_table.NO_ERROR
+    assert truth_table.tables == tables
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""Collect the toggle coverage of every output of the network.
+
+Used in the Logic Simulator project to check that a batch of regression runs
+has exercised the circuit, by recording which outputs have risen from 0 to 1
+and fallen from 1 to 0 at least once.
+
+Coverage files map every signal name to a [rose, fell] pair, and are merged
+with each other when the same or different circuits are run many times.
+
+Usage
+-----
+Show help: toggles.py -h
+Merge coverage files: toggles.py [-o <merged path>] <coverage path> ...
+
+Classes
+-------
+ToggleCoverage - records which outputs have risen and fallen.
+"""
+import getopt
+import json
+import sys
+
+from names import Names
+from devices import Devices
+
+
+class ToggleCoverage:
+
+    """Record which outputs have risen and fallen.
+
+    The network calls this class while toggle coverage is set, and does not
+    call it at all otherwise. Whenever a device is marked as changed, its
+    outputs are checked for RISING and FALLING signals, which set the bit of
+    the output in the rose and fell bitsets. Once an output has both bits
+    set it is no longer checked, and once every output of a device is
+    covered the device is not looked at again, so the cost falls as the
+    coverage grows.
+
+    Coverage merged from other runs is kept by signal name, and includes
+    signals of other circuits, so that coverage files of a whole batch of
+    runs can be built up.
+
+    Parameters
+    ----------
+    devices: instance of the devices.Devices() class.
+
+    Public methods
+    --------------
+    reset(self): Clears the coverage.
+
+    build_index(self): Assigns bits to the outputs not yet covered.
+
+    record_outputs(self, device_id): Sets the bits of the outputs of the
+                                     device which are rising or falling.
+
+    is_covered(self, position): Returns True if the output of the bit has
+                                risen and fallen.
+
+    get_bits(self): Returns the rose and fell bitsets.
+
+    merge_bits(self, rose, fell): Merges bitsets recorded by a copy of this
+                                  coverage, such as in a worker process.
+
+    merge(self, coverage): Merges coverage keyed by signal name.
+
+    get_coverage(self): Returns the coverage keyed by signal name.
+
+    load(self, path): Merges the coverage saved in a file.
+
+    save(self, path): Saves the coverage to a file.
+
+    get_report(self, count=20): Returns the coverage as a list of lines of
+                                text.
+    """
+
+    def __init__(self, devices):
+        """Initialise the coverage."""
+        self.devices = devices
+        self.RISING = devices.RISING
+        self.FALLING = devices.FALLING
+        self.reset()
+
+    def reset(self):
+        """Clear the coverage."""
+        # outputs lists the (device_id, output_id) output of each bit, and
+        # uncovered_outputs stores {device_id: [(position, outputs
+        # dictionary, output_id) for each output not yet covered]}
+        self.outputs = []
+        self.positions = {}
+        self.uncovered_outputs = {}
+        self.edit_count = None
+
+        # One bit per output, set once the output has risen or fallen
+        self.rose = bytearray()
+        self.fell = bytearray()
+
+        # {signal name: [rose, fell]} merged from other runs
+        self.merged_coverage = {}
+
+        self.build_index()
+
+    def build_index(self):
+        """Assign bits to the outputs not yet covered.
+
+        This is called whenever devices or outputs may have been added.
+        """
+        if self.edit_count == self.devices.edit_count:
+            return
+        for device in self.devices.devices_list:
+            for output_id in device.outputs:
+                output = (device.device_id, output_id)
+                if output in self.positions:
+                    continue
+                position = len(self.outputs)
+                self.positions[output] = position
+                self.outputs.append(output)
+                if position % 8 == 0:
+                    self.rose.append(0)
+                    self.fell.append(0)
+                uncovered_outputs = self.uncovered_outputs.setdefault(
+                    device.device_id, [])
+                uncovered_outputs.append((position, device.outputs,
+                                          output_id))
+        self.edit_count = self.devices.edit_count
+
+    def record_outputs(self, device_id):
+        """Set the bits of the outputs of the device which are rising or
+        falling."""
+        uncovered_outputs = self.uncovered_outputs.get(device_id)
+        if not uncovered_outputs:
+            return
+        covered = False
+        for position, outputs, output_id in uncovered_outputs:
+            signal = outputs[output_id]
+            if signal == self.RISING:
+                self.rose[position >> 3] |= 1 << (position & 7)
+            elif signal == self.FALLING:
+                self.fell[position >> 3] |= 1 << (position & 7)
+            else:
+                continue
+            covered = covered or self.is_covered(position)
+        if covered:  # stop checking the covered outputs
+            self.uncovered_outputs[device_id] = [
+                uncovered_output for uncovered_output in uncovered_outputs
+                if not self.is_covered(uncovered_output[0])]
+
+    def is_covered(self, position):
+        """Return True if the output of the bit has risen and fallen."""
+        return bool(self.rose[position >> 3] & self.fell[position >> 3] &
+                    1 << (position & 7))
+
+    def get_bits(self):
+        """Return the rose and fell bitsets as bytes."""
+        return (bytes(self.rose), bytes(self.fell))
+
+    def merge_bits(self, rose, fell):
+        """Merge bitsets recorded by a copy of this coverage.
+
+        The copy must have assigned the same bits, which is the case in a
+        worker process started after build_index().
+        """
+        for index, (rose_byte, fell_byte) in enumerate(zip(rose, fell)):
+            self.rose[index] |= rose_byte
+            self.fell[index] |= fell_byte
+        for device_id, uncovered_outputs in self.uncovered_outputs.items():
+            self.uncovered_outputs[device_id] = [
+                uncovered_output for uncovered_output in uncovered_outputs
+                if not self.is_covered(uncovered_output[0])]
+
+    def merge(self, coverage):
+        """Merge coverage keyed by signal name.
+
+        coverage maps signal names to [rose, fell] pairs, as returned by
+        get_coverage().
+        """
+        for signal_name, (rose, fell) in coverage.items():
+            merged = self.merged_coverage.setdefault(signal_name,
+                                                     [False, False])
+            merged[0] = merged[0] or bool(rose)
+            merged[1] = merged[1] or bool(fell)
+
+    def get_coverage(self):
+        """Return the coverage keyed by signal name.
+
+        The returned dictionary maps the name of every output, and every
+        signal merged from other runs, to a [rose, fell] pair.
+        """
+        coverage = {}
+        for signal_name, (rose, fell) in self.merged_coverage.items():
+            coverage[signal_name] = [rose, fell]
+        for position, (device_id, output_id) in enumerate(self.outputs):
+            signal_name = self.devices.get_signal_name(device_id, output_id)
+            bit = 1 << (position & 7)
+            merged = coverage.setdefault(signal_name, [False, False])
+            merged[0] = merged[0] or bool(self.rose[position >> 3] & bit)
+            merged[1] = merged[1] or bool(self.fell[position >> 3] & bit)
+        return coverage
+
+    def load(self, path):
+        """Merge the coverage saved in the file at path."""
+        with open(path) as coverage_file:
+            self.merge(json.load(coverage_file))
+
+    def save(self, path):
+        """Save the coverage to the file at path."""
+        with open(path, "w") as coverage_file:
+            json.dump(self.get_coverage(), coverage_file, indent=1,
+                      sort_keys=True)
+
+    def get_report(self, count=20):
+        """Return the coverage as a list of lines of text.
+
+        At most count signals which are not covered are listed.
+        """
+        coverage = self.get_coverage()
+        covered = sum(1 for rose, fell in coverage.values() if rose and fell)
+        percentage = 100 * covered / max(len(coverage), 1)
+        lines = ["".join(["Toggle coverage: ", str(covered), " of ",
+                          str(len(coverage)), " outputs (",
+                          format(percentage, ".1f"), "%)"])]
+        uncovered = [signal_name for signal_name in sorted(coverage)
+                     if not all(coverage[signal_name])]
+        if uncovered:
+            lines.append("Outputs not toggled both ways:")
+        for signal_name in uncovered[:count]:
+            rose, fell = coverage[signal_name]
+            if rose:
+                missing = "never fell"
+            elif fell:
+                missing = "never rose"
+            else:
+                missing = "never toggled"
+            lines.append("".join(["  ", signal_name, ": ", missing]))
+        if len(uncovered) > count:
+            lines.append("".join(["  and ", str(len(uncovered) - count),
+                                  " more"]))
+        return lines
+
+
+def main(arg_list):
+    """Parse the command line options and arguments specified in arg_list.
+
+    Merge the coverage files, print the report and save the merged coverage
+    if an output path is given.
+    """
+    usage_message = ("Usage:\n"
+                     "Show help: toggles.py -h\n"
+                     "Merge coverage files: toggles.py [-o <merged path>] "
+                     "<coverage path> ...")
+    try:
+        options, arguments = getopt.getopt(arg_list, "ho:")
+    except getopt.GetoptError:
+        print("Error: invalid command line arguments\n")
+        print(usage_message)
+        sys.exit()
+
+    merged_path = None
+    for option, value in options:
+        if option == "-h":  # print the usage message
+            print(usage_message)
+            sys.exit()
+        elif option == "-o":
+            merged_path = value
+    if not arguments:
+        print("Error: at least one coverage file required\n")
+        print(usage_message)
+        sys.exit()
+
+    # Coverage of an empty circuit only holds the merged coverage
+    toggle_coverage = ToggleCoverage(Devices(Names()))
+    for path in arguments:
+        toggle_coverage.load(path)
+    for line in toggle_coverage.get_report():
+        print(line)
+    if merged_path is not None:
+        toggle_coverage.save(merged_path)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,199 @@
+"""Hold the signal trace of a monitor in segments shared between branches.
+
+Used in the Logic Simulator project so that forked simulations share the
+signal levels recorded before they were forked, and each only stores the
+levels it records itself. A level held for many cycles is stored once, with
+the number of cycles.
+
+Classes
+-------
+Run - a segment of one signal level repeated for a number of cycles.
+Trace - a sequence of signal levels with a shared prefix.
+"""
+import bisect
+import collections.abc
+import itertools
+
+
+class Run(collections.abc.Sequence):
+
+    """A segment of one signal level repeated for a number of cycles.
+
+    Parameters
+    ----------
+    signal: the signal level.
+    cycles: number of cycles the level is held for.
+    """
+
+    def __init__(self, signal, cycles):
+        """Initialise the run."""
+        self.signal = signal
+        self.cycles = cycles
+
+    def __len__(self):
+        """Return the number of cycles."""
+        return self.cycles
+
+    def __iter__(self):
+        """Iterate over the signal levels."""
+        return itertools.repeat(self.signal, self.cycles)
+
+    def __getitem__(self, index):
+        """Return the level at the index, or a list of a slice of levels."""
+        if isinstance(index, slice):
+            return [self.signal] * len(range(*index.indices(self.cycles)))
+        if not -self.cycles <= index < self.cycles:
+            raise IndexError("run index out of range")
+        return self.signal
+
+
+class Trace(collections.abc.Sequence):
+
+    """A sequence of signal levels with a shared prefix.
+
+    The levels are held in segments, which are lists or runs that are never
+    written to again and may be shared with other traces, followed by a
+    suffix list of the levels recorded since the trace was last forked or
+    last had a run appended. A trace compares equal to a list or trace of
+    the same levels.
+
+    Parameters
+    ----------
+    signals: iterable of the first signal levels.
+
+    Public methods
+    --------------
+    append(self, signal): Appends a signal level.
+
+    extend(self, signals): Appends the signal levels.
+
+    append_run(self, signal, cycles): Appends the signal level for the
+                                      given number of cycles.
+
+    fork(self): Returns a branch of the trace that shares its levels.
+    """
+
+    def __init__(self, signals=()):
+        """Initialise the trace with the given levels."""
+        # segments is a list of the shared lists and runs, and offsets holds
+        # the index of the first level of each segment. Both lists are
+        # shared with the last fork until one of the traces adds a segment.
+        self.segments = []
+        self.offsets = []
+        self.shared = False
+        self.prefix_length = 0
+        self.suffix = list(signals)
+
+    def __len__(self):
+        """Return the number of signal levels."""
+        return self.prefix_length + len(self.suffix)
+
+    def __iter__(self):
+        """Iterate over the signal levels."""
+        return itertools.chain(*self.segments, self.suffix)
+
+    def __getitem__(self, index):
+        """Return the level at the index, or a list of a slice of levels."""
+        prefix_length = self.prefix_length
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                return list(self)[index]
+            stop = max(start, stop)
+            if start >= prefix_length:
+                return self.suffix[start - prefix_length:
+                                   stop - prefix_length]
+
+            # Slice the segments from the one holding the start
+            signals = []
+            first_segment = bisect.bisect_right(self.offsets, start) - 1
+            for segment, offset in zip(self.segments[first_segment:],
+                                       self.offsets[first_segment:]):
+                if offset >= stop:
+                    break
+                signals.extend(segment[max(start - offset, 0):
+                                       stop - offset])
+            signals.extend(self.suffix[:max(stop - prefix_length, 0)])
+            return signals
+        if index < 0:
+            index += len(self)
+        if index >= prefix_length:
+            return self.suffix[index - prefix_length]
+        if index < 0:
+            raise IndexError("trace index out of range")
+        segment = bisect.bisect_right(self.offsets, index) - 1
+        return self.segments[segment][index - self.offsets[segment]]
+
+    def __eq__(self, other):
+        """Return True if the other list or trace has the same levels."""
+        if not isinstance(other, (list, Trace)):
+            return NotImplemented
+        return len(self) == len(other) and \
+            all(signal == other_signal
+                for signal, other_signal in zip(self, other))
+
+    __hash__ = None
+
+    def __repr__(self):
+        """Return the levels as a list would show them."""
+        return repr(list(self))
+
+    def append(self, signal):
+        """Append a signal level."""
+        self.suffix.append(signal)
+
+    def extend(self, signals):
+        """Append the signal levels."""
+        self.suffix.extend(signals)
+
+    def append_run(self, signal, cycles):
+        """Append the signal level for the given number of cycles.
+
+        The level is stored once, so this takes the same time for any
+        number of cycles. A run following a run of the same level is merged
+        with it, and a single cycle is appended to the suffix.
+        """
+        if cycles <= 1:
+            self.suffix.extend(itertools.repeat(signal, cycles))
+            return
+        if self.suffix:
+            self.add_segment(self.suffix)
+            self.suffix = []
+        last_run = self.segments[-1] if self.segments else None
+        if isinstance(last_run, Run) and last_run.signal == signal:
+            # Runs are shared, so the merged run replaces the last one
+            self.copy_segments()
+            self.segments[-1] = Run(signal, last_run.cycles + cycles)
+            self.prefix_length += cycles
+        else:
+            self.add_segment(Run(signal, cycles))
+
+    def add_segment(self, segment):
+        """Add a list or run after the segments."""
+        self.copy_segments()
+        self.offsets.append(self.prefix_length)
+        self.segments.append(segment)
+        self.prefix_length += len(segment)
+
+    def copy_segments(self):
+        """Copy the segments and offsets if they are shared with a fork."""
+        if self.shared:
+            self.segments = list(self.segments)
+            self.offsets = list(self.offsets)
+            self.shared = False
+
+    def fork(self):
+        """Return a branch of the trace that shares its levels.
+
+        The levels recorded so far become a segment shared by both traces,
+        so neither copies them, and each appends to its own suffix.
+        """
+        if self.suffix:
+            self.add_segment(self.suffix)
+            self.suffix = []
+        forked_trace = Trace()
+        forked_trace.segments = self.segments
+        forked_trace.offsets = self.offsets
+        forked_trace.prefix_length = self.prefix_length
+        self.shared = forked_trace.shared = True
+        return forked_trace
@@ -0,0 +1,445 @@
+#!/usr/bin/env python3
+"""Extract the truth tables of the combinational logic driven by switches.
+
+Used in the Logic Simulator project to tabulate every monitored output of a
+circuit against every combination of its switches, in one pass instead of
+one run per combination. Only the logic gates and switches the monitored
+outputs depend on are evaluated, so the rest of the circuit may hold any
+devices.
+
+Many combinations are evaluated at once by packing them into the bits, or
+lanes, of Python integers: each switch is given the integer whose lanes
+hold its level in every combination of a chunk, so one bitwise operation
+evaluates a gate for the whole chunk.
+
+Rows of a table are numbered with the first switch as the most significant
+bit. Tables are cached in files named by a hash of the circuit.
+
+Usage
+-----
+Show help: truthtable.py -h
+Print the truth table: truthtable.py [-m] [-b <chunk bits>]
+                       [-c <cache directory>] <file path>
+
+Classes
+-------
+TruthTable - extracts the truth tables of the monitored outputs.
+"""
+import getopt
+import hashlib
+import json
+import os
+import sys
+
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+from scanner import Scanner
+from parse import Parser
+
+
+class TruthTable:
+
+    """Extract the truth tables of the monitored outputs.
+
+    The monitored outputs and the gates they depend on are compiled into
+    one Python function, which evaluates the gates in topological order
+    with bitwise operations on integers holding one lane per combination
+    of the switches. Each chunk of 2 ** chunk_bits combinations is
+    evaluated with one call, and the tables are built up as bitsets holding
+    one bit per row.
+
+    Parameters
+    ----------
+    names: instance of the names.Names() class.
+    devices: instance of the devices.Devices() class.
+    network: instance of the network.Network() class.
+    monitors: instance of the monitors.Monitors() class.
+    chunk_bits: base 2 logarithm of the number of combinations evaluated
+                at once, which is at least 8.
+    cache_dir: directory the tables are cached in, or None.
+
+    Public methods
+    --------------
+    build_circuit(self): Finds the switches and gates the monitored outputs
+                         depend on and orders the gates.
+
+    get_circuit_hash(self): Returns a hash of the switches, gates and
+                            monitored outputs.
+
+    compile_circuit(self): Returns the function evaluating the monitored
+                           outputs.
+
+    iterate_chunks(self): Evaluates the combinations chunk by chunk and
+                          yields the levels of the monitored outputs.
+
+    run(self): Builds, or loads from the cache, the truth tables.
+
+    get_level(self, output_number, row): Returns the level of the output in
+                                         the row.
+
+    get_rows(self): Yields the levels of the switches and outputs in every
+                    row.
+
+    get_minterms(self, output_number): Yields the rows in which the output
+                                       is HIGH.
+
+    load(self, path): Loads the tables saved in a file.
+
+    save(self, path): Saves the tables to a file.
+
+    get_report(self, count=16): Returns the first rows of the tables as a
+                                list of lines of text.
+    """
+
+    def __init__(self, names, devices, network, monitors, chunk_bits=16,
+                 cache_dir=None):
+        """Initialise the truth tables."""
+        self.names = names
+        self.devices = devices
+        self.network = network
+        self.monitors = monitors
+        self.chunk_bits = chunk_bits
+        self.cache_dir = cache_dir
+
+        [self.NO_ERROR, self.NO_MONITORS, self.NOT_COMBINATIONAL,
+         self.TOO_MANY_SWITCHES] = self.names.unique_error_codes(4)
+
+        self.max_switches = 24
+
+        # Set by build_circuit(): the switch IDs in the order of the
+        # devices, the gate IDs in topological order and the monitored
+        # (device_id, output_id) outputs
+        self.switches = []
+        self.gates = []
+        self.outputs = []
+
+        # One bitset per monitored output, set by run(): bit r of byte
+        # r // 8 holds the level of the output in row r
+        self.tables = []
+
+    def build_circuit(self):
+        """Find the switches and gates the monitored outputs depend on.
+
+        Return NO_ERROR, NO_MONITORS if no output is monitored,
+        network.INPUTS_NOT_CONNECTED if an input is unconnected,
+        NOT_COMBINATIONAL if the outputs depend on devices other than
+        switches and gates or on a loop, or TOO_MANY_SWITCHES.
+        """
+        devices = self.devices
+        self.outputs = list(self.monitors.monitors_dictionary)
+        if not self.outputs:
+            return self.NO_MONITORS
+
+        # Order the gates depth-first from the monitored outputs, each gate
+        # after the gates driving it
+        switches = set()
+        self.gates = []
+        visiting = set()
+        visited = set()
+        for device_id, output_id in self.outputs:
+            if device_id in visited:
+                continue
+            stack = [(device_id, False)]
+            while stack:
+                device_id, inputs_done = stack.pop()
+                if inputs_done:
+                    visiting.discard(device_id)
+                    visited.add(device_id)
+                    self.gates.append(device_id)
+                    continue
+                if device_id in visited:
+                    continue
+                if device_id in visiting:  # reached around a loop
+                    return self.NOT_COMBINATIONAL
+                device = devices.get_device(device_id)
+                if device.device_kind == devices.SWITCH:
+                    switches.add(device_id)
+                    visited.add(device_id)
+                    continue
+                if device.device_kind not in devices.gate_types:
+                    return self.NOT_COMBINATIONAL
+                if None in device.inputs.values():
+                    return self.network.INPUTS_NOT_CONNECTED
+                visiting.add(device_id)
+                stack.append((device_id, True))
+                for connected_output in device.inputs.values():
+                    stack.append((connected_output[0], False))
+
+        self.switches = [device.device_id for device in devices.devices_list
+                         if device.device_id in switches]
+        if len(self.switches) > self.max_switches:
+            return self.TOO_MANY_SWITCHES
+        return self.NO_ERROR
+
+    def get_circuit_hash(self):
+        """Return a hash of the switches, gates and monitored outputs."""
+        get_name_string = self.names.get_name_string
+        description = [[get_name_string(device_id)
+                        for device_id in self.switches]]
+        for device_id in self.gates:
+            device = self.devices.get_device(device_id)
+            description.append(
+                [get_name_string(device_id),
+                 get_name_string(device.device_kind)] +
+                [self.devices.get_signal_name(*connected_output)
+                 for connected_output in device.inputs.values()])
+        description.append([self.devices.get_signal_name(*output)
+                            for output in self.outputs])
+        return hashlib.sha256(
+            json.dumps(description).encode()).hexdigest()
+
+    def compile_circuit(self):
+        """Return the function evaluating the monitored outputs.
+
+        The function is called as function(levels, M), where levels holds
+        the lanes of each switch and M has every lane set, and returns the
+        lanes of each monitored output.
+        """
+        devices = self.devices
+        variables = {}
+        for device_id in self.switches + self.gates:
+            variables[device_id] = "s" + str(len(variables))
+
+        lines = ["def evaluate(levels, M):"]
+        if self.switches:
+            lines.append("    (" + "".join(
+                variables[device_id] + ", " for device_id in self.switches) +
+                ") = levels")
+        operators = {devices.AND: " & ", devices.NAND: " & ",
+                     devices.OR: " | ", devices.NOR: " | ",
+                     devices.XOR: " ^ "}
+        for device_id in self.gates:
+            device = devices.get_device(device_id)
+            expression = operators[device.device_kind].join(
+                variables[connected_output[0]]
+                for connected_output in device.inputs.values())
+            if device.device_kind in [devices.NAND, devices.NOR]:
+                expression = "(" + expression + ") ^ M"
+            lines.append("    " + variables[device_id] + " = " + expression)
+        lines.append("    return (" + "".join(
+            variables[device_id] + ", "
+            for device_id, output_id in self.outputs) + ")")
+
+        namespace = {}
+        exec("\n".join(lines), namespace)
+        return namespace["evaluate"]
+
+    def iterate_chunks(self):
+        """Evaluate the combinations chunk by chunk.
+
+        build_circuit() must have returned NO_ERROR. Yield the first row of
+        each chunk, its number of rows and the lanes of each monitored
+        output, in which lane n holds the level in row first + n.
+        """
+        evaluate = self.compile_circuit()
+        count = len(self.switches)
+        bits = min(count, max(self.chunk_bits, 3))  # whole bytes of rows
+        lanes = 1 << bits
+        full = (1 << lanes) - 1
+
+        # The lanes of each row bit within a chunk alternate between runs
+        # of 0 and 1 as long as the place value of the bit
+        patterns = []
+        for bit in range(bits):
+            run = 1 << bit
+            period = ((1 << run) - 1) << run
+            patterns.append(period * (full // ((1 << 2 * run) - 1)))
+
+        for chunk in range(1 << (count - bits)):
+            levels = []
+            for number in range(count):
+                bit = count - 1 - number
+                if bit < bits:
+                    levels.append(patterns[bit])
+                elif chunk >> (bit - bits) & 1:
+                    levels.append(full)
+                else:
+                    levels.append(0)
+            yield chunk * lanes, lanes, evaluate(levels, full)
+
+    def run(self):
+        """Build, or load from the cache, the truth tables.
+
+        Return NO_ERROR or the error code of build_circuit().
+        """
+        error_code = self.build_circuit()
+        if error_code != self.NO_ERROR:
+            return error_code
+        path = None
+        if self.cache_dir is not None:
+            path = os.path.join(self.cache_dir,
+                                self.get_circuit_hash() + ".table")
+            if os.path.exists(path):
+                self.load(path)
+                return self.NO_ERROR
+
+        self.tables = [bytearray() for output in self.outputs]
+        for first, lanes, levels in self.iterate_chunks():
+            for table, lanes_level in zip(self.tables, levels):
+                table.extend(lanes_level.to_bytes((lanes + 7) // 8,
+                                                  "little"))
+        if path is not None:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self.save(path)
+        return self.NO_ERROR
+
+    def get_level(self, output_number, row):
+        """Return the level, 0 or 1, of the output in the row."""
+        return self.tables[output_number][row >> 3] >> (row & 7) & 1
+
+    def get_rows(self):
+        """Yield the levels of the switches and outputs in every row.
+
+        Each row is yielded as a (switch levels, output levels) pair of
+        tuples.
+        """
+        count = len(self.switches)
+        for row in range(1 << count):
+            yield (tuple(row >> (count - 1 - number) & 1
+                         for number in range(count)),
+                   tuple(table[row >> 3] >> (row & 7) & 1
+                         for table in self.tables))
+
+    def get_minterms(self, output_number):
+        """Yield the rows in which the output is HIGH, in order."""
+        rows = 1 << len(self.switches)
+        for index, byte in enumerate(self.tables[output_number]):
+            if not byte:
+                continue
+            for bit in range(8):
+                if byte >> bit & 1 and index * 8 + bit < rows:
+                    yield index * 8 + bit
+
+    def load(self, path):
+        """Load the tables saved in the file at path.
+
+        The file holds a line of JSON naming the switches and outputs,
+        followed by the bitset of each output.
+        """
+        with open(path, "rb") as table_file:
+            header = json.loads(table_file.readline())
+            size = max(1, (1 << len(header["switches"])) // 8)
+            self.tables = [bytearray(table_file.read(size))
+                           for output in header["outputs"]]
+
+    def save(self, path):
+        """Save the tables to the file at path."""
+        header = {"switches": [self.names.get_name_string(device_id)
+                               for device_id in self.switches],
+                  "outputs": [self.devices.get_signal_name(*output)
+                              for output in self.outputs]}
+        with open(path, "wb") as table_file:
+            table_file.write(json.dumps(header).encode() + b"\n")
+            for table in self.tables:
+                table_file.write(table)
+
+    def get_report(self, count=16):
+        """Return the first rows of the tables as a list of lines of text.
+
+        At most count rows are listed, followed by the number of minterms
+        of each output.
+        """
+        switch_names = [self.names.get_name_string(device_id)
+                        for device_id in self.switches]
+        output_names = [self.devices.get_signal_name(*output)
+                        for output in self.outputs]
+        lines = [" ".join(switch_names + ["|"] + output_names)]
+        widths = [len(name) for name in switch_names + ["|"] + output_names]
+        for row, (switch_levels, output_levels) in enumerate(
+                self.get_rows()):
+            if row == count:
+                lines.append("".join(["... ", str(2 ** len(self.switches) -
+                                                  count), " more rows"]))
+                break
+            levels = [str(level) for level in switch_levels]
+            levels += ["|"] + [str(level) for level in output_levels]
+            lines.append(" ".join(level.rjust(width)
+                                  for level, width in zip(levels, widths)))
+        for output_number, output_name in enumerate(output_names):
+            minterms = sum(1 for row in self.get_minterms(output_number))
+            lines.append("".join([output_name, ": ", str(minterms),
+                                  " minterms"]))
+        return lines
+
+
+def main(arg_list):
+    """Parse the command line options and arguments specified in arg_list.
+
+    Print every row of the truth table of the circuit in the definition
+    file, or with -m the minterms of each monitored output.
+    """
+    usage_message = ("Usage:\n"
+                     "Show help: truthtable.py -h\n"
+                     "Print the truth table: truthtable.py [-m] "
+                     "[-b <chunk bits>] [-c <cache directory>] <file path>")
+    try:
+        options, arguments = getopt.getopt(arg_list, "hmb:c:")
+    except getopt.GetoptError:
+        print("Error: invalid command line arguments\n")
+        print(usage_message)
+        sys.exit()
+
+    minterms = False
+    chunk_bits = 16
+    cache_dir = None
+    for option, value in options:
+        if option == "-h":  # print the usage message
+            print(usage_message)
+            sys.exit()
+        elif option == "-m":
+            minterms = True
+        elif option == "-b":
+            if not value.isdigit():
+                print("Error: the chunk bits must be a number\n")
+                print(usage_message)
+                sys.exit()
+            chunk_bits = int(value)
+        elif option == "-c":
+            cache_dir = value
+    if len(arguments) != 1:
+        print("Error: one file path required\n")
+        print(usage_message)
+        sys.exit()
+
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    monitors = Monitors(names, devices, network)
+    parser = Parser(names, devices, network, monitors,
+                    Scanner(arguments[0], names))
+    if not parser.parse_network():
+        print("Error: the definition file could not be parsed")
+        sys.exit(1)
+
+    truth_table = TruthTable(names, devices, network, monitors, chunk_bits,
+                             cache_dir)
+    error_code = truth_table.run()
+    if error_code == truth_table.NO_MONITORS:
+        print("Error: the circuit has no monitored outputs")
+    elif error_code == network.INPUTS_NOT_CONNECTED:
+        print("Error: the circuit has unconnected inputs")
+    elif error_code == truth_table.NOT_COMBINATIONAL:
+        print("Error: the monitored outputs do not depend on switches and "
+              "gates alone")
+    elif error_code == truth_table.TOO_MANY_SWITCHES:
+        print("".join(["Error: the monitored outputs depend on more than ",
+                       str(truth_table.max_switches), " switches"]))
+    elif minterms:
+        for output_number, output in enumerate(truth_table.outputs):
+            print("".join([devices.get_signal_name(*output), ": "]) +
+                  ", ".join(str(row) for row in
+                            truth_table.get_minterms(output_number)))
+        return
+    else:
+        print(truth_table.get_report(count=0)[0])
+        for switch_levels, output_levels in truth_table.get_rows():
+            print(" ".join([str(level) for level in switch_levels] + ["|"] +
+                           [str(level) for level in output_levels]))
+        return
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
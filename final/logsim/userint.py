@@ -7,6 +7,8 @@ Classes:
 --------
 UserInterface - reads and parses user commands.
 """
+from simulator import Simulator
+from stimulus import Stimulus
 
 
 class UserInterface:
@@ -15,8 +17,8 @@ class UserInterface:
 
     This class allows the user to enter certain commands.
     These commands enable the user to run or continue the simulation for a
-    number of cycles, set switches, add or zap monitors, show help, or quit
-    the program.
+    number of cycles, set switches, apply a stimulus file of switch events,
+    add or zap monitors, show help, or quit the program.
 
     Parameters
     -----------
@@ -58,6 +60,24 @@ class UserInterface:
 
     zap_command(self): Removes the specified monitor.
 
+    period_command(self): Turns periodic steady-state detection on or off.
+
+    stats_command(self): Turns profiling on or off, or prints the profiling
+                         statistics.
+
+    activity_command(self): Turns activity statistics on or off, or prints
+                            the most active outputs.
+
+    coverage_command(self): Turns toggle coverage on or off, or prints the
+                            coverage.
+
+    input_command(self): Sets or removes the stimulus file whose switch
+                         events are applied during runs.
+
+    trigger_command(self): Sets or removes the trigger of the monitors.
+
+    breakpoint_command(self): Adds a breakpoint or removes all breakpoints.
+
     run_network(self, cycles): Runs the network for the specified number of
                                simulation cycles.
 
@@ -73,6 +93,9 @@ class UserInterface:
         self.monitors = monitors
         self.network = network
 
+        # Runs the network, skipping cycles in which no signal can change
+        self.simulator = Simulator(names, devices, network, monitors)
+
         self.cycles_completed = 0  # number of simulation cycles completed
 
         self.character = ""  # current character
@@ -88,12 +111,28 @@ class UserInterface:
         while command != "q":
             if command == "h":
                 self.help_command()
+            elif command == "s" and \
+                    self.line[self.cursor:self.cursor + 4] == "tats":
+                self.cursor += 4
+                self.stats_command()
             elif command == "s":
                 self.switch_command()
             elif command == "m":
                 self.monitor_command()
             elif command == "z":
                 self.zap_command()
+            elif command == "p":
+                self.period_command()
+            elif command == "a":
+                self.activity_command()
+            elif command == "v":
+                self.coverage_command()
+            elif command == "i":
+                self.input_command()
+            elif command == "t":
+                self.trigger_command()
+            elif command == "b":
+                self.breakpoint_command()
             elif command == "r":
                 self.run_command()
             elif command == "c":
@@ -207,6 +246,24 @@ class UserInterface:
         print("s X N     - set switch X to N (0 or 1)")
         print("m X       - set a monitor on signal X")
         print("z X       - zap the monitor on signal X")
+        print("p N       - turn periodic steady-state detection on (1) or "
+              "off (0)")
+        print("stats N   - turn profiling on (1) or off (0)")
+        print("stats     - print the profiling statistics")
+        print("a N       - turn activity statistics on (1) or off (0)")
+        print("a         - print the most active outputs")
+        print("v N       - turn toggle coverage on (1) or off (0)")
+        print("v         - print the outputs not toggled both ways")
+        print("i F       - apply the switch events in stimulus file F")
+        print("i         - stop applying switch events")
+        print("t N M C   - only keep the N cycles before and M cycles after "
+              "each cycle")
+        print("            meeting condition C, such as 'X rises and Y high'")
+        print("t         - keep every cycle again")
+        print("b C       - stop runs at the cycle meeting condition C, such "
+              "as 'D1.Q high'")
+        print("            or 'cycle 100'")
+        print("b         - remove all breakpoints")
         print("h         - help (this command)")
         print("q         - quit the program")
 
@@ -243,18 +300,142 @@ class UserInterface:
             else:
                 print("Error! Could not zap monitor.")
 
+    def period_command(self):
+        """Turn periodic steady-state detection on or off."""
+        period_detection = self.read_number(0, 1)
+        if period_detection is not None:
+            self.simulator.set_period_detection(bool(period_detection))
+            if period_detection:
+                print("Periodic steady-state detection on.")
+            else:
+                print("Periodic steady-state detection off.")
+
+    def stats_command(self):
+        """Turn profiling on or off, or print the profiling statistics."""
+        if self.line[self.cursor:].strip():  # a number follows the command
+            profiling = self.read_number(0, 1)
+            if profiling is not None:
+                self.network.set_profiling(bool(profiling))
+                if profiling:
+                    print("Profiling on.")
+                else:
+                    print("Profiling off.")
+        elif self.network.profiler is None:
+            print("Error! Profiling is off. Enter 'stats 1' to turn it on.")
+        else:
+            for line in self.network.profiler.get_report():
+                print(line)
+
+    def activity_command(self):
+        """Turn activity statistics on or off, or print the most active
+        outputs."""
+        if self.line[self.cursor:].strip():  # a number follows the command
+            activity = self.read_number(0, 1)
+            if activity is not None:
+                self.network.set_activity(bool(activity))
+                if activity:
+                    print("Activity statistics on.")
+                else:
+                    print("Activity statistics off.")
+        elif self.network.activity is None:
+            print("Error! Activity statistics are off. Enter 'a 1' to turn "
+                  "them on.")
+        else:
+            for line in self.network.activity.get_report():
+                print(line)
+
+    def coverage_command(self):
+        """Turn toggle coverage on or off, or print the coverage."""
+        if self.line[self.cursor:].strip():  # a number follows the command
+            coverage = self.read_number(0, 1)
+            if coverage is not None:
+                self.network.set_coverage(bool(coverage))
+                if coverage:
+                    print("Toggle coverage on.")
+                else:
+                    print("Toggle coverage off.")
+        elif self.network.coverage is None:
+            print("Error! Toggle coverage is off. Enter 'v 1' to turn it "
+                  "on.")
+        else:
+            for line in self.network.coverage.get_report():
+                print(line)
+
+    def input_command(self):
+        """Set or remove the stimulus file applied during runs.
+
+        The events of the file are counted from the cold start-up of the
+        next run.
+        """
+        path = self.line[self.cursor:].strip()
+        if not path:
+            self.simulator.set_stimulus(None)
+            print("Stimulus removed.")
+            return
+        try:
+            stimulus = Stimulus(self.names, self.devices, path)
+        except OSError:
+            print("Error! Could not open stimulus file.")
+            return
+        self.simulator.set_stimulus(stimulus)
+        print("Stimulus set.")
+
+    def trigger_command(self):
+        """Set or remove the trigger of the monitors."""
+        if not self.line[self.cursor:].strip():
+            self.monitors.set_trigger(None)
+            print("Trigger removed.")
+            return
+        pre_cycles = self.read_number(0, None)
+        if pre_cycles is None:
+            return
+        post_cycles = self.read_number(0, None)
+        if post_cycles is None:
+            return
+        error_code = self.monitors.set_trigger(self.line[self.cursor:],
+                                               pre_cycles, post_cycles)
+        if error_code == self.monitors.NO_ERROR:
+            print("Trigger set.")
+        elif error_code == self.monitors.NOT_MONITORED:
+            print("Error! Trigger signals must be monitored.")
+        else:
+            print("Error! Invalid trigger condition.")
+
+    def breakpoint_command(self):
+        """Add a breakpoint or remove all breakpoints."""
+        expression = self.line[self.cursor:].strip()
+        if not expression:
+            self.simulator.clear_breakpoints()
+            print("Breakpoints removed.")
+        elif self.simulator.add_breakpoint(expression):
+            print("Breakpoint set.")
+        else:
+            print("Error! Invalid breakpoint condition.")
+
     def run_network(self, cycles):
         """Run the network for the specified number of simulation cycles.
 
         Return True if successful.
         """
-        for _ in range(cycles):
-            if self.network.execute_network():
-                self.monitors.record_signals()
-            else:
-                print("Error! Network oscillating.")
-                return False
+        error_code = self.simulator.run_network(cycles)
+        stimulus = self.simulator.stimulus
+        if stimulus is not None and error_code == stimulus.error_code and \
+                error_code != stimulus.NO_ERROR:
+            print("".join(["Error! Invalid stimulus on line ",
+                           str(stimulus.line_number), "."]))
+            return False
+        if error_code != self.network.NO_ERROR:
+            print("Error! Network oscillating.")
+            return False
+        if self.simulator.period is not None:
+            print("".join(["Periodic after ",
+                           str(self.simulator.transient_cycles),
+                           " cycles with period ",
+                           str(self.simulator.period)]))
         self.monitors.display_signals()
+        if self.simulator.breakpoint_cycle is not None:
+            print("".join(["Stopped at breakpoint after cycle ",
+                           str(self.simulator.breakpoint_cycle), "."]))
         return True
 
     def run_command(self):
@@ -263,11 +444,10 @@ class UserInterface:
         cycles = self.read_number(0, None)
 
         if cycles is not None:  # if the number of cycles provided is valid
-            self.monitors.reset_monitors()
             print("".join(["Running for ", str(cycles), " cycles"]))
-            self.devices.cold_startup()
+            self.simulator.reset()
             if self.run_network(cycles):
-                self.cycles_completed += cycles
+                self.cycles_completed = self.simulator.cycles_completed
 
     def continue_command(self):
         """Continue a previously run simulation."""
@@ -276,6 +456,6 @@ class UserInterface:
             if self.cycles_completed == 0:
                 print("Error! Nothing to continue. Run first.")
             elif self.run_network(cycles):
-                self.cycles_completed += cycles
+                self.cycles_completed = self.simulator.cycles_completed
                 print(" ".join(["Continuing for", str(cycles), "cycles.",
                                 "Total:", str(self.cycles_completed)]))